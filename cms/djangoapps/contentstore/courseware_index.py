@@ -4,9 +4,11 @@ from __future__ import absolute_import
 import logging
 import re
 from abc import ABCMeta, abstractmethod
+from collections import namedtuple
 from datetime import timedelta
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.urlresolvers import resolve
 from django.utils.translation import ugettext as _
 from django.utils.translation import ugettext_lazy
@@ -20,6 +22,7 @@ from openedx.core.lib.courses import course_image_url
 from xmodule.annotator_mixin import html_to_text
 from xmodule.library_tools import normalize_key_for_search
 from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.exceptions import ItemNotFoundError
 
 # REINDEX_AGE is the default amount of time that we look back for changes
 # that might have happened. If we are provided with a time at which the
@@ -30,6 +33,25 @@ REINDEX_AGE = timedelta(0, 60)  # 60 seconds
 
 log = logging.getLogger('edx.modulestore')
 
+# The published content that changed since a course or library was last indexed:
+#   version - the version of the published structure that the changes lead to
+#   block_keys - the usage keys of the changed blocks and of their ancestors
+#   inherited_keys - the usage keys of the blocks whose changed settings are
+#       inherited by all of their descendants
+#   removed_keys - the usage keys of the blocks that are no longer published
+IndexChanges = namedtuple('IndexChanges', 'version block_keys inherited_keys removed_keys')
+
+# Recorded in place of the indexed version when an index update failed, so that
+# the next update reindexes everything rather than what changed recently.
+FAILED_INDEX_VERSION = u'failed'
+
+
+def get_version_agnostic_location(location):
+    """
+    Gets the version and branch agnostic form of the given location
+    """
+    return location.version_agnostic().replace(branch=None)
+
 
 def strip_html_content_to_text(html_content):
     """ Gets only the textual part for html content - useful for building text to be searched """
@@ -88,7 +110,7 @@ class SearchIndexerBase(object):
 
     @classmethod
     @abstractmethod
-    def _fetch_top_level(cls, modulestore, structure_key):
+    def _fetch_top_level(cls, modulestore, structure_key, depth=None):
         """ Fetch the item from the modulestore location """
 
     @classmethod
@@ -116,7 +138,99 @@ class SearchIndexerBase(object):
         searcher.remove(cls.DOCUMENT_TYPE, result_ids)
 
     @classmethod
-    def index(cls, modulestore, structure_key, triggered_at=None, reindex_age=REINDEX_AGE):
+    def _indexed_version_cache_key(cls, structure_key):
+        """ Cache key of the version of the structure that the index was last updated from """
+        return u'{}.indexed_version.{}'.format(cls.INDEX_NAME, structure_key)
+
+    @classmethod
+    def _get_indexed_version(cls, structure_key):
+        """ Returns the version of the structure that the index was last updated from, if known """
+        return cache.get(cls._indexed_version_cache_key(structure_key))
+
+    @classmethod
+    def set_indexed_version(cls, structure_key, version):
+        """
+        Records the version of the structure that the index was updated from, or forgets it if None,
+        or records that the last update failed if FAILED_INDEX_VERSION
+        """
+        if version is None:
+            cache.delete(cls._indexed_version_cache_key(structure_key))
+        else:
+            cache.set(cls._indexed_version_cache_key(structure_key), unicode(version), None)
+
+    @classmethod
+    def last_index_failed(cls, structure_key):
+        """
+        Returns whether the last update of the index failed, in which case the next update
+        should reindex everything rather than only what changed recently
+        """
+        return cls._get_indexed_version(cls.normalize_structure_key(structure_key)) == FAILED_INDEX_VERSION
+
+    @classmethod
+    def get_changes(cls, modulestore, structure_key):
+        """
+        Compares the published structure of the course or library with the
+        version that its index was last updated from.
+
+        Returns:
+        IndexChanges, or None if the changes can not be determined (the index
+        has not been updated from a known version, the last update failed, or
+        the modulestore does not version its structures) and the whole
+        structure needs to be walked
+        """
+        structure_key = cls.normalize_structure_key(structure_key)
+        indexed_version = cls._get_indexed_version(structure_key)
+        if indexed_version in (None, FAILED_INDEX_VERSION) or not hasattr(modulestore, 'get_structure_changes'):
+            return None
+
+        published_only = ModuleStoreEnum.RevisionOption.published_only
+        with modulestore.branch_setting(published_only):
+            structure = cls._fetch_top_level(modulestore, structure_key, depth=0)
+        version = getattr(structure, 'course_version', None)
+        if version is None:
+            return None
+
+        try:
+            structure_changes = modulestore.get_structure_changes(
+                structure_key, indexed_version, revision=published_only
+            )
+        except (NotImplementedError, ItemNotFoundError):
+            return None
+
+        # The index of an item depends on its children, so the ancestors of
+        # changed blocks are indexed with them.  Parents are located on the
+        # published branch, but items are matched by their agnostic location.
+        block_keys = set()
+        for usage_key in structure_changes.changed:
+            usage_key = get_version_agnostic_location(usage_key)
+            while usage_key not in block_keys:
+                block_keys.add(usage_key)
+                parent_location = modulestore.get_parent_location(usage_key, revision=published_only)
+                if parent_location is None:
+                    break
+                usage_key = get_version_agnostic_location(parent_location)
+
+        return IndexChanges(version, block_keys, structure_changes.changed_settings, structure_changes.removed)
+
+    @classmethod
+    def get_changed_subtrees(cls, modulestore, structure_key, changes):
+        """
+        Returns the locations of the top-level items of the course or library
+        that have changes to index.
+        """
+        structure_key = cls.normalize_structure_key(structure_key)
+        with modulestore.branch_setting(ModuleStoreEnum.RevisionOption.published_only):
+            structure = cls._fetch_top_level(modulestore, structure_key, depth=0)
+        if get_version_agnostic_location(structure.location) in changes.inherited_keys:
+            return list(structure.children)
+        return [
+            child_location for child_location in structure.children
+            if get_version_agnostic_location(child_location) in changes.block_keys
+        ]
+
+    @classmethod
+    def index(cls, modulestore, structure_key, triggered_at=None, reindex_age=REINDEX_AGE, changes=None,
+              top_level_keys=None):
         """
         Process course for indexing
 
@@ -132,6 +246,17 @@ class SearchIndexerBase(object):
             which items may need to be removed from the index
             If None, then a full reindex takes place
 
+        changes (IndexChanges) - the changes since the index was last updated (see
+            get_changes); only the changed items and their ancestors are updated,
+            along with the descendants of items whose inherited settings changed,
+            and only the removed items are removed from the index
+
+        top_level_keys (list) - locations of the top-level items to walk; the other
+            top-level items are indexed separately. The indexed version is not
+            recorded, which is left to the caller (see set_indexed_version). Unless
+            changes are given, this does not remove items or index supplemental
+            information either
+
         Returns:
         Number of items that have been added to the index
         """
@@ -142,6 +267,10 @@ class SearchIndexerBase(object):
 
         structure_key = cls.normalize_structure_key(structure_key)
         location_info = cls._get_location_info(structure_key)
+        batch_size = settings.SEARCH_INDEX_BATCH_SIZE
+        if top_level_keys is not None:
+            top_level_keys = {get_version_agnostic_location(usage_key) for usage_key in top_level_keys}
+        is_partial_index = top_level_keys is not None
 
         # Wrap counter in dictionary - otherwise we seem to lose scope inside the embedded function `prepare_item_index`
         indexed_count = {
@@ -154,18 +283,49 @@ class SearchIndexerBase(object):
         # list - those are ready to be destroyed
         indexed_items = set()
 
-        # items_index is a list of all the items index dictionaries.
-        # it is used to collect all indexes and index them using bulk API,
-        # instead of per item index API call.
+        # items_index is a list of the items index dictionaries that have yet to be sent.
+        # it is used to collect indexes and index them using bulk API, in batches of
+        # batch_size, instead of per item index API call.
         items_index = []
 
         def get_item_location(item):
             """
             Gets the version agnostic item location
             """
-            return item.location.version_agnostic().replace(branch=None)
+            return get_version_agnostic_location(item.location)
 
-        def prepare_item_index(item, skip_index=False, groups_usage_info=None):
+        def send_full_batch():
+            """
+            Sends the collected index dictionaries once there is a full batch of them
+            """
+            if len(items_index) >= batch_size:
+                searcher.index(cls.DOCUMENT_TYPE, items_index)
+                del items_index[:]
+
+        def is_changed(item, index_subtree):
+            """
+            When indexing changes, returns whether the item or its descendants are to be indexed
+            """
+            item_location = get_item_location(item)
+            return index_subtree or item_location in changes.inherited_keys or item_location in changes.block_keys
+
+        def get_content_groups(item, groups_usage_info):
+            """
+            Returns the content groups that prepare_item_index returns for the item,
+            without indexing it or its descendants
+            """
+            item_index_dictionary = item.index_dictionary() if hasattr(item, "index_dictionary") else None
+            if not item_index_dictionary or not groups_usage_info:
+                return None
+            item_content_groups = groups_usage_info.get(unicode(get_item_location(item)), None)
+            if item_content_groups is not None and item.has_children:
+                for child_item in item.get_children():
+                    if modulestore.has_published_version(child_item):
+                        if get_content_groups(child_item, groups_usage_info) is None:
+                            return None
+            return item_content_groups
+
+        def prepare_item_index(item, skip_index=False, groups_usage_info=None, index_subtree=False):
             """
             Add this item to the items_index and indexed_items list
 
@@ -177,9 +337,18 @@ class SearchIndexerBase(object):
                 This should really only be passed from the recursive child calls when
                 this method has determined that it is safe to do so
 
+            index_subtree - when indexing changes, index the item and all of its
+                descendants, because they inherit changed settings of an ancestor
+
             Returns:
             item_content_groups - content groups assigned to indexed item
             """
+            if changes is not None:
+                if not is_changed(item, index_subtree):
+                    # neither the item nor its descendants changed
+                    return
+                index_subtree = index_subtree or get_item_location(item) in changes.inherited_keys
+
             is_indexable = hasattr(item, "index_dictionary")
             item_index_dictionary = item.index_dictionary() if is_indexable else None
             # if it's not indexable and it does not have children, then ignore
@@ -217,13 +386,20 @@ class SearchIndexerBase(object):
                 children_groups_usage = []
                 for child_item in item.get_children():
                     if modulestore.has_published_version(child_item):
+                        if changes is not None and not is_changed(child_item, index_subtree):
+                            # The child isn't indexed again, but its content groups restrict those of the item.
+                            if item_content_groups is not None:
+                                children_groups_usage.append(get_content_groups(child_item, groups_usage_info))
+                            continue
                         children_groups_usage.append(
                             prepare_item_index(
                                 child_item,
                                 skip_index=skip_child_index,
-                                groups_usage_info=groups_usage_info
+                                groups_usage_info=groups_usage_info,
+                                index_subtree=index_subtree,
                             )
                         )
+                        send_full_batch()
                 if None in children_groups_usage:
                     item_content_groups = None
 
@@ -248,19 +424,35 @@ class SearchIndexerBase(object):
                 log.warning('Could not index item: %s - %r', item.location, err)
                 error_list.append(_('Could not index item: {}').format(item.location))
 
+        version = None
         try:
             with modulestore.branch_setting(ModuleStoreEnum.RevisionOption.published_only):
-                structure = cls._fetch_top_level(modulestore, structure_key)
+                # Only load the items that are walked when part of the structure is indexed
+                depth = None if changes is None and top_level_keys is None else 0
+                structure = cls._fetch_top_level(modulestore, structure_key, depth=depth)
+                version = changes.version if changes is not None else getattr(structure, 'course_version', None)
                 groups_usage_info = cls.fetch_group_usage(modulestore, structure)
 
                 # First perform any additional indexing from the structure object
-                cls.supplemental_index_information(modulestore, structure)
+                if changes is not None or not is_partial_index:
+                    cls.supplemental_index_information(modulestore, structure)
 
                 # Now index the content
+                index_subtree = changes is not None and get_item_location(structure) in changes.inherited_keys
                 for item in structure.get_children():
-                    prepare_item_index(item, groups_usage_info=groups_usage_info)
+                    if top_level_keys is None or get_item_location(item) in top_level_keys:
+                        prepare_item_index(item, groups_usage_info=groups_usage_info, index_subtree=index_subtree)
+                        send_full_batch()
                 searcher.index(cls.DOCUMENT_TYPE, items_index)
-                cls.remove_deleted_items(searcher, structure_key, indexed_items)
+                if changes is not None:
+                    removed_ids = [
+                        unicode(cls._id_modifier(usage_key.map_into_course(structure_key)))
+                        for usage_key in changes.removed_keys
+                    ]
+                    if removed_ids:
+                        searcher.remove(cls.DOCUMENT_TYPE, removed_ids)
+                elif not is_partial_index:
+                    cls.remove_deleted_items(searcher, structure_key, indexed_items)
         except Exception as err:  # pylint: disable=broad-except
             # broad exception so that index operation does not prevent the rest of the application from working
             log.exception(
@@ -271,8 +463,12 @@ class SearchIndexerBase(object):
             error_list.append(_('General indexing error occurred'))
 
         if error_list:
+            # The next update reindexes the whole structure rather than trusting the recorded version.
+            cls.set_indexed_version(structure_key, FAILED_INDEX_VERSION)
             raise SearchIndexingError('Error(s) present during indexing', error_list)
 
+        if not is_partial_index:
+            cls.set_indexed_version(structure_key, version)
         return indexed_count["count"]
 
     @classmethod
@@ -360,9 +556,9 @@ class CoursewareSearchIndexer(SearchIndexerBase):
         return structure_key
 
     @classmethod
-    def _fetch_top_level(cls, modulestore, structure_key):
+    def _fetch_top_level(cls, modulestore, structure_key, depth=None):
         """ Fetch the item from the modulestore location """
-        return modulestore.get_course(structure_key, depth=None)
+        return modulestore.get_course(structure_key, depth=depth)
 
     @classmethod
     def _get_location_info(cls, normalized_structure_key):
@@ -448,9 +644,9 @@ class LibrarySearchIndexer(SearchIndexerBase):
         return normalize_key_for_search(structure_key)
 
     @classmethod
-    def _fetch_top_level(cls, modulestore, structure_key):
+    def _fetch_top_level(cls, modulestore, structure_key, depth=None):
         """ Fetch the item from the modulestore location """
-        return modulestore.get_library(structure_key, depth=None)
+        return modulestore.get_library(structure_key, depth=depth)
 
     @classmethod
     def _get_location_info(cls, normalized_structure_key):
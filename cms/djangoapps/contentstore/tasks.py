@@ -11,6 +11,7 @@ import tarfile
 from datetime import datetime
 from tempfile import NamedTemporaryFile, mkdtemp
 
+from celery import chord
 from celery.task import task
 from celery.utils.log import get_task_logger
 from django.conf import settings
@@ -21,7 +22,7 @@ from django.test import RequestFactory
 from django.utils.text import get_valid_filename
 from django.utils.translation import ugettext as _
 from djcelery.common import respect_language
-from opaque_keys.edx.keys import CourseKey
+from opaque_keys.edx.keys import CourseKey, UsageKey
 from opaque_keys.edx.locator import LibraryLocator
 from organizations.models import OrganizationCourse
 from path import Path as path
@@ -161,10 +162,36 @@ def _parse_time(time_isoformat):
 
 @task()
 def update_search_index(course_id, triggered_time_isoformat):
-    """ Updates course search index. """
+    """
+    Updates course search index.
+
+    Only the blocks that changed since the course was last indexed are indexed,
+    when those are known; large updates are split into a subtask per chapter.
+    The whole course is reindexed after an update that failed.
+    """
     try:
         course_key = CourseKey.from_string(course_id)
-        CoursewareSearchIndexer.index(modulestore(), course_key, triggered_at=(_parse_time(triggered_time_isoformat)))
+        store = modulestore()
+        changes = CoursewareSearchIndexer.get_changes(store, course_key)
+        if changes is None:
+            triggered_at = None
+            if not CoursewareSearchIndexer.last_index_failed(course_key):
+                triggered_at = _parse_time(triggered_time_isoformat)
+            CoursewareSearchIndexer.index(store, course_key, triggered_at=triggered_at)
+        elif len(changes.block_keys) > settings.SEARCH_INDEX_SUBTASK_THRESHOLD:
+            subtree_keys = CoursewareSearchIndexer.get_changed_subtrees(store, course_key, changes)
+            # The removed blocks and the course information are indexed here.
+            CoursewareSearchIndexer.index(store, course_key, changes=changes, top_level_keys=[])
+            # The indexed version is recorded once all the subtasks succeeded; until then, the
+            # next update indexes the changes since the previously recorded version again.
+            if subtree_keys:
+                chord(
+                    update_search_index_subtree.s(course_id, text_type(subtree_key)) for subtree_key in subtree_keys
+                )(record_search_index_version.s(course_id, text_type(changes.version)))
+            else:
+                CoursewareSearchIndexer.set_indexed_version(course_key, changes.version)
+        else:
+            CoursewareSearchIndexer.index(store, course_key, changes=changes)
 
     except SearchIndexingError as exc:
         LOGGER.error(u'Search indexing error for complete course %s - %s', course_id, text_type(exc))
@@ -172,12 +199,47 @@ def update_search_index(course_id, triggered_time_isoformat):
         LOGGER.debug(u'Search indexing successful for complete course %s', course_id)
 
 
+@task()
+def update_search_index_subtree(course_id, usage_key_string):
+    """
+    Updates course search index for all the content of a top-level block of the course.
+
+    Returns whether the update succeeded.
+    """
+    try:
+        course_key = CourseKey.from_string(course_id)
+        usage_key = UsageKey.from_string(usage_key_string).map_into_course(course_key)
+        CoursewareSearchIndexer.index(modulestore(), course_key, top_level_keys=[usage_key])
+
+    except SearchIndexingError as exc:
+        LOGGER.error(u'Search indexing error for %s in course %s - %s', usage_key_string, course_id, text_type(exc))
+        return False
+    else:
+        LOGGER.debug(u'Search indexing successful for %s in course %s', usage_key_string, course_id)
+        return True
+
+
+@task()
+def record_search_index_version(subtask_results, course_id, version):
+    """
+    Records the version of the course that its search index was updated from,
+    once the update_search_index_subtree subtasks of the update have all succeeded.
+    """
+    if all(subtask_results):
+        CoursewareSearchIndexer.set_indexed_version(CourseKey.from_string(course_id), version)
+    else:
+        LOGGER.warning(u'Search index of course %s was not updated to version %s', course_id, version)
+
+
 @task()
 def update_library_index(library_id, triggered_time_isoformat):
     """ Updates course search index. """
     try:
         library_key = CourseKey.from_string(library_id)
-        LibrarySearchIndexer.index(modulestore(), library_key, triggered_at=(_parse_time(triggered_time_isoformat)))
+        triggered_at = None
+        if not LibrarySearchIndexer.last_index_failed(library_key):
+            triggered_at = _parse_time(triggered_time_isoformat)
+        LibrarySearchIndexer.index(modulestore(), library_key, triggered_at=triggered_at)
 
     except SearchIndexingError as exc:
         LOGGER.error(u'Search indexing error for library %s - %s', library_id, text_type(exc))
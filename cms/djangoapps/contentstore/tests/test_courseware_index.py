@@ -10,18 +10,22 @@ from uuid import uuid4
 import ddt
 from dateutil.tz import tzutc
 from django.conf import settings
+from django.test.utils import override_settings
 from lazy.lazy import lazy
 from mock import patch
 from pytz import UTC
 from search.search_engine_base import SearchEngine
+from search.tests.mock_search_engine import MockSearchEngine
 
 from contentstore.courseware_index import (
     CourseAboutSearchIndexer,
     CoursewareSearchIndexer,
     LibrarySearchIndexer,
-    SearchIndexingError
+    SearchIndexingError,
+    get_version_agnostic_location
 )
 from contentstore.signals.handlers import listen_for_course_publish, listen_for_library_update
+from contentstore.tasks import update_search_index
 from contentstore.tests.utils import CourseTestCase
 from contentstore.utils import reverse_course_url, reverse_usage_url
 from course_modes.models import CourseMode
@@ -35,6 +39,7 @@ from xmodule.modulestore.mixed import MixedModuleStore
 from xmodule.modulestore.tests.django_utils import (
     TEST_DATA_MONGO_MODULESTORE,
     TEST_DATA_SPLIT_MODULESTORE,
+    ModuleStoreTestCase,
     SharedModuleStoreTestCase
 )
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory, LibraryFactory
@@ -439,6 +444,79 @@ class TestCoursewareSearchIndexer(MixedWithOptionsTestCase):
         indexed_count = self.reindex_course(store)
         self.assertEqual(indexed_count, 7)
 
+    def _test_indexing_changes(self, store):
+        """ Test that only the items that changed since the course was indexed, and their ancestors, are indexed """
+        self.publish_item(store, self.vertical.location)
+        self.assertIsNone(CoursewareSearchIndexer.get_changes(store, self.course.id))
+        self.assertEqual(self.reindex_course(store), 4)
+
+        changes = CoursewareSearchIndexer.get_changes(store, self.course.id)
+        self.assertEqual(CoursewareSearchIndexer.index(store, self.course.id, changes=changes), 0)
+
+        vertical2 = ItemFactory.create(
+            parent_location=self.sequential.location,
+            category='vertical',
+            display_name='Subsection 2',
+            modulestore=store,
+            publish_item=True,
+        )
+        ItemFactory.create(
+            parent_location=vertical2.location,
+            category="html",
+            display_name="Some other content",
+            publish_item=False,
+            modulestore=store,
+        )
+        self.publish_item(store, vertical2.location)
+        self.delete_item(store, self.html_unit.location)
+        self.publish_item(store, self.vertical.location)
+
+        # the new vertical and its html, the changed vertical and their ancestors
+        changes = CoursewareSearchIndexer.get_changes(store, self.course.id)
+        self.assertEqual(CoursewareSearchIndexer.index(store, self.course.id, changes=changes), 5)
+        response = self.search()
+        self.assertEqual(response["total"], 5)
+        self.assertNotIn(
+            unicode(self.html_unit.location),
+            [result["data"]["id"] for result in response["results"]],
+        )
+
+    def _test_no_changes_without_versions(self, store):
+        """ Test that changes are not known for courses whose structures are not versioned """
+        self.reindex_course(store)
+        self.assertIsNone(CoursewareSearchIndexer.get_changes(store, self.course.id))
+
+    def _test_indexing_in_batches(self, store):
+        """ Test that the items are sent to the search engine in batches """
+        self.publish_item(store, self.vertical.location)
+        with patch.object(MockSearchEngine, 'index', autospec=True, side_effect=MockSearchEngine.index) as mock_index:
+            with override_settings(SEARCH_INDEX_BATCH_SIZE=3):
+                self.assertEqual(self.reindex_course(store), 4)
+
+        batch_sizes = [
+            len(sources)
+            for (__, doc_type, sources), __ in mock_index.call_args_list
+            if doc_type == self.DOCUMENT_TYPE
+        ]
+        self.assertEqual(batch_sizes, [3, 1])
+        self.assertEqual(self.search()["total"], 4)
+
+    def _test_indexing_subtrees(self, store):
+        """ Test that the content of some of the top-level items can be indexed on its own """
+        self.publish_item(store, self.vertical.location)
+        self.reindex_course(store)
+        chapter2 = ItemFactory.create(
+            parent_location=self.course.location,
+            category='chapter',
+            display_name="Week 2",
+            modulestore=store,
+            publish_item=True,
+        )
+
+        indexed_count = CoursewareSearchIndexer.index(store, self.course.id, top_level_keys=[chapter2.location])
+        self.assertEqual(indexed_count, 1)
+        self.assertEqual(self.search()["total"], 5)
+
     def _test_course_about_property_index(self, store):
         """ Test that informational properties in the course object end up in the course_info index """
         display_name = "Help, I need somebody!"
@@ -574,6 +652,20 @@ class TestCoursewareSearchIndexer(MixedWithOptionsTestCase):
     def test_exception(self, store_type):
         self._perform_test_using_store(store_type, self._test_exception)
 
+    def test_indexing_changes(self):
+        self._perform_test_using_store(ModuleStoreEnum.Type.split, self._test_indexing_changes)
+
+    def test_no_changes_without_versions(self):
+        self._perform_test_using_store(ModuleStoreEnum.Type.mongo, self._test_no_changes_without_versions)
+
+    @ddt.data(*WORKS_WITH_STORES)
+    def test_indexing_in_batches(self, store_type):
+        self._perform_test_using_store(store_type, self._test_indexing_in_batches)
+
+    @ddt.data(*WORKS_WITH_STORES)
+    def test_indexing_subtrees(self, store_type):
+        self._perform_test_using_store(store_type, self._test_indexing_subtrees)
+
     @ddt.data(*WORKS_WITH_STORES)
     def test_course_about_property_index(self, store_type):
         self._perform_test_using_store(store_type, self._test_course_about_property_index)
@@ -772,6 +864,124 @@ class TestTaskExecution(SharedModuleStoreTestCase):
         self.assertEqual(response["total"], 2)
 
 
+@ddt.ddt
+class TestTaskIndexingChanges(ModuleStoreTestCase):
+    """
+    Tests that the task records the indexed version of the course only once
+    the subtasks that index the changes have all succeeded.
+    """
+    MODULESTORE = TEST_DATA_SPLIT_MODULESTORE
+
+    def setUp(self):
+        super(TestTaskIndexingChanges, self).setUp()
+        self.course = CourseFactory.create(start=datetime(2015, 3, 1, tzinfo=UTC))
+        self.chapter = ItemFactory.create(
+            parent_location=self.course.location,
+            category='chapter',
+            display_name="Week 1",
+            publish_item=True,
+            start=datetime(2015, 3, 1, tzinfo=UTC),
+        )
+        self.searcher = SearchEngine.get_search_engine(CoursewareSearchIndexer.INDEX_NAME)
+
+    def _update_search_index(self):
+        """ Runs the task the way the course_published signal does """
+        update_search_index(unicode(self.course.id), datetime.now(UTC).isoformat())
+
+    def _indexed_total(self):
+        """ Returns the number of items of the course in the index """
+        response = self.searcher.search(
+            doc_type=CoursewareSearchIndexer.DOCUMENT_TYPE,
+            field_dictionary={"course": unicode(self.course.id)}
+        )
+        return response["total"]
+
+    def _add_chapter(self):
+        """ Publishes a new chapter in the course """
+        ItemFactory.create(
+            parent_location=self.course.location,
+            category='chapter',
+            display_name="Week 2",
+            publish_item=True,
+            start=datetime(2015, 3, 1, tzinfo=UTC),
+        )
+
+    @override_settings(SEARCH_INDEX_SUBTASK_THRESHOLD=0)
+    def test_version_recorded_after_subtasks(self):
+        """ the next update only indexes what changed since the subtasks indexed """
+        self._update_search_index()
+        self._add_chapter()
+        self.assertTrue(CoursewareSearchIndexer.get_changes(self.store, self.course.id).block_keys)
+
+        self._update_search_index()
+        self.assertEqual(self._indexed_total(), 2)
+        self.assertFalse(CoursewareSearchIndexer.last_index_failed(self.course.id))
+        self.assertEqual(CoursewareSearchIndexer.get_changes(self.store, self.course.id).block_keys, set())
+
+    @ddt.data(0, 100)
+    def test_leaf_change_under_unchanged_chapter(self, subtask_threshold):
+        """ an item that changed is indexed again, whether in a subtask or not """
+        sequential = ItemFactory.create(
+            parent_location=self.chapter.location, category='sequential', display_name="Lesson 1", publish_item=True,
+        )
+        vertical = ItemFactory.create(
+            parent_location=sequential.location, category='vertical', display_name="Subsection 1", publish_item=True,
+        )
+        html_unit = ItemFactory.create(
+            parent_location=vertical.location, category="html", display_name="Html Content", publish_item=True,
+        )
+        self._update_search_index()
+        self.assertEqual(self._indexed_total(), 4)
+
+        html_unit.display_name = "Changed Content"
+        self.store.update_item(html_unit, ModuleStoreEnum.UserID.test)
+        self.store.publish(html_unit.location, ModuleStoreEnum.UserID.test)
+
+        changes = CoursewareSearchIndexer.get_changes(self.store, self.course.id)
+        self.assertLessEqual(
+            {get_version_agnostic_location(item.location) for item in (self.chapter, sequential, vertical, html_unit)},
+            changes.block_keys,
+        )
+        self.assertEqual(
+            [
+                get_version_agnostic_location(subtree_key)
+                for subtree_key in CoursewareSearchIndexer.get_changed_subtrees(self.store, self.course.id, changes)
+            ],
+            [get_version_agnostic_location(self.chapter.location)],
+        )
+
+        with override_settings(SEARCH_INDEX_SUBTASK_THRESHOLD=subtask_threshold):
+            self._update_search_index()
+        response = self.searcher.search(
+            doc_type=CoursewareSearchIndexer.DOCUMENT_TYPE,
+            field_dictionary={"course": unicode(self.course.id)}
+        )
+        display_names = {
+            result["data"]["id"]: result["data"]["content"]["display_name"] for result in response["results"]
+        }
+        self.assertEqual(len(display_names), 4)
+        self.assertEqual(display_names[unicode(html_unit.location)], "Changed Content")
+        self.assertEqual(CoursewareSearchIndexer.get_changes(self.store, self.course.id).block_keys, set())
+
+    @override_settings(SEARCH_INDEX_SUBTASK_THRESHOLD=0)
+    def test_version_not_recorded_after_failed_subtask(self):
+        """ the next update reindexes the whole course when a subtask failed """
+        self._update_search_index()
+        self._add_chapter()
+
+        with patch.object(CoursewareSearchIndexer, 'supplemental_fields', side_effect=Exception):
+            self._update_search_index()
+        self.assertEqual(self._indexed_total(), 1)
+        self.assertTrue(CoursewareSearchIndexer.last_index_failed(self.course.id))
+        self.assertIsNone(CoursewareSearchIndexer.get_changes(self.store, self.course.id))
+
+        # whatever the age of its content
+        with patch('contentstore.tasks._parse_time', return_value=datetime(2100, 1, 1, tzinfo=UTC)):
+            self._update_search_index()
+        self.assertEqual(self._indexed_total(), 2)
+        self.assertFalse(CoursewareSearchIndexer.last_index_failed(self.course.id))
+
+
 @ddt.ddt
 class TestLibrarySearchIndexer(MixedWithOptionsTestCase):
     """ Tests the operation of the CoursewareSearchIndexer """
@@ -1445,3 +1655,30 @@ class GroupConfigurationSearchSplit(GroupConfigurationSearchMongo):
     Tests indexing of content groups on course modules using split modulestore.
     """
     MODULESTORE = TEST_DATA_SPLIT_MODULESTORE
+
+    def test_unchanged_children_keep_content_groups(self):
+        """ indexing the changes keeps the content groups that the unchanged children restrict a vertical to """
+        html_unit7 = ItemFactory.create(
+            parent_location=self.condition_0_vertical.location,
+            category="html",
+            display_name="Split A 2",
+            publish_item=True,
+        )
+        self.publish_item(self.store, self.split_test_unit.location)
+        self.reindex_course(self.store)
+
+        self.html_unit4.display_name = "Split A changed"
+        self.update_item(self.store, self.html_unit4)
+        self.publish_item(self.store, self.html_unit4.location)
+
+        changes = CoursewareSearchIndexer.get_changes(self.store, self.course.id)
+        self.assertIn(get_version_agnostic_location(self.html_unit4.location), changes.block_keys)
+        self.assertNotIn(get_version_agnostic_location(html_unit7.location), changes.block_keys)
+        with patch(settings.SEARCH_ENGINE + '.index') as mock_index:
+            CoursewareSearchIndexer.index(self.store, self.course.id, changes=changes)
+            indexed_content = [item for kall in mock_index.call_args_list for item in kall[0][1]]
+        self.assertIn(
+            self._vertical_experiment_group_result(self.condition_0_vertical, [unicode(2)]),
+            indexed_content
+        )
+        self.assertNotIn(unicode(html_unit7.location), [item['id'] for item in indexed_content])
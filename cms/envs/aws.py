@@ -151,6 +151,29 @@ if 'loc_cache' not in CACHES:
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'edx_location_mem_cache',
     }
+COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES = ENV_TOKENS.get(
+    'COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES', COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES
+)
+COURSE_DEFINITION_LOCAL_CACHE_MAX_BYTES = ENV_TOKENS.get(
+    'COURSE_DEFINITION_LOCAL_CACHE_MAX_BYTES', COURSE_DEFINITION_LOCAL_CACHE_MAX_BYTES
+)
+CONFIGURATION_CACHE_LOCAL_TIMEOUT = ENV_TOKENS.get(
+    'CONFIGURATION_CACHE_LOCAL_TIMEOUT', CONFIGURATION_CACHE_LOCAL_TIMEOUT
+)
+if CONFIGURATION_CACHE_LOCAL_TIMEOUT and 'configuration' in CACHES:
+    CACHES['configuration_remote'] = CACHES['configuration']
+    CACHES['configuration'] = {
+        'BACKEND': 'util.configuration_cache.TieredConfigurationCache',
+        'LOCATION': 'configuration_remote',
+        'OPTIONS': {'LOCAL_TIMEOUT': CONFIGURATION_CACHE_LOCAL_TIMEOUT},
+    }
+STATIC_CONTENT_DISK_CACHE_DIR = ENV_TOKENS.get('STATIC_CONTENT_DISK_CACHE_DIR', STATIC_CONTENT_DISK_CACHE_DIR)
+STATIC_CONTENT_DISK_CACHE_MAX_BYTES = ENV_TOKENS.get(
+    'STATIC_CONTENT_DISK_CACHE_MAX_BYTES', STATIC_CONTENT_DISK_CACHE_MAX_BYTES
+)
+STATIC_CONTENT_DISK_CACHE_MAX_FILE_BYTES = ENV_TOKENS.get(
+    'STATIC_CONTENT_DISK_CACHE_MAX_FILE_BYTES', STATIC_CONTENT_DISK_CACHE_MAX_FILE_BYTES
+)
 
 SESSION_COOKIE_DOMAIN = ENV_TOKENS.get('SESSION_COOKIE_DOMAIN')
 SESSION_COOKIE_HTTPONLY = ENV_TOKENS.get('SESSION_COOKIE_HTTPONLY', True)
@@ -411,6 +434,7 @@ CELERY_QUEUES.update(
 
 # Event tracking
 TRACKING_BACKENDS.update(AUTH_TOKENS.get("TRACKING_BACKENDS", {}))
+TRACKING_ASYNC.update(ENV_TOKENS.get("TRACKING_ASYNC", {}))
 EVENT_TRACKING_BACKENDS['tracking_logs']['OPTIONS']['backends'].update(AUTH_TOKENS.get("EVENT_TRACKING_BACKENDS", {}))
 EVENT_TRACKING_BACKENDS['segmentio']['OPTIONS']['processors'][0]['OPTIONS']['whitelist'].extend(
     AUTH_TOKENS.get("EVENT_TRACKING_SEGMENTIO_EMIT_WHITELIST", []))
@@ -459,6 +483,8 @@ if FEATURES['ENABLE_COURSEWARE_INDEX'] or FEATURES['ENABLE_LIBRARY_INDEX']:
     SEARCH_ENGINE = "search.elastic.ElasticSearchEngine"
 
 ELASTIC_SEARCH_CONFIG = ENV_TOKENS.get('ELASTIC_SEARCH_CONFIG', [{}])
+SEARCH_INDEX_BATCH_SIZE = ENV_TOKENS.get('SEARCH_INDEX_BATCH_SIZE', SEARCH_INDEX_BATCH_SIZE)
+SEARCH_INDEX_SUBTASK_THRESHOLD = ENV_TOKENS.get('SEARCH_INDEX_SUBTASK_THRESHOLD', SEARCH_INDEX_SUBTASK_THRESHOLD)
 
 XBLOCK_SETTINGS = ENV_TOKENS.get('XBLOCK_SETTINGS', {})
 XBLOCK_SETTINGS.setdefault("VideoDescriptor", {})["licensing_enabled"] = FEATURES.get("LICENSING", False)
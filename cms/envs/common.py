@@ -465,6 +465,29 @@ XBLOCK_FIELD_DATA_WRAPPERS = ()
 ############################ Modulestore Configuration ################################
 MODULESTORE_BRANCH = 'draft-preferred'
 
+# Number of bytes of pickled course structures each process keeps in memory
+# in front of the 'course_structure_cache'. Set to 0 to disable the local tier.
+COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Number of bytes of pickled split modulestore definitions each process keeps in
+# memory, in front of the optional 'course_definition_cache'. Set to 0 to disable.
+COURSE_DEFINITION_LOCAL_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Number of seconds each process serves ConfigurationModel values from memory
+# before checking the 'configuration' cache for changes to them. Deployments
+# that configure a 'configuration' cache get request and process tiers in front
+# of it (see util.configuration_cache). Set to 0 to disable these tiers.
+CONFIGURATION_CACHE_LOCAL_TIMEOUT = 5
+
+# Directory in which each server keeps copies of recently served course assets
+# that are too large for the 'course_assets' cache, or None to always read them
+# from the contentstore. The copies are limited to a total of
+# STATIC_CONTENT_DISK_CACHE_MAX_BYTES, and assets larger than
+# STATIC_CONTENT_DISK_CACHE_MAX_FILE_BYTES are never copied.
+STATIC_CONTENT_DISK_CACHE_DIR = None
+STATIC_CONTENT_DISK_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+STATIC_CONTENT_DISK_CACHE_MAX_FILE_BYTES = 64 * 1024 * 1024
+
 MODULESTORE = {
     'default': {
         'ENGINE': 'xmodule.modulestore.mixed.MixedModuleStore',
@@ -1066,6 +1089,18 @@ TRACKING_BACKENDS = {
     }
 }
 
+# Buffer tracking events and send them to TRACKING_BACKENDS in batches from a
+# background thread.  When the queue is full, events are dropped, block the
+# request ('block'), or are appended to SPILL_FILE ('spill').
+TRACKING_ASYNC = {
+    'ENABLED': False,
+    'MAX_QUEUE_SIZE': 10000,
+    'BATCH_SIZE': 100,
+    'FLUSH_INTERVAL': 1.0,
+    'OVERFLOW_POLICY': 'drop',
+    'SPILL_FILE': None,
+}
+
 # We're already logging events, and we don't want to capture user
 # names/passwords.  Heartbeat events are likely not interesting.
 TRACKING_IGNORE_URL_PATTERNS = [r'^/event', r'^/login', r'^/heartbeat']
@@ -1234,6 +1269,14 @@ ELASTIC_FIELD_MAPPINGS = {
     }
 }
 
+# The maximum number of documents sent to the search engine in one request
+# when indexing courseware and library content.
+SEARCH_INDEX_BATCH_SIZE = 500
+
+# Courseware index updates that change more blocks than this are split into
+# one celery subtask per changed chapter.
+SEARCH_INDEX_SUBTASK_THRESHOLD = 1000
+
 XBLOCK_SETTINGS = {
     "VideoDescriptor": {
         "licensing_enabled": FEATURES.get("LICENSING", False)
@@ -183,6 +183,11 @@ CACHES = {
     },
 }
 
+# Structures and definitions are cached in-process by default, which would
+# hide the mongo queries that tests count.
+COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES = 0
+COURSE_DEFINITION_LOCAL_CACHE_MAX_BYTES = 0
+
 # hide ratelimit warnings while running tests
 filterwarnings('ignore', message='No request passed to the backend, unable to rate-limit')
 
@@ -1,6 +1,7 @@
 import logging
 import re
 
+import crum
 from django.contrib.staticfiles.storage import staticfiles_storage
 from django.contrib.staticfiles import finders
 from django.conf import settings
@@ -11,10 +12,16 @@ from xmodule.modulestore import ModuleStoreEnum
 from xmodule.contentstore.content import StaticContent
 
 from opaque_keys.edx.locator import AssetLocator
+import request_cache
 
 log = logging.getLogger(__name__)
 XBLOCK_STATIC_RESOURCE_PREFIX = '/static/xblock'
 
+# Compiled url regexes, keyed by the prefix regex they match.  The prefixes depend on
+# the settings and on each course's data directory, so there are few of them.
+_URL_REGEXES = {}
+_MAX_URL_REGEXES = 1000
+
 
 def _url_replace_regex(prefix):
     """
@@ -32,13 +39,71 @@ def _url_replace_regex(prefix):
         """.format(prefix=prefix)
 
 
+def _compiled_url_regex(prefix):
+    """
+    Returns the compiled _url_replace_regex for the given prefix.
+    """
+    regex = _URL_REGEXES.get(prefix)
+    if regex is None:
+        if len(_URL_REGEXES) >= _MAX_URL_REGEXES:
+            _URL_REGEXES.clear()
+        regex = _URL_REGEXES[prefix] = re.compile(_url_replace_regex(prefix))
+    return regex
+
+
+def _static_prefix_regex(data_dir):
+    """
+    Returns the regex for the prefix of static urls that are not already in the given data directory.
+    """
+    return u'(?:{static_url}|/static/)(?!{data_dir})'.format(
+        static_url=settings.STATIC_URL,
+        data_dir=data_dir
+    )
+
+
+def _lookup_cache():
+    """
+    Returns the cache of staticfiles and asset path lookups for the current request,
+    or None outside of a request.
+    """
+    if crum.get_current_request() is None:
+        return None
+    return request_cache.get_cache('static_replace.lookups')
+
+
+def _memoized_lookup(key, lookup_function, *args):
+    """
+    Returns lookup_function(*args), remembering the result for the rest of the request.
+    """
+    cache = _lookup_cache()
+    if cache is None:
+        return lookup_function(*args)
+    if key not in cache:
+        cache[key] = lookup_function(*args)
+    return cache[key]
+
+
+def _staticfiles_exists(path):
+    """
+    Returns whether the path exists in staticfiles_storage.
+    """
+    return _memoized_lookup(('exists', path), staticfiles_storage.exists, path)
+
+
+def _staticfiles_url(path):
+    """
+    Returns the url of the path in staticfiles_storage.
+    """
+    return _memoized_lookup(('url', path), staticfiles_storage.url, path)
+
+
 def try_staticfiles_lookup(path):
     """
     Try to lookup a path in staticfiles_storage.  If it fails, return
     a dead link instead of raising an exception.
     """
     try:
-        url = staticfiles_storage.url(path)
+        url = _staticfiles_url(path)
     except Exception as err:
         log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
             path, str(err)))
@@ -73,7 +138,7 @@ def replace_jump_to_id_urls(text, course_id, jump_to_id_base_url):
         rest = match.group('rest')
         return "".join([quote, jump_to_id_base_url + rest, quote])
 
-    return re.sub(_url_replace_regex('/jump_to_id/'), replace_jump_to_id_url, text)
+    return _compiled_url_regex('/jump_to_id/').sub(replace_jump_to_id_url, text)
 
 
 def replace_course_urls(text, course_key):
@@ -93,7 +158,7 @@ def replace_course_urls(text, course_key):
         rest = match.group('rest')
         return "".join([quote, '/courses/' + course_id + '/', rest, quote])
 
-    return re.sub(_url_replace_regex('/course/'), replace_course_url, text)
+    return _compiled_url_regex('/course/').sub(replace_course_url, text)
 
 
 def process_static_urls(text, replacement_function, data_dir=None):
@@ -106,31 +171,32 @@ def process_static_urls(text, replacement_function, data_dir=None):
         Unwraps a match group for the captures specified in _url_replace_regex
         and forward them on as function arguments
         """
-        original = match.group(0)
-        prefix = match.group('prefix')
-        quote = match.group('quote')
-        rest = match.group('rest')
+        return _replace_static_match(match, replacement_function)
 
-        # Don't rewrite XBlock resource links.  Probably wasn't a good idea that /static
-        # works for actual static assets and for magical course asset URLs....
-        full_url = prefix + rest
+    return _compiled_url_regex(_static_prefix_regex(data_dir)).sub(wrap_part_extraction, text)
 
-        starts_with_static_url = full_url.startswith(unicode(settings.STATIC_URL))
-        starts_with_prefix = full_url.startswith(XBLOCK_STATIC_RESOURCE_PREFIX)
-        contains_prefix = XBLOCK_STATIC_RESOURCE_PREFIX in full_url
-        if starts_with_prefix or (starts_with_static_url and contains_prefix):
-            return original
 
-        return replacement_function(original, prefix, quote, rest)
+def _replace_static_match(match, replacement_function):
+    """
+    Calls replacement_function with the parts of a static url match, unless it is
+    an XBlock resource url, which is left as is.
+    """
+    original = match.group(0)
+    prefix = match.group('prefix')
+    quote = match.group('quote')
+    rest = match.group('rest')
+
+    # Don't rewrite XBlock resource links.  Probably wasn't a good idea that /static
+    # works for actual static assets and for magical course asset URLs....
+    full_url = prefix + rest
 
-    return re.sub(
-        _url_replace_regex(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
-            static_url=settings.STATIC_URL,
-            data_dir=data_dir
-        )),
-        wrap_part_extraction,
-        text
-    )
+    starts_with_static_url = full_url.startswith(unicode(settings.STATIC_URL))
+    starts_with_prefix = full_url.startswith(XBLOCK_STATIC_RESOURCE_PREFIX)
+    contains_prefix = XBLOCK_STATIC_RESOURCE_PREFIX in full_url
+    if starts_with_prefix or (starts_with_static_url and contains_prefix):
+        return original
+
+    return replacement_function(original, prefix, quote, rest)
 
 
 def make_static_urls_absolute(request, html):
@@ -162,7 +228,50 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
     course_id: The course identifier used to distinguish static content for this course in studio
     static_asset_path: Path for static assets, which overrides data_directory and course_namespace, if nonempty
     """
+    return process_static_urls(
+        text,
+        _static_url_replacement(data_directory, course_id, static_asset_path),
+        data_dir=static_asset_path or data_directory
+    )
+
+
+def replace_urls(text, data_directory=None, course_id=None, static_asset_path='', jump_to_id_base_url=None):
+    """
+    Does the replacements of replace_static_urls, replace_course_urls and (if
+    jump_to_id_base_url is given) replace_jump_to_id_urls in a single pass over text.
+
+    See those functions for a description of the arguments.
+    """
+    url_families = [
+        u'(?P<static>{})'.format(_static_prefix_regex(static_asset_path or data_directory)),
+        u'(?P<course>/course/)',
+    ]
+    if jump_to_id_base_url is not None:
+        url_families.append(u'(?P<jump_to_id>/jump_to_id/)')
+
+    replace_static_url = _static_url_replacement(data_directory, course_id, static_asset_path)
+    course_url_base = '/courses/' + course_id.to_deprecated_string() + '/'
+
+    def replace_url(match):
+        """
+        Replaces a single url of any of the families.
+        """
+        if match.group('static') is not None:
+            return _replace_static_match(match, replace_static_url)
 
+        quote = match.group('quote')
+        rest = match.group('rest')
+        if match.group('course') is not None:
+            return "".join([quote, course_url_base, rest, quote])
+        return "".join([quote, jump_to_id_base_url + rest, quote])
+
+    return _compiled_url_regex(u'|'.join(url_families)).sub(replace_url, text)
+
+
+def _static_url_replacement(data_directory, course_id, static_asset_path):
+    """
+    Returns the replacement function used by replace_static_urls, for use with process_static_urls.
+    """
     def replace_static_url(original, prefix, quote, rest):
         """
         Replace a single matched url.
@@ -181,32 +290,27 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
 
             exists_in_staticfiles_storage = False
             try:
-                exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
+                exists_in_staticfiles_storage = _staticfiles_exists(rest)
             except Exception as err:
                 log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
                     rest, str(err)))
 
             if exists_in_staticfiles_storage:
-                url = staticfiles_storage.url(rest)
+                url = _staticfiles_url(rest)
             else:
                 # if not, then assume it's courseware specific content and then look in the
                 # Mongo-backed database
-                base_url = AssetBaseUrlConfig.get_base_url()
-                excluded_exts = AssetExcludedExtensionsConfig.get_excluded_extensions()
-                url = StaticContent.get_canonicalized_asset_path(course_id, rest, base_url, excluded_exts)
-
-                if AssetLocator.CANONICAL_NAMESPACE in url:
-                    url = url.replace('block@', 'block/', 1)
+                url = _memoized_lookup(('asset', course_id, rest), _canonicalized_asset_path, course_id, rest)
 
         # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
         else:
             course_path = "/".join((static_asset_path or data_directory, rest))
 
             try:
-                if staticfiles_storage.exists(rest):
-                    url = staticfiles_storage.url(rest)
+                if _staticfiles_exists(rest):
+                    url = _staticfiles_url(rest)
                 else:
-                    url = staticfiles_storage.url(course_path)
+                    url = _staticfiles_url(course_path)
             # And if that fails, assume that it's course content, and add manually data directory
             except Exception as err:
                 log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
@@ -215,4 +319,17 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
 
         return "".join([quote, url, quote])
 
-    return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
+    return replace_static_url
+
+
+def _canonicalized_asset_path(course_id, path):
+    """
+    Returns the url of the course asset at the given path.
+    """
+    base_url = AssetBaseUrlConfig.get_base_url()
+    excluded_exts = AssetExcludedExtensionsConfig.get_excluded_extensions()
+    url = StaticContent.get_canonicalized_asset_path(course_id, path, base_url, excluded_exts)
+
+    if AssetLocator.CANONICAL_NAMESPACE in url:
+        url = url.replace('block@', 'block/', 1)
+    return url
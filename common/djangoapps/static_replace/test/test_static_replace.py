@@ -5,20 +5,24 @@ import re
 from cStringIO import StringIO
 from urlparse import parse_qsl, urlparse, urlunparse
 
+import crum
 import ddt
-from django.test import override_settings
+from django.test import RequestFactory, override_settings
 from django.utils.http import urlencode, urlquote
 from mock import Mock, patch
 from nose.tools import assert_equals, assert_false, assert_true  # pylint: disable=no-name-in-module
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from PIL import Image
+from request_cache.middleware import RequestCache
 
 from static_replace import (
     _url_replace_regex,
     make_static_urls_absolute,
     process_static_urls,
     replace_course_urls,
-    replace_static_urls
+    replace_jump_to_id_urls,
+    replace_static_urls,
+    replace_urls
 )
 from xmodule.assetstore.assetmgr import AssetManager
 from xmodule.contentstore.content import StaticContent
@@ -178,6 +182,54 @@ def test_static_url_with_query(mock_modulestore, mock_storage):
     assert_equals(post_text, replace_static_urls(pre_text, DATA_DIRECTORY, COURSE_KEY))
 
 
+@patch('static_replace.staticfiles_storage', autospec=True)
+def test_replace_urls(mock_storage):
+    """
+    Make sure that replace_urls does the replacements of the separate functions in a single pass.
+    """
+    mock_storage.exists.return_value = True
+    mock_storage.url.side_effect = lambda path: '/static/hashed/' + path
+
+    text = (
+        '<img src="/static/file.png"/><a href=\'/course/info\'>Info</a><a href="/jump_to_id/abc">'
+        '<img src="/static/data_dir/other.png"/><script src="/static/xblock/resources/a.js"></script>'
+    )
+    expected = replace_jump_to_id_urls(
+        replace_course_urls(replace_static_urls(text, DATA_DIRECTORY, COURSE_KEY), COURSE_KEY), COURSE_KEY, '/jump/'
+    )
+    assert_equals(expected, replace_urls(text, DATA_DIRECTORY, COURSE_KEY, jump_to_id_base_url='/jump/'))
+    assert_true('"/static/hashed/file.png"' in expected)
+    assert_true("'/courses/org/course/run/info'" in expected)
+    assert_true('"/jump/abc"' in expected)
+
+    # Without a jump_to_id_base_url, /jump_to_id/ urls are left as is.
+    assert_true('"/jump_to_id/abc"' in replace_urls(text, DATA_DIRECTORY, COURSE_KEY))
+
+
+@patch('static_replace.staticfiles_storage', autospec=True)
+def test_lookups_are_memoized_for_request(mock_storage):
+    """
+    Make sure that staticfiles are only looked up once per request.
+    """
+    mock_storage.exists.return_value = True
+    mock_storage.url.return_value = '/static/hashed/file.png'
+    text = STATIC_SOURCE + STATIC_SOURCE
+
+    crum.set_current_request(RequestFactory().get('/'))
+    try:
+        replace_static_urls(text, DATA_DIRECTORY)
+        replace_static_urls(text, DATA_DIRECTORY)
+        mock_storage.exists.assert_called_once_with('file.png')
+        mock_storage.url.assert_called_once_with('file.png')
+
+        RequestCache.clear_request_cache()
+        replace_static_urls(text, DATA_DIRECTORY)
+        assert_equals(mock_storage.exists.call_count, 2)
+    finally:
+        crum.set_current_request(None)
+        RequestCache.clear_request_cache()
+
+
 def test_regex():
     yes = ('"/static/foo.png"',
            '"/static/foo.png"',
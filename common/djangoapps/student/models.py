@@ -28,7 +28,7 @@ from django.contrib.auth.models import User
 from django.contrib.auth.signals import user_logged_in, user_logged_out
 from django.core.cache import cache
 from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist
-from django.db import IntegrityError, models
+from django.db import IntegrityError, models, transaction
 from django.db.models import Count
 from django.db.models.signals import post_save, pre_save
 from django.dispatch import Signal, receiver
@@ -149,11 +149,7 @@ def anonymous_id_for_user(user, course_id, save=True):
         hasher.update(unicode(course_id).encode('utf-8'))
     digest = hasher.hexdigest()
 
-    if not hasattr(user, '_anonymous_id'):
-        user._anonymous_id = {}  # pylint: disable=protected-access
-
-    user._anonymous_id[course_id] = digest  # pylint: disable=protected-access
-
+    # The id is only cached once saved, so that a later call with save=True does save it.
     if save is False:
         return digest
 
@@ -168,9 +164,50 @@ def anonymous_id_for_user(user, course_id, save=True):
         # continue
         pass
 
+    _cache_anonymous_id(user, course_id, digest)
     return digest
 
 
+def anonymous_ids_for_users(users, course_id):
+    """
+    Return a dict of user id to the anonymous_id_for_user of each of the
+    given users in the course, saving the AnonymousUserId objects that
+    are missing with a single query rather than one per user.
+    """
+    anonymous_ids = {user.id: anonymous_id_for_user(user, course_id, save=False) for user in users}
+    saved_ids = set(
+        AnonymousUserId.objects.filter(
+            anonymous_user_id__in=anonymous_ids.values(),
+        ).values_list('anonymous_user_id', flat=True)
+    )
+    missing_users = [user for user in users if anonymous_ids[user.id] not in saved_ids]
+    try:
+        with transaction.atomic():
+            AnonymousUserId.objects.bulk_create([
+                AnonymousUserId(user=user, course_id=course_id, anonymous_user_id=anonymous_ids[user.id])
+                for user in missing_users
+            ])
+    except IntegrityError:
+        # Another thread has already created some of these entries,
+        # so create the others one at a time.
+        for user in missing_users:
+            anonymous_id_for_user(user, course_id)
+
+    for user in users:
+        _cache_anonymous_id(user, course_id, anonymous_ids[user.id])
+    return anonymous_ids
+
+
+def _cache_anonymous_id(user, course_id, anonymous_id):
+    """
+    Cache the saved anonymous id of the user in the course on the user object.
+    """
+    if not hasattr(user, '_anonymous_id'):
+        user._anonymous_id = {}  # pylint: disable=protected-access
+
+    user._anonymous_id[course_id] = anonymous_id  # pylint: disable=protected-access
+
+
 def user_by_anonymous_id(uid):
     """
     Return user by anonymous_user_id using AnonymousUserId lookup table.
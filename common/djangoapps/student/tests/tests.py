@@ -40,6 +40,7 @@ from student.models import (
     LinkedInAddToProfileConfiguration,
     UserAttribute,
     anonymous_id_for_user,
+    anonymous_ids_for_users,
     unique_id_for_user,
     user_by_anonymous_id
 )
@@ -1048,6 +1049,27 @@ class AnonymousLookupTable(ModuleStoreTestCase):
         self.assertEqual(self.user, real_user)
         self.assertEqual(anonymous_id, anonymous_id_for_user(self.user, course2.id, save=False))
 
+    def test_unsaved_id_is_saved_later(self):
+        anonymous_id = anonymous_id_for_user(self.user, self.course.id, save=False)
+        self.assertIsNone(user_by_anonymous_id(anonymous_id))
+        self.assertEqual(anonymous_id, anonymous_id_for_user(self.user, self.course.id))
+        self.assertEqual(self.user, user_by_anonymous_id(anonymous_id))
+
+    def test_anonymous_ids_for_users(self):
+        users = [self.user, UserFactory.create(), UserFactory.create()]
+        saved_id = anonymous_id_for_user(users[0], self.course.id)
+        anonymous_id_for_user(users[1], self.course.id, save=False)
+
+        anonymous_ids = anonymous_ids_for_users(users, self.course.id)
+        self.assertEqual(anonymous_ids[users[0].id], saved_id)
+        for user in users:
+            self.assertEqual(user, user_by_anonymous_id(anonymous_ids[user.id]))
+            # A fresh user object gets the same id.
+            self.assertEqual(
+                anonymous_ids[user.id],
+                anonymous_id_for_user(User.objects.get(pk=user.id), self.course.id, save=False),
+            )
+
     def test_secret_key_changes(self):
         """Test that a new anonymous id is returned when the secret key changes."""
         CourseEnrollment.enroll(self.user, self.course.id)
@@ -4,6 +4,7 @@ Admin site configuration for third party authentication
 """
 from config_models.admin import ConfigurationModelAdmin, KeyedConfigurationModelAdmin
 from django import forms
+from django.conf import settings
 from django.contrib import admin
 
 from third_party_auth.provider import Registry
@@ -78,10 +79,11 @@ class SAMLProviderConfigAdmin(KeyedConfigurationModelAdmin):
         We only want to do this for manual edits done using the admin interface.
 
         Note: This only works if the celery worker and the app worker are using the
-        same 'configuration' cache.
+        same 'configuration' cache.  The fetch is delayed until the worker no longer
+        serves the previous configuration from process memory.
         """
         super(SAMLProviderConfigAdmin, self).save_model(request, obj, form, change)
-        fetch_saml_metadata.apply_async((), countdown=2)
+        fetch_saml_metadata.apply_async((), countdown=2 + settings.CONFIGURATION_CACHE_LOCAL_TIMEOUT)
 
 admin.site.register(SAMLProviderConfig, SAMLProviderConfigAdmin)
 
@@ -3,15 +3,18 @@ Tests third_party_auth admin views
 """
 import unittest
 
+from config_models.admin import KeyedConfigurationModelAdmin
 from django.conf import settings
 from django.contrib.admin.sites import AdminSite
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.urlresolvers import reverse
 from django.forms import models
+from django.test.utils import override_settings
+from mock import Mock, patch
 
 from student.tests.factories import UserFactory
-from third_party_auth.admin import OAuth2ProviderConfigAdmin
-from third_party_auth.models import OAuth2ProviderConfig
+from third_party_auth.admin import OAuth2ProviderConfigAdmin, SAMLProviderConfigAdmin
+from third_party_auth.models import OAuth2ProviderConfig, SAMLProviderConfig
 from third_party_auth.tests import testutil
 
 
@@ -86,3 +89,17 @@ class Oauth2ProviderConfigAdminTest(testutil.TestCase):
         # Ensure the icon_image was preserved on the new provider instance
         self.assertEquals(provider2.icon_image, provider1.icon_image)
         self.assertEquals(provider2.name, post_data['name'])
+
+
+@unittest.skipUnless(testutil.AUTH_FEATURE_ENABLED, testutil.AUTH_FEATURES_KEY + ' not enabled')
+class SAMLProviderConfigAdminTest(testutil.TestCase):
+    """
+    Tests for SAML provider config admin
+    """
+    @override_settings(CONFIGURATION_CACHE_LOCAL_TIMEOUT=5)
+    def test_metadata_fetched_after_configuration_cache_local_timeout(self):
+        admin = SAMLProviderConfigAdmin(SAMLProviderConfig, AdminSite())
+        with patch.object(KeyedConfigurationModelAdmin, 'save_model'):
+            with patch('third_party_auth.admin.fetch_saml_metadata') as mock_fetch:
+                admin.save_model(Mock(), Mock(), Mock(), False)
+        mock_fetch.apply_async.assert_called_once_with((), countdown=7)
@@ -96,3 +96,15 @@ class MongoBackend(BaseBackend):
             # during the next event.
             msg = 'Error inserting to MongoDB event tracker backend'
             log.exception(msg)
+
+    def send_batch(self, events):
+        """Insert the events in to the Mongo collection with a single request"""
+        try:
+            self.collection.insert(events, manipulate=False, continue_on_error=True)
+        except BSONError:
+            # An event that cannot be encoded fails the whole batch, so
+            # insert the events one at a time to lose only that event.
+            super(MongoBackend, self).send_batch(events)
+        except PyMongoError:
+            msg = 'Error inserting to MongoDB event tracker backend'
+            log.exception(msg)
@@ -1,6 +1,12 @@
+import json
+import os
+import shutil
+import tempfile
+
 from django.conf import settings
 from django.test import TestCase
 from django.test.utils import override_settings
+from mock import patch
 
 import track.tracker as tracker
 from track.backends import BaseBackend
@@ -106,11 +112,70 @@ class TestTrackerDjangoInstantiation(TestCase):
         return tracker.backends
 
 
+@override_settings(TRACKING_BACKENDS=MULTI_SETTINGS.copy())
+class TestAsyncSender(TestCase):
+    """Test sending events to the backends in batches from a background thread."""
+
+    def setUp(self):
+        super(TestAsyncSender, self).setUp()
+        tracker._initialize_backends_from_django_settings()  # pylint: disable=protected-access
+        self.addCleanup(tracker._initialize_backends_from_django_settings)  # pylint: disable=protected-access
+
+    def test_events_are_sent_in_batches(self):
+        sender = tracker.AsyncSender(max_queue_size=100, batch_size=4, flush_interval=60, overflow_policy='drop')
+        event_count = 10
+        with patch.object(tracker, 'async_sender', sender):
+            for index in xrange(event_count):
+                tracker.send({'index': index})
+            sender.close()
+
+        for backend in tracker.backends.values():
+            self.assertEqual(backend.count, event_count)
+            self.assertEqual([len(batch) for batch in backend.batches], [4, 4, 2])
+            self.assertEqual([event['index'] for batch in backend.batches for event in batch], range(event_count))
+
+    def test_async_settings(self):
+        with override_settings(TRACKING_ASYNC={'ENABLED': True, 'BATCH_SIZE': 5}):
+            tracker._initialize_backends_from_django_settings()  # pylint: disable=protected-access
+        self.assertEqual(tracker.async_sender.batch_size, 5)
+        self.assertEqual(tracker.async_sender.max_queue_size, tracker.ASYNC_DEFAULTS['MAX_QUEUE_SIZE'])
+
+        tracker._initialize_backends_from_django_settings()  # pylint: disable=protected-access
+        self.assertIsNone(tracker.async_sender)
+
+    def test_invalid_overflow_policy(self):
+        with self.assertRaises(ValueError):
+            tracker.AsyncSender(max_queue_size=1, batch_size=1, flush_interval=1, overflow_policy='ignore')
+
+    def test_spill(self):
+        spill_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spill_dir)
+        spill_path = os.path.join(spill_dir, 'spill.log')
+
+        sender = tracker.AsyncSender(
+            max_queue_size=1, batch_size=1, flush_interval=1, overflow_policy='spill', spill_file=spill_path
+        )
+        # Without a background thread, the queue fills up after one event.
+        with patch.object(sender, '_start_thread'):
+            sender.queue = tracker.Queue.Queue(maxsize=1)
+            sender.put({'index': 0})
+            sender.put({'index': 1})
+            sender.put({'index': 2})
+
+        with open(spill_path) as spill_file:
+            self.assertEqual([json.loads(line) for line in spill_file], [{'index': 1}, {'index': 2}])
+
+
 class DummyBackend(BaseBackend):
     def __init__(self, **options):
         super(DummyBackend, self).__init__(**options)
         self.flag = options.get('flag', False)
         self.count = 0
+        self.batches = []
 
     def send(self, event):
         self.count += 1
+
+    def send_batch(self, events):
+        self.batches.append(events)
+        super(DummyBackend, self).send_batch(events)
@@ -16,21 +16,58 @@ below::
       }
   }
 
+Events can instead be buffered, and sent to the backends in batches by a
+background thread, using the TRACKING_ASYNC Django setting::
+
+  TRACKING_ASYNC = {
+      'ENABLED': True,
+      'MAX_QUEUE_SIZE': 10000,
+      'BATCH_SIZE': 100,
+      'FLUSH_INTERVAL': 1.0,
+      'OVERFLOW_POLICY': 'drop',  # or 'block' or 'spill'
+      'SPILL_FILE': '/var/tmp/tracking_spill.log',
+  }
+
 """
 
+import atexit
 import inspect
+import json
+import logging
+import os
+import Queue
+import threading
 from importlib import import_module
+from time import time
 
 from django.conf import settings
 from dogapi import dog_stats_api
 
 from track.backends import BaseBackend
+from track.utils import DateTimeJSONEncoder
 
 __all__ = ['send']
 
+log = logging.getLogger(__name__)
+
+OVERFLOW_DROP = 'drop'
+OVERFLOW_BLOCK = 'block'
+OVERFLOW_SPILL = 'spill'
+
+ASYNC_DEFAULTS = {
+    'ENABLED': False,
+    'MAX_QUEUE_SIZE': 10000,
+    'BATCH_SIZE': 100,
+    'FLUSH_INTERVAL': 1.0,
+    'OVERFLOW_POLICY': OVERFLOW_DROP,
+    'SPILL_FILE': None,
+}
 
 backends = {}
 
+# The AsyncSender that buffers events, when TRACKING_ASYNC is enabled
+async_sender = None
+
 
 def _initialize_backends_from_django_settings():
     """
@@ -38,7 +75,12 @@ def _initialize_backends_from_django_settings():
     configuration in django settings
 
     """
+    global async_sender  # pylint: disable=global-statement
+
     backends.clear()
+    if async_sender is not None:
+        async_sender.close()
+        async_sender = None
 
     config = getattr(settings, 'TRACKING_BACKENDS', {})
 
@@ -49,6 +91,16 @@ def _initialize_backends_from_django_settings():
             options = values.get('OPTIONS', {})
             backends[name] = _instantiate_backend_from_name(engine, options)
 
+    async_config = dict(ASYNC_DEFAULTS, **getattr(settings, 'TRACKING_ASYNC', {}))
+    if async_config['ENABLED']:
+        async_sender = AsyncSender(
+            max_queue_size=async_config['MAX_QUEUE_SIZE'],
+            batch_size=async_config['BATCH_SIZE'],
+            flush_interval=async_config['FLUSH_INTERVAL'],
+            overflow_policy=async_config['OVERFLOW_POLICY'],
+            spill_file=async_config['SPILL_FILE'],
+        )
+
 
 def _instantiate_backend_from_name(name, options):
     """
@@ -81,14 +133,146 @@ def _instantiate_backend_from_name(name, options):
     return backend
 
 
+class AsyncSender(object):
+    """
+    Sends events to all the initialized backends from a background thread.
+
+    Events wait in a bounded queue, and are sent in batches once
+    `batch_size` of them are waiting, or `flush_interval` seconds after the
+    first of them arrived.  When the queue is full, the `overflow_policy`
+    decides whether an event is dropped, waits for room in the queue, or is
+    appended to `spill_file` as a line of JSON, to be replayed by hand.
+
+    """
+    _STOP = object()
+
+    def __init__(self, max_queue_size, batch_size, flush_interval, overflow_policy, spill_file=None):
+        if overflow_policy not in (OVERFLOW_DROP, OVERFLOW_BLOCK, OVERFLOW_SPILL):
+            raise ValueError('Invalid tracking overflow policy %s' % overflow_policy)
+        if overflow_policy == OVERFLOW_SPILL and not spill_file:
+            raise ValueError('A spill file is required by the tracking overflow policy %s' % overflow_policy)
+
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.spill_file = spill_file
+
+        self.queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def put(self, event):
+        """
+        Queue an event to be sent, applying the overflow policy if the
+        queue is full.
+        """
+        self._start_thread()
+        if self.overflow_policy == OVERFLOW_BLOCK:
+            self.queue.put(event)
+            return
+
+        try:
+            self.queue.put_nowait(event)
+        except Queue.Full:
+            dog_stats_api.increment('track.send.overflow', tags=['policy:{0}'.format(self.overflow_policy)])
+            if self.overflow_policy == OVERFLOW_SPILL:
+                self._spill(event)
+
+    def close(self):
+        """
+        Send the events that are waiting, and stop the background thread.
+        """
+        with self._lock:
+            thread = self._thread if self._pid == os.getpid() else None
+            self._thread = None
+            self._pid = None
+        if thread is not None:
+            self.queue.put(self._STOP)
+            thread.join()
+
+    def _start_thread(self):
+        """
+        Start the background thread of this process, if it is not running.
+
+        The thread and queue of a parent process do not survive a fork, so
+        each process gets its own.
+        """
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self.queue = Queue.Queue(maxsize=self.max_queue_size)
+                self._thread = threading.Thread(target=self._run, name='track-async-sender')
+                self._thread.daemon = True
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def _run(self):
+        """
+        Send batches of events until the sender is closed.
+        """
+        stopping = False
+        while not stopping:
+            events = [self.queue.get()]
+            deadline = time() + self.flush_interval
+            while len(events) < self.batch_size:
+                timeout = deadline - time()
+                if timeout <= 0:
+                    break
+                try:
+                    events.append(self.queue.get(timeout=timeout))
+                except Queue.Empty:
+                    break
+                if events[-1] is self._STOP:
+                    break
+
+            if events[-1] is self._STOP:
+                stopping = True
+                events.pop()
+            if events:
+                self._send_batch(events)
+
+    def _send_batch(self, events):
+        """
+        Send a batch of events to each backend.
+        """
+        dog_stats_api.gauge('track.send.queue_depth', self.queue.qsize())
+        dog_stats_api.histogram('track.send.batch_size', len(events))
+        for name, backend in backends.items():
+            with dog_stats_api.timer('track.send.backend.{0}'.format(name)):
+                try:
+                    backend.send_batch(events)
+                except Exception:  # pylint: disable=broad-except
+                    log.exception('Error sending %d events to the %s tracking backend', len(events), name)
+
+    def _spill(self, event):
+        """
+        Append an event to the spill file.
+        """
+        try:
+            with self._lock:
+                with open(self.spill_file, 'a') as spill_file:
+                    spill_file.write(json.dumps(event, cls=DateTimeJSONEncoder) + '\n')
+        except (IOError, TypeError, ValueError):
+            log.exception('Error spilling an event to %s', self.spill_file)
+
+
 @dog_stats_api.timed('track.send')
 def send(event):
     """
-    Send an event object to all the initialized backends.
+    Send an event object to all the initialized backends, or queue it to be
+    sent by the AsyncSender.
 
     """
     dog_stats_api.increment('track.send.count')
 
+    if async_sender is not None:
+        async_sender.put(event)
+        return
+
     for name, backend in backends.iteritems():
         with dog_stats_api.timer('track.send.backend.{0}'.format(name)):
             backend.send(event)
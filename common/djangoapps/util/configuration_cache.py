@@ -0,0 +1,246 @@
+"""
+A cache backend for the values cached by ConfigurationModel.current().
+
+ConfigurationModel subclasses cache their current rows in the 'configuration'
+cache, which is usually memcached.  Since many of them are looked up on each
+request, this backend puts two faster tiers in front of that cache:
+
+  * a request tier, which returns the same value for repeated lookups within
+    a single request, and
+  * a process tier, shared by all the threads of the process, which keeps
+    values across requests for LOCAL_TIMEOUT seconds, or for the timeout they
+    were set with if that is shorter, and for as long as the "version stamp"
+    stored in the remote cache does not change.  Its values are kept pickled,
+    so that each lookup gets a copy of its own that other threads can't see
+    being modified.
+
+Whenever a value is deleted (which is what ConfigurationModel.save() does), the
+version stamp is replaced, which invalidates the process tiers of all processes.
+Each process rereads the stamp at most once every LOCAL_TIMEOUT seconds, so
+changes take at most that long to be seen by other processes.  Code that has
+to see a change made by another process right away, such as a celery task
+queued when the change is saved, should run LOCAL_TIMEOUT seconds later.
+
+To use it, configure the 'configuration' cache with this backend and point its
+LOCATION at the alias of the remote cache:
+
+    CACHES['configuration'] = {
+        'BACKEND': 'util.configuration_cache.TieredConfigurationCache',
+        'LOCATION': 'configuration_remote',
+        'OPTIONS': {'LOCAL_TIMEOUT': 5, 'MAX_ENTRIES': 1000},
+    }
+"""
+import cPickle as pickle
+from collections import Counter, OrderedDict
+from threading import Lock
+from time import time
+from uuid import uuid4
+
+import crum
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+import request_cache
+
+# The name of the request cache used for the request tier.
+REQUEST_CACHE_NAME = 'util.configuration_cache'
+
+# The key of the version stamp in the remote cache.
+VERSION_STAMP_KEY = 'configuration_cache.version_stamp'
+
+# Lookup outcomes counted for the hit-rate report.
+REQUEST_HIT = 'request_hits'
+LOCAL_HIT = 'local_hits'
+REMOTE_HIT = 'remote_hits'
+MISS = 'misses'
+
+_stats = Counter()
+
+
+class _ProcessTier(object):
+    """
+    The values of a TieredConfigurationCache that are kept in process memory.
+
+    Django creates a cache instance per thread, so the instances share this
+    instead, to have changes seen by all the threads of the process at once.
+    """
+    def __init__(self):
+        self.lock = Lock()
+        # Maps keys to (pickled value, version stamp, expiry time) tuples, least recently used first.
+        self.entries = OrderedDict()
+        self.version_stamp = None
+        self.version_stamp_read_at = None
+
+
+# The process tiers of the configured caches, by the alias of their remote cache.
+_process_tiers = {}
+_process_tiers_lock = Lock()
+
+
+def _get_process_tier(remote_alias):
+    """
+    Returns the process tier of the caches in front of the given remote cache.
+    """
+    with _process_tiers_lock:
+        return _process_tiers.setdefault(remote_alias, _ProcessTier())
+
+
+def get_stats():
+    """
+    Returns the lookup counts of all configuration caches in this process,
+    along with the fraction of lookups served by each tier.
+    """
+    stats = {outcome: _stats[outcome] for outcome in (REQUEST_HIT, LOCAL_HIT, REMOTE_HIT, MISS)}
+    lookups = sum(stats.values())
+    stats['lookups'] = lookups
+    stats['in_memory_hit_rate'] = float(stats[REQUEST_HIT] + stats[LOCAL_HIT]) / lookups if lookups else None
+    stats['hit_rate'] = float(lookups - stats[MISS]) / lookups if lookups else None
+    return stats
+
+
+def reset_stats():
+    """
+    Resets the lookup counts of the hit-rate report.
+    """
+    _stats.clear()
+
+
+class TieredConfigurationCache(BaseCache):
+    """
+    A cache that serves values from the current request and from process memory
+    before falling back to the remote cache named by LOCATION.
+    """
+    def __init__(self, location, params):
+        options = params.get('OPTIONS', {})
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        super(TieredConfigurationCache, self).__init__(params)
+        self._remote_alias = location
+        self._process_tier = _get_process_tier(location)
+
+    @property
+    def _remote(self):
+        """
+        The cache that holds the values shared by all processes.
+        """
+        return caches[self._remote_alias]
+
+    def get(self, key, default=None, version=None):
+        local_key = self.make_key(key, version)
+        request_values = self._request_values()
+        if request_values is not None and local_key in request_values:
+            _stats[REQUEST_HIT] += 1
+            return request_values[local_key]
+
+        version_stamp = self._get_version_stamp()
+        process_tier = self._process_tier
+        with process_tier.lock:
+            entry = process_tier.entries.get(local_key)
+            if entry is not None:
+                process_tier.entries[local_key] = process_tier.entries.pop(local_key)
+        if entry is not None and entry[1] == version_stamp and entry[2] > time():
+            _stats[LOCAL_HIT] += 1
+            value = pickle.loads(entry[0])
+        else:
+            value = self._remote.get(key, version=version)
+            if value is None:
+                _stats[MISS] += 1
+                return default
+            _stats[REMOTE_HIT] += 1
+            # How long the remote cache keeps the value is unknown, so LOCAL_TIMEOUT applies.
+            self._set_local(local_key, value, version_stamp, self.local_timeout)
+
+        if request_values is not None:
+            request_values[local_key] = value
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._remote.set(key, value, timeout=timeout, version=version)
+        self._remember(key, value, timeout, version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self._remote.add(key, value, timeout=timeout, version=version)
+        if added:
+            self._remember(key, value, timeout, version)
+        return added
+
+    def delete(self, key, version=None):
+        self._remote.delete(key, version=version)
+        self._invalidate()
+
+    def clear(self):
+        self._remote.clear()
+        self._invalidate()
+
+    def _remember(self, key, value, timeout, version):
+        """
+        Stores a value that was just written to the remote cache with the given timeout in the faster tiers.
+        """
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self._remote.default_timeout
+        local_timeout = self.local_timeout if timeout is None else min(self.local_timeout, timeout)
+        local_key = self.make_key(key, version)
+        self._set_local(local_key, value, self._get_version_stamp(), local_timeout)
+        request_values = self._request_values()
+        if request_values is not None:
+            if local_timeout > 0:
+                request_values[local_key] = value
+            else:
+                request_values.pop(local_key, None)
+
+    def _set_local(self, local_key, value, version_stamp, local_timeout):
+        """
+        Stores a value in the process tier for local_timeout seconds, evicting the least
+        recently used values beyond MAX_ENTRIES.
+        """
+        pickled_value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL) if local_timeout > 0 else None
+        process_tier = self._process_tier
+        with process_tier.lock:
+            process_tier.entries.pop(local_key, None)
+            if local_timeout > 0:
+                process_tier.entries[local_key] = (pickled_value, version_stamp, time() + local_timeout)
+            while len(process_tier.entries) > self._max_entries:
+                process_tier.entries.popitem(last=False)
+
+    def _invalidate(self):
+        """
+        Replaces the version stamp, so that the faster tiers of all processes are refreshed.
+        """
+        version_stamp = uuid4().hex
+        self._remote.set(VERSION_STAMP_KEY, version_stamp, timeout=None)
+        process_tier = self._process_tier
+        with process_tier.lock:
+            process_tier.entries.clear()
+            process_tier.version_stamp = version_stamp
+            process_tier.version_stamp_read_at = time()
+        request_cache.clear_cache(REQUEST_CACHE_NAME)
+
+    def _get_version_stamp(self):
+        """
+        Returns the current version stamp, reading it from the remote cache at most every LOCAL_TIMEOUT seconds.
+        """
+        now = time()
+        process_tier = self._process_tier
+        with process_tier.lock:
+            read_at = process_tier.version_stamp_read_at
+            if read_at is not None and now - read_at < self.local_timeout:
+                return process_tier.version_stamp
+        version_stamp = self._remote.get(VERSION_STAMP_KEY)
+        if version_stamp is None:
+            # The stamp was evicted or was never set, so start a new one.
+            self._remote.add(VERSION_STAMP_KEY, uuid4().hex, timeout=None)
+            version_stamp = self._remote.get(VERSION_STAMP_KEY) or uuid4().hex
+        with process_tier.lock:
+            process_tier.version_stamp = version_stamp
+            process_tier.version_stamp_read_at = now
+        return version_stamp
+
+    def _request_values(self):
+        """
+        Returns the values cached for the current request, or None outside of a request.
+
+        Values are not cached outside of requests, since nothing clears the request
+        cache of a long-running process such as a management command.
+        """
+        if crum.get_current_request() is None:
+            return None
+        return request_cache.get_cache(REQUEST_CACHE_NAME)
@@ -0,0 +1,149 @@
+"""
+Tests for the tiered cache of ConfigurationModel values.
+"""
+from time import time
+
+import crum
+from django.core.cache import caches
+from django.test import TestCase
+from django.test.utils import override_settings
+from mock import patch
+
+from openedx.core.djangolib.testing.utils import get_mock_request
+from request_cache.middleware import RequestCache
+from util import configuration_cache
+from util.configuration_cache import TieredConfigurationCache
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    'configuration_remote': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+})
+class TieredConfigurationCacheTest(TestCase):
+    """
+    Tests for TieredConfigurationCache.
+    """
+    def setUp(self):
+        super(TieredConfigurationCacheTest, self).setUp()
+        self.remote = caches['configuration_remote']
+        self.remote.clear()
+        configuration_cache.reset_stats()
+        self.addCleanup(configuration_cache.reset_stats)
+        self.addCleanup(RequestCache.clear_request_cache)
+
+    def create_cache(self, local_timeout=60, new_process=True):
+        """
+        Returns a cache as it would be configured in a new process, or in a new thread of the current one.
+        """
+        if new_process:
+            configuration_cache._process_tiers.clear()  # pylint: disable=protected-access
+        return TieredConfigurationCache('configuration_remote', {'OPTIONS': {'LOCAL_TIMEOUT': local_timeout}})
+
+    def assert_stats(self, **expected):
+        """
+        Asserts that the lookup counts of the hit-rate report are as expected.
+        """
+        stats = configuration_cache.get_stats()
+        for outcome in ('request_hits', 'local_hits', 'remote_hits', 'misses'):
+            self.assertEqual(stats[outcome], expected.get(outcome, 0), outcome)
+
+    def test_local_tier(self):
+        cache = self.create_cache()
+        self.assertIsNone(cache.get('key'))
+        self.remote.set('key', 'value')
+        self.assertEqual(cache.get('key'), 'value')
+
+        # The value is now served from process memory.
+        self.remote.set('key', 'changed')
+        self.assertEqual(cache.get('key'), 'value')
+        self.assert_stats(misses=1, remote_hits=1, local_hits=1)
+        self.assertEqual(configuration_cache.get_stats()['hit_rate'], 2.0 / 3)
+
+    def test_set_is_served_locally(self):
+        cache = self.create_cache()
+        cache.set('key', 'value')
+        self.assertEqual(self.remote.get('key'), 'value')
+        self.assertEqual(cache.get('key'), 'value')
+        self.assert_stats(local_hits=1)
+
+    def test_threads_share_process_tier(self):
+        cache = self.create_cache()
+        other_thread_cache = self.create_cache(new_process=False)
+        cache.set('key', 'value')
+        self.remote.set('key', 'changed')
+        self.assertEqual(other_thread_cache.get('key'), 'value')
+
+        # Deleting invalidates the values of all the threads right away.
+        other_thread_cache.delete('key')
+        self.remote.set('key', 'changed')
+        self.assertEqual(cache.get('key'), 'changed')
+
+    def test_local_tier_returns_copies(self):
+        cache = self.create_cache()
+        other_thread_cache = self.create_cache(new_process=False)
+        self.remote.set('key', {'enabled': True})
+        cache.get('key')['enabled'] = False
+        self.assertEqual(other_thread_cache.get('key'), {'enabled': True})
+        self.assertEqual(cache.get('key'), {'enabled': True})
+        self.assert_stats(remote_hits=1, local_hits=2)
+
+    def test_local_tier_expires_after_local_timeout(self):
+        cache = self.create_cache()
+        self.remote.set('key', 'value')
+        self.assertEqual(cache.get('key'), 'value')
+        self.remote.set('key', 'changed')
+        with patch('util.configuration_cache.time', return_value=time() + 61):
+            self.assertEqual(cache.get('key'), 'changed')
+
+    def test_local_tier_expires_after_shorter_timeout(self):
+        cache = self.create_cache()
+        cache.set('key', 'value', timeout=10)
+        self.remote.set('key', 'changed')
+        self.assertEqual(cache.get('key'), 'value')
+        with patch('util.configuration_cache.time', return_value=time() + 11):
+            self.assertEqual(cache.get('key'), 'changed')
+
+    def test_zero_timeout_not_kept_locally(self):
+        cache = self.create_cache()
+        cache.set('key', 'value', timeout=0)
+        self.assertIsNone(cache.get('key'))
+        self.assert_stats(misses=1)
+
+    def test_delete_invalidates_other_processes(self):
+        cache = self.create_cache(local_timeout=0)
+        other_cache = self.create_cache(local_timeout=0)
+        cache.set('key', 'value')
+        self.assertEqual(other_cache.get('key'), 'value')
+
+        cache.delete('key')
+        self.assertIsNone(cache.get('key'))
+        self.assertIsNone(other_cache.get('key'))
+
+        self.remote.set('key', 'changed')
+        self.assertEqual(other_cache.get('key'), 'changed')
+
+    def test_delete_waits_for_local_timeout_in_other_processes(self):
+        cache = self.create_cache()
+        other_cache = self.create_cache()
+        cache.set('key', 'value')
+        self.assertEqual(other_cache.get('key'), 'value')
+
+        cache.delete('key')
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(other_cache.get('key'), 'value')
+
+    def test_request_tier(self):
+        cache = self.create_cache(local_timeout=0)
+        self.addCleanup(crum.set_current_request, None)
+        get_mock_request()
+        self.remote.set('key', 'value')
+        self.assertEqual(cache.get('key'), 'value')
+
+        # Changes made by other processes are not seen within a request.
+        self.remote.delete('key')
+        self.remote.set(configuration_cache.VERSION_STAMP_KEY, 'changed')
+        self.assertEqual(cache.get('key'), 'value')
+        self.assert_stats(remote_hits=1, request_hits=1)
+
+        RequestCache.clear_request_cache()
+        self.assertIsNone(cache.get('key'))
@@ -25,6 +25,8 @@ from openedx.features.enterprise_support import api as enterprise_api
 from student.models import CourseEnrollment
 from student.models import UserProfile
 from student.roles import GlobalStaff
+from util import configuration_cache
+from util.json_request import JsonResponse
 
 log = logging.getLogger(__name__)
 
@@ -159,6 +161,15 @@ def calculate(request):
     return HttpResponse(json.dumps({'result': str(result)}))
 
 
+@require_global_staff
+def configuration_cache_stats(request):  # pylint: disable=unused-argument
+    """
+    Reports how many ConfigurationModel lookups have been served by each tier
+    of the configuration cache in the process that handles this request.
+    """
+    return JsonResponse(configuration_cache.get_stats())
+
+
 class _ZendeskApi(object):
 
     CACHE_PREFIX = 'ZENDESK_API_CACHE'
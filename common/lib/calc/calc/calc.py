@@ -7,6 +7,8 @@ Uses pyparsing to parse. Main function as of now is evaluator().
 import math
 import numbers
 import operator
+import threading
+from collections import OrderedDict
 
 import numpy
 import scipy.constants
@@ -238,38 +240,259 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
      python numbers.
     -Unary functions are passed as a dictionary from string to function.
     """
-    # No need to go further.
-    if math_expr.strip() == "":
-        return float('nan')
+    return compile_expression(math_expr, case_sensitive).evaluate(variables, functions)
 
-    # Parse the tree.
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
 
-    # Get our variables together.
-    all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
+# Functions among the defaults that can be applied to numpy arrays of values
+# elementwise, so expressions using them can be evaluated for many samples
+# of the variables at once.
+VECTORIZED_FUNCTIONS = set(
+    func for func in DEFAULT_FUNCTIONS.itervalues()
+    if func not in (math.factorial, functions.arccot)
+)
 
-    # ...and check them
-    math_interpreter.check_variables(all_variables, all_functions)
+# Number of compiled expressions that are kept by compile_expression.
+COMPILED_EXPRESSIONS_CACHE_SIZE = 1000
 
-    # Create a recursion to evaluate the tree.
-    if case_sensitive:
-        casify = lambda x: x
-    else:
-        casify = lambda x: x.lower()  # Lowercase for case insens.
-
-    evaluate_actions = {
-        'number': eval_number,
-        'variable': lambda x: all_variables[casify(x[0])],
-        'function': lambda x: all_functions[casify(x[0])](x[1]),
-        'atom': eval_atom,
-        'power': eval_power,
-        'parallel': eval_parallel,
-        'product': eval_product,
-        'sum': eval_sum
-    }
-
-    return math_interpreter.reduce_tree(evaluate_actions)
+_compiled_expressions = OrderedDict()
+_compiled_expressions_lock = threading.Lock()
+
+
+def compile_expression(math_expr, case_sensitive=False):
+    """
+    Return the CompiledExpression for the given math expression string.
+
+    The most recently used CompiledExpressions are cached, so an expression
+    is parsed only once when it is evaluated repeatedly.
+    """
+    key = (math_expr, case_sensitive)
+    with _compiled_expressions_lock:
+        compiled = _compiled_expressions.pop(key, None)
+        if compiled is not None:
+            _compiled_expressions[key] = compiled
+            return compiled
+
+    compiled = CompiledExpression(math_expr, case_sensitive)
+    with _compiled_expressions_lock:
+        _compiled_expressions[key] = compiled
+        while len(_compiled_expressions) > COMPILED_EXPRESSIONS_CACHE_SIZE:
+            _compiled_expressions.popitem(last=False)
+    return compiled
+
+
+class CompiledExpression(object):
+    """
+    A math expression that is parsed once and can then be evaluated many
+    times, for different variables.
+
+    The parse tree is compiled into nested python functions, each of which
+    takes the dictionaries of all variables and functions and returns the
+    value of a node of the tree.  They compute values just as the evaluation
+    actions of `evaluator` do, and can equally compute them for numpy arrays
+    of values of the variables.
+    """
+    def __init__(self, math_expr, case_sensitive=False):
+        """
+        Parse and compile the given math expression string.
+
+        Raise a `pyparsing.ParseException` if the expression is invalid.
+        """
+        self.math_expr = math_expr
+        self.case_sensitive = case_sensitive
+        if case_sensitive:
+            self.casify = lambda x: x
+        else:
+            self.casify = lambda x: x.lower()  # Lowercase for case insens.
+
+        # No need to go further.
+        if math_expr.strip() == "":
+            self.math_interpreter = None
+            self._evaluate = lambda all_variables, all_functions: float('nan')
+            return
+
+        self.math_interpreter = ParseAugmenter(math_expr, case_sensitive)
+        self.math_interpreter.parse_algebra()
+        self._evaluate = self._compile_node(self.math_interpreter.tree)
+
+    def _compile_node(self, node):
+        """
+        Return a function that computes the value of the given node of the
+        parse tree from the dictionaries of all variables and functions.
+        """
+        node_name = node.getName()
+        child_nodes = [child for child in node if isinstance(child, ParseResults)]
+
+        if node_name == 'number':
+            value = eval_number(node)
+            return lambda all_variables, all_functions: value
+
+        elif node_name == 'variable':
+            name = self.casify(node[0])
+            return lambda all_variables, all_functions: all_variables[name]
+
+        elif node_name == 'function':
+            name = self.casify(node[0])
+            compiled_arg = self._compile_node(node[1])
+            return lambda all_variables, all_functions: all_functions[name](
+                compiled_arg(all_variables, all_functions)
+            )
+
+        elif node_name == 'atom':
+            # Ignore the parentheses.
+            return self._compile_node(child_nodes[0])
+
+        elif node_name == 'power':
+            compiled_terms = [self._compile_node(child) for child in reversed(child_nodes)]
+            if len(compiled_terms) == 1:
+                return compiled_terms[0]
+
+            def compiled_power(all_variables, all_functions):
+                """
+                Exponentiate the terms, right to left.
+                """
+                power = compiled_terms[0](all_variables, all_functions)
+                for compiled_term in compiled_terms[1:]:
+                    power = compiled_term(all_variables, all_functions) ** power
+                return power
+            return compiled_power
+
+        elif node_name == 'parallel':
+            compiled_terms = [self._compile_node(child) for child in child_nodes]
+            if len(compiled_terms) == 1:
+                return compiled_terms[0]
+
+            def compiled_parallel(all_variables, all_functions):
+                """
+                Combine the terms with the parallel resistors operator.
+                """
+                values = [compiled_term(all_variables, all_functions) for compiled_term in compiled_terms]
+                if not any(isinstance(value, numpy.ndarray) for value in values):
+                    return eval_parallel(values)
+                has_zero = reduce(numpy.logical_or, [value == 0 for value in values])
+                return numpy.where(has_zero, float('nan'), 1. / sum(1. / value for value in values))
+            return compiled_parallel
+
+        elif node_name in ('product', 'sum'):
+            if node_name == 'product':
+                ops = {'*': operator.mul, '/': operator.truediv}
+                total_start = 1.0
+                current_op = operator.mul
+            else:
+                ops = {'+': operator.add, '-': operator.sub}
+                total_start = 0.0
+                current_op = operator.add
+
+            compiled_terms = []
+            for child in node:
+                if isinstance(child, ParseResults):
+                    compiled_terms.append((current_op, self._compile_node(child)))
+                else:
+                    current_op = ops[child]
+
+            def compiled_operation(all_variables, all_functions):
+                """
+                Add or multiply the terms, applying their operators.
+                """
+                total = total_start
+                for term_op, compiled_term in compiled_terms:
+                    total = term_op(total, compiled_term(all_variables, all_functions))
+                return total
+            return compiled_operation
+
+        else:  # pragma: no cover
+            raise Exception(u"Unknown branch name '{}'".format(node_name))
+
+    def _all_variables_and_functions(self, variables, functions):
+        """
+        Return the dictionaries of the default and given variables and
+        functions, after checking that the expression uses none but them.
+        """
+        all_variables, all_functions = add_defaults(variables, functions, self.case_sensitive)
+        if self.math_interpreter is not None:
+            self.math_interpreter.check_variables(all_variables, all_functions)
+        return all_variables, all_functions
+
+    def evaluate(self, variables, functions):
+        """
+        Evaluate the expression for the given variables and functions, as
+        `evaluator` does.
+        """
+        all_variables, all_functions = self._all_variables_and_functions(variables, functions)
+        return self._evaluate(all_variables, all_functions)
+
+    def evaluate_samples(self, variables_list, functions):
+        """
+        Evaluate the expression for each of the given dictionaries of
+        variables, and return the list of values.
+
+        When the samples all have the same float or complex variables, and
+        the expression uses only VECTORIZED_FUNCTIONS, the expression is
+        evaluated for all the samples in one pass over numpy arrays of their
+        values.  If that pass does not produce finite values, the samples
+        are evaluated again one at a time, so the same values are returned,
+        and the same exceptions raised, as by `evaluate`.
+        """
+        if not variables_list:
+            return []
+
+        values = None
+        arrays = self._sample_arrays(variables_list)
+        if arrays is not None:
+            all_variables, all_functions = self._all_variables_and_functions(arrays, functions)
+            if self._is_vectorized(all_functions):
+                values = self._evaluate_vectorized(all_variables, all_functions, len(variables_list))
+
+        if values is None:
+            values = [self.evaluate(variables, functions) for variables in variables_list]
+        return values
+
+    @staticmethod
+    def _sample_arrays(variables_list):
+        """
+        Return a dictionary of numpy arrays of the values of each variable
+        in the given samples, or None if the samples do not all have the
+        same variables with float or complex values.
+        """
+        names = set(variables_list[0])
+        if any(set(variables) != names for variables in variables_list):
+            return None
+
+        arrays = {name: numpy.array([variables[name] for variables in variables_list]) for name in names}
+        # Arrays of integers could silently overflow.
+        if any(array.dtype.kind not in 'fc' for array in arrays.itervalues()):
+            return None
+        return arrays
+
+    def _is_vectorized(self, all_functions):
+        """
+        Return whether all the functions used in the expression are among
+        the VECTORIZED_FUNCTIONS.
+        """
+        if self.math_interpreter is None:
+            return True
+        return all(
+            all_functions[self.casify(name)] in VECTORIZED_FUNCTIONS
+            for name in self.math_interpreter.functions_used
+        )
+
+    def _evaluate_vectorized(self, all_variables, all_functions, num_samples):
+        """
+        Evaluate the expression for all the samples in the given variables
+        at once.  Return the list of values, or None if not all of them are
+        finite.
+        """
+        # pylint: disable=broad-except
+        try:
+            with numpy.errstate(all='ignore'):
+                values = self._evaluate(all_variables, all_functions)
+        except Exception:
+            return None
+
+        if not numpy.all(numpy.isfinite(values)):
+            return None
+        if isinstance(values, numpy.ndarray):
+            return values.tolist()
+        return [values] * num_samples
 
 
 class ParseAugmenter(object):
@@ -2,6 +2,8 @@
 Unit tests for calc.py
 """
 
+import cmath
+import math
 import unittest
 import numpy
 import calc
@@ -559,3 +561,94 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+
+class CompiledExpressionTest(unittest.TestCase):
+    """
+    Run tests for calc.compile_expression and the evaluation of compiled
+    expressions for many samples of their variables.
+    """
+
+    def test_compile_expression_cache(self):
+        """
+        Check that expressions are compiled once for each case sensitivity
+        """
+        compiled = calc.compile_expression('x^2 + 1')
+        self.assertIs(calc.compile_expression('x^2 + 1'), compiled)
+        self.assertIsNot(calc.compile_expression('x^2 + 1', case_sensitive=True), compiled)
+        self.assertEqual(compiled.evaluate({'x': 3.0}, {}), 10.0)
+
+    def test_evaluate_samples(self):
+        """
+        Check that evaluating many samples at once gives the values that are
+        computed for each sample with the math module
+        """
+        samples = [
+            {'x': x_value, 'y': y_value}
+            for x_value in (-2.5, -1.0, 0.0, 0.5, 3.0)
+            for y_value in (-1.5, 0.0, 2.0)
+        ]
+        references = {
+            'x + y': lambda x, y: x + y,
+            'x*y/3 - 2^x': lambda x, y: x * y / 3 - 2 ** x,
+            'sin(x)*cos(y) + exp(x)': lambda x, y: math.sin(x) * math.cos(y) + math.exp(x),
+            'e^(i*pi*x) + arctan(y)': lambda x, y: cmath.exp(1j * math.pi * x) + math.atan(y),
+            '5k*x + 3%*y': lambda x, y: 5000 * x + 0.03 * y,
+            'X + Y': lambda x, y: x + y,
+            '3': lambda x, y: 3.0,
+        }
+        for expr, reference in references.iteritems():
+            values = calc.compile_expression(expr).evaluate_samples(samples, {})
+            self.assertEqual(len(values), len(samples))
+            for value, sample in zip(values, samples):
+                self.assertAlmostEqual(value, reference(sample['x'], sample['y']), msg=expr)
+
+        values = calc.compile_expression('').evaluate_samples(samples, {})
+        self.assertEqual(len(values), len(samples))
+        self.assertTrue(all(math.isnan(value) for value in values))
+
+    def test_evaluate_samples_non_finite(self):
+        """
+        Check that when some of the samples have no finite value, the samples
+        are evaluated one at a time, and the finite values are unchanged
+        """
+        samples = [{'x': 4.0, 'y': 0.0}, {'x': 1.0, 'y': 1.0}, {'x': -4.0, 'y': 2.0}]
+
+        values = calc.compile_expression('x || y').evaluate_samples(samples, {})
+        self.assertTrue(math.isnan(values[0]))
+        self.assertEqual(values[1:], [0.5, 4.0])
+
+        values = calc.compile_expression('sqrt(x) + y').evaluate_samples(samples, {})
+        self.assertEqual(values[:2], [2.0, 2.0])
+        self.assertTrue(math.isnan(values[2]))
+
+    def test_evaluate_samples_not_vectorized(self):
+        """
+        Check the values of samples that cannot be evaluated as numpy arrays:
+        integers, which could overflow, samples with different variables,
+        and functions that are not vectorized
+        """
+        samples = [{'x': 2, 'y': 70}, {'x': 3, 'y': 2}]
+        self.assertEqual(calc.compile_expression('x^y').evaluate_samples(samples, {}), [2 ** 70, 9])
+
+        samples = [{'x': 1.0}, {'x': 2.0, 'y': 1.0}]
+        self.assertEqual(calc.compile_expression('2*x').evaluate_samples(samples, {}), [2.0, 4.0])
+
+        samples = [{'x': 0.5}, {'x': 2.0}]
+        values = calc.compile_expression('arccot(x)').evaluate_samples(samples, {})
+        for value, sample in zip(values, samples):
+            self.assertAlmostEqual(value, math.atan(1 / sample['x']))
+
+    def test_evaluate_samples_errors(self):
+        """
+        Check that the evaluator's errors are raised for samples for which
+        the expression cannot be evaluated
+        """
+        samples = [{'x': 1.0}, {'x': 2.0}, {'x': 3.0}]
+        with self.assertRaises(ZeroDivisionError):
+            calc.compile_expression('1/(x-2)').evaluate_samples(samples, {})
+        with self.assertRaises(ValueError):
+            calc.compile_expression('fact(x - 2.5)').evaluate_samples(samples, {})
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'y'):
+            calc.compile_expression('x + y').evaluate_samples(samples, {})
+        self.assertEqual(calc.compile_expression('x').evaluate_samples([], {}), [])
@@ -13,9 +13,11 @@ Main module which shows problems (of "capa" type).
 This is used by capa_module.
 """
 
+import hashlib
 import logging
 import os.path
 import re
+import threading
 from collections import OrderedDict
 from copy import deepcopy
 from datetime import datetime
@@ -29,7 +31,7 @@ import capa.inputtypes as inputtypes
 import capa.responsetypes as responsetypes
 import capa.xqueue_interface as xqueue_interface
 from capa.correctmap import CorrectMap
-from capa.safe_exec import safe_exec
+from capa.safe_exec import safe_exec, SafeExecDeferred
 from capa.util import contextualize_text, convert_files_to_filenames
 from openedx.core.djangolib.markup import HTML
 from xmodule.stringify import stringify_children
@@ -75,6 +77,50 @@ log = logging.getLogger(__name__)
 # main class for this module
 
 
+class ProblemTemplateCache(object):
+    """
+    A thread-safe, least-recently-used cache of problem templates, for use
+    as the `problem_template_cache` of a LoncapaSystem.
+
+    A problem template is the state of a LoncapaProblem that depends only on
+    its XML, seed and course: the XML tree after includes are processed,
+    and the context produced by the problem's scripts.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._templates = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Return the template cached for the given key, or None.
+        """
+        with self._lock:
+            template = self._templates.pop(key, None)
+            if template is not None:
+                self._templates[key] = template
+            return template
+
+    def set(self, key, template):
+        """
+        Cache the given template for the given key.
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._templates.pop(key, None)
+            self._templates[key] = template
+            while len(self._templates) > self.max_size:
+                self._templates.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove all cached templates.
+        """
+        with self._lock:
+            self._templates.clear()
+
+
 class LoncapaSystem(object):
     """
     An encapsulation of resources needed from the outside.
@@ -86,6 +132,9 @@ class LoncapaSystem(object):
     Attributes:
         i18n: an object implementing the `gettext.Translations` interface so
             that we can use `.ugettext` to localize strings.
+        problem_template_cache: an optional ProblemTemplateCache, so that
+            problems with the same XML and seed need not be parsed and have
+            their scripts executed again.
 
     See :class:`ModuleSystem` for documentation of other attributes.
 
@@ -105,7 +154,8 @@ class LoncapaSystem(object):
         seed,      # Why do we do this if we have self.seed?
         STATIC_URL,                                     # pylint: disable=invalid-name
         xqueue,
-        matlab_api_key=None
+        matlab_api_key=None,
+        problem_template_cache=None,
     ):
         self.ajax_url = ajax_url
         self.anonymous_student_id = anonymous_student_id
@@ -121,6 +171,7 @@ class LoncapaSystem(object):
         self.STATIC_URL = STATIC_URL                    # pylint: disable=invalid-name
         self.xqueue = xqueue
         self.matlab_api_key = matlab_api_key
+        self.problem_template_cache = problem_template_cache
 
 
 class LoncapaProblem(object):
@@ -176,19 +227,34 @@ class LoncapaProblem(object):
         problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
         self.problem_text = problem_text
 
-        # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
+        template_cache = self.capa_system.problem_template_cache
+        template_key = self._template_key(minimal_init) if template_cache is not None else None
+        template = template_cache.get(template_key) if template_key is not None else None
+        if template is not None:
+            # start from a copy of the cached template, since the tree and context
+            # are modified while the problem is preprocessed and graded
+            tree, context = template
+            self.tree = deepcopy(tree)
+            self.context = deepcopy(context)
+            if 'anonymous_student_id' in self.context:
+                self.context['anonymous_student_id'] = self.capa_system.anonymous_student_id
+        else:
+            # parse problem XML file into an element tree
+            self.tree = etree.XML(problem_text)
 
-        self.make_xml_compatible(self.tree)
+            self.make_xml_compatible(self.tree)
 
-        # handle any <include file="foo"> tags
-        self._process_includes()
+            # handle any <include file="foo"> tags
+            self._process_includes()
 
-        # construct script processor context (eg for customresponse problems)
-        if minimal_init:
-            self.context = {}
-        else:
-            self.context = self._extract_context(self.tree)
+            # construct script processor context (eg for customresponse problems)
+            if minimal_init:
+                self.context = {}
+            else:
+                self.context = self._extract_context(self.tree)
+
+            if template_key is not None:
+                template_cache.set(template_key, (deepcopy(self.tree), deepcopy(self.context)))
 
         # Pre-parse the XML tree: modifies it to add ID's and perform some in-place
         # transformations.  This also creates the dict (self.responders) of Response
@@ -214,6 +280,44 @@ class LoncapaProblem(object):
 
             self.extracted_tree = self._extract_html(self.tree)
 
+    def _template_key(self, minimal_init):
+        """
+        Return the key of the template of this problem in the
+        problem_template_cache.
+
+        The template depends on the problem XML and seed, and on the course
+        files that the XML may include or that its scripts may import.  The
+        results of the scripts depend on the learner's anonymous id only if
+        the scripts refer to it.
+        """
+        key_parts = [
+            self.problem_text,
+            self.seed,
+            minimal_init,
+            getattr(self.capa_system.filestore, 'root_path', None),
+            self.capa_system.DEBUG,
+        ]
+        if 'anonymous_student_id' in self.problem_text:
+            key_parts.append(self.capa_system.anonymous_student_id)
+        if not minimal_init and '<script' in self.problem_text:
+            zip_lib = self._get_python_lib_zip()
+            key_parts.append(hashlib.sha1(zip_lib).hexdigest() if zip_lib is not None else None)
+
+        key_hash = hashlib.sha1()
+        for key_part in key_parts:
+            key_hash.update(repr(key_part))
+        return key_hash.hexdigest()
+
+    def _get_python_lib_zip(self):
+        """
+        Return the contents of the course's python_lib.zip, or None.  The
+        contents are fetched only once.
+        """
+        if not hasattr(self, '_python_lib_zip'):
+            zip_lib = self.capa_system.get_python_lib_zip()
+            self._python_lib_zip = zip_lib  # pylint: disable=attribute-defined-outside-init
+        return self._python_lib_zip
+
     def make_xml_compatible(self, tree):
         """
         Adjust tree xml in-place for compatibility before creating
@@ -724,7 +828,7 @@ class LoncapaProblem(object):
         extra_files = []
         if all_code:
             # An asset named python_lib.zip can be imported by Python code.
-            zip_lib = self.capa_system.get_python_lib_zip()
+            zip_lib = self._get_python_lib_zip()
             if zip_lib is not None:
                 extra_files.append(("python_lib.zip", zip_lib))
                 python_path.append("python_lib.zip")
@@ -740,6 +844,9 @@ class LoncapaProblem(object):
                     slug=self.problem_id,
                     unsafely=self.capa_system.can_execute_unsafe_code(),
                 )
+            except SafeExecDeferred:
+                # Not an error: the script will be run with a batch of others.
+                raise
             except Exception as err:
                 log.exception("Error while execing script code: " + all_code)
                 msg = "Error while executing script code: %s" % str(err).replace('<', '&lt;')
@@ -7,6 +7,12 @@ from . import lazymod
 from dogapi import dog_stats_api
 
 import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -49,6 +55,82 @@ for name, modname in ASSUMED_IMPORTS:
 
 LAZY_IMPORTS = "".join(LAZY_IMPORTS)
 
+# The code that runs a batch of jobs in a single sandbox.  Each job is run in
+# a fresh globals dictionary, and its JSON-safe globals (or the message of the
+# exception it raised) become its result.
+#
+# After each job, sys.modules is restored to what it was before the job, so
+# that the next job starts as a separate execution would: CODE_PROLOG replaces
+# the "random" module with a seeded stand-in, and a module imported by a job
+# (e.g. from python_lib.zip) may hold on to that job's stand-in.  Installed
+# libraries that a job imported are kept for the later jobs, unless they hold
+# on to the job's stand-in, so that numpy and the like are imported only once.
+BATCH_CODE = """\
+import json
+import os
+import sys
+
+INSTALLED_PREFIXES = tuple(set(
+    os.path.abspath(prefix)
+    for prefix in (sys.prefix, sys.exec_prefix, getattr(sys, "real_prefix", sys.prefix))
+))
+
+def is_shared_module(module, job_random):
+    filename = getattr(module, "__file__", None)
+    if filename is not None and not os.path.abspath(filename).startswith(INSTALLED_PREFIXES):
+        return False
+    return not any(
+        value is job_random or getattr(value, "__self__", None) is job_random
+        for value in getattr(module, "__dict__", {}).itervalues()
+    )
+
+def restore_modules(modules):
+    job_random = sys.modules.get("random")
+    for name, module in sys.modules.items():
+        if name not in modules and not is_shared_module(module, job_random):
+            del sys.modules[name]
+    sys.modules.update(modules)
+
+def run_batch_job(job_code, job_globals):
+    modules = dict(sys.modules)
+    try:
+        exec compile(job_code, "<jailed code>", "exec", 0, True) in job_globals
+    except Exception as e:
+        return "{0.__class__.__name__}: {0!s}".format(e), None
+    finally:
+        restore_modules(modules)
+    results = {}
+    for name, value in job_globals.iteritems():
+        if name == "__builtins__" or not isinstance(value, BATCH_RESULT_TYPES):
+            continue
+        try:
+            json.dumps(value)
+        except Exception:
+            continue
+        results[name] = value
+    return None, results
+
+BATCH_RESULT_TYPES = (type(None), int, long, float, str, unicode, list, tuple, dict)
+batch_results = [run_batch_job(job_code, job_globals) for job_code, job_globals in batch_jobs]
+del batch_jobs
+"""
+
+# The number of jobs that are run together by a SafeExecBatch.  All the jobs
+# of a batch share the sandbox's limits, so this should stay small.
+DEFAULT_BATCH_SIZE = 20
+
+# The SafeExecBatch of each thread, if any.
+_batch_state = threading.local()
+
+
+class SafeExecDeferred(SafeExecException):
+    """
+    Raised by `safe_exec` in place of the result of an execution that has been
+    deferred to a SafeExecBatch.  This isn't an error of the executed code, so
+    callers need not report it.
+    """
+    pass
+
 
 def update_hash(hasher, obj):
     """
@@ -73,6 +155,25 @@ def update_hash(hasher, obj):
         hasher.update(repr(obj))
 
 
+def _cache_key(code, globals_dict, random_seed):
+    """
+    Return the cache key of the execution of `code` with `globals_dict` and
+    `random_seed`.
+    """
+    safe_globals = json_safe(globals_dict)
+    md5er = hashlib.md5()
+    md5er.update(repr(code))
+    update_hash(md5er, safe_globals)
+    return "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
+
+
+def _full_code(code, random_seed):
+    """
+    Return `code` with the prolog that establishes Capa's Python environment.
+    """
+    return CODE_PROLOG % random_seed + LAZY_IMPORTS + code
+
+
 @dog_stats_api.timed('capa.safe_exec.time')
 def safe_exec(
     code,
@@ -109,15 +210,19 @@ def safe_exec(
 
     If `unsafely` is true, then the code will actually be executed without sandboxing.
 
+    If the calling thread is collecting executions in a SafeExecBatch, the
+    batch's results are used, and executions are deferred to the batch while it
+    is deferring.
+
     """
-    # Check the cache for a previous result.
-    if cache:
-        safe_globals = json_safe(globals_dict)
-        md5er = hashlib.md5()
-        md5er.update(repr(code))
-        update_hash(md5er, safe_globals)
-        key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
-        cached = cache.get(key)
+    batch = getattr(_batch_state, 'batch', None)
+
+    # Check the cache and the batch for a previous result.
+    if cache or batch:
+        key = _cache_key(code, globals_dict, random_seed)
+        cached = cache.get(key) if cache else None
+        if cached is None and batch:
+            cached = batch.get_result(key)
         if cached is not None:
             # We have a cached result.  The result is a pair: the exception
             # message, if any, else None; and the resulting globals dictionary.
@@ -126,9 +231,8 @@ def safe_exec(
             if emsg:
                 raise SafeExecException(emsg)
             return
-
-    # Create the complete code we'll run.
-    code_prolog = CODE_PROLOG % random_seed
+        if batch and batch.is_deferring:
+            batch.defer(key, code, globals_dict, random_seed, python_path, extra_files, cache, slug, unsafely)
 
     # Decide which code executor to use.
     if unsafely:
@@ -139,7 +243,7 @@ def safe_exec(
     # Run the code!  Results are side effects in globals_dict.
     try:
         exec_fn(
-            code_prolog + LAZY_IMPORTS + code, globals_dict,
+            _full_code(code, random_seed), globals_dict,
             python_path=python_path, extra_files=extra_files, slug=slug,
         )
     except SafeExecException as e:
@@ -156,3 +260,155 @@ def safe_exec(
     # If an exception happened, raise it now.
     if emsg:
         raise e
+
+
+def safe_exec_batch(jobs, python_path=None, extra_files=None, cache=None, slug=None, unsafely=False):
+    """
+    Execute many pieces of python code safely, in a single sandbox.
+
+    `jobs` is a list of (code, globals_dict, random_seed) triples.  Each piece
+    of code is executed with its own globals and random seed, as by
+    `safe_exec`, and the changes it makes to its globals are visible in its
+    `globals_dict` when this function returns.
+
+    The other arguments are shared by all the jobs, and are as for `safe_exec`.
+    Results are cached with the same keys as `safe_exec` uses.
+
+    Returns a list with, for each job, the SafeExecException that its code
+    raised, or None.  Raises SafeExecException if the sandbox itself fails,
+    for example by exceeding its limits, in which case no job has run.
+
+    """
+    errors = [None] * len(jobs)
+    keys = [None] * len(jobs)
+    pending = []
+    for index, (code, globals_dict, random_seed) in enumerate(jobs):
+        if cache:
+            keys[index] = _cache_key(code, globals_dict, random_seed)
+            cached = cache.get(keys[index])
+            if cached is not None:
+                emsg, cleaned_results = cached
+                globals_dict.update(cleaned_results)
+                errors[index] = SafeExecException(emsg) if emsg else None
+                continue
+        pending.append(index)
+
+    if not pending:
+        return errors
+
+    exec_fn = codejail_not_safe_exec if unsafely else codejail_safe_exec
+    batch_globals = {
+        'batch_jobs': [
+            (_full_code(jobs[index][0], jobs[index][2]), json_safe(jobs[index][1]))
+            for index in pending
+        ],
+    }
+    with dog_stats_api.timer('capa.safe_exec.batch.time'):
+        exec_fn(BATCH_CODE, batch_globals, python_path=python_path, extra_files=extra_files, slug=slug)
+
+    for index, (emsg, cleaned_results) in zip(pending, batch_globals['batch_results']):
+        if cleaned_results:
+            jobs[index][1].update(cleaned_results)
+        errors[index] = SafeExecException(emsg) if emsg else None
+        if cache:
+            cache.set(keys[index], (emsg, json_safe(jobs[index][1])))
+
+    return errors
+
+
+class SafeExecBatch(object):
+    """
+    Collects the executions that `safe_exec` is asked for, so that they can be
+    run together with `safe_exec_batch`.
+
+    While the batch is deferring, each execution that has no result yet is
+    recorded, and `safe_exec` raises SafeExecDeferred instead of running it.
+    Work done while deferring is a rehearsal, whose results should be thrown
+    away.  `run_pending` then runs the recorded executions in batches, and
+    while the batch is active, `safe_exec` uses their results instead of
+    running the same code again.
+
+    Usage::
+
+        with SafeExecBatch() as batch:
+            with batch.deferring():
+                rehearse_the_work()
+            batch.run_pending()
+            do_the_work()
+
+    """
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.is_deferring = False
+        self._pending = OrderedDict()
+        self._results = {}
+        self._previous_batch = None
+
+    def __enter__(self):
+        self._previous_batch = getattr(_batch_state, 'batch', None)
+        _batch_state.batch = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _batch_state.batch = self._previous_batch
+
+    @contextmanager
+    def deferring(self):
+        """
+        Context manager during which executions are deferred to this batch.
+        """
+        self.is_deferring = True
+        try:
+            yield self
+        finally:
+            self.is_deferring = False
+
+    def get_result(self, key):
+        """
+        Return the (exception message, results) pair of the execution with the
+        given cache key, or None.
+        """
+        return self._results.get(key)
+
+    def defer(self, key, code, globals_dict, random_seed, python_path, extra_files, cache, slug, unsafely):
+        """
+        Record an execution to be run by `run_pending`, and raise
+        SafeExecDeferred in place of its result.
+        """
+        options = (
+            tuple(python_path or ()),
+            tuple(tuple(extra_file) for extra_file in extra_files or ()),
+            cache, slug, unsafely,
+        )
+        self._pending.setdefault(key, (code, json_safe(globals_dict), random_seed, options))
+        raise SafeExecDeferred("Execution deferred to a batch")
+
+    def run_pending(self):
+        """
+        Run the recorded executions, in batches of executions that share their
+        options.  Returns the number of executions that were run.
+
+        If a batch fails as a whole, its executions are left to run one at a
+        time when they are asked for again.
+        """
+        groups = OrderedDict()
+        for key, (code, globals_dict, random_seed, options) in self._pending.iteritems():
+            groups.setdefault(options, []).append((key, (code, globals_dict, random_seed)))
+        self._pending.clear()
+
+        executed = 0
+        for (python_path, extra_files, cache, slug, unsafely), keyed_jobs in groups.iteritems():
+            for start in xrange(0, len(keyed_jobs), self.batch_size):
+                keys, jobs = zip(*keyed_jobs[start:start + self.batch_size])
+                try:
+                    errors = safe_exec_batch(
+                        list(jobs), python_path=python_path, extra_files=extra_files,
+                        cache=cache, slug=slug, unsafely=unsafely,
+                    )
+                except SafeExecException:
+                    log.warning("Batch of %d executions for %s failed", len(jobs), slug, exc_info=True)
+                    continue
+                for key, (_code, globals_dict, _random_seed), error in zip(keys, jobs, errors):
+                    self._results[key] = (error.message if error else None, json_safe(globals_dict))
+                executed += len(jobs)
+        return executed
@@ -4,12 +4,14 @@ import hashlib
 import os
 import os.path
 import random
+import sys
 import textwrap
 import unittest
 
+from mock import patch
 from nose.plugins.skip import SkipTest
 
-from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec import safe_exec, safe_exec_batch, update_hash, SafeExecBatch, SafeExecDeferred
 from codejail.safe_exec import SafeExecException
 from codejail.jail_code import is_configured
 
@@ -177,6 +179,72 @@ class TestSafeExecCaching(unittest.TestCase):
                 self.fail("Tried executing code with non-ASCII unicode: {0}".format(code))
 
 
+class TestSafeExecBatch(unittest.TestCase):
+    """Test running many pieces of code in one sandbox."""
+    # The module, which the safe_exec function hides in the package.
+    safe_exec_module = sys.modules[SafeExecBatch.__module__]
+
+    def test_same_results_as_safe_exec(self):
+        code = "a = random.randint(0, 999)\nb = a / 2\n"
+        jobs = [(code, {'c': seed}, seed) for seed in range(5)]
+        errors = safe_exec_batch(jobs)
+        self.assertEqual(errors, [None] * 5)
+        for _code, g, seed in jobs:
+            expected = {'c': seed}
+            safe_exec(code, expected, random_seed=seed)
+            self.assertEqual(g, expected)
+
+    def test_imported_modules_are_not_shared(self):
+        # A module imported by one job must not keep that job's seeded random
+        # module for the next jobs.
+        pylib = os.path.dirname(__file__) + "/test_files/pylib"
+        self.addCleanup(sys.modules.pop, 'seeded_random', None)
+        jobs = [("import seeded_random\na = seeded_random.draw()", {}, seed) for seed in range(3)]
+        errors = safe_exec_batch(jobs, python_path=[pylib])
+        self.assertEqual(errors, [None] * 3)
+        for _code, g, seed in jobs:
+            self.assertEqual(g['a'], random.Random(seed).randint(0, 10 ** 9))
+        self.assertIs(sys.modules['random'], random)
+
+    def test_jobs_are_isolated(self):
+        jobs = [("a = 1", {}, 1), ("b = a", {}, 1), ("1/0", {}, 1), ("c = 3", {}, 1)]
+        errors = safe_exec_batch(jobs)
+        self.assertEqual(jobs[0][1]['a'], 1)
+        self.assertIn("NameError", errors[1].message)
+        self.assertIn("ZeroDivisionError", errors[2].message)
+        self.assertEqual(jobs[3][1]['c'], 3)
+        self.assertIsNone(errors[3])
+
+    def test_shared_cache(self):
+        cache = {}
+        safe_exec_batch([("a = int(math.pi)", {}, 1)], cache=DictCache(cache))
+        self.assertEqual(cache.values()[0], (None, {'a': 3}))
+
+        # safe_exec uses the results of safe_exec_batch
+        cache[cache.keys()[0]] = (None, {'a': 17})
+        g = {}
+        safe_exec("a = int(math.pi)", g, random_seed=1, cache=DictCache(cache))
+        self.assertEqual(g['a'], 17)
+
+    def test_deferred_executions(self):
+        with SafeExecBatch(batch_size=2) as batch:
+            with batch.deferring():
+                for x in range(3):
+                    with self.assertRaises(SafeExecDeferred):
+                        safe_exec("y = x * 2", {'x': x}, random_seed=1)
+
+            with patch.object(self.safe_exec_module, 'safe_exec_batch', wraps=safe_exec_batch) as mock_batch:
+                self.assertEqual(batch.run_pending(), 3)
+            self.assertEqual(mock_batch.call_count, 2)
+
+            with patch.object(self.safe_exec_module, 'codejail_safe_exec') as mock_exec:
+                for x in range(3):
+                    g = {'x': x}
+                    safe_exec("y = x * 2", g, random_seed=1)
+                    self.assertEqual(g['y'], x * 2)
+            self.assertFalse(mock_exec.called)
+
+
 class TestUpdateHash(unittest.TestCase):
     """Test the safe_exec.update_hash function to be sure it canonicalizes properly."""
 
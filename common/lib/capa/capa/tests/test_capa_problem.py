@@ -4,9 +4,13 @@ Test capa problem.
 import ddt
 import textwrap
 from lxml import etree
+from mock import patch
 import unittest
 
-from capa.tests.helpers import new_loncapa_problem
+from capa.capa_problem import ProblemTemplateCache
+from capa.safe_exec import SafeExecBatch, SafeExecDeferred
+import capa.capa_problem
+from capa.tests.helpers import new_loncapa_problem, test_capa_system
 
 
 @ddt.ddt
@@ -590,3 +594,73 @@ class CAPAMultiInputProblemTest(unittest.TestCase):
             description_element = multi_inputs_group.xpath('//p[@id="{}"]'.format(description_id))
             self.assertEqual(len(description_element), 1)
             self.assertEqual(description_element[0].text, descriptions[index])
+
+
+class ProblemTemplateCacheTest(unittest.TestCase):
+    """
+    Tests for the reuse of preprocessed problems through a ProblemTemplateCache.
+    """
+    xml = textwrap.dedent("""
+        <problem>
+            <script type="loncapa/python">
+            answer = random.randint(0, 1000)
+            </script>
+            <customresponse cfn="check" expect="$answer">
+                <textline/>
+            </customresponse>
+        </problem>
+    """)
+
+    def setUp(self):
+        super(ProblemTemplateCacheTest, self).setUp()
+        self.capa_system = test_capa_system()
+        self.capa_system.problem_template_cache = ProblemTemplateCache(max_size=10)
+
+    def new_problem(self, seed=1, anonymous_student_id='student'):
+        """
+        Construct a problem from `self.xml` using the cache.
+        """
+        self.capa_system.anonymous_student_id = anonymous_student_id
+        return new_loncapa_problem(self.xml, capa_system=self.capa_system, seed=seed)
+
+    def test_same_xml_and_seed(self):
+        first_problem = self.new_problem()
+        with patch.object(capa.capa_problem, 'safe_exec') as mock_safe_exec:
+            second_problem = self.new_problem(anonymous_student_id='other_student')
+        self.assertFalse(mock_safe_exec.called)
+
+        self.assertEqual(second_problem.context['answer'], first_problem.context['answer'])
+        self.assertEqual(second_problem.context['anonymous_student_id'], 'other_student')
+        self.assertEqual(etree.tostring(second_problem.tree), etree.tostring(first_problem.tree))
+
+        # the problems do not share their state
+        self.assertIsNot(second_problem.tree, first_problem.tree)
+        second_problem.context['answer'] = 'changed'
+        self.assertNotEqual(self.new_problem().context['answer'], 'changed')
+
+    def test_different_seed(self):
+        self.new_problem(seed=1)
+        with patch.object(capa.capa_problem, 'safe_exec') as mock_safe_exec:
+            self.new_problem(seed=2)
+        self.assertTrue(mock_safe_exec.called)
+
+    def test_cache_size(self):
+        self.capa_system.problem_template_cache = ProblemTemplateCache(max_size=1)
+        self.new_problem(seed=1)
+        self.new_problem(seed=2)
+        with patch.object(capa.capa_problem, 'safe_exec') as mock_safe_exec:
+            self.new_problem(seed=1)
+        self.assertTrue(mock_safe_exec.called)
+
+
+class DeferredScriptTest(unittest.TestCase):
+    """
+    Tests for problems whose script is deferred to a SafeExecBatch.
+    """
+    def test_deferred_script_is_not_logged(self):
+        with SafeExecBatch() as batch:
+            with batch.deferring():
+                with patch.object(capa.capa_problem, 'log') as mock_log:
+                    with self.assertRaises(SafeExecDeferred):
+                        new_loncapa_problem(ProblemTemplateCacheTest.xml)
+        self.assertFalse(mock_log.exception.called)
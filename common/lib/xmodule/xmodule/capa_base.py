@@ -20,9 +20,10 @@ except ImportError:
     dog_stats_api = None
 from pytz import utc
 
-from capa.capa_problem import LoncapaProblem, LoncapaSystem
+from capa.capa_problem import LoncapaProblem, LoncapaSystem, ProblemTemplateCache
 from capa.inputtypes import Status
 from capa.responsetypes import StudentInputError, ResponseError, LoncapaProblemError
+from capa.safe_exec import SafeExecDeferred
 from capa.util import convert_files_to_filenames, get_inner_html_from_xpath
 from xblock.fields import Boolean, Dict, Float, Integer, Scope, String, XMLString
 from xblock.scorable import ScorableXBlockMixin, Score
@@ -50,6 +51,9 @@ MAX_RANDOMIZATION_BINS = 1000
 
 FEATURES = getattr(settings, 'FEATURES', {})
 
+# Preprocessed problems shared by all the capa problems of this process
+PROBLEM_TEMPLATE_CACHE = ProblemTemplateCache(getattr(settings, 'CAPA_PROBLEM_TEMPLATE_CACHE_SIZE', 0))
+
 
 def randomization_bin(seed, problem_id):
     """
@@ -269,6 +273,10 @@ class CapaMixin(ScorableXBlockMixin, CapaFields):
             if self.seed is None:
                 self.seed = self.lcp.seed
 
+        except SafeExecDeferred:
+            # Not an error: the problem's code will be run with a batch of others,
+            # and the problem loaded again after that.
+            raise
         except Exception as err:  # pylint: disable=broad-except
             msg = u'cannot create LoncapaProblem {loc}: {err}'.format(
                 loc=self.location.to_deprecated_string(), err=err)
@@ -346,7 +354,8 @@ class CapaMixin(ScorableXBlockMixin, CapaFields):
             seed=self.runtime.seed,      # Why do we do this if we have self.seed?
             STATIC_URL=self.runtime.STATIC_URL,
             xqueue=self.runtime.xqueue,
-            matlab_api_key=self.matlab_api_key
+            matlab_api_key=self.matlab_api_key,
+            problem_template_cache=PROBLEM_TEMPLATE_CACHE,
         )
 
         ### @jbau 2-21-14 edx-west HACK for deanonymized email HERE ###
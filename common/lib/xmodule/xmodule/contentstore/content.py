@@ -294,6 +294,12 @@ class StaticContent(object):
     def stream_data(self):
         yield self._data
 
+    def stream_data_in_range(self, first_byte, last_byte):
+        """
+        Stream the data between first_byte and last_byte (included)
+        """
+        yield self._data[first_byte:last_byte + 1]
+
     @staticmethod
     def serialize_asset_key_with_slash(asset_key):
         """
@@ -316,7 +322,7 @@ class StaticContentStream(StaticContent):
 
     def stream_data(self):
         while True:
-            chunk = self._stream.read(STREAM_DATA_CHUNK_SIZE)
+            chunk = self._read_chunk()
             if len(chunk) == 0:
                 break
             yield chunk
@@ -326,16 +332,27 @@ class StaticContentStream(StaticContent):
         Stream the data between first_byte and last_byte (included)
         """
         self._stream.seek(first_byte)
-        position = first_byte
-        while True:
-            if last_byte < position + STREAM_DATA_CHUNK_SIZE - 1:
-                chunk = self._stream.read(last_byte - position + 1)
-                yield chunk
+        remaining = last_byte - first_byte + 1
+        while remaining > 0:
+            chunk = self._read_chunk()
+            if len(chunk) == 0:
                 break
-            chunk = self._stream.read(STREAM_DATA_CHUNK_SIZE)
-            position += STREAM_DATA_CHUNK_SIZE
+            if len(chunk) > remaining:
+                chunk = chunk[:remaining]
+            remaining -= len(chunk)
             yield chunk
 
+    def _read_chunk(self):
+        """
+        Reads the next chunk of data from the stream.
+
+        Streams that support it (such as GridFS files) are read a whole stored chunk at a
+        time, which avoids buffering and copying the data as smaller reads would.
+        """
+        if hasattr(self._stream, 'readchunk'):
+            return self._stream.readchunk()
+        return self._stream.read(STREAM_DATA_CHUNK_SIZE)
+
     def close(self):
         self._stream.close()
 
@@ -12,6 +12,7 @@ import sys
 from collections import OrderedDict
 from datetime import datetime
 
+import numpy
 from contracts import contract
 from pytz import UTC
 
@@ -194,6 +195,105 @@ def grader_from_conf(conf):
     return WeightedSubsectionsGrader(subgraders)
 
 
+class ScoreMatrix(object):
+    """
+    The graded scores of many students, arranged for each assignment type as
+    students x subsections arrays of earned and possible points, for grading
+    all of the students at once with CourseGrader.grade_matrix.
+
+    Cells whose possible points are not positive are treated as subsections
+    that are absent from the student's grade sheet, just as subsections
+    without any possible points are left out of the grade sheets given to
+    CourseGrader.grade.
+    """
+    def __init__(self, num_students):
+        self.num_students = num_students
+        self._scores = {}
+
+    @classmethod
+    def from_grade_sheets(cls, grade_sheets):
+        """
+        Returns a ScoreMatrix with a row for each of the given grade sheets,
+        as they would be given to CourseGrader.grade.
+        """
+        score_matrix = cls(len(grade_sheets))
+        assignment_types = set()
+        for grade_sheet in grade_sheets:
+            assignment_types.update(grade_sheet)
+
+        for assignment_type in assignment_types:
+            rows = [grade_sheet.get(assignment_type, {}).values() for grade_sheet in grade_sheets]
+            num_sections = max(len(row) for row in rows)
+            earned = numpy.zeros((len(rows), num_sections))
+            possible = numpy.zeros((len(rows), num_sections))
+            display_names = numpy.empty((len(rows), num_sections), dtype=object)
+            for index, row in enumerate(rows):
+                for section_index, subsection_grade in enumerate(row):
+                    earned[index, section_index] = subsection_grade.graded_total.earned
+                    possible[index, section_index] = subsection_grade.graded_total.possible
+                    display_names[index, section_index] = subsection_grade.display_name
+            score_matrix.add(assignment_type, earned, possible, display_names)
+
+        return score_matrix
+
+    def add(self, assignment_type, earned, possible, display_names):
+        """
+        Adds the scores of the students for the subsections of the given
+        assignment type.
+
+        Arguments:
+            assignment_type (str): The format of the subsections.
+            earned (array): students x subsections array of earned points.
+            possible (array): students x subsections array of possible points.
+            display_names: The display names of the subsections, either as
+                a sequence with an entry for each subsection or as a
+                students x subsections array.
+        """
+        earned = numpy.asarray(earned, dtype=float)
+        possible = numpy.asarray(possible, dtype=float)
+        if earned.shape != possible.shape or earned.shape[0] != self.num_students:
+            raise ValueError(
+                u"Expected earned and possible points of shape ({}, N), got {} and {}.".format(
+                    self.num_students, earned.shape, possible.shape,
+                )
+            )
+        display_names = numpy.array(display_names, dtype=object)
+        if display_names.ndim == 1:
+            display_names = numpy.array([display_names] * self.num_students, dtype=object)
+            display_names.shape = earned.shape
+        self._scores[assignment_type] = (earned, possible, display_names)
+
+    def get(self, assignment_type):
+        """
+        Returns a tuple of the earned points, possible points and display
+        names arrays for the given assignment type.
+        """
+        if assignment_type not in self._scores:
+            empty = numpy.zeros((self.num_students, 0))
+            return empty, empty, numpy.empty((self.num_students, 0), dtype=object)
+        return self._scores[assignment_type]
+
+
+class GradeMatrixResult(object):
+    """
+    The result of grading the students of a ScoreMatrix.
+
+    percent is an array with the final percentage of each student, while
+    indexing the result with a student's row returns the same dictionary
+    that CourseGrader.grade returns for the student's grade sheet.  Those
+    dictionaries are only created when they are accessed.
+    """
+    def __init__(self, percent, result_for_student):
+        self.percent = percent
+        self._result_for_student = result_for_student
+
+    def __len__(self):
+        return len(self.percent)
+
+    def __getitem__(self, index):
+        return self._result_for_student(index)
+
+
 class CourseGrader(object):
     """
     A course grader takes the totaled scores for each graded section (that a student has
@@ -242,6 +342,13 @@ class CourseGrader(object):
         '''Given a grade sheet, return a dict containing grading information'''
         raise NotImplementedError
 
+    def grade_matrix(self, score_matrix):
+        '''
+        Given a ScoreMatrix, return a GradeMatrixResult containing grading information
+        for all of its students, which is identical to calling grade for each of them.
+        '''
+        raise NotImplementedError
+
 
 class WeightedSubsectionsGrader(CourseGrader):
     """
@@ -263,13 +370,33 @@ class WeightedSubsectionsGrader(CourseGrader):
         self.subgraders = subgraders
 
     def grade(self, grade_sheet, generate_random_scores=False):
+        return self._combine_results(
+            [subgrader.grade(grade_sheet, generate_random_scores) for subgrader, _, _ in self.subgraders]
+        )
+
+    def grade_matrix(self, score_matrix):
+        total_percent = numpy.zeros(score_matrix.num_students)
+        subgrade_results = []
+        for subgrader, _, weight in self.subgraders:
+            subgrade_result = subgrader.grade_matrix(score_matrix)
+            total_percent += subgrade_result.percent * weight
+            subgrade_results.append(subgrade_result)
+
+        return GradeMatrixResult(
+            total_percent,
+            lambda index: self._combine_results([subgrade_result[index] for subgrade_result in subgrade_results]),
+        )
+
+    def _combine_results(self, subgrade_results):
+        """
+        Returns the grading information of a student, given the results of
+        the subgraders for the student.
+        """
         total_percent = 0.0
         section_breakdown = []
         grade_breakdown = OrderedDict()
 
-        for subgrader, assignment_type, weight in self.subgraders:
-            subgrade_result = subgrader.grade(grade_sheet, generate_random_scores)
-
+        for (_, assignment_type, weight), subgrade_result in zip(self.subgraders, subgrade_results):
             weighted_percent = subgrade_result['percent'] * weight
             section_detail = u"{0} = {1:.2%} of a possible {2:.2%}".format(assignment_type, weighted_percent, weight)
 
@@ -367,7 +494,7 @@ class AssignmentFormatGrader(CourseGrader):
             return aggregate_score, dropped_indices
 
         scores = grade_sheet.get(self.type, {}).values()
-        breakdown = []
+        sections = []
         for i in range(max(self.min_count, len(scores))):
             if i < len(scores) or generate_random_scores:
                 if generate_random_scores:  	# for debugging!
@@ -380,6 +507,83 @@ class AssignmentFormatGrader(CourseGrader):
                     possible = scores[i].graded_total.possible
                     section_name = scores[i].display_name
 
+                sections.append((earned, possible, section_name))
+            else:
+                sections.append(None)
+
+        breakdown = self._section_breakdown(sections)
+        total_percent, dropped_indices = total_with_drops(breakdown, self.drop_count)
+        return self._result(breakdown, total_percent, dropped_indices)
+
+    def grade_matrix(self, score_matrix):
+        earned, possible, display_names = score_matrix.get(self.type)
+        num_students = score_matrix.num_students
+        rows = numpy.arange(num_students).reshape(num_students, 1)
+
+        # Move the scores of each student to the front of the student's
+        # row, keeping their order, so the sections are numbered just as
+        # the scores of the student's grade sheet.
+        present = possible > 0
+        order = numpy.argsort(~present, axis=1, kind='mergesort')
+        present = present[rows, order]
+        earned = earned[rows, order]
+        possible = possible[rows, order]
+        display_names = display_names[rows, order]
+        num_scores = present.sum(axis=1)
+        num_sections = numpy.maximum(num_scores, self.min_count)
+
+        # Sections that are not released yet have a percentage of 0.
+        width = max(self.min_count, earned.shape[1])
+        percent = numpy.zeros((num_students, width))
+        percent[:, :earned.shape[1]] = numpy.where(present, earned / numpy.where(present, possible, 1.0), 0.0)
+        in_breakdown = numpy.arange(width) < num_sections.reshape(num_students, 1)
+
+        # Drop the lowest percentages, the later of equal percentages first.
+        dropped = numpy.zeros((num_students, width), dtype=bool)
+        if self.drop_count > 0:
+            lowest_first = numpy.lexsort((
+                -numpy.arange(width) * numpy.ones((num_students, 1), dtype=int),
+                numpy.where(in_breakdown, percent, numpy.inf),
+            ))
+            dropped[rows, lowest_first[:, :self.drop_count]] = True
+            dropped &= in_breakdown
+
+        # Sum the kept percentages in the order of the sections so the
+        # totals are identical to those computed by grade.
+        kept = in_breakdown & ~dropped
+        total_percent = numpy.zeros(num_students)
+        for index in range(width):
+            total_percent += numpy.where(kept[:, index], percent[:, index], 0.0)
+        num_kept = num_sections - self.drop_count
+        total_percent = numpy.where(num_kept > 0, total_percent / numpy.maximum(num_kept, 1), total_percent)
+
+        def result_for_student(index):
+            """
+            Returns the grading information of the student in the given row.
+            """
+            sections = [
+                (float(earned[index, i]), float(possible[index, i]), display_names[index, i])
+                if i < num_scores[index] else None
+                for i in range(num_sections[index])
+            ]
+            return self._result(
+                self._section_breakdown(sections),
+                float(total_percent[index]),
+                numpy.flatnonzero(dropped[index]).tolist(),
+            )
+
+        return GradeMatrixResult(total_percent, result_for_student)
+
+    def _section_breakdown(self, sections):
+        """
+        Returns the breakdown of the given sections, each of which is either
+        a tuple of (earned, possible, section_name), or None if the section
+        is not released yet.
+        """
+        breakdown = []
+        for i, section in enumerate(sections):
+            if section is not None:
+                earned, possible, section_name = section
                 percentage = earned / possible
                 summary_format = u"{section_type} {index} - {name} - {percent:.0%} ({earned:.3n}/{possible:.3n})"
                 summary = summary_format.format(
@@ -404,9 +608,13 @@ class AssignmentFormatGrader(CourseGrader):
 
             breakdown.append({'percent': percentage, 'label': short_label,
                               'detail': summary, 'category': self.category})
+        return breakdown
 
-        total_percent, dropped_indices = total_with_drops(breakdown, self.drop_count)
-
+    def _result(self, breakdown, total_percent, dropped_indices):
+        """
+        Returns the grading information for the given section breakdown,
+        total percentage and indices of dropped sections.
+        """
         for dropped_index in dropped_indices:
             breakdown[dropped_index]['mark'] = {
                 'detail': u"The lowest {drop_count} {section_type} scores are dropped.".format(
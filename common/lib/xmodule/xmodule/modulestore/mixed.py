@@ -593,6 +593,18 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         except NotImplementedError:
             return None, None
 
+    def get_structure_changes(self, course_key, from_version, **kwargs):
+        """
+        Returns the blocks that changed between the structure with the
+        given version and the current structure of the given course.
+
+        Raises:
+            NotImplementedError if the course's modulestore does not
+                version course structures.
+        """
+        store = self._verify_modulestore_support(course_key, 'get_structure_changes')
+        return store.get_structure_changes(course_key, from_version, **kwargs)
+
     def get_modulestore_type(self, course_id):
         """
         Returns a type which identifies which modulestore is servicing the given course_id.
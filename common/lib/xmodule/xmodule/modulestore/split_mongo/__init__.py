@@ -21,3 +21,7 @@ class BlockKey(namedtuple('BlockKey', 'type id')):
 
 
 CourseEnvelope = namedtuple('CourseEnvelope', 'course_key structure')
+
+# The usage keys of the blocks that changed between two versions of a course
+# structure, as returned by get_structure_changes.
+StructureChanges = namedtuple('StructureChanges', 'changed changed_content changed_settings removed')
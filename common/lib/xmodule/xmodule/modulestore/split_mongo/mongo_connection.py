@@ -4,10 +4,12 @@ Segregation of pymongo functions from the data modeling mechanisms for split mod
 import datetime
 import cPickle as pickle
 import math
+import threading
 import zlib
 import pymongo
 import pytz
 import re
+from collections import Counter, OrderedDict
 from contextlib import contextmanager
 from time import time
 
@@ -15,6 +17,7 @@ from time import time
 from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
 
 try:
+    from django.conf import settings
     from django.core.cache import caches, InvalidCacheBackendError
     DJANGO_AVAILABLE = True
 except ImportError:
@@ -44,6 +47,90 @@ def get_cache(alias):
     return caches[alias]
 
 
+# Default number of bytes (measured as the pickled size of each structure) that
+# a single process may use to hold course structures in memory.
+DEFAULT_LOCAL_STRUCTURE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+_LOCAL_STRUCTURE_CACHE = None
+_LOCAL_STRUCTURE_CACHE_LOCK = threading.Lock()
+
+
+def get_local_structure_cache():
+    """
+    Return the process-local :class:`StructureLRUCache`, or None if it has been
+    disabled by setting ``COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES`` to 0.
+
+    Note: The primary purpose of this is to mock the local cache in test_split_modulestore.py
+    """
+    global _LOCAL_STRUCTURE_CACHE  # pylint: disable=global-statement
+    if _LOCAL_STRUCTURE_CACHE is None:
+        with _LOCAL_STRUCTURE_CACHE_LOCK:
+            if _LOCAL_STRUCTURE_CACHE is None:
+                max_bytes = DEFAULT_LOCAL_STRUCTURE_CACHE_MAX_BYTES
+                if DJANGO_AVAILABLE:
+                    max_bytes = getattr(settings, 'COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES', max_bytes)
+                _LOCAL_STRUCTURE_CACHE = StructureLRUCache(max_bytes)
+
+    if _LOCAL_STRUCTURE_CACHE.max_bytes <= 0:
+        return None
+    return _LOCAL_STRUCTURE_CACHE
+
+
+_LOCAL_DEFINITION_CACHE = None
+_LOCAL_DEFINITION_CACHE_LOCK = threading.Lock()
+
+
+def get_local_definition_cache():
+    """
+    Return the process-local :class:`StructureLRUCache` of pickled definitions,
+    or None unless ``COURSE_DEFINITION_LOCAL_CACHE_MAX_BYTES`` is set.
+
+    Note: The primary purpose of this is to mock the local cache in test_split_modulestore.py
+    """
+    global _LOCAL_DEFINITION_CACHE  # pylint: disable=global-statement
+    if _LOCAL_DEFINITION_CACHE is None:
+        with _LOCAL_DEFINITION_CACHE_LOCK:
+            if _LOCAL_DEFINITION_CACHE is None:
+                max_bytes = 0
+                if DJANGO_AVAILABLE:
+                    max_bytes = getattr(settings, 'COURSE_DEFINITION_LOCAL_CACHE_MAX_BYTES', max_bytes)
+                _LOCAL_DEFINITION_CACHE = StructureLRUCache(max_bytes)
+
+    if _LOCAL_DEFINITION_CACHE.max_bytes <= 0:
+        return None
+    return _LOCAL_DEFINITION_CACHE
+
+
+# Lookup outcomes of CourseDefinitionCache, reported by get_definition_cache_stats.
+DEFINITION_LOCAL_HIT = 'local_hits'
+DEFINITION_REMOTE_HIT = 'remote_hits'
+DEFINITION_MISS = 'misses'
+
+_definition_cache_stats = Counter()
+
+
+def get_definition_cache_stats():
+    """
+    Return the lookup counts of the definition caches in this process,
+    along with the fraction of lookups served without querying mongo.
+    """
+    stats = {
+        outcome: _definition_cache_stats[outcome]
+        for outcome in (DEFINITION_LOCAL_HIT, DEFINITION_REMOTE_HIT, DEFINITION_MISS)
+    }
+    lookups = sum(stats.values())
+    stats['lookups'] = lookups
+    stats['hit_rate'] = float(lookups - stats[DEFINITION_MISS]) / lookups if lookups else None
+    return stats
+
+
+def reset_definition_cache_stats():
+    """
+    Reset the lookup counts of the definition caches.
+    """
+    _definition_cache_stats.clear()
+
+
 def round_power_2(value):
     """
     Return value rounded up to the nearest power of 2.
@@ -225,21 +312,107 @@ def structure_to_mongo(structure, course_context=None):
         return new_structure
 
 
+class StructureLRUCache(object):
+    """
+    A thread-safe, process-local, least-recently-used cache of pickled
+    course structures, keyed by structure id.
+
+    Structures are immutable once written, so an entry never needs to be
+    invalidated; it is only evicted when the total size of the cached
+    structures exceeds ``max_bytes``. The size of an entry is the size of its
+    pickled representation.
+
+    Entries are kept pickled, rather than deserialized, because callers modify
+    the structures they are given (e.g. by merging definition fields into the
+    blocks); each lookup therefore unpickles a copy of its own.
+
+    :class:`CourseDefinitionCache` uses the same class to hold pickled
+    definitions, keyed by definition id.
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Return the pickled structure cached for ``key`` (marking it as the most
+        recently used entry), or None if it isn't cached.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            self._entries[key] = entry
+            return entry[0]
+
+    def set(self, key, structure, size):
+        """
+        Cache ``structure`` under ``key``, evicting least recently used entries
+        until the cache fits in ``max_bytes``.
+
+        Arguments:
+            key: The structure id.
+            structure (str): The pickled structure.
+            size (int): The number of bytes to account for this structure.
+
+        Returns:
+            int: The number of entries evicted to make room for this one.
+        """
+        if size > self.max_bytes:
+            return 0
+
+        evictions = 0
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+
+            while self._entries and self.current_bytes + size > self.max_bytes:
+                __, (__, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                evictions += 1
+
+            self._entries[key] = (structure, size)
+            self.current_bytes += size
+        return evictions
+
+    def clear(self):
+        """
+        Remove all entries from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+
 class CourseStructureCache(object):
     """
     Wrapper around django cache object to cache course structure objects.
     The course structures are pickled and compressed when cached.
 
+    Pickled structures are also kept in a process-local
+    :class:`StructureLRUCache`, which is checked before the django cache.
+    Each lookup unpickles a new copy, because callers modify the structures
+    they are given.
+
     If the 'course_structure_cache' doesn't exist, then don't do anything for
     for set and get.
     """
     def __init__(self):
         self.cache = None
+        self.local_cache = None
         if DJANGO_AVAILABLE:
             try:
                 self.cache = get_cache('course_structure_cache')
             except InvalidCacheBackendError:
                 pass
+            else:
+                self.local_cache = get_local_structure_cache()
 
     def get(self, key, course_context=None):
         """Pull the compressed, pickled struct data from cache and deserialize."""
@@ -247,6 +420,13 @@ class CourseStructureCache(object):
             return None
 
         with TIMER.timer("CourseStructureCache.get", course_context) as tagger:
+            if self.local_cache is not None:
+                pickled_data = self.local_cache.get(key)
+                tagger.tag(from_local_cache=str(pickled_data is not None).lower())
+                if pickled_data is not None:
+                    tagger.tag(from_cache='true')
+                    return pickle.loads(pickled_data)
+
             compressed_pickled_data = self.cache.get(key)
             tagger.tag(from_cache=str(compressed_pickled_data is not None).lower())
 
@@ -260,6 +440,7 @@ class CourseStructureCache(object):
             pickled_data = zlib.decompress(compressed_pickled_data)
             tagger.measure('uncompressed_size', len(pickled_data))
 
+            self._set_local(key, pickled_data, tagger)
             return pickle.loads(pickled_data)
 
     def set(self, key, structure, course_context=None):
@@ -278,6 +459,113 @@ class CourseStructureCache(object):
             # Stuctures are immutable, so we set a timeout of "never"
             self.cache.set(key, compressed_pickled_data, None)
 
+            self._set_local(key, pickled_data, tagger)
+
+    def _set_local(self, key, pickled_data, tagger):
+        """
+        Add a pickled structure to the process-local cache (if enabled),
+        recording evictions and the resulting cache size on ``tagger``.
+        """
+        if self.local_cache is None:
+            return
+
+        evictions = self.local_cache.set(key, pickled_data, len(pickled_data))
+        tagger.measure('local_evictions', evictions)
+        tagger.measure('local_cache_size', self.local_cache.current_bytes)
+
+
+class CourseDefinitionCache(object):
+    """
+    Cache of definition documents, which are immutable and addressed by their
+    ObjectId, so an entry never needs to be invalidated.
+
+    Definitions are kept pickled in a process-local :class:`StructureLRUCache`
+    (if ``COURSE_DEFINITION_LOCAL_CACHE_MAX_BYTES`` is set) and, pickled and
+    compressed, in the 'course_definition_cache' django cache (if it exists).
+    Each lookup unpickles a new copy, because callers modify the definitions
+    they are given.
+    """
+    def __init__(self):
+        self.cache = None
+        if DJANGO_AVAILABLE:
+            try:
+                self.cache = get_cache('course_definition_cache')
+            except InvalidCacheBackendError:
+                pass
+        self.local_cache = get_local_definition_cache()
+
+    @property
+    def enabled(self):
+        """Whether either tier of the cache is configured."""
+        return self.cache is not None or self.local_cache is not None
+
+    def get_many(self, keys, course_context=None):
+        """
+        Return a dict of the definitions cached for ``keys``, keyed by definition id.
+        Definitions missing from the local tier are fetched from the django cache
+        in a single call.
+        """
+        if not self.enabled:
+            return {}
+
+        with TIMER.timer("CourseDefinitionCache.get_many", course_context) as tagger:
+            tagger.measure('definitions', len(keys))
+            definitions = {}
+            missing_keys = []
+            for key in keys:
+                pickled_data = self.local_cache.get(key) if self.local_cache is not None else None
+                if pickled_data is None:
+                    missing_keys.append(key)
+                else:
+                    definitions[key] = pickle.loads(pickled_data)
+            _definition_cache_stats[DEFINITION_LOCAL_HIT] += len(definitions)
+
+            if missing_keys and self.cache is not None:
+                for key, compressed_pickled_data in self.cache.get_many(missing_keys).iteritems():
+                    pickled_data = zlib.decompress(compressed_pickled_data)
+                    definitions[key] = pickle.loads(pickled_data)
+                    self._set_local(key, pickled_data, tagger)
+                    _definition_cache_stats[DEFINITION_REMOTE_HIT] += 1
+
+            misses = len(keys) - len(definitions)
+            _definition_cache_stats[DEFINITION_MISS] += misses
+            tagger.measure('misses', misses)
+            if misses:
+                # Always log cache misses, so that the hit rate can be followed
+                tagger.sample_rate = 1
+            return definitions
+
+    def set_many(self, definitions, course_context=None):
+        """Given a list of definitions, will pickle, compress, and write them to cache."""
+        if not self.enabled:
+            return
+
+        with TIMER.timer("CourseDefinitionCache.set_many", course_context) as tagger:
+            tagger.measure('definitions', len(definitions))
+            compressed_pickled_definitions = {}
+            for definition in definitions:
+                pickled_data = pickle.dumps(definition, pickle.HIGHEST_PROTOCOL)
+                self._set_local(definition['_id'], pickled_data, tagger)
+                if self.cache is not None:
+                    # 1 = Fastest (slightly larger results)
+                    compressed_pickled_definitions[definition['_id']] = zlib.compress(pickled_data, 1)
+
+            if compressed_pickled_definitions:
+                # Definitions are immutable, so we set a timeout of "never"
+                self.cache.set_many(compressed_pickled_definitions, None)
+
+    def _set_local(self, key, pickled_data, tagger):
+        """
+        Add a pickled definition to the process-local cache (if enabled),
+        recording evictions and the resulting cache size on ``tagger``.
+        """
+        if self.local_cache is None:
+            return
+
+        evictions = self.local_cache.set(key, pickled_data, len(pickled_data))
+        tagger.measure('local_evictions', evictions)
+        tagger.measure('local_cache_size', self.local_cache.current_bytes)
+
 
 class MongoConnection(object):
     """
@@ -521,9 +809,17 @@ class MongoConnection(object):
     def get_definition(self, key, course_context=None):
         """
         Get the definition from the persistence mechanism whose id is the given key
+
+        This method will use a cached version of the definition if it is available.
         """
         with TIMER.timer("get_definition", course_context) as tagger:
-            definition = self.definitions.find_one({'_id': key})
+            cache = CourseDefinitionCache()
+            definition = cache.get_many([key], course_context).get(key)
+            tagger.tag(from_cache=str(definition is not None).lower())
+            if definition is None:
+                definition = self.definitions.find_one({'_id': key})
+                if definition is not None:
+                    cache.set_many([definition], course_context)
             tagger.measure("fields", len(definition['fields']))
             tagger.tag(block_type=definition['block_type'])
             return definition
@@ -531,11 +827,22 @@ class MongoConnection(object):
     def get_definitions(self, definitions, course_context=None):
         """
         Retrieve all definitions listed in `definitions`.
+
+        Cached definitions are used where available, and the rest are read from
+        the database in a single query.
         """
         with TIMER.timer("get_definitions", course_context) as tagger:
             tagger.measure('definitions', len(definitions))
-            definitions = self.definitions.find({'_id': {'$in': definitions}})
-            return definitions
+            cache = CourseDefinitionCache()
+            cached_definitions = cache.get_many(definitions, course_context)
+            missing_ids = [definition_id for definition_id in definitions if definition_id not in cached_definitions]
+            tagger.measure('from_db', len(missing_ids))
+            results = cached_definitions.values()
+            if missing_ids:
+                definitions_from_db = list(self.definitions.find({'_id': {'$in': missing_ids}}))
+                cache.set_many(definitions_from_db, course_context)
+                results.extend(definitions_from_db)
+            return results
 
     def insert_definition(self, definition, course_context=None):
         """
@@ -85,7 +85,8 @@ from ..exceptions import ItemNotFoundError
 from .caching_descriptor_system import CachingDescriptorSystem
 from xmodule.partitions.partitions_service import PartitionService
 from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, DuplicateKeyError
-from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
+from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope, StructureChanges
+from xmodule.modulestore.split_mongo.structure_index import clear_structure_index, get_structure_index
 from xmodule.modulestore.store_utilities import DETACHED_XBLOCK_TYPES
 from xmodule.error_module import ErrorDescriptor
 from collections import defaultdict
@@ -344,6 +345,7 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
         (no data will be written to the database if a bulk operation is active.)
         """
         self._clear_cache(structure['_id'])
+        clear_structure_index(structure['_id'])
         bulk_write_record = self._get_bulk_ops_record(course_key)
         if bulk_write_record.active:
             bulk_write_record.structures[structure['_id']] = structure
@@ -1179,6 +1181,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             return []
 
         course = self._lookup_course(course_locator)
+        structure_index = self._get_structure_index(course)
         items = []
         qualifiers = qualifiers.copy() if qualifiers else {}  # copy the qualifiers (destructively manipulated here)
 
@@ -1202,20 +1205,26 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         if 'name' in qualifiers:
             # odd case where we don't search just confirm
             block_name = qualifiers.pop('name')
-            block_ids = []
-            for block_id, block in course.structure['blocks'].iteritems():
-                # Don't do an in comparison blindly; first check to make sure
-                # that the name qualifier we're looking at isn't a plain string;
-                # if it is a string, then it should match exactly. If it's other
-                # than a string, we check whether it contains the block ID; this
-                # is so a list or other iterable can be passed with multiple
-                # valid qualifiers.
-                if isinstance(block_name, six.string_types):
-                    name_matches = block_id.id == block_name
-                else:
-                    name_matches = block_id.id in block_name
-                if name_matches and _block_matches_all(block):
-                    block_ids.append(block_id)
+            # Don't do an in comparison blindly; first check to make sure
+            # that the name qualifier we're looking at isn't a plain string;
+            # if it is a string, then it should match exactly. If it's other
+            # than a string, we check whether it contains the block ID; this
+            # is so a list or other iterable can be passed with multiple
+            # valid qualifiers.
+            if isinstance(block_name, six.string_types):
+                candidates = structure_index.get_keys_by_id(block_name)
+            else:
+                candidates = [
+                    block_key
+                    for block_id, block_keys in structure_index.keys_by_id.iteritems()
+                    if block_id in block_name
+                    for block_key in block_keys
+                ]
+            block_ids = [
+                block_id
+                for block_id in candidates
+                if _block_matches_all(course.structure['blocks'][block_id])
+            ]
 
             return self._load_items(course, block_ids, **kwargs)
 
@@ -1226,20 +1235,18 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         if 'children' in qualifiers:
             settings['children'] = qualifiers.pop('children')
 
-        # No need of these caches unless include_orphans is set to False
-        path_cache = None
-        parents_cache = None
-
-        if not include_orphans:
-            path_cache = {}
-            parents_cache = self.build_block_key_to_parents_mapping(course.structure)
+        # When a single block type is requested, only look at the blocks of that type
+        if isinstance(qualifiers.get('block_type'), six.string_types):
+            candidates = structure_index.get_keys_by_type(qualifiers['block_type'])
+        else:
+            candidates = course.structure['blocks'].iterkeys()
 
-        for block_id, value in course.structure['blocks'].iteritems():
-            if _block_matches_all(value):
+        for block_id in candidates:
+            if _block_matches_all(course.structure['blocks'][block_id]):
                 if not include_orphans:
                     if (  # pylint: disable=bad-continuation
                         block_id.type in DETACHED_XBLOCK_TYPES or
-                        self.has_path_to_root(block_id, course, path_cache, parents_cache)
+                        structure_index.has_path_to_root(block_id)
                     ):
                         items.append(block_id)
                 else:
@@ -1266,6 +1273,18 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         return children_to_parents
 
+    def _get_structure_index(self, course):
+        """
+        Returns the StructureIndex of the structure of the given CourseEnvelope.
+
+        The index is only kept for later queries when the structure has been saved,
+        since unsaved structures of a bulk operation are still edited in place.
+        """
+        structure_id = course.structure['_id']
+        bulk_write_record = self._get_bulk_ops_record(course.course_key)
+        editable = bulk_write_record.active and structure_id not in bulk_write_record.structures_in_db
+        return get_structure_index(course.structure, cache=not editable)
+
     def has_path_to_root(self, block_key, course, path_cache=None, parents_cache=None):
         """
         Check recursively if an xblock has a path to the course root
@@ -1280,11 +1299,14 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         :return Bool: whether or not component has path to the root
         """
 
+        if path_cache is None and parents_cache is None:
+            return self._get_structure_index(course).has_path_to_root(block_key)
+
         if path_cache and block_key in path_cache:
             return path_cache[block_key]
 
         if parents_cache is None:
-            xblock_parents = self._get_parents_from_structure(block_key, course.structure)
+            xblock_parents = self._get_structure_index(course).get_parents(block_key)
         else:
             xblock_parents = parents_cache[block_key]
 
@@ -1318,14 +1340,15 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             raise ItemNotFoundError(locator)
 
         course = self._lookup_course(locator.course_key)
-        all_parent_ids = self._get_parents_from_structure(BlockKey.from_usage_key(locator), course.structure)
+        structure_index = self._get_structure_index(course)
+        all_parent_ids = structure_index.get_parents(BlockKey.from_usage_key(locator))
 
         # Check and verify the found parent_ids are not orphans; Remove parent which has no valid path
         # to the course root
         parent_ids = [
             valid_parent
             for valid_parent in all_parent_ids
-            if self.has_path_to_root(valid_parent, course)
+            if structure_index.has_path_to_root(valid_parent)
         ]
 
         if len(parent_ids) == 0:
@@ -1349,13 +1372,16 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         detached_categories = [name for name, __ in XBlock.load_tagged_classes("detached")]
         course = self._lookup_course(course_key)
-        items = set(course.structure['blocks'].keys())
-        items.remove(course.structure['root'])
-        blocks = course.structure['blocks']
-        for block_id, block_data in blocks.iteritems():
-            items.difference_update(BlockKey(*child) for child in block_data.fields.get('children', []))
-            if block_data.block_type in detached_categories:
-                items.discard(block_id)
+        structure_index = self._get_structure_index(course)
+        items = [
+            block_id
+            for block_id, block_data in course.structure['blocks'].iteritems()
+            if (  # pylint: disable=bad-continuation
+                block_id != course.structure['root'] and
+                not structure_index.get_parents(block_id) and
+                block_data.block_type not in detached_categories
+            )
+        ]
         return [
             course_key.make_usage_key(block_type=block_id.type, block_id=block_id.id)
             for block_id in items
@@ -1408,6 +1434,69 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             'edited_on': course['edited_on']
         }
 
+    def get_structure_changes(self, course_key, from_version):
+        """
+        Compares the course's current structure with its structure at the
+        given version and returns the blocks that changed in between.
+
+        :param course_key: the course whose current structure is compared
+        :param from_version: the version guid of the earlier structure
+
+        :return StructureChanges: sets of the usage keys of:
+            changed - blocks that were added or whose definition, fields
+                (including children), defaults or asides differ
+            changed_content - blocks that were added or whose definition differs
+            changed_settings - blocks that were added or moved, or whose fields
+                (excluding children), defaults or asides differ
+            removed - blocks that are no longer in the structure
+        """
+        if not isinstance(course_key, CourseLocator) or course_key.deprecated:
+            # The supplied CourseKey is of the wrong type, so it can't possibly be stored in this modulestore.
+            raise ItemNotFoundError(course_key)
+
+        new_structure = self._lookup_course(course_key).structure
+        old_structure = self.get_structure(course_key, course_key.as_object_id(from_version))
+        if old_structure is None:
+            raise ItemNotFoundError('Structure: {}'.format(from_version))
+
+        make_usage_key = course_key.replace(branch=None, version_guid=None).make_usage_key
+        old_blocks, new_blocks = old_structure['blocks'], new_structure['blocks']
+        old_parents = self.build_block_key_to_parents_mapping(old_structure)
+        new_parents = self.build_block_key_to_parents_mapping(new_structure)
+
+        changes = StructureChanges(set(), set(), set(), set())
+        for block_key, new_block in new_blocks.iteritems():
+            usage_key = make_usage_key(block_key.type, block_key.id)
+            old_block = old_blocks.get(block_key)
+            if old_block is None:
+                changes.changed.add(usage_key)
+                changes.changed_content.add(usage_key)
+                changes.changed_settings.add(usage_key)
+                continue
+
+            content_changed = old_block.definition != new_block.definition
+            settings_changed = (
+                _fields_except_children(old_block) != _fields_except_children(new_block) or
+                old_block.defaults != new_block.defaults or
+                old_block.get_asides() != new_block.get_asides() or
+                set(old_parents.get(block_key, [])) != set(new_parents.get(block_key, []))
+            )
+            children_changed = old_block.fields.get('children') != new_block.fields.get('children')
+
+            if content_changed:
+                changes.changed_content.add(usage_key)
+            if settings_changed:
+                changes.changed_settings.add(usage_key)
+            if content_changed or settings_changed or children_changed:
+                changes.changed.add(usage_key)
+
+        changes.removed.update(
+            make_usage_key(block_key.type, block_key.id)
+            for block_key in old_blocks
+            if block_key not in new_blocks
+        )
+        return changes
+
     def get_definition_history_info(self, definition_locator, course_context=None):
         """
         Because xblocks doesn't give a means to separate the definition's meta information from
@@ -3388,6 +3477,13 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         self.db_connection.ensure_indexes()
 
 
+def _fields_except_children(block_data):
+    """
+    Returns the given block's fields, other than its children.
+    """
+    return {name: value for name, value in block_data.fields.iteritems() if name != 'children'}
+
+
 class SparseList(list):
     """
     Enable inserting items into a list in arbitrary order and then retrieving them.
@@ -313,6 +313,15 @@ class DraftVersioningModuleStore(SplitMongoModuleStore, ModuleStoreDraftAndPubli
         usage_key = self._map_revision_to_branch(usage_key)
         return super(DraftVersioningModuleStore, self).get_block_original_usage(usage_key)
 
+    def get_structure_changes(self, course_key, from_version, revision=None):
+        """
+        Returns the blocks that changed between the structure with the
+        given version and the current structure of the course's branch
+        for the given revision.
+        """
+        course_key = self._map_revision_to_branch(course_key, revision=revision)
+        return super(DraftVersioningModuleStore, self).get_structure_changes(course_key, from_version)
+
     def get_orphans(self, course_key, **kwargs):
         course_key = self._map_revision_to_branch(course_key)
         return super(DraftVersioningModuleStore, self).get_orphans(course_key, **kwargs)
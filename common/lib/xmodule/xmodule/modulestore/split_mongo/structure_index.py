@@ -0,0 +1,120 @@
+"""
+Secondary indexes over the blocks of a split modulestore structure.
+
+Queries such as get_items, get_parent_location and get_orphans would otherwise
+scan every block of the structure on each call.  Since a persisted structure
+never changes, its indexes are built once and kept for later queries of the
+same structure version.
+"""
+from collections import OrderedDict, defaultdict
+from threading import Lock
+
+from xmodule.modulestore.split_mongo import BlockKey
+
+# The number of structure versions whose indexes are kept in memory.
+MAX_CACHED_STRUCTURE_INDEXES = 32
+
+_cached_indexes = OrderedDict()
+_cached_indexes_lock = Lock()
+
+
+class StructureIndex(object):
+    """
+    Lookups by block type, block id and parent for the blocks of one structure.
+
+    Block keys are listed in the order of the structure's blocks.
+    """
+    def __init__(self, structure):
+        self.keys_by_type = defaultdict(list)
+        self.keys_by_id = defaultdict(list)
+        self.parents = defaultdict(list)
+        for block_key, block_data in structure['blocks'].iteritems():
+            self.keys_by_type[block_key.type].append(block_key)
+            self.keys_by_id[block_key.id].append(block_key)
+            for child_key in block_data.fields.get('children', []):
+                self.parents[BlockKey(*child_key)].append(block_key)
+
+        # Blocks that are not the child of any block and are course or library roots have a path to
+        # the root, as do the descendants of those blocks (see SplitMongoModuleStore.has_path_to_root).
+        self.reachable_from_root = set()
+        stack = [
+            block_key
+            for block_key in structure['blocks']
+            if block_key.type in ('course', 'library') and block_key not in self.parents
+        ]
+        while stack:
+            block_key = stack.pop()
+            if block_key in self.reachable_from_root:
+                continue
+            self.reachable_from_root.add(block_key)
+            block_data = structure['blocks'].get(block_key)
+            if block_data is not None:
+                stack.extend(BlockKey(*child_key) for child_key in block_data.fields.get('children', []))
+
+        # Stop the lookups of missing keys from adding entries.
+        self.keys_by_type.default_factory = None
+        self.keys_by_id.default_factory = None
+        self.parents.default_factory = None
+
+    def get_keys_by_type(self, block_type):
+        """
+        Returns the keys of the blocks of the given type.
+        """
+        return self.keys_by_type.get(block_type, [])
+
+    def get_keys_by_id(self, block_id):
+        """
+        Returns the keys of the blocks with the given block id, of any type.
+        """
+        return self.keys_by_id.get(block_id, [])
+
+    def get_parents(self, block_key):
+        """
+        Returns the keys of the blocks which list block_key as a child.
+        """
+        return self.parents.get(block_key, [])
+
+    def has_path_to_root(self, block_key):
+        """
+        Returns whether block_key is the course or library root, or one of its descendants.
+        """
+        return block_key in self.reachable_from_root
+
+
+def get_structure_index(structure, cache=True):
+    """
+    Returns the StructureIndex of the given structure.
+
+    Arguments:
+        structure (dict): db json of a course structure
+        cache (bool): whether the index may be kept for later calls with the same
+            structure version. This must be False for structures that can still be
+            edited, such as the unsaved structures of a bulk operation.
+    """
+    if not cache:
+        return StructureIndex(structure)
+
+    structure_id = structure['_id']
+    with _cached_indexes_lock:
+        index = _cached_indexes.pop(structure_id, None)
+        if index is not None:
+            _cached_indexes[structure_id] = index
+            return index
+
+    index = StructureIndex(structure)
+    with _cached_indexes_lock:
+        _cached_indexes[structure_id] = index
+        while len(_cached_indexes) > MAX_CACHED_STRUCTURE_INDEXES:
+            _cached_indexes.popitem(last=False)
+    return index
+
+
+def clear_structure_index(structure_id=None):
+    """
+    Forgets the index of the given structure version, or of all structure versions.
+    """
+    with _cached_indexes_lock:
+        if structure_id is None:
+            _cached_indexes.clear()
+        else:
+            _cached_indexes.pop(structure_id, None)
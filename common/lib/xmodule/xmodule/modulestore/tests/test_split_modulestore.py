@@ -32,6 +32,8 @@ from xmodule.fields import Date, Timedelta
 from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
 from xmodule.modulestore.tests.test_modulestore import check_has_course_method
 from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo import mongo_connection
+from xmodule.modulestore.split_mongo.mongo_connection import StructureLRUCache
 from xmodule.modulestore.tests.factories import check_mongo_calls
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
 from xmodule.modulestore.tests.utils import mock_tab_from_json
@@ -987,6 +989,29 @@ class TestCourseStructureCache(SplitModuleTest):
         # now make sure that you get the same structure
         self.assertEqual(cached_structure, not_cached_structure)
 
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_local_structure_cache')
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_local_structure_cache(self, mock_get_cache, mock_get_local_cache):
+        # the dummy cache never returns anything, so every hit must come
+        # from the process-local tier
+        mock_get_cache.return_value = caches['course_structure_cache']
+        mock_get_local_cache.return_value = StructureLRUCache(max_bytes=16 * 1024 * 1024)
+
+        with check_mongo_calls(1):
+            not_cached_structure = self._get_structure(self.new_course)
+
+        with check_mongo_calls(0):
+            cached_structure = self._get_structure(self.new_course)
+        self.assertEqual(cached_structure, not_cached_structure)
+
+        # each lookup gets its own copy, so changes made by callers aren't cached
+        self.assertIsNot(cached_structure, not_cached_structure)
+        root_block = cached_structure['blocks'][cached_structure['root']]
+        root_block.fields['changed'] = True
+        with check_mongo_calls(0):
+            structure = self._get_structure(self.new_course)
+        self.assertNotIn('changed', structure['blocks'][structure['root']].fields)
+
     def test_dummy_cache(self):
         with check_mongo_calls(1):
             not_cached_structure = self._get_structure(self.new_course)
@@ -1008,6 +1033,94 @@ class TestCourseStructureCache(SplitModuleTest):
         )
 
 
+class TestCourseDefinitionCache(SplitModuleTest):
+    """Tests for the CourseDefinitionCache"""
+
+    def setUp(self):
+        super(TestCourseDefinitionCache, self).setUp()
+        # use the default cache, since there is no `course_definition_cache`
+        # during testing
+        self.cache = caches['default']
+        self.cache.clear()
+        self.addCleanup(self.cache.clear)
+        mongo_connection.reset_definition_cache_stats()
+        self.addCleanup(mongo_connection.reset_definition_cache_stats)
+
+        self.user = random.getrandbits(32)
+        self.new_course = modulestore().create_course(
+            'org', 'course', 'definition_run', self.user, BRANCH_NAME_DRAFT,
+        )
+        self.chapter = modulestore().create_child(
+            self.user, self.new_course.location, 'chapter', fields={'display_name': 'chapter'},
+        )
+        self.definition_ids = [
+            self.new_course.definition_locator.definition_id,
+            self.chapter.definition_locator.definition_id,
+        ]
+
+    def assert_stats(self, **expected):
+        """
+        Asserts that the lookup counts of the definition caches are as expected.
+        """
+        stats = mongo_connection.get_definition_cache_stats()
+        for outcome in ('local_hits', 'remote_hits', 'misses'):
+            self.assertEqual(stats[outcome], expected.get(outcome, 0), outcome)
+
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_remote_definition_cache(self, mock_get_cache):
+        mock_get_cache.return_value = self.cache
+
+        with check_mongo_calls(1):
+            not_cached_definition = modulestore().db_connection.get_definition(self.definition_ids[0])
+
+        with check_mongo_calls(0):
+            cached_definition = modulestore().db_connection.get_definition(self.definition_ids[0])
+
+        self.assertEqual(cached_definition, not_cached_definition)
+        self.assert_stats(misses=1, remote_hits=1)
+        self.assertEqual(mongo_connection.get_definition_cache_stats()['hit_rate'], 0.5)
+
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_local_definition_cache')
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_local_definition_cache(self, mock_get_cache, mock_get_local_cache):
+        mock_get_cache.side_effect = InvalidCacheBackendError
+        mock_get_local_cache.return_value = StructureLRUCache(max_bytes=1024 * 1024)
+
+        with check_mongo_calls(1):
+            not_cached_definition = modulestore().db_connection.get_definition(self.definition_ids[0])
+        not_cached_definition['fields']['changed'] = True
+
+        with check_mongo_calls(0):
+            cached_definition = modulestore().db_connection.get_definition(self.definition_ids[0])
+
+        # each lookup gets its own copy, so changes made by callers aren't cached
+        self.assertNotIn('changed', cached_definition['fields'])
+        self.assert_stats(misses=1, local_hits=1)
+
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_get_definitions_only_queries_missing_definitions(self, mock_get_cache):
+        mock_get_cache.return_value = self.cache
+        modulestore().db_connection.get_definition(self.definition_ids[0])
+
+        with check_mongo_calls(1):
+            definitions = modulestore().db_connection.get_definitions(self.definition_ids)
+        self.assertEqual({definition['_id'] for definition in definitions}, set(self.definition_ids))
+
+        with check_mongo_calls(0):
+            definitions = modulestore().db_connection.get_definitions(self.definition_ids)
+        self.assertEqual({definition['_id'] for definition in definitions}, set(self.definition_ids))
+        self.assert_stats(misses=2, remote_hits=3)
+
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_no_definition_cache_configured(self, mock_get_cache):
+        mock_get_cache.side_effect = InvalidCacheBackendError
+
+        for __ in range(2):
+            with check_mongo_calls(1):
+                modulestore().db_connection.get_definitions(self.definition_ids)
+        self.assert_stats()
+
+
 class SplitModuleItemTests(SplitModuleTest):
     '''
     Item read tests including inheritance
@@ -1596,6 +1709,33 @@ class TestItemCrud(SplitModuleTest):
         other_updated = modulestore().update_item(other_block, self.user_id)
         self.assertIn(moved_child.version_agnostic(), version_agnostic(other_updated.children))
 
+    def test_get_structure_changes(self):
+        """
+        test finding the blocks that changed between two versions of a course structure
+        """
+        course_key = CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT)
+        block = modulestore().get_item(course_key.make_usage_key('chapter', 'chapter3'))
+        pre_version_guid = block.location.version_guid
+
+        # move a child to another chapter
+        moved_child = block.children.pop()
+        block.save()  # decache model changes
+        modulestore().update_item(block, self.user_id)
+        other_block = modulestore().get_item(course_key.make_usage_key('chapter', 'chapter1'))
+        other_block.children.append(moved_child)
+        modulestore().update_item(other_block, self.user_id)
+
+        changes = modulestore().get_structure_changes(course_key, pre_version_guid)
+        make_usage_key = course_key.for_branch(None).make_usage_key
+        moved_key = make_usage_key(moved_child.block_type, moved_child.block_id)
+        self.assertEqual(
+            changes.changed,
+            {make_usage_key('chapter', 'chapter3'), make_usage_key('chapter', 'chapter1'), moved_key},
+        )
+        self.assertEqual(changes.changed_content, set())
+        self.assertEqual(changes.changed_settings, {moved_key})
+        self.assertEqual(changes.removed, set())
+
     @patch('xmodule.tabs.CourseTab.from_json', side_effect=mock_tab_from_json)
     def test_update_definition(self, _from_json):
         """
@@ -1,7 +1,7 @@
 """ Test the behavior of split_mongo/MongoConnection """
 import unittest
 from mock import patch
-from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection
+from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, StructureLRUCache
 from xmodule.exceptions import HeartbeatFailure
 
 
@@ -17,3 +17,49 @@ class TestHeartbeatFailureException(unittest.TestCase):
 
             with self.assertRaises(HeartbeatFailure):
                 useless_conn.heartbeat()
+
+
+class TestStructureLRUCache(unittest.TestCase):
+    """ Test the process-local cache of course structures """
+    def setUp(self):
+        super(TestStructureLRUCache, self).setUp()
+        self.cache = StructureLRUCache(max_bytes=100)
+
+    def test_get_missing(self):
+        self.assertIsNone(self.cache.get('missing'))
+
+    def test_set_and_get(self):
+        structure = {'_id': 'a'}
+        self.assertEqual(self.cache.set('a', structure, 10), 0)
+        self.assertIs(self.cache.get('a'), structure)
+        self.assertEqual(self.cache.current_bytes, 10)
+
+    def test_evicts_least_recently_used(self):
+        self.cache.set('a', {'_id': 'a'}, 40)
+        self.cache.set('b', {'_id': 'b'}, 40)
+        # Touch 'a' so that 'b' becomes the least recently used entry
+        self.cache.get('a')
+
+        self.assertEqual(self.cache.set('c', {'_id': 'c'}, 40), 1)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertIsNotNone(self.cache.get('a'))
+        self.assertIsNotNone(self.cache.get('c'))
+        self.assertEqual(self.cache.current_bytes, 80)
+
+    def test_replace_existing_entry(self):
+        self.cache.set('a', {'_id': 'a'}, 40)
+        self.cache.set('a', {'_id': 'a'}, 60)
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(self.cache.current_bytes, 60)
+
+    def test_oversized_structure_not_cached(self):
+        self.cache.set('a', {'_id': 'a'}, 40)
+        self.assertEqual(self.cache.set('huge', {'_id': 'huge'}, 101), 0)
+        self.assertIsNone(self.cache.get('huge'))
+        self.assertIsNotNone(self.cache.get('a'))
+
+    def test_clear(self):
+        self.cache.set('a', {'_id': 'a'}, 40)
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.current_bytes, 0)
@@ -0,0 +1,90 @@
+"""
+Tests for the secondary indexes of split modulestore structures.
+"""
+import unittest
+
+from bson.objectid import ObjectId
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo import structure_index
+from xmodule.modulestore.split_mongo.structure_index import StructureIndex, get_structure_index
+
+COURSE = BlockKey('course', 'course')
+CHAPTER = BlockKey('chapter', 'chapter')
+SEQUENTIAL = BlockKey('sequential', 'sequential')
+HTML = BlockKey('html', 'html')
+PROBLEM = BlockKey('problem', 'problem')
+ORPHAN = BlockKey('vertical', 'orphan')
+ORPHAN_CHILD = BlockKey('html', 'orphan_child')
+SAME_ID = BlockKey('problem', 'html')
+
+
+def make_structure(children):
+    """
+    Returns a structure with the given children of each block.
+    """
+    return {
+        '_id': ObjectId(),
+        'root': COURSE,
+        'blocks': {
+            block_key: BlockData(block_type=block_key.type, fields={'children': block_children})
+            for block_key, block_children in children.iteritems()
+        },
+    }
+
+
+class StructureIndexTest(unittest.TestCase):
+    """
+    Tests for StructureIndex.
+    """
+    def setUp(self):
+        super(StructureIndexTest, self).setUp()
+        self.structure = make_structure({
+            COURSE: [CHAPTER],
+            CHAPTER: [SEQUENTIAL],
+            # children are stored as (block_type, block_id) pairs
+            SEQUENTIAL: [list(HTML), PROBLEM],
+            HTML: [],
+            PROBLEM: [],
+            ORPHAN: [ORPHAN_CHILD, HTML],
+            ORPHAN_CHILD: [],
+            SAME_ID: [],
+        })
+        self.index = StructureIndex(self.structure)
+
+    def test_keys_by_type(self):
+        self.assertEqual(set(self.index.get_keys_by_type('html')), {HTML, ORPHAN_CHILD})
+        self.assertEqual(self.index.get_keys_by_type('video'), [])
+
+    def test_keys_by_id(self):
+        self.assertEqual(set(self.index.get_keys_by_id('html')), {HTML, SAME_ID})
+        self.assertEqual(self.index.get_keys_by_id('missing'), [])
+
+    def test_parents(self):
+        self.assertEqual(self.index.get_parents(CHAPTER), [COURSE])
+        self.assertEqual(set(self.index.get_parents(HTML)), {SEQUENTIAL, ORPHAN})
+        self.assertEqual(self.index.get_parents(COURSE), [])
+        self.assertNotIn(COURSE, self.index.parents)
+
+    def test_has_path_to_root(self):
+        for block_key in (COURSE, CHAPTER, SEQUENTIAL, HTML, PROBLEM):
+            self.assertTrue(self.index.has_path_to_root(block_key), block_key)
+        for block_key in (ORPHAN, ORPHAN_CHILD, SAME_ID):
+            self.assertFalse(self.index.has_path_to_root(block_key), block_key)
+
+    def test_cached_per_structure_version(self):
+        self.addCleanup(structure_index.clear_structure_index)
+        index = get_structure_index(self.structure)
+        self.assertIs(get_structure_index(self.structure), index)
+        self.assertIsNot(get_structure_index(self.structure, cache=False), index)
+
+        structure_index.clear_structure_index(self.structure['_id'])
+        self.assertIsNot(get_structure_index(self.structure), index)
+
+    def test_cache_size_is_bounded(self):
+        self.addCleanup(structure_index.clear_structure_index)
+        structures = [make_structure({COURSE: []}) for __ in range(structure_index.MAX_CACHED_STRUCTURE_INDEXES + 1)]
+        indexes = [get_structure_index(structure) for structure in structures]
+        self.assertIsNot(get_structure_index(structures[0]), indexes[0])
+        self.assertIs(get_structure_index(structures[-1]), indexes[-1])
@@ -22,6 +22,7 @@ from webob.multidict import MultiDict
 import xmodule
 from xmodule.tests import DATA_DIR
 from capa import responsetypes
+from capa.safe_exec import SafeExecDeferred
 from capa.responsetypes import (StudentInputError, LoncapaProblemError,
                                 ResponseError)
 from capa.xqueue_interface import XQueueInterface
@@ -1598,6 +1599,17 @@ class CapaModuleTest(unittest.TestCase):
         # Expect that the module has created a new dummy problem with the error
         self.assertNotEqual(original_problem, module.lcp)
 
+    @patch('xmodule.capa_base.log')
+    def test_create_deferred_problem(self, mock_log):
+        """
+        Creating a module whose script code is deferred to a batch raises
+        SafeExecDeferred as is, rather than an error about the problem.
+        """
+        with patch.object(CapaModule, 'new_lcp', side_effect=SafeExecDeferred("Execution deferred to a batch")):
+            with self.assertRaises(SafeExecDeferred):
+                CapaFactory.create()
+        self.assertFalse(mock_log.warning.called)
+
     def test_get_problem_html_error_w_debug(self):
         """
         Test the html response when an error occurs with DEBUG on
@@ -2,6 +2,7 @@
 Tests for ErrorModule and NonStaffErrorModule
 """
 import unittest
+from capa.safe_exec import SafeExecDeferred
 from xmodule.tests import get_test_system
 from xmodule.error_module import ErrorDescriptor, ErrorModule, NonStaffErrorDescriptor
 from xmodule.modulestore.xml import CourseLocationManager
@@ -142,6 +143,18 @@ class TestErrorModuleConstruction(unittest.TestCase):
         module = self.descriptor._xmodule
         self.assertIsInstance(module, ErrorModule)
 
+    @patch.object(BrokenModule, '__init__', Mock(side_effect=SafeExecDeferred("Execution deferred to a batch")))
+    @patch('xmodule.x_module.log')
+    def test_deferred_module(self, mock_log):
+        """
+        Test that an XModule whose sandboxed code is deferred to a batch during
+        __init__ isn't replaced by an ErrorModule, nor logged as an error
+        """
+        with self.assertRaises(SafeExecDeferred):
+            self.descriptor._xmodule  # pylint: disable=pointless-statement
+        self.assertIsNone(self.descriptor.xmodule_runtime.xmodule_instance)
+        self.assertFalse(mock_log.exception.called)
+
     @patch.object(ErrorDescriptor, '__init__', Mock(side_effect=TestException))
     def test_broken_error_descriptor(self):
         """
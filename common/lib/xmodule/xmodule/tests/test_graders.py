@@ -2,7 +2,9 @@
 Grading tests
 """
 
+import random
 import unittest
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
 import ddt
@@ -295,6 +297,70 @@ class GraderTest(unittest.TestCase):
         self.assertAlmostEqual(graded['percent'], 0.11)
         self.assertEqual(len(graded['section_breakdown']), 12 + 1)
 
+    def _random_gradesheet(self, rand):
+        """
+        Returns a random gradesheet, with equal percentages and sections
+        that are absent for some students.
+        """
+        gradesheet = {}
+        for assignment_type, num_sections in (('Homework', 14), ('Lab', 5), ('Midterm', 1)):
+            sections = OrderedDict()
+            for index in range(num_sections):
+                if rand.random() < 0.2:
+                    continue
+                possible = float(rand.choice([1, 2, 4, 10]))
+                earned = rand.choice([0, possible / 2, possible, rand.uniform(0, possible)])
+                sections[index] = self.MockGrade(
+                    AggregatedScore(tw_earned=earned, tw_possible=possible, **self.common_fields),
+                    display_name='{} {}'.format(assignment_type, index),
+                )
+            if sections or rand.random() < 0.5:
+                gradesheet[assignment_type] = sections
+        return gradesheet
+
+    @ddt.data(
+        graders.AssignmentFormatGrader("Homework", 12, 2),
+        graders.AssignmentFormatGrader("Homework", 12, 20),
+        graders.AssignmentFormatGrader("Lab", 3, 2, show_only_average=True),
+        graders.AssignmentFormatGrader("Lab", 7, 0, hide_average=True),
+        graders.AssignmentFormatGrader("Midterm", 1, 0),
+        graders.AssignmentFormatGrader("Final", 1, 0),
+        graders.WeightedSubsectionsGrader([]),
+        graders.grader_from_conf([
+            {'type': "Homework", 'min_count': 12, 'drop_count': 2, 'short_label': "HW", 'weight': 0.25},
+            {'type': "Lab", 'min_count': 7, 'drop_count': 3, 'category': "Labs", 'weight': 0.25},
+            {'type': "Midterm", 'min_count': 0, 'drop_count': 0, 'short_label': "Midterm", 'weight': 0.5},
+        ]),
+    )
+    def test_grade_matrix(self, grader):
+        rand = random.Random(0)
+        gradesheets = [self.empty_gradesheet, self.incomplete_gradesheet, self.test_gradesheet]
+        gradesheets += [self._random_gradesheet(rand) for _ in range(25)]
+
+        graded = grader.grade_matrix(graders.ScoreMatrix.from_grade_sheets(gradesheets))
+        self.assertEqual(len(graded), len(gradesheets))
+        for index, gradesheet in enumerate(gradesheets):
+            expected = grader.grade(gradesheet)
+            self.assertEqual(graded.percent[index], expected['percent'])
+            self.assertEqual(graded[index], expected)
+
+    def test_grade_matrix_with_absent_subsections(self):
+        lab_grader = graders.AssignmentFormatGrader("Lab", 3, 1)
+        score_matrix = graders.ScoreMatrix(2)
+        score_matrix.add('Lab', [[1, 2, 3], [0, 0, 2]], [[2, 0, 4], [1, 0, 4]], ['Lab 1', 'Lab 2', 'Lab 3'])
+
+        graded = lab_grader.grade_matrix(score_matrix)
+        self.assertEqual(graded.percent.tolist(), [(0.5 + 0.75) / 2, (0.0 + 0.5) / 2])
+        self.assertEqual(
+            [section['detail'] for section in graded[0]['section_breakdown']],
+            [
+                u"Lab 1 - Lab 1 - 50% (1/2)",
+                u"Lab 2 - Lab 3 - 75% (3/4)",
+                u"Lab 3 Unreleased - 0% (?/?)",
+                u"Lab Average = 62%",
+            ],
+        )
+
     @ddt.data(
         (
             # empty
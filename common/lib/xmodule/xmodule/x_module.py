@@ -18,6 +18,7 @@ from webob import Response
 from webob.multidict import MultiDict
 from lazy import lazy
 
+from capa.safe_exec import SafeExecDeferred
 from xblock.core import XBlock, XBlockAside
 from xblock.fields import (
     Scope, Integer, Float, List,
@@ -1182,11 +1183,16 @@ class XModuleDescriptor(HTMLSnippet, ResourceTemplates, XModuleMixin):
                     for_parent=self.get_parent() if self.has_cached_parent else None
                 )
                 self.xmodule_runtime.xmodule_instance.save()
-            except Exception:  # pylint: disable=broad-except
+            except Exception as err:  # pylint: disable=broad-except
                 # xmodule_instance is set by the XModule.__init__. If we had an error after that,
                 # we need to clean it out so that we can set up the ErrorModule instead
                 self.xmodule_runtime.xmodule_instance = None
 
+                if isinstance(err, SafeExecDeferred):
+                    # Not an error: the module is being loaded to collect the sandboxed
+                    # code it runs, which is deferred to a batch, so leave it to the caller.
+                    raise
+
                 if isinstance(self, self.xmodule_runtime.error_descriptor_class):
                     log.exception('Error creating an ErrorModule from an ErrorDescriptor')
                     raise
@@ -5,11 +5,15 @@ to a course.
 """
 import json
 import logging
+import os
 import random
 import re
+import sys
+import threading
 from collections import Counter
+from operator import or_
 from smtplib import SMTPConnectError, SMTPDataError, SMTPException, SMTPServerDisconnected
-from time import sleep
+from time import sleep, time
 
 from boto.exception import AWSConnectionError
 from boto.ses.exceptions import (
@@ -31,12 +35,13 @@ from django.contrib.auth.models import User
 from django.core.mail import EmailMultiAlternatives, get_connection
 from django.core.mail.message import forbid_multi_line_headers
 from django.core.urlresolvers import reverse
+from django.db.models import Q
 from django.utils.translation import override as override_language
 from django.utils.translation import ugettext as _
 from markupsafe import escape
 
 import dogstats_wrapper as dog_stats_api
-from bulk_email.models import CourseEmail, Optout
+from bulk_email.models import CourseEmail
 from courseware.courses import get_course
 from lms.djangoapps.instructor_task.models import InstructorTask
 from lms.djangoapps.instructor_task.subtasks import (
@@ -48,6 +53,7 @@ from lms.djangoapps.instructor_task.subtasks import (
 from openedx.core.djangoapps.site_configuration import helpers as configuration_helpers
 from openedx.core.lib.courses import course_image_url
 from util.date_utils import get_default_time_display
+from util.query import use_read_replica_if_available
 
 log = logging.getLogger('edx.celery.task')
 
@@ -179,10 +185,7 @@ def perform_delegate_email_batches(entry_id, course_id, task_input, action_name)
         target.get_users(course_id, user_id)
         for target in targets
     ]
-    combined_set = User.objects.none()
-    for qset in recipient_qsets:
-        combined_set |= qset
-    combined_set = combined_set.distinct()
+    combined_set = _get_recipients(recipient_qsets, course_id)
     recipient_fields = ['profile__name', 'email']
 
     log.info(u"Task %s: Preparing to queue subtasks for sending emails for course %s, email %s",
@@ -268,7 +271,7 @@ def send_course_email(entry_id, email_id, to_list, global_email_context, subtask
         Most values will be zero on initial call, but may be different when the task is
         invoked as part of a retry.
 
-    Sends to all addresses contained in to_list that are not also in the Optout table.
+    Sends to all addresses contained in to_list, from which optouts have already been excluded.
     Emails are sent multi-part, in both plain text and html.  Updates InstructorTask object
     with status information (sends, failures, skips) and updates number of subtasks completed.
     """
@@ -333,24 +336,22 @@ def send_course_email(entry_id, email_id, to_list, global_email_context, subtask
     return new_subtask_status.to_dict()
 
 
-def _filter_optouts_from_recipients(to_list, course_id):
+def _get_recipients(recipient_qsets, course_id):
     """
-    Filters a recipient list based on student opt-outs for a given course.
+    Returns a queryset of the users in any of the given querysets of users,
+    excluding those who have opted out of email from the course.
 
-    Returns the filtered recipient list, as well as the number of optouts
-    removed from the list.
+    The database selects each user once, without joining the querysets and
+    removing the duplicates with DISTINCT.
     """
-    optouts = Optout.objects.filter(
-        course_id=course_id,
-        user__in=[i['pk'] for i in to_list]
-    ).values_list('user__email', flat=True)
-    optouts = set(optouts)
-    # Only count the num_optout for the first time the optouts are calculated.
-    # We assume that the number will not change on retries, and so we don't need
-    # to calculate it each time.
-    num_optout = len(optouts)
-    to_list = [recipient for recipient in to_list if recipient['email'] not in optouts]
-    return to_list, num_optout
+    if not recipient_qsets:
+        return User.objects.none()
+    recipients = User.objects.filter(
+        reduce(or_, [Q(pk__in=qset.values('pk')) for qset in recipient_qsets])
+    ).exclude(
+        optout__course_id=course_id,
+    )
+    return use_read_replica_if_available(recipients)
 
 
 def _get_source_address(course_id, course_title, course_language, truncate=True):
@@ -421,6 +422,167 @@ def _get_source_address(course_id, course_title, course_language, truncate=True)
     return from_addr
 
 
+# Connections that have been idle for longer than this many seconds are not reused,
+# since the email server has likely dropped them.
+CONNECTION_MAX_IDLE_SECONDS = 60
+
+
+class _ConnectionPool(object):
+    """
+    Keeps open email connections so that they can be reused by later subtasks
+    running in the same worker process.
+
+    At most settings.BULK_EMAIL_CONNECTION_POOL_SIZE idle connections are kept.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._idle = []
+
+    def acquire(self):
+        """
+        Returns an open connection, reusing an idle one if there is one that is still alive.
+        """
+        while True:
+            with self._lock:
+                self._reset_after_fork()
+                if not self._idle:
+                    break
+                connection, last_used = self._idle.pop()
+            if time() - last_used <= CONNECTION_MAX_IDLE_SECONDS and self._is_alive(connection):
+                return connection
+            self.discard(connection)
+
+        connection = get_connection()
+        connection.open()
+        return connection
+
+    def release(self, connection):
+        """
+        Returns a connection that is still usable to the pool, or closes it if the pool is full.
+        """
+        with self._lock:
+            self._reset_after_fork()
+            if len(self._idle) < settings.BULK_EMAIL_CONNECTION_POOL_SIZE:
+                self._idle.append((connection, time()))
+                return
+        connection.close()
+
+    def discard(self, connection):
+        """
+        Closes a connection that should not be reused, ignoring any error in doing so.
+        """
+        try:
+            connection.close()
+        except Exception:  # pylint: disable=broad-except
+            log.debug("BulkEmail ==> Error closing discarded connection", exc_info=True)
+
+    def _is_alive(self, connection):
+        """
+        Returns whether the email server still accepts commands over an idle connection.
+
+        SMTP connections are checked with a NOOP command, since the server may have dropped
+        them before CONNECTION_MAX_IDLE_SECONDS.  Other connections are assumed to be alive.
+        """
+        smtp_connection = getattr(connection, 'connection', None)
+        if not hasattr(smtp_connection, 'noop'):
+            return True
+        try:
+            status, _ = smtp_connection.noop()
+        except Exception:  # pylint: disable=broad-except
+            log.debug("BulkEmail ==> Idle connection failed its liveness check", exc_info=True)
+            return False
+        return status == 250
+
+    def _reset_after_fork(self):
+        """
+        Forgets connections that were opened by a parent process, since their sockets are shared with it.
+        """
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle = []
+
+
+CONNECTION_POOL = _ConnectionPool()
+
+
+def _send_to_recipients(send_fcn, to_list, num_workers):
+    """
+    Calls `send_fcn(connection, recipient_num, recipient)` for each recipient in `to_list`.
+
+    Up to `num_workers` threads send concurrently, each over its own connection taken from
+    CONNECTION_POOL, and each sending no faster than
+    settings.BULK_EMAIL_MAX_SENDS_PER_SECOND_PER_CONNECTION (if set).
+
+    Recipients are taken from the end of `to_list` and are only dropped from it once they have
+    been processed, so that if an error is raised, `to_list` contains exactly the recipients
+    that still need to be sent to.  The first error raised by any thread stops all of them,
+    and is then re-raised here.
+    """
+    num_workers = min(num_workers, len(to_list))
+    max_sends_per_second = settings.BULK_EMAIL_MAX_SENDS_PER_SECOND_PER_CONNECTION
+    min_send_interval = 1.0 / max_sends_per_second if max_sends_per_second else 0
+    lock = threading.Lock()
+    errors = []
+    num_started = Counter()
+
+    def next_recipient():
+        """
+        Removes and returns the next recipient to send to, or None if sending should stop.
+        """
+        with lock:
+            if errors or not to_list:
+                return None, None
+            num_started['recipients'] += 1
+            return num_started['recipients'], to_list.pop()
+
+    def send_all():
+        """
+        Sends to recipients over a single connection until there are none left or an error occurs.
+        """
+        connection = None
+        try:
+            connection = CONNECTION_POOL.acquire()
+            last_send_time = None
+            while True:
+                recipient_num, recipient = next_recipient()
+                if recipient is None:
+                    break
+                if last_send_time is not None:
+                    wait_time = last_send_time + min_send_interval - time()
+                    if wait_time > 0:
+                        sleep(wait_time)
+                last_send_time = time()
+                try:
+                    send_fcn(connection, recipient_num, recipient)
+                except Exception:
+                    # Put the recipient back, so that it is included in a retry.
+                    with lock:
+                        to_list.append(recipient)
+                    raise
+        except Exception:  # pylint: disable=broad-except
+            with lock:
+                errors.append(sys.exc_info())
+            if connection is not None:
+                CONNECTION_POOL.discard(connection)
+        else:
+            CONNECTION_POOL.release(connection)
+
+    if num_workers <= 1:
+        if to_list:
+            send_all()
+    else:
+        workers = [threading.Thread(target=send_all) for _ in range(num_workers)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    if errors:
+        exc_type, exc_value, exc_traceback = errors[0]
+        raise exc_type, exc_value, exc_traceback
+
+
 def _send_course_email(entry_id, email_id, to_list, global_email_context, subtask_status):
     """
     Performs the email sending task.
@@ -439,7 +601,7 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         template.  It does not include 'name' and 'email', which will be provided by the to_list.
       * `subtask_status` : object of class SubtaskStatus representing current status.
 
-    Sends to all addresses contained in to_list that are not also in the Optout table.
+    Sends to all addresses contained in to_list, from which optouts have already been excluded.
     Emails are sent multi-part, in both plain text and html.
 
     Returns a tuple of two values:
@@ -453,9 +615,6 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
     parent_task_id = InstructorTask.objects.get(pk=entry_id).task_id
     task_id = subtask_status.task_id
     total_recipients = len(to_list)
-    recipient_num = 0
-    total_recipients_successful = 0
-    total_recipients_failed = 0
     recipients_info = Counter()
 
     log.info(
@@ -477,16 +636,6 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         )
         raise
 
-    # Exclude optouts (if not a retry):
-    # Note that we don't have to do the optout logic at all if this is a retry,
-    # because we have presumably already performed the optout logic on the first
-    # attempt.  Anyone on the to_list on a retry has already passed the filter
-    # that existed at that time, and we don't need to keep checking for changes
-    # in the Optout list.
-    if subtask_status.get_retry_count() == 0:
-        to_list, num_optout = _filter_optouts_from_recipients(to_list, course_email.course_id)
-        subtask_status.increment(skipped=num_optout)
-
     course_title = global_email_context['course_title']
     course_language = global_email_context['course_language']
 
@@ -497,30 +646,33 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
     # use the CourseEmailTemplate that was associated with the CourseEmail
     course_email_template = course_email.get_template()
     try:
-        connection = get_connection()
-        connection.open()
-
         # Define context values to use in all course emails:
         email_context = {'name': '', 'email': ''}
         email_context.update(global_email_context)
+        email_context['course_id'] = course_email.course_id
+
+        # Counts of the recipients processed so far, shared by the sending threads.
+        progress = Counter()
+        progress_lock = threading.Lock()
+
+        def send_to_recipient(connection, recipient_num, current_recipient):
+            """
+            Sends the email to a single recipient over the given connection.
 
-        while to_list:
-            # Update context with user-specific values from the user at the end of the list.
-            # At the end of processing this user, they will be popped off of the to_list.
-            # That way, the to_list will always contain the recipients remaining to be emailed.
-            # This is convenient for retries, which will need to send to those who haven't
-            # yet been emailed, but not send to those who have already been sent to.
-            recipient_num += 1
-            current_recipient = to_list[-1]
+            Failures that are particular to the recipient are counted here.  Other errors
+            are raised, and leave the recipient to be retried.
+            """
             email = current_recipient['email']
-            email_context['email'] = email
-            email_context['name'] = current_recipient['profile__name']
-            email_context['user_id'] = current_recipient['pk']
-            email_context['course_id'] = course_email.course_id
+            recipient_context = dict(
+                email_context,
+                email=email,
+                name=current_recipient['profile__name'],
+                user_id=current_recipient['pk'],
+            )
 
             # Construct message content using templates and context:
-            plaintext_msg = course_email_template.render_plaintext(course_email.text_message, email_context)
-            html_msg = course_email_template.render_htmltext(course_email.html_message, email_context)
+            plaintext_msg = course_email_template.render_plaintext(course_email.text_message, recipient_context)
+            html_msg = course_email_template.render_htmltext(course_email.html_message, recipient_context)
 
             # Create email:
             email_msg = EmailMultiAlternatives(
@@ -557,7 +709,8 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
 
             except SMTPDataError as exc:
                 # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure.
-                total_recipients_failed += 1
+                with progress_lock:
+                    progress['failed'] += 1
                 log.error(
                     "BulkEmail ==> Status: Failed(SMTPDataError), Task: %s, SubTask: %s, EmailId: %s, \
                     Recipient num: %s/%s, Email address: %s",
@@ -569,7 +722,8 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
                     email
                 )
                 if exc.smtp_code >= 400 and exc.smtp_code < 500:
-                    # This will cause the outer handler to catch the exception and retry the entire task.
+                    # This will cause the outer handler to catch the exception and retry the
+                    # recipients that have not been processed.
                     raise exc
                 else:
                     # This will fall through and not retry the message.
@@ -585,11 +739,13 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
                         exc.smtp_error
                     )
                     dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
-                    subtask_status.increment(failed=1)
+                    with progress_lock:
+                        subtask_status.increment(failed=1)
 
             except SINGLE_EMAIL_FAILURE_ERRORS as exc:
                 # This will fall through and not retry the message.
-                total_recipients_failed += 1
+                with progress_lock:
+                    progress['failed'] += 1
                 log.error(
                     "BulkEmail ==> Status: Failed(SINGLE_EMAIL_FAILURE_ERRORS), Task: %s, SubTask: %s, \
                     EmailId: %s, Recipient num: %s/%s, Email address: %s, Exception: %s",
@@ -602,10 +758,12 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
                     exc
                 )
                 dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
-                subtask_status.increment(failed=1)
+                with progress_lock:
+                    subtask_status.increment(failed=1)
 
             else:
-                total_recipients_successful += 1
+                with progress_lock:
+                    progress['successful'] += 1
                 log.info(
                     "BulkEmail ==> Status: Success, Task: %s, SubTask: %s, EmailId: %s, \
                     Recipient num: %s/%s, Email address: %s,",
@@ -621,13 +779,22 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
                     log.info('Email with id %s sent to %s', email_id, email)
                 else:
                     log.debug('Email with id %s sent to %s', email_id, email)
-                subtask_status.increment(succeeded=1)
-
-            # Pop the user that was emailed off the end of the list only once they have
-            # successfully been processed.  (That way, if there were a failure that
-            # needed to be retried, the user is still on the list.)
-            recipients_info[email] += 1
-            to_list.pop()
+                with progress_lock:
+                    subtask_status.increment(succeeded=1)
+
+            with progress_lock:
+                recipients_info[email] += 1
+
+        start_time = time()
+        try:
+            _send_to_recipients(send_to_recipient, to_list, settings.BULK_EMAIL_SEND_CONCURRENCY)
+        finally:
+            elapsed_time = time() - start_time
+            num_processed = progress['successful'] + progress['failed']
+            if num_processed and elapsed_time > 0:
+                dog_stats_api.histogram(
+                    'course_email.send_rate', num_processed / elapsed_time, tags=[_statsd_tag(course_title)]
+                )
 
         log.info(
             "BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Total Successful Recipients: %s/%s, \
@@ -635,9 +802,9 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
             parent_task_id,
             task_id,
             email_id,
-            total_recipients_successful,
+            progress['successful'],
             total_recipients,
-            total_recipients_failed,
+            progress['failed'],
             total_recipients
         )
         duplicate_recipients = ["{0} ({1})".format(email, repetition)
@@ -706,9 +873,6 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         subtask_status.increment(state=SUCCESS)
         # Successful completion is marked by an exception value of None.
         return subtask_status, None
-    finally:
-        # Clean up at the end.
-        connection.close()
 
 
 def _get_current_task():
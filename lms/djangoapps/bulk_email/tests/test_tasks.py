@@ -26,12 +26,14 @@ from boto.ses.exceptions import (
 from celery.states import FAILURE, SUCCESS  # pylint: disable=no-name-in-module, import-error
 from django.conf import settings
 from django.core.management import call_command
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
 from mock import Mock, patch
 from nose.plugins.attrib import attr
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
 from bulk_email.models import SEND_TO_LEARNERS, SEND_TO_MYSELF, SEND_TO_STAFF, CourseEmail, Optout
-from bulk_email.tasks import _get_course_email_context
+from bulk_email.tasks import _ConnectionPool, _get_course_email_context, _send_to_recipients
 from lms.djangoapps.instructor_task.models import InstructorTask
 from lms.djangoapps.instructor_task.subtasks import SubtaskStatus, update_subtask_status
 from lms.djangoapps.instructor_task.tasks import send_bulk_course_email
@@ -214,6 +216,62 @@ class TestBulkEmailInstructorTask(InstructorTaskCourseTestCase):
         self.assertEquals(parent_status.get('succeeded'), num_emails)
         self.assertEquals(parent_status.get('failed'), 0)
 
+    @override_settings(BULK_EMAIL_SEND_CONCURRENCY=4)
+    def test_concurrent_retry_resends_only_unsent(self):
+        # Select number of emails to fit into a single subtask.
+        num_emails = settings.BULK_EMAIL_EMAILS_PER_TASK
+        # We also send email to the instructor:
+        self._create_students(num_emails - 1)
+        sent_to = []
+        results = chain(repeat(None, 3), [SMTPServerDisconnected(425, "Disconnecting")], repeat(None))
+
+        def send_messages(messages):
+            """Records the recipients of the messages that are sent successfully."""
+            result = next(results)
+            if result is not None:
+                raise result
+            sent_to.extend(address for message in messages for address in message.to)
+
+        with patch('bulk_email.tasks.get_connection', autospec=True) as get_conn:
+            get_conn.return_value.send_messages.side_effect = send_messages
+            self._test_run_with_task(
+                send_bulk_course_email, 'emailed', num_emails, num_emails, retried_withmax=1
+            )
+        self.assertEquals(len(sent_to), num_emails)
+        self.assertEquals(len(set(sent_to)), num_emails)
+
+    @override_settings(BULK_EMAIL_SEND_CONCURRENCY=4, BULK_EMAIL_CONNECTION_POOL_SIZE=4)
+    def test_concurrent_sends_over_pooled_connections(self):
+        # Select number of emails to fit into a single subtask.
+        num_emails = settings.BULK_EMAIL_EMAILS_PER_TASK
+        # We also send email to the instructor:
+        self._create_students(num_emails - 1)
+        connections = []
+        sent_to = []
+
+        def create_connection():
+            """Returns a new connection that records the recipients of the messages it sends."""
+            connection = Mock()
+            connection.connection.noop.return_value = (250, 'OK')
+            connection.send_messages.side_effect = lambda messages: sent_to.extend(
+                address for message in messages for address in message.to
+            )
+            connections.append(connection)
+            return connection
+
+        with patch('bulk_email.tasks.CONNECTION_POOL', _ConnectionPool()):
+            with patch('bulk_email.tasks.get_connection', side_effect=create_connection):
+                self._test_run_with_task(send_bulk_course_email, 'emailed', num_emails, num_emails)
+                self._test_run_with_task(send_bulk_course_email, 'emailed', num_emails, num_emails)
+
+        self.assertEquals(len(sent_to), 2 * num_emails)
+        self.assertEquals(len(set(sent_to)), num_emails)
+        # The connections of the first task are checked and reused by the second one.
+        self.assertLessEqual(len(connections), 4)
+        self.assertTrue(any(connection.connection.noop.called for connection in connections))
+        for connection in connections:
+            self.assertFalse(connection.close.called)
+
     def test_unactivated_user(self):
         # Select number of emails to fit into a single subtask.
         num_emails = settings.BULK_EMAIL_EMAILS_PER_TASK
@@ -227,22 +285,20 @@ class TestBulkEmailInstructorTask(InstructorTaskCourseTestCase):
             get_conn.return_value.send_messages.side_effect = cycle([None])
             self._test_run_with_task(send_bulk_course_email, 'emailed', num_emails - 1, num_emails - 1)
 
-    def test_skipped(self):
+    def test_optouts_are_not_recipients(self):
         # Select number of emails to fit into a single subtask.
         num_emails = settings.BULK_EMAIL_EMAILS_PER_TASK
         # We also send email to the instructor:
         students = self._create_students(num_emails - 1)
         # have every fourth student optout:
-        expected_skipped = int((num_emails + 3) / 4.0)
-        expected_succeeds = num_emails - expected_skipped
+        num_optouts = int((num_emails + 3) / 4.0)
+        expected_succeeds = num_emails - num_optouts
         for index in range(0, num_emails, 4):
             Optout.objects.create(user=students[index], course_id=self.course.id)
-        # mark some students as opting out
+        # optouts are excluded when the recipients are queried, so they are not counted as skipped
         with patch('bulk_email.tasks.get_connection', autospec=True) as get_conn:
             get_conn.return_value.send_messages.side_effect = cycle([None])
-            self._test_run_with_task(
-                send_bulk_course_email, 'emailed', num_emails, expected_succeeds, skipped=expected_skipped
-            )
+            self._test_run_with_task(send_bulk_course_email, 'emailed', expected_succeeds, expected_succeeds)
 
     def _test_email_address_failures(self, exception):
         """Test that celery handles bad address errors by failing and not retrying."""
@@ -444,3 +500,73 @@ class TestBulkEmailInstructorTask(InstructorTaskCourseTestCase):
         self.assertIn('account_settings_url', result)
         self.assertIn('email_settings_url', result)
         self.assertIn('platform_name', result)
+
+
+@attr(shard=3)
+class TestConnectionPool(SimpleTestCase):
+    """Tests the reuse of email connections by _ConnectionPool."""
+
+    def setUp(self):
+        super(TestConnectionPool, self).setUp()
+        self.pool = _ConnectionPool()
+        patcher = patch('bulk_email.tasks.get_connection', side_effect=self._create_connection)
+        self.get_connection = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _create_connection(self):
+        """Returns a new connection whose SMTP server accepts NOOP commands."""
+        connection = Mock()
+        connection.connection.noop.return_value = (250, 'OK')
+        return connection
+
+    @override_settings(BULK_EMAIL_CONNECTION_POOL_SIZE=1)
+    def test_reuses_live_connection(self):
+        connection = self.pool.acquire()
+        self.pool.release(connection)
+        self.assertIs(self.pool.acquire(), connection)
+        self.assertEquals(self.get_connection.call_count, 1)
+        self.assertTrue(connection.connection.noop.called)
+        self.assertFalse(connection.close.called)
+
+    @override_settings(BULK_EMAIL_CONNECTION_POOL_SIZE=1)
+    def test_discards_dropped_connection(self):
+        connection = self.pool.acquire()
+        self.pool.release(connection)
+        connection.connection.noop.side_effect = SMTPServerDisconnected("Connection unexpectedly closed")
+        new_connection = self.pool.acquire()
+        self.assertIsNot(new_connection, connection)
+        self.assertTrue(connection.close.called)
+        self.assertTrue(new_connection.open.called)
+
+    @override_settings(BULK_EMAIL_CONNECTION_POOL_SIZE=1)
+    def test_discards_connection_closing_on_noop(self):
+        connection = self.pool.acquire()
+        self.pool.release(connection)
+        connection.connection.noop.return_value = (421, 'Service not available, closing transmission channel')
+        self.assertIsNot(self.pool.acquire(), connection)
+        self.assertTrue(connection.close.called)
+
+    @override_settings(BULK_EMAIL_CONNECTION_POOL_SIZE=0)
+    def test_closes_connection_without_pool(self):
+        connection = self.pool.acquire()
+        self.pool.release(connection)
+        self.assertTrue(connection.close.called)
+        self.assertIsNot(self.pool.acquire(), connection)
+
+    @override_settings(BULK_EMAIL_CONNECTION_POOL_SIZE=4)
+    def test_concurrent_sends_reuse_connections(self):
+        sent = []
+
+        def send_fcn(connection, recipient_num, recipient):  # pylint: disable=unused-argument
+            """Records the recipient and the connection it was sent over."""
+            sent.append((connection, recipient))
+
+        with patch('bulk_email.tasks.CONNECTION_POOL', self.pool):
+            for _ in range(2):
+                _send_to_recipients(send_fcn, range(20), 4)
+
+        self.assertEquals(sorted(recipient for _, recipient in sent), sorted(range(20) * 2))
+        # Never more connections than there are threads, and all of them kept open.
+        self.assertLessEqual(self.get_connection.call_count, 4)
+        for connection, _ in sent:
+            self.assertFalse(connection.close.called)
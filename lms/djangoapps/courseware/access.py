@@ -13,14 +13,17 @@ Note: The access control logic in this file does NOT check for enrollment in
 import logging
 from datetime import datetime
 
+import crum
 import pytz
 from ccx_keys.locator import CCXLocator
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 from django.utils.timezone import UTC
+from lazy import lazy
 from opaque_keys.edx.keys import CourseKey, UsageKey
 from xblock.core import XBlock
 
+import request_cache
 from courseware.access_response import MilestoneError, MobileAvailabilityError, VisibilityError
 from courseware.access_utils import (
     ACCESS_DENIED,
@@ -164,6 +167,109 @@ def has_access(user, action, obj, course_key=None):
                     .format(type(obj)))
 
 
+def has_access_to_blocks(user, action, descriptors, course_key):
+    """
+    Check whether a user has the access to do action on each of the given
+    descriptors (or modules) of the course with course_key.
+
+    The result for each descriptor is the same as has_access(user, action,
+    descriptor, course_key), but the checks that only depend on the user and
+    the course -- preview mode, the user's role and staff access, registration
+    and the user's group in each user partition -- are made once, and are
+    reused for the rest of the request.
+
+    Returns a dict mapping the location of each descriptor to an AccessResponse.
+    """
+    if not user:
+        user = AnonymousUser()
+
+    if in_preview_mode() and not has_staff_access_to_preview_mode(user, course_key):
+        return {descriptor.location: ACCESS_DENIED for descriptor in descriptors}
+
+    user_access = _get_user_course_access(user, course_key)
+    responses = {}
+    for descriptor in descriptors:
+        block = descriptor.descriptor if isinstance(descriptor, XModule) else descriptor
+        if action in ('load', 'staff', 'instructor') and _is_plain_descriptor(block):
+            responses[descriptor.location] = _has_access_descriptor(user, action, block, course_key, user_access)
+        else:
+            responses[descriptor.location] = has_access(user, action, descriptor, course_key)
+    return responses
+
+
+def _is_plain_descriptor(obj):
+    """
+    Returns whether has_access checks obj with _has_access_descriptor.
+    """
+    return isinstance(obj, XBlock) and not isinstance(obj, (CourseDescriptor, ErrorDescriptor))
+
+
+class _UserCourseAccess(object):
+    """
+    The access checks of a user in a course which do not depend on the block
+    being accessed. Each check is made when it is first needed.
+    """
+    def __init__(self, user, course_key):
+        self.user = user
+        self.course_key = course_key
+        self._groups_by_partition_id = {}
+
+    @lazy
+    def is_registered(self):
+        """
+        Whether the user has a profile.
+        """
+        return UserProfile.has_registered(self.user)
+
+    @lazy
+    def user_role(self):
+        """
+        The user's role in the course, taking masquerading into account.
+        """
+        return get_user_role(self.user, self.course_key)
+
+    @lazy
+    def staff_access(self):
+        """
+        Whether the user has staff access to the course.
+        """
+        return _has_access_to_course(self.user, 'staff', self.course_key)
+
+    @lazy
+    def instructor_access(self):
+        """
+        Whether the user has instructor access to the course.
+        """
+        return _has_access_to_course(self.user, 'instructor', self.course_key)
+
+    def get_group_for_partition(self, partition):
+        """
+        Returns the user's group in the given user partition.
+        """
+        if partition.id not in self._groups_by_partition_id:
+            self._groups_by_partition_id[partition.id] = partition.scheme.get_group_for_user(
+                self.course_key,
+                self.user,
+                partition,
+            )
+        return self._groups_by_partition_id[partition.id]
+
+
+def _get_user_course_access(user, course_key):
+    """
+    Returns the _UserCourseAccess of the user in the course, which is shared
+    by the rest of the current request.
+    """
+    if crum.get_current_request() is None:
+        return _UserCourseAccess(user, course_key)
+
+    cache = request_cache.get_cache('courseware.access.user_course_access')
+    cache_key = (user.id, unicode(course_key))
+    if cache_key not in cache:
+        cache[cache_key] = _UserCourseAccess(user, course_key)
+    return cache[cache_key]
+
+
 def has_staff_access_to_preview_mode(user, course_key):
     """
     Checks if given user can access course in preview mode.
@@ -483,13 +589,17 @@ def _can_load_descriptor_nonregistered(descriptor):
     return descriptor.category in NONREGISTERED_CATEGORY_WHITELIST
 
 
-def _has_group_access(descriptor, user, course_key):
+def _has_group_access(descriptor, user, course_key, user_access=None):
     """
     This function returns a boolean indicating whether or not `user` has
     sufficient group memberships to "load" a block (the `descriptor`)
+
+    user_access (_UserCourseAccess): if given, the user's role and groups are looked up with it.
     """
+    user_role = user_access.user_role if user_access else get_user_role(user, course_key)
+
     # Allow staff and instructors roles group access, as they are not masquerading as a student.
-    if get_user_role(user, course_key) in ['staff', 'instructor']:
+    if user_role in ['staff', 'instructor']:
         return ACCESS_GRANTED
 
     # use merged_group_access which takes group access on the block's
@@ -539,11 +649,14 @@ def _has_group_access(descriptor, user, course_key):
     # look up the user's group for each partition
     user_groups = {}
     for partition, groups in partition_groups:
-        user_groups[partition.id] = partition.scheme.get_group_for_user(
-            course_key,
-            user,
-            partition,
-        )
+        if user_access:
+            user_groups[partition.id] = user_access.get_group_for_partition(partition)
+        else:
+            user_groups[partition.id] = partition.scheme.get_group_for_user(
+                course_key,
+                user,
+                partition,
+            )
 
     # finally: check that the user has a satisfactory group assignment
     # for each partition.
@@ -554,7 +667,7 @@ def _has_group_access(descriptor, user, course_key):
     return ACCESS_GRANTED
 
 
-def _has_access_descriptor(user, action, descriptor, course_key=None):
+def _has_access_descriptor(user, action, descriptor, course_key=None, user_access=None):
     """
     Check if user has access to this descriptor.
 
@@ -562,10 +675,29 @@ def _has_access_descriptor(user, action, descriptor, course_key=None):
     'load' -- load this descriptor, showing it to the user.
     'staff' -- staff access to descriptor.
 
+    user_access (_UserCourseAccess): if given, the checks that do not depend on
+    the descriptor are looked up with it (see has_access_to_blocks).
+
     NOTE: This is the fallback logic for descriptors that don't have custom policy
     (e.g. courses).  If you call this method directly instead of going through
     has_access(), it will not do the right thing.
     """
+    def has_staff_access():
+        """
+        Returns whether the user has staff access to the descriptor.
+        """
+        if user_access:
+            return user_access.staff_access
+        return _has_staff_access_to_descriptor(user, descriptor, course_key)
+
+    def has_instructor_access():
+        """
+        Returns whether the user has instructor access to the descriptor.
+        """
+        if user_access:
+            return user_access.instructor_access
+        return _has_instructor_access_to_descriptor(user, descriptor, course_key)
+
     def can_load():
         """
         NOTE: This does not check that the student is enrolled in the course
@@ -574,7 +706,8 @@ def _has_access_descriptor(user, action, descriptor, course_key=None):
         don't have to hit the enrollments table on every module load.
         """
         if user.is_authenticated():
-            if not UserProfile.has_registered(user):
+            is_registered = user_access.is_registered if user_access else UserProfile.has_registered(user)
+            if not is_registered:
                 if not _can_load_descriptor_nonregistered(descriptor):
                     return ACCESS_DENIED
 
@@ -582,11 +715,11 @@ def _has_access_descriptor(user, action, descriptor, course_key=None):
         # access to this content, then deny access. The problem with calling _has_staff_access_to_descriptor
         # before this method is that _has_staff_access_to_descriptor short-circuits and returns True
         # for staff users in preview mode.
-        if not _has_group_access(descriptor, user, course_key):
+        if not _has_group_access(descriptor, user, course_key, user_access):
             return ACCESS_DENIED
 
         # If the user has staff access, they can load the module and checks below are not needed.
-        if _has_staff_access_to_descriptor(user, descriptor, course_key):
+        if has_staff_access():
             return ACCESS_GRANTED
 
         return (
@@ -600,8 +733,8 @@ def _has_access_descriptor(user, action, descriptor, course_key=None):
 
     checkers = {
         'load': can_load,
-        'staff': lambda: _has_staff_access_to_descriptor(user, descriptor, course_key),
-        'instructor': lambda: _has_instructor_access_to_descriptor(user, descriptor, course_key)
+        'staff': has_staff_access,
+        'instructor': has_instructor_access,
     }
 
     return _dispatch(checkers, action, user, descriptor)
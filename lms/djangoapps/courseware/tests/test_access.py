@@ -5,6 +5,7 @@ Test the access control framework
 import datetime
 import itertools
 
+import crum
 import ddt
 import pytz
 from ccx_keys.locator import CCXLocator
@@ -31,6 +32,8 @@ from courseware.tests.factories import (
 from courseware.tests.helpers import LoginEnrollmentTestCase, masquerade_as_group_member
 from lms.djangoapps.ccx.models import CustomCourseForEdX
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+from openedx.core.djangolib.testing.utils import get_mock_request
+from request_cache.middleware import RequestCache
 from student.models import CourseEnrollment
 from student.roles import CourseCcxCoachRole, CourseStaffRole
 from student.tests.factories import (
@@ -331,6 +334,50 @@ class AccessTestCase(LoginEnrollmentTestCase, ModuleStoreTestCase, MilestonesTes
             bool(access.has_access(self.global_staff, 'load', chapter, course_key=self.course.id))
         )
 
+    @patch.dict('django.conf.settings.FEATURES', {'DISABLE_START_DATES': False})
+    def test_has_access_to_blocks(self):
+        """
+        Tests that has_access_to_blocks gives the same result as has_access for each block.
+        """
+        chapter = ItemFactory.create(category='chapter', parent_location=self.course.location)
+        ItemFactory.create(category='sequential', parent_location=chapter.location, visible_to_staff_only=True)
+        ItemFactory.create(category='sequential', parent_location=chapter.location, start=self.TOMORROW)
+        ItemFactory.create(category='sequential', parent_location=chapter.location, days_early_for_beta=2,
+                           start=self.TOMORROW)
+        blocks = [self.course] + modulestore().get_items(self.course.id, qualifiers={'category': 'sequential'})
+
+        for user, action in itertools.product(
+                [self.anonymous_user, self.student, self.beta_user, self.course_staff, self.course_instructor],
+                ['load', 'staff', 'instructor'],
+        ):
+            block_access = access.has_access_to_blocks(user, action, blocks, self.course.id)
+            self.assertEqual(set(block_access), {block.location for block in blocks})
+            for block in blocks:
+                self.assertEqual(
+                    bool(block_access[block.location]),
+                    bool(access.has_access(user, action, block, self.course.id)),
+                    (user, action, block.location),
+                )
+
+    def test_has_access_to_blocks_is_memoized_for_request(self):
+        """
+        Tests that the checks which do not depend on the block are made once per request.
+        """
+        self.addCleanup(crum.set_current_request, None)
+        self.addCleanup(RequestCache.clear_request_cache)
+        chapter = ItemFactory.create(category='chapter', parent_location=self.course.location)
+        get_mock_request(self.student)
+
+        with patch('courseware.access.get_user_role', wraps=access.get_user_role) as mock_user_role:
+            for __ in range(2):
+                block_access = access.has_access_to_blocks(self.student, 'load', [chapter], self.course.id)
+                self.assertTrue(block_access[chapter.location])
+            self.assertEqual(mock_user_role.call_count, 1)
+
+            RequestCache.clear_request_cache()
+            access.has_access_to_blocks(self.student, 'load', [chapter], self.course.id)
+            self.assertEqual(mock_user_role.call_count, 2)
+
     def test_has_access_to_course(self):
         self.assertFalse(access._has_access_to_course(
             None, 'staff', self.course.id
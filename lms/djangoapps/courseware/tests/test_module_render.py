@@ -114,6 +114,13 @@ class GradedStatelessXBlock(XBlock):
         )
 
 
+def grant_access_to_blocks(user, action, descriptors, course_key):  # pylint: disable=unused-argument
+    """
+    Stand-in for `has_access_to_blocks` that grants access to every block.
+    """
+    return {descriptor.location: True for descriptor in descriptors}
+
+
 @attr(shard=1)
 @ddt.ddt
 class ModuleRenderTestCase(SharedModuleStoreTestCase, LoginEnrollmentTestCase):
@@ -1475,6 +1482,7 @@ class DetachedXBlock(XBlock):
 @attr(shard=1)
 @patch.dict('django.conf.settings.FEATURES', {'DISPLAY_DEBUG_INFO_TO_STAFF': True, 'DISPLAY_HISTOGRAMS_TO_STAFF': True})
 @patch('courseware.module_render.has_access', Mock(return_value=True, autospec=True))
+@patch('courseware.module_render.has_access_to_blocks', grant_access_to_blocks)
 class TestStaffDebugInfo(SharedModuleStoreTestCase):
     """Tests to verify that Staff Debug Info panel and histograms are displayed to staff."""
 
@@ -1637,6 +1645,7 @@ class TestAnonymousStudentId(SharedModuleStoreTestCase, LoginEnrollmentTestCase)
         self.user = UserFactory()
 
     @patch('courseware.module_render.has_access', Mock(return_value=True, autospec=True))
+    @patch('courseware.module_render.has_access_to_blocks', grant_access_to_blocks)
     def _get_anonymous_id(self, course_id, xblock_class):
         location = course_id.make_usage_key('dummy_category', 'dummy_name')
         descriptor = Mock(
@@ -2115,8 +2124,8 @@ class TestFilteredChildren(SharedModuleStoreTestCase):
         super(TestFilteredChildren, self).setUp()
         self.users = {number: UserFactory() for number in USER_NUMBERS}
 
-        self._old_has_access = render.has_access
-        patcher = patch('courseware.module_render.has_access', self._has_access)
+        self._old_has_access_to_blocks = render.has_access_to_blocks
+        patcher = patch('courseware.module_render.has_access_to_blocks', self._has_access_to_blocks)
         patcher.start()
         self.addCleanup(patcher.stop)
 
@@ -2217,22 +2226,21 @@ class TestFilteredChildren(SharedModuleStoreTestCase):
             course=self.course
         )
 
-    def _has_access(self, user, action, obj, course_key=None):
+    def _has_access_to_blocks(self, user, action, descriptors, course_key):
         """
-        Mock implementation of `has_access` used to control which blocks
+        Mock implementation of `has_access_to_blocks` used to control which blocks
         have access to which children during tests.
         """
         if action != 'load':
-            return self._old_has_access(user, action, obj, course_key)
+            return self._old_has_access_to_blocks(user, action, descriptors, course_key)
 
-        if isinstance(obj, XBlock):
-            key = obj.scope_ids.usage_id
-        elif isinstance(obj, UsageKey):
-            key = obj
-
-        if key == self.parent.scope_ids.usage_id:
-            return True
-        return key in self.children_for_user[user]
+        return {
+            descriptor.location: (
+                descriptor.scope_ids.usage_id == self.parent.scope_ids.usage_id or
+                descriptor.scope_ids.usage_id in self.children_for_user[user]
+            )
+            for descriptor in descriptors
+        }
 
     def assertBoundChildren(self, block, user):
         """
@@ -289,10 +289,13 @@ def single_thread(request, course_key, discussion_id, thread_id):
 
     if request.is_ajax():
         cc_user = cc.User.from_django_user(request.user)
-        user_info = cc_user.to_dict()
+        user_info, thread = cc.utils.perform_concurrently(
+            cc_user.to_dict,
+            lambda: _retrieve_thread(request, thread_id),
+        )
         is_staff = has_permission(request.user, 'openclose_thread', course.id)
 
-        thread = _find_thread(request, course, discussion_id=discussion_id, thread_id=thread_id)
+        thread = _verify_thread_access(request, course, discussion_id, thread)
         if not thread:
             raise Http404
 
@@ -331,8 +334,17 @@ def _find_thread(request, course, discussion_id, thread_id):
     Returns:
         The thread in question if the user can see it, else None.
     """
+    thread = _retrieve_thread(request, thread_id)
+    return _verify_thread_access(request, course, discussion_id, thread)
+
+
+def _retrieve_thread(request, thread_id):
+    """
+    Retrieves the discussion thread with the specified ID from the comments
+    service, or returns None if it is not found.
+    """
     try:
-        thread = cc.Thread.find(thread_id).retrieve(
+        return cc.Thread.find(thread_id).retrieve(
             with_responses=request.is_ajax(),
             recursive=request.is_ajax(),
             user_id=request.user.id,
@@ -342,6 +354,14 @@ def _find_thread(request, course, discussion_id, thread_id):
     except cc.utils.CommentClientRequestError:
         return None
 
+
+def _verify_thread_access(request, course, discussion_id, thread):
+    """
+    Returns the given thread if the user can see it, else None.
+    """
+    if thread is None:
+        return None
+
     # Verify that the student has access to this thread if belongs to a course discussion module
     thread_context = getattr(thread, "context", "course")
     if thread_context == "course" and not utils.discussion_category_id_access(course, request.user, discussion_id):
@@ -0,0 +1,66 @@
+"""
+Tests for the DiscussionTopicsTransformer.
+"""
+from datetime import datetime
+
+from pytz import UTC
+
+from django_comment_client.transformer import DiscussionTopic, DiscussionTopicsTransformer
+from lms.djangoapps.course_blocks.api import get_course_blocks
+from lms.djangoapps.course_blocks.transformers.tests.helpers import CourseStructureTestCase
+
+
+class DiscussionTopicsTransformerTestCase(CourseStructureTestCase):
+    """
+    Verify behavior of the DiscussionTopicsTransformer
+    """
+    TRANSFORMER_CLASS_TO_TEST = DiscussionTopicsTransformer
+
+    def setUp(self):
+        super(DiscussionTopicsTransformerTestCase, self).setUp()
+        self.start = datetime(2015, 4, 1, tzinfo=UTC)
+        self.blocks = self.build_course([
+            {
+                '#type': 'course',
+                '#ref': 'course',
+                'start': self.start,
+                '#children': [
+                    {
+                        '#type': 'vertical',
+                        '#ref': 'vertical',
+                        '#children': [
+                            {
+                                '#type': 'discussion',
+                                '#ref': 'discussion',
+                                'discussion_id': 'discussion_id',
+                                'discussion_category': 'Chapter / Section',
+                                'discussion_target': 'Target',
+                                'sort_key': 'A',
+                            },
+                            {'#type': 'html', '#ref': 'html'},
+                        ],
+                    },
+                ],
+            },
+        ])
+
+    def test_topics(self):
+        block_structure = get_course_blocks(self.user, self.blocks['course'].location, self.transformers)
+        self.assertEqual(
+            DiscussionTopicsTransformer.get_topics(block_structure),
+            [
+                DiscussionTopic(
+                    location=self.blocks['discussion'].location,
+                    discussion_id='discussion_id',
+                    discussion_category='Chapter / Section',
+                    discussion_target='Target',
+                    sort_key='A',
+                    start=self.start,
+                ),
+            ],
+        )
+
+    def test_no_topics_for_removed_blocks(self):
+        block_structure = get_course_blocks(self.user, self.blocks['course'].location, self.transformers)
+        block_structure.remove_block(self.blocks['vertical'].location, keep_descendants=False)
+        self.assertEqual(DiscussionTopicsTransformer.get_topics(block_structure), [])
@@ -1,11 +1,13 @@
 # -*- coding: utf-8 -*-
 import datetime
 import json
+import threading
 
 import ddt
 import mock
 from django.core.urlresolvers import reverse
 from django.test import RequestFactory, TestCase
+from django.utils import translation
 from django.utils.timezone import UTC as django_utc
 from mock import Mock, patch
 from nose.plugins.attrib import attr
@@ -24,7 +26,12 @@ from django_comment_common.models import CourseDiscussionSettings, ForumsConfig
 from django_comment_common.utils import get_course_discussion_settings, set_course_discussion_settings
 from edxmako import add_lookup
 from lms.djangoapps.teams.tests.factories import CourseTeamFactory
-from lms.lib.comment_client.utils import CommentClientMaintenanceError, perform_request
+from lms.lib.comment_client.utils import (
+    CommentClientError,
+    CommentClientMaintenanceError,
+    perform_concurrently,
+    perform_request
+)
 from openedx.core.djangoapps.content.course_structures.models import CourseStructure
 from openedx.core.djangoapps.course_groups import cohorts
 from openedx.core.djangoapps.course_groups.cohorts import set_course_cohorted
@@ -313,6 +320,11 @@ class CachedDiscussionIdMapTestCase(ModuleStoreTestCase):
         CourseStructure.objects.all().delete()
         self.verify_discussion_metadata()
 
+    def test_get_discussion_id_map_only_requested_ids(self):
+        metadata = utils.get_cached_discussion_id_map(self.course, ['test_discussion_id'], self.user)
+        self.assertEqual(metadata.keys(), ['test_discussion_id'])
+        self.assertEqual(metadata['test_discussion_id']['location'], self.discussion.location)
+
     def test_get_missing_discussion_id_map_from_cache(self):
         metadata = utils.get_cached_discussion_id_map(self.course, ['bogus_id'], self.user)
         self.assertEqual(metadata, {})
@@ -330,6 +342,14 @@ class CachedDiscussionIdMapTestCase(ModuleStoreTestCase):
         metadata = utils.get_cached_discussion_id_map(self.course, ['bad_discussion_id'], self.user)
         self.assertEqual(metadata, {})
 
+    def test_get_all_discussion_ids(self):
+        self.assertItemsEqual(
+            utils.get_discussion_categories_ids(self.course, None, include_all=True),
+            self.course.top_level_discussion_topic_ids + [
+                'test_discussion_id', 'test_discussion_id_2', 'private_discussion_id'
+            ]
+        )
+
     def test_discussion_id_accessible(self):
         self.assertTrue(utils.discussion_category_id_access(self.course, self.user, 'test_discussion_id'))
 
@@ -1696,7 +1716,7 @@ class ClientConfigurationTestCase(TestCase):
         with self.assertRaises(CommentClientMaintenanceError):
             perform_request('GET', 'http://www.google.com')
 
-    @patch('requests.request')
+    @patch('lms.lib.comment_client.utils.send_request')
     def test_enabled(self, mock_request):
         """Ensures that requests proceed normally when forums are enabled."""
         config = ForumsConfig.current()
@@ -1713,6 +1733,62 @@ class ClientConfigurationTestCase(TestCase):
         self.assertEqual(result, {})
 
 
+@ddt.ddt
+class PerformConcurrentlyTestCase(TestCase):
+    """Tests for sending batches of requests to the comment service concurrently."""
+
+    def setUp(self):
+        super(PerformConcurrentlyTestCase, self).setUp()
+        config = ForumsConfig.current()
+        config.enabled = True
+        config.save()
+
+        patcher = patch('lms.lib.comment_client.utils.send_request')
+        self.mock_request = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.request_threads = []
+
+        def _send_request(_method, url, **kwargs):
+            """Returns the requested url and language as a response, recording the thread of the request."""
+            self.request_threads.append(threading.current_thread())
+            response = Mock(status_code=200)
+            response.json.return_value = {'url': url, 'language': kwargs['headers']['Accept-Language']}
+            return response
+
+        self.mock_request.side_effect = _send_request
+
+    @ddt.data(1, 3)
+    def test_results(self, num_workers):
+        with patch('lms.lib.comment_client.settings.BATCH_WORKERS', num_workers):
+            with translation.override('eo'):
+                results = perform_concurrently(
+                    lambda: perform_request('get', 'http://example.com/1'),
+                    lambda: perform_request('get', 'http://example.com/2'),
+                    lambda: perform_request('get', 'http://example.com/3'),
+                )
+        self.assertEqual(results, [
+            {'url': 'http://example.com/{}'.format(index), 'language': 'eo'} for index in range(1, 4)
+        ])
+        self.assertEqual(
+            threading.current_thread() in self.request_threads,
+            num_workers == 1,
+        )
+
+    @ddt.data(1, 3)
+    def test_first_error_raised(self, num_workers):
+        def _raise(message):
+            """Raises a CommentClientError with the given message."""
+            raise CommentClientError(message)
+
+        with patch('lms.lib.comment_client.settings.BATCH_WORKERS', num_workers):
+            with self.assertRaisesRegexp(CommentClientError, 'first'):
+                perform_concurrently(
+                    lambda: perform_request('get', 'http://example.com/1'),
+                    lambda: _raise('first'),
+                    lambda: _raise('second'),
+                )
+
+
 def set_discussion_division_settings(
         course_key, enable_cohorts=False, always_divide_inline_discussions=False,
         divided_discussions=[], division_scheme=CourseDiscussionSettings.COHORT
@@ -0,0 +1,77 @@
+"""
+Discussion Topics Transformer
+"""
+from collections import namedtuple
+
+from openedx.core.djangoapps.content.block_structure.transformer import BlockStructureTransformer
+
+# The topic metadata of an inline discussion xblock, with the same attribute
+# names as the xblock itself so that either can be used to build topic maps.
+DiscussionTopic = namedtuple(
+    'DiscussionTopic',
+    'location discussion_id discussion_category discussion_target sort_key start',
+)
+
+
+class DiscussionTopicsTransformer(BlockStructureTransformer):
+    """
+    The DiscussionTopicsTransformer collects the topic metadata of the
+    inline discussion xblocks of a course, so that the discussion topics
+    available to a user can be listed without loading each xblock.
+
+    No runtime transformations are performed; the blocks that a user can
+    not access are removed by the course blocks access transformers.
+
+    The following value is stored as a transformer_block_field on each
+    discussion block in the block structure:
+
+        topic: (dict) the discussion_id, discussion_category,
+            discussion_target, sort_key and start of the xblock.
+    """
+    WRITE_VERSION = 1
+    READ_VERSION = 1
+    COLLECT_SCOPE = BlockStructureTransformer.COLLECT_SCOPE_LOCAL
+    TOPIC_FIELDS = ('discussion_id', 'discussion_category', 'discussion_target', 'sort_key', 'start')
+
+    @classmethod
+    def name(cls):
+        """
+        Unique identifier for the transformer's class;
+        same identifier used in setup.py.
+        """
+        return u'discussion_topics'
+
+    @classmethod
+    def collect(cls, block_structure):
+        """
+        Collects the topic metadata of each discussion block.
+        """
+        for block_key in block_structure.topological_traversal(
+                filter_func=lambda block_key: block_key.block_type == 'discussion',
+                yield_descendants_of_unyielded=True,
+        ):
+            xblock = block_structure.get_xblock(block_key)
+            topic = {field: getattr(xblock, field, None) for field in cls.TOPIC_FIELDS}
+            block_structure.set_transformer_block_field(block_key, cls, 'topic', topic)
+
+    def transform(self, usage_info, block_structure):
+        """
+        Perform no transformations.
+        """
+        pass
+
+    @classmethod
+    def get_topics(cls, block_structure):
+        """
+        Returns a DiscussionTopic for each discussion block in the given
+        block structure.
+        """
+        topics = []
+        for block_key in block_structure.topological_traversal(
+                filter_func=lambda block_key: block_key.block_type == 'discussion',
+                yield_descendants_of_unyielded=True,
+        ):
+            topic = block_structure.get_transformer_block_field(block_key, cls, 'topic')
+            if topic is not None:
+                topics.append(DiscussionTopic(location=block_key, **topic))
+        return topics
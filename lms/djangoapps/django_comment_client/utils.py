@@ -15,13 +15,17 @@ from opaque_keys.edx.locations import i4xEncoder
 
 import pystache_custom as pystache
 from courseware import courses
-from courseware.access import has_access
+from courseware.access import has_access, has_access_to_blocks
 from django_comment_client.constants import TYPE_ENTRY, TYPE_SUBCATEGORY
 from django_comment_client.permissions import check_permissions_by_view, get_team, has_permission
 from django_comment_client.settings import MAX_COMMENT_DEPTH
+from django_comment_client.transformer import DiscussionTopicsTransformer
 from django_comment_common.models import FORUM_ROLE_STUDENT, CourseDiscussionSettings, Role
 from django_comment_common.utils import get_course_discussion_settings
 from edxmako import lookup_template
+from lms.djangoapps.course_blocks.api import COURSE_BLOCK_ACCESS_TRANSFORMERS, get_course_blocks
+from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache
+from openedx.core.djangoapps.content.block_structure.transformers import BlockStructureTransformers
 from openedx.core.djangoapps.content.course_structures.models import CourseStructure
 from openedx.core.djangoapps.course_groups.cohorts import get_cohort_id, get_cohort_names, is_course_cohorted
 from request_cache.middleware import request_cached
@@ -130,11 +134,30 @@ def get_accessible_discussion_xblocks(course, user, include_all=False):  # pylin
     are accessible to the given user.
     """
     all_xblocks = modulestore().get_items(course.id, qualifiers={'category': 'discussion'}, include_orphans=False)
+    xblocks = [xblock for xblock in all_xblocks if has_required_keys(xblock)]
+    if include_all:
+        return xblocks
 
-    return [
-        xblock for xblock in all_xblocks
-        if has_required_keys(xblock) and (include_all or has_access(user, 'load', xblock, course.id))
-    ]
+    access = has_access_to_blocks(user, 'load', xblocks, course.id)
+    return [xblock for xblock in xblocks if access[xblock.location]]
+
+
+def get_accessible_discussion_topics(course, user, include_all=False):  # pylint: disable=invalid-name
+    """
+    Return the topic metadata (see DiscussionTopic) of all valid discussion
+    xblocks in this course that are accessible to the given user.
+
+    Unlike get_accessible_discussion_xblocks, this is served from the course's
+    collected block structure, and access is checked by the course blocks
+    access transformers rather than for each xblock.
+    """
+    if include_all:
+        block_structure = get_course_in_cache(course.id)
+    else:
+        transformers = BlockStructureTransformers(COURSE_BLOCK_ACCESS_TRANSFORMERS + [DiscussionTopicsTransformer()])
+        block_structure = get_course_blocks(user, course.location, transformers)
+
+    return [topic for topic in DiscussionTopicsTransformer.get_topics(block_structure) if has_required_keys(topic)]
 
 
 def get_discussion_id_map_entry(xblock):
@@ -174,22 +197,15 @@ def get_cached_discussion_key(course_id, discussion_id):
 
 def get_cached_discussion_id_map(course, discussion_ids, user):
     """
-    Returns a dict mapping discussion_ids to respective discussion xblock metadata if it is cached and visible to the
-    user. If not, returns the result of get_discussion_id_map
+    Returns a dict mapping discussion_ids to respective discussion xblock metadata if they are visible to the user.
+    The metadata is read from the course's cached block structure, so no discussion xblock is loaded.
     """
-    try:
-        entries = []
-        for discussion_id in discussion_ids:
-            key = get_cached_discussion_key(course.id, discussion_id)
-            if not key:
-                continue
-            xblock = modulestore().get_item(key)
-            if not (has_required_keys(xblock) and has_access(user, 'load', xblock, course.id)):
-                continue
-            entries.append(get_discussion_id_map_entry(xblock))
-        return dict(entries)
-    except DiscussionIdMapIsNotCached:
-        return get_discussion_id_map(course, user)
+    discussion_ids = set(discussion_ids)
+    return dict(
+        get_discussion_id_map_entry(topic)
+        for topic in get_accessible_discussion_topics(course, user)
+        if topic.discussion_id in discussion_ids
+    )
 
 
 def get_discussion_id_map(course, user):
@@ -197,7 +213,7 @@ def get_discussion_id_map(course, user):
     Transform the list of this course's discussion xblocks (visible to a given user) into a dictionary of metadata keyed
     by discussion_id.
     """
-    return dict(map(get_discussion_id_map_entry, get_accessible_discussion_xblocks(course, user)))
+    return dict(map(get_discussion_id_map_entry, get_accessible_discussion_topics(course, user)))
 
 
 def _filter_unstarted_categories(category_map, course):
@@ -306,19 +322,19 @@ def get_discussion_category_map(course, user, divided_only_if_explicit=False, ex
     """
     unexpanded_category_map = defaultdict(list)
 
-    xblocks = get_accessible_discussion_xblocks(course, user)
+    topics = get_accessible_discussion_topics(course, user)
 
     discussion_settings = get_course_discussion_settings(course.id)
     discussion_division_enabled = course_discussion_division_enabled(discussion_settings)
     divided_discussion_ids = discussion_settings.divided_discussions
 
-    for xblock in xblocks:
-        discussion_id = xblock.discussion_id
-        title = xblock.discussion_target
-        sort_key = xblock.sort_key
-        category = " / ".join([x.strip() for x in xblock.discussion_category.split("/")])
-        # Handle case where xblock.start is None
-        entry_start_date = xblock.start if xblock.start else datetime.max.replace(tzinfo=pytz.UTC)
+    for topic in topics:
+        discussion_id = topic.discussion_id
+        title = topic.discussion_target
+        sort_key = topic.sort_key
+        category = " / ".join([x.strip() for x in topic.discussion_category.split("/")])
+        # Handle case where topic.start is None
+        entry_start_date = topic.start if topic.start else datetime.max.replace(tzinfo=pytz.UTC)
         unexpanded_category_map[category].append({"title": title,
                                                   "id": discussion_id,
                                                   "sort_key": sort_key,
@@ -428,7 +444,7 @@ def get_discussion_categories_ids(course, user, include_all=False):
 
     """
     accessible_discussion_ids = [
-        xblock.discussion_id for xblock in get_accessible_discussion_xblocks(course, user, include_all=include_all)
+        topic.discussion_id for topic in get_accessible_discussion_topics(course, user, include_all=include_all)
     ]
     return course.top_level_discussion_topic_ids + accessible_discussion_ids
 
@@ -340,6 +340,8 @@ class PersistentSubsectionGrade(DeleteGradesMixin, TimeStampedModel):
     # track which blocks were visible at the time of grade calculation
     visible_blocks = models.ForeignKey(VisibleBlocks, db_column='visible_blocks_hash', to_field='hashed')
 
+    CACHE_NAMESPACE = u"grades.models.PersistentSubsectionGrade"
+
     @property
     def full_usage_key(self):
         """
@@ -389,17 +391,49 @@ class PersistentSubsectionGrade(DeleteGradesMixin, TimeStampedModel):
     @classmethod
     def bulk_read_grades(cls, user_id, course_key):
         """
-        Reads all grades for the given user and course.
+        Reads all grades for the given user and course, from the
+        prefetched grades if they were prefetched for the user.
 
         Arguments:
             user_id: The user associated with the desired grades
             course_key: The course identifier for the desired grades
         """
+        prefetched_grades = get_cache(cls.CACHE_NAMESPACE).get(cls._cache_key(course_key), {})
+        if user_id in prefetched_grades:
+            return prefetched_grades[user_id]
+
         return cls.objects.select_related('visible_blocks').filter(
             user_id=user_id,
             course_id=course_key,
         )
 
+    @classmethod
+    def prefetch(cls, course_key, users):
+        """
+        Prefetches all grades for the given users for the given course,
+        with a single query.  The visible blocks of the grades are taken
+        from the VisibleBlocks cache for the course rather than joined
+        for each grade, since they are largely shared across users.
+        """
+        visible_blocks = VisibleBlocks.bulk_read(course_key)
+        prefetched_grades = {user.id: [] for user in users}
+        for grade in cls.objects.filter(user_id__in=prefetched_grades.keys(), course_id=course_key):
+            if grade.visible_blocks_id in visible_blocks:
+                grade.visible_blocks = visible_blocks[grade.visible_blocks_id]
+            prefetched_grades[grade.user_id].append(grade)
+        get_cache(cls.CACHE_NAMESPACE)[cls._cache_key(course_key)] = prefetched_grades
+
+    @classmethod
+    def clear_prefetched_data(cls, course_key):
+        """
+        Clears the prefetched grades for the given course.
+        """
+        get_cache(cls.CACHE_NAMESPACE).pop(cls._cache_key(course_key), None)
+
+    @classmethod
+    def _cache_key(cls, course_key):
+        return u"subsection_grades_cache.{}".format(course_key)
+
     @classmethod
     def update_or_create_grade(cls, **params):
         """
@@ -597,6 +631,13 @@ class PersistentCourseGrade(DeleteGradesMixin, TimeStampedModel):
             cls.objects.filter(user_id__in=[user.id for user in users], course_id=course_id)
         }
 
+    @classmethod
+    def clear_prefetched_data(cls, course_key):
+        """
+        Clears the prefetched grades for the given course.
+        """
+        get_cache(cls.CACHE_NAMESPACE).pop(cls._cache_key(course_key), None)
+
     @classmethod
     def read(cls, user_id, course_id):
         """
@@ -8,6 +8,7 @@ from django.conf import settings
 from lazy import lazy
 
 from xmodule import block_metadata_utils
+from xmodule.graders import ScoreMatrix
 
 from .subsection_grade import ZeroSubsectionGrade
 from .subsection_grade_factory import SubsectionGradeFactory
@@ -144,6 +145,28 @@ class CourseGradeBase(object):
             generate_random_scores=settings.GENERATE_PROFILE_SCORES,
         )
 
+    @staticmethod
+    def compute_grader_results(course_grades):
+        """
+        Computes the grader_result of each of the given grades, which
+        must all be for the same course, with a single vectorized call
+        to the course grader instead of grading each of them separately.
+
+        Grades whose grader_result was already computed, such as updated
+        grades whose percent was computed from it, are left as they are.
+        """
+        course_grades = [course_grade for course_grade in course_grades if 'grader_result' not in vars(course_grade)]
+        if not course_grades or settings.GENERATE_PROFILE_SCORES:
+            return
+
+        course = course_grades[0].course_data.course
+        course.set_grading_policy(course.grading_policy)
+        grader_results = course.grader.grade_matrix(ScoreMatrix.from_grade_sheets(
+            [course_grade.graded_subsections_by_format for course_grade in course_grades]
+        ))
+        for index, course_grade in enumerate(course_grades):
+            course_grade.grader_result = grader_results[index]
+
     @property
     def summary(self):
         """
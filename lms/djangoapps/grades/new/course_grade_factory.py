@@ -1,5 +1,6 @@
 from collections import namedtuple
 from contextlib import contextmanager
+from itertools import islice
 from logging import getLogger
 
 import dogstats_wrapper as dog_stats_api
@@ -11,6 +12,7 @@ from ..config.waffle import WRITE_ONLY_IF_ENGAGED, waffle
 from ..models import PersistentCourseGrade, VisibleBlocks
 from .course_data import CourseData
 from .course_grade import CourseGrade, ZeroCourseGrade
+from .subsection_grade_factory import SubsectionGradeFactory
 
 log = getLogger(__name__)
 
@@ -21,6 +23,9 @@ class CourseGradeFactory(object):
     """
     GradeResult = namedtuple('GradeResult', ['student', 'course_grade', 'error'])
 
+    # Number of users whose grade data is prefetched together by iter.
+    USER_BATCH_SIZE = 100
+
     def create(self, user, course=None, collected_block_structure=None, course_structure=None, course_key=None):
         """
         Returns the CourseGrade for the given user in the course.
@@ -90,8 +95,12 @@ class CourseGradeFactory(object):
         """
         Provides a transaction context in which GradeResults are created.
         """
-        yield
-        VisibleBlocks.clear_cache(course_key)
+        try:
+            yield
+        finally:
+            VisibleBlocks.clear_cache(course_key)
+            PersistentCourseGrade.clear_prefetched_data(course_key)
+            SubsectionGradeFactory.clear_prefetched_data(course_key)
 
     def iter(
             self,
@@ -109,6 +118,9 @@ class CourseGradeFactory(object):
 
         If an error occurred, course_grade will be None and err_msg will be an
         exception message. If there was no error, err_msg is an empty string.
+
+        The users are graded in batches of USER_BATCH_SIZE, prefetching the
+        persisted grades and scores of each batch with a few set-based queries.
         """
         # Pre-fetch the collected course_structure so:
         # 1. Correctness: the same version of the course is used to
@@ -120,9 +132,25 @@ class CourseGradeFactory(object):
         )
         stats_tags = [u'action:{}'.format(course_data.course_key)]
         with self._course_transaction(course_data.course_key):
-            for user in users:
-                with dog_stats_api.timer('lms.grades.CourseGradeFactory.iter', tags=stats_tags):
-                    yield self._iter_grade_result(user, course_data, force_update)
+            users = iter(users)
+            while True:
+                batch = list(islice(users, self.USER_BATCH_SIZE))
+                if not batch:
+                    break
+                self._prefetch(batch, course_data)
+                for user in batch:
+                    with dog_stats_api.timer('lms.grades.CourseGradeFactory.iter', tags=stats_tags):
+                        yield self._iter_grade_result(user, course_data, force_update)
+
+    @staticmethod
+    def _prefetch(users, course_data):
+        """
+        Prefetches the grade data of the given users in the course, which
+        is otherwise queried separately for each user.
+        """
+        if should_persist_grades(course_data.course_key):
+            PersistentCourseGrade.prefetch(course_data.course_key, users)
+        SubsectionGradeFactory.prefetch(course_data, users)
 
     def _iter_grade_result(self, user, course_data, force_update):
         try:
@@ -1,4 +1,4 @@
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 from logging import getLogger
 
 from lazy import lazy
@@ -8,8 +8,10 @@ from lms.djangoapps.grades.config import assume_zero_if_absent, should_persist_g
 from lms.djangoapps.grades.models import PersistentSubsectionGrade
 from lms.djangoapps.grades.scores import possibly_scored
 from openedx.core.lib.grade_utils import is_score_higher_or_equal
-from student.models import anonymous_id_for_user
+from request_cache import get_cache
+from student.models import anonymous_id_for_user, anonymous_ids_for_users
 from submissions import api as submissions_api
+from submissions.models import ScoreSummary
 
 from .course_data import CourseData
 from .subsection_grade import SubsectionGrade, ZeroSubsectionGrade
@@ -21,6 +23,8 @@ class SubsectionGradeFactory(object):
     """
     Factory for Subsection Grades.
     """
+    CACHE_NAMESPACE = u"grades.new.subsection_grade_factory.SubsectionGradeFactory"
+
     def __init__(self, student, course=None, course_structure=None, course_data=None):
         self.student = student
         self.course_data = course_data or CourseData(student, course=course, structure=course_structure)
@@ -98,12 +102,66 @@ class SubsectionGradeFactory(object):
 
         return calculated_grade
 
+    @classmethod
+    def prefetch(cls, course_data, users):
+        """
+        Prefetches the scores and persisted subsection grades of the
+        given users in the given course, with a few set-based queries
+        rather than a few queries per user.  They are used by factories
+        subsequently created for these users in the same request.
+
+        Arguments:
+            course_data (CourseData) - Data of the course, whose collected
+                structure determines the scorable blocks to prefetch.
+            users (list(User)) - Users whose data is to be prefetched.
+        """
+        course_key = course_data.course_key
+        user_ids = [user.id for user in users]
+
+        scorable_locations = [
+            block_key for block_key in course_data.collected_structure if possibly_scored(block_key)
+        ]
+        csm_scores = ScoresClient.create_for_users(course_key, user_ids, scorable_locations)
+
+        anonymous_user_ids = anonymous_ids_for_users(users, course_key)
+        submissions_scores = _bulk_submissions_scores(course_key, anonymous_user_ids.values())
+
+        get_cache(cls.CACHE_NAMESPACE)[cls._cache_key(course_key)] = {
+            user_id: (csm_scores[user_id], submissions_scores.get(anonymous_user_ids[user_id], {}))
+            for user_id in user_ids
+        }
+        if should_persist_grades(course_key):
+            PersistentSubsectionGrade.prefetch(course_key, users)
+
+    @classmethod
+    def clear_prefetched_data(cls, course_key):
+        """
+        Clears the data prefetched for the given course.
+        """
+        get_cache(cls.CACHE_NAMESPACE).pop(cls._cache_key(course_key), None)
+        PersistentSubsectionGrade.clear_prefetched_data(course_key)
+
+    @classmethod
+    def _cache_key(cls, course_key):
+        return u"scores_cache.{}".format(course_key)
+
+    @lazy
+    def _prefetched_scores(self):
+        """
+        Returns the prefetched (csm scores, submissions scores) for the
+        student in the course, or None if they were not prefetched.
+        """
+        prefetched_scores = get_cache(self.CACHE_NAMESPACE).get(self._cache_key(self.course_data.course_key), {})
+        return prefetched_scores.get(self.student.id)
+
     @lazy
     def _csm_scores(self):
         """
         Lazily queries and returns all the scores stored in the user
         state (in CSM) for the course, while caching the result.
         """
+        if self._prefetched_scores:
+            return self._prefetched_scores[0]
         scorable_locations = [block_key for block_key in self.course_data.structure if possibly_scored(block_key)]
         return ScoresClient.create_for_locations(self.course_data.course_key, self.student.id, scorable_locations)
 
@@ -113,6 +171,8 @@ class SubsectionGradeFactory(object):
         Lazily queries and returns the scores stored by the
         Submissions API for the course, while caching the result.
         """
+        if self._prefetched_scores:
+            return self._prefetched_scores[1]
         anonymous_user_id = anonymous_id_for_user(self.student, self.course_data.course_key)
         return submissions_api.get_scores(str(self.course_data.course_key), anonymous_user_id)
 
@@ -163,3 +223,31 @@ class SubsectionGradeFactory(object):
             getattr(subsection, 'subtree_edited_on', None),
             self.student.id,
         ))
+
+
+def _bulk_submissions_scores(course_key, anonymous_user_ids):
+    """
+    Returns the scores stored by the Submissions API for the course for
+    all of the given students, with a single query.
+
+    The scores of each student are in the format returned by
+    submissions_api.get_scores, limited to the fields used for grading.
+
+    Returns a dict of anonymous user id to the student's scores.
+    """
+    score_summaries = ScoreSummary.objects.filter(
+        student_item__course_id=unicode(course_key),
+        student_item__student_id__in=list(anonymous_user_ids),
+    ).select_related('latest', 'student_item')
+
+    scores = defaultdict(dict)
+    for summary in score_summaries:
+        # Hidden scores are filtered out by the Submissions API.
+        if summary.latest.is_hidden():
+            continue
+        scores[summary.student_item.student_id][summary.student_item.item_id] = {
+            'points_earned': summary.latest.points_earned,
+            'points_possible': summary.latest.points_possible,
+            'created_at': summary.latest.created_at,
+        }
+    return scores
@@ -17,7 +17,7 @@ from courseware.tests.test_submitting_problems import ProblemSubmissionTestMixin
 from lms.djangoapps.course_blocks.api import get_course_blocks
 from lms.djangoapps.grades.config.tests.utils import persistent_grades_feature_flags
 from openedx.core.djangolib.testing.utils import get_mock_request
-from student.models import CourseEnrollment
+from student.models import AnonymousUserId, CourseEnrollment
 from student.tests.factories import UserFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase, SharedModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
@@ -260,6 +260,58 @@ class TestCourseGradeFactory(GradeTestBase):
         self.assertTrue(desired_call.called)
         self.assertFalse(undesired_call.called)
 
+    def test_iter_prefetches_in_batches(self):
+        users = [self.request.user, UserFactory(), UserFactory()]
+        for user in users[1:]:
+            CourseEnrollment.enroll(user, self.course.id)
+
+        prefetch = SubsectionGradeFactory.prefetch
+        with patch.object(CourseGradeFactory, 'USER_BATCH_SIZE', 2):
+            with patch.object(SubsectionGradeFactory, 'prefetch', wraps=prefetch) as mock_prefetch:
+                with mock_get_score(1, 2):
+                    grade_results = list(CourseGradeFactory().iter(users=users, course=self.course))
+
+        self.assertEqual(mock_prefetch.call_count, 2)
+        self.assertEqual([grade_result.student for grade_result in grade_results], users)
+        for grade_result in grade_results:
+            self.assertIsNone(grade_result.error)
+            self.assertEqual(grade_result.course_grade.percent, 0.5)
+
+        # The prefetched data is not used beyond the iteration.
+        self.assertIsNone(SubsectionGradeFactory(users[0], course=self.course)._prefetched_scores)
+        # The anonymous ids that the submissions were looked up with are saved.
+        self.assertEqual(
+            set(AnonymousUserId.objects.filter(course_id=self.course.id).values_list('user_id', flat=True)),
+            {user.id for user in users},
+        )
+
+    def test_compute_grader_results(self):
+        users = [self.request.user, UserFactory()]
+        with mock_get_score(1, 2):
+            course_grades = [CourseGradeFactory().update(user, self.course) for user in users]
+        expected_results = [course_grade.grader_result for course_grade in course_grades]
+
+        course_grades = [CourseGradeFactory().read(user, self.course) for user in users]
+        with patch.object(type(self.course.grader), 'grade') as mock_grade:
+            CourseGrade.compute_grader_results(course_grades)
+            self.assertEqual([course_grade.grader_result for course_grade in course_grades], expected_results)
+        self.assertFalse(mock_grade.called)
+        for course_grade in course_grades:
+            self.assertEqual(course_grade.percent, CourseGrade._compute_percent(course_grade.grader_result))
+
+    def test_compute_grader_results_of_updated_grades(self):
+        users = [self.request.user, UserFactory()]
+        with mock_get_score(1, 2):
+            course_grades = [CourseGradeFactory().update(user, self.course) for user in users]
+        grader_results = [course_grade.grader_result for course_grade in course_grades]
+
+        with patch.object(type(self.course.grader), 'grade_matrix') as mock_grade_matrix:
+            CourseGrade.compute_grader_results(course_grades)
+        self.assertFalse(mock_grade_matrix.called)
+        for course_grade, grader_result in zip(course_grades, grader_results):
+            self.assertIs(course_grade.grader_result, grader_result)
+            self.assertEqual(course_grade.percent, CourseGrade._compute_percent(course_grade.grader_result))
+
 
 @ddt.ddt
 class TestSubsectionGradeFactory(ProblemSubmissionTestMixin, GradeTestBase):
@@ -12,6 +12,7 @@ from opaque_keys.edx.keys import CourseKey
 
 from courseware.courses import get_course_with_access
 from edxmako.shortcuts import render_to_response
+from lms.djangoapps.grades.new.course_grade import CourseGrade
 from lms.djangoapps.grades.new.course_grade_factory import CourseGradeFactory
 from lms.djangoapps.instructor.views.api import require_level
 from xmodule.modulestore.django import modulestore
@@ -84,14 +85,16 @@ def get_grade_book_page(request, course, course_key):
         enrolled_students = enrolled_students[offset: offset + MAX_STUDENTS_PER_PAGE_GRADE_BOOK]
 
     with modulestore().bulk_operations(course.location.course_key):
+        course_grades = [(student, CourseGradeFactory().create(student, course)) for student in enrolled_students]
+        CourseGrade.compute_grader_results([course_grade for _, course_grade in course_grades])
         student_info = [
             {
                 'username': student.username,
                 'id': student.id,
                 'email': student.email,
-                'grade_summary': CourseGradeFactory().create(student, course).summary
+                'grade_summary': course_grade.summary
             }
-            for student in enrolled_students
+            for student, course_grade in course_grades
         ]
     return student_info, page
 
@@ -16,3 +16,8 @@ class UpdateProblemModuleStateError(Exception):
 class DuplicateTaskException(Exception):
     """Exception indicating that a task already exists or has already completed."""
     pass
+
+
+class SubtaskLockedException(DuplicateTaskException):
+    """Exception indicating that a subtask is currently locked by another execution of it."""
+    pass
@@ -16,11 +16,12 @@ import csv
 import hashlib
 import json
 import os.path
+from tempfile import SpooledTemporaryFile
 from uuid import uuid4
 
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.files.base import ContentFile
+from django.core.files.base import File
 from django.db import models, transaction
 
 from openedx.core.djangoapps.xmodule_django.models import CourseKeyField
@@ -179,9 +180,8 @@ class InstructorTask(models.Model):
 class ReportStore(object):
     """
     Simple abstraction layer that can fetch and store CSV files for reports
-    download. Should probably refactor later to create a ReportFile object that
-    can simply be appended to for the sake of memory efficiency, rather than
-    passing in the whole dataset. Doing that for now just because it's simpler.
+    download. Rows can be passed in as a generator, so reports can be written
+    to the store as they are computed rather than as a whole dataset.
     """
     @classmethod
     def from_config(cls, config_name):
@@ -215,8 +215,8 @@ class ReportStore(object):
 
     def _get_utf8_encoded_rows(self, rows):
         """
-        Given a list of `rows` containing unicode strings, return a
-        new list of rows with those strings encoded as utf-8 for CSV
+        Given an iterable of `rows` containing unicode strings, return a
+        generator of rows with those strings encoded as utf-8 for CSV
         compatibility.
         """
         for row in rows:
@@ -227,6 +227,10 @@ class DjangoStorageReportStore(ReportStore, DeleteFileMixin):
     """
     ReportStore implementation that delegates to django's storage api.
     """
+    # Number of bytes of a CSV that are buffered in memory by store_rows
+    # before the CSV is spooled to a temporary file on disk.
+    SPOOL_MAX_SIZE = 1024 * 1024
+
     def __init__(self, storage_class=None, storage_kwargs=None):
         if storage_kwargs is None:
             storage_kwargs = {}
@@ -265,12 +269,31 @@ class DjangoStorageReportStore(ReportStore, DeleteFileMixin):
         """
         Given a course_id, filename, and rows (each row is an iterable of
         strings), write the rows to the storage backend in csv format.
+
+        `rows` may be any iterable, including a generator.  The rows are
+        consumed one at a time and written to a temporary file that is
+        spooled to disk once it outgrows SPOOL_MAX_SIZE, so neither the
+        rows nor the CSV need to be held in memory.
+        """
+        with SpooledTemporaryFile(max_size=self.SPOOL_MAX_SIZE) as output_buffer:
+            csvwriter = csv.writer(output_buffer)
+            for row in self._get_utf8_encoded_rows(rows):
+                csvwriter.writerow(row)
+            output_buffer.seek(0)
+            self.store(course_id, filename, File(output_buffer))
+
+    def open_file(self, course_id, filename):
+        """
+        Return a file-like object for reading the file stored under
+        `filename` for the given `course_id`.
+        """
+        return self.storage.open(self.path_to(course_id, filename))
+
+    def exists(self, course_id, filename):
+        """
+        Return whether a file is stored under `filename` for the given `course_id`.
         """
-        output_buffer = ContentFile('')
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        output_buffer.seek(0)
-        self.store(course_id, filename, output_buffer)
+        return self.storage.exists(self.path_to(course_id, filename))
 
     def links_for(self, course_id):
         """
@@ -8,14 +8,14 @@ from time import time
 from uuid import uuid4
 
 import psutil
-from celery.states import READY_STATES, RETRY, SUCCESS
+from celery.states import FAILURE, READY_STATES, RETRY, SUCCESS
 from django.core.cache import cache
 from django.db import DatabaseError, transaction
 
 import dogstats_wrapper as dog_stats_api
 from util.db import outer_atomic
 
-from .exceptions import DuplicateTaskException
+from .exceptions import DuplicateTaskException, SubtaskLockedException
 from .models import PROGRESS, QUEUING, InstructorTask
 
 TASK_LOG = logging.getLogger('edx.celery.task')
@@ -25,6 +25,8 @@ SUBTASK_LOCK_EXPIRE = 60 * 10  # Lock expires in 10 minutes
 # Number of times to retry if a subtask update encounters a lock on the InstructorTask.
 # (These are recursive retries, so don't make this number too large.)
 MAX_DATABASE_LOCK_RETRIES = 5
+# Number of items fetched by each query when generating the items for subtasks.
+ITEMS_PER_QUERY = 1000
 
 
 def _get_number_of_subtasks(total_num_items, items_per_task):
@@ -66,6 +68,27 @@ def track_memory_usage(metric, course_id):
         )
 
 
+def _get_items_by_pk(queryset, item_fields, items_per_query):
+    """
+    Yields dicts of the `item_fields` of the items of `queryset`, in order of pk.
+
+    The items are fetched `items_per_query` at a time.  Each query continues
+    after the last pk fetched by the previous one, rather than at an offset,
+    so that it can start from the pk index however deep into the queryset it is.
+    `item_fields` must include 'pk'.
+    """
+    queryset = queryset.order_by('pk').values(*item_fields)
+    last_pk = None
+    while True:
+        query = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        items = list(query[:items_per_query])
+        for item in items:
+            yield item
+        if len(items) < items_per_query:
+            return
+        last_pk = items[-1]['pk']
+
+
 def _generate_items_for_subtask(
     item_querysets,  # pylint: disable=bad-continuation
     item_fields,
@@ -82,7 +105,6 @@ def _generate_items_for_subtask(
         `item_fields` : the fields that should be included in the dict that is returned.
             These are in addition to the 'pk' field.
         `total_num_items` : the result of summing the count of each queryset in `item_querysets`.
-        `items_per_query` : size of chunks to break the query operation into.
         `items_per_task` : maximum size of chunks to break each query chunk into for use by a subtask.
         `course_id` : course_id of the course. Only needed for the track_memory_usage context manager.
 
@@ -99,7 +121,7 @@ def _generate_items_for_subtask(
 
     with track_memory_usage('course_email.subtask_generation.memory', course_id):
         for queryset in item_querysets:
-            for item in queryset.values(*all_item_fields).iterator():
+            for item in _get_items_by_pk(queryset, all_item_fields, ITEMS_PER_QUERY):
                 if len(items_for_task) == items_per_task and num_subtasks < total_num_subtasks - 1:
                     yield items_for_task
                     num_items_queued += items_per_task
@@ -456,10 +478,10 @@ def check_subtask_is_valid(entry_id, current_task_id, new_subtask_status):
         msg = format_str.format(current_task_id, entry)
         TASK_LOG.warning(msg)
         dog_stats_api.increment('instructor_task.subtask.duplicate.locked', tags=[entry.course_id])
-        raise DuplicateTaskException(msg)
+        raise SubtaskLockedException(msg)
 
 
-def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_count=0):
+def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_count=0, set_final_state=True):
     """
     Update the status of the subtask in the parent InstructorTask object tracking its progress.
 
@@ -470,9 +492,14 @@ def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_c
 
     The subtask lock acquired in the call to check_subtask_is_valid() is released here, only when
     the attempting of retries has concluded.
+
+    If `set_final_state` is False, the InstructorTask is not marked as having succeeded when its
+    last subtask completes; the caller is then responsible for calling set_final_task_state().
+
+    Returns True if this update completed the last of the subtasks of the InstructorTask.
     """
     try:
-        _update_subtask_status(entry_id, current_task_id, new_subtask_status)
+        return _update_subtask_status(entry_id, current_task_id, new_subtask_status, set_final_state)
     except DatabaseError:
         # If we fail, try again recursively.
         retry_count += 1
@@ -480,7 +507,7 @@ def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_c
             TASK_LOG.info("Retrying to update status for subtask %s of instructor task %d with status %s:  retry %d",
                           current_task_id, entry_id, new_subtask_status, retry_count)
             dog_stats_api.increment('instructor_task.subtask.retry_after_failed_update')
-            update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_count)
+            return update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_count, set_final_state)
         else:
             TASK_LOG.info("Failed to update status after %d retries for subtask %s of instructor task %d with status %s",
                           retry_count, current_task_id, entry_id, new_subtask_status)
@@ -494,7 +521,7 @@ def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_c
 
 
 @transaction.atomic
-def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
+def _update_subtask_status(entry_id, current_task_id, new_subtask_status, set_final_state=True):
     """
     Update the status of the subtask in the parent InstructorTask object tracking its progress.
 
@@ -514,12 +541,14 @@ def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
     subtasks.  'Total' is expected to have been set at the time the subtasks were created.
     The other three counters are incremented depending on the value of `status`.  Once the counters
     for 'succeeded' and 'failed' match the 'total', the subtasks are done and the InstructorTask's
-    "status" is changed to SUCCESS.
+    "status" is changed to SUCCESS, unless `set_final_state` is False.
 
     The "subtasks" field also contains a 'status' key, that contains a dict that stores status
     information for each subtask.  At the moment, the value for each subtask (keyed by its task_id)
     is the value of the SubtaskStatus.to_dict(), but could be expanded in future to store information
     about failure messages, progress made, etc.
+
+    Returns True if this update completed the last of the subtasks.
     """
     TASK_LOG.info("Preparing to update status for subtask %s for instructor task %d with status %s",
                   current_task_id, entry_id, new_subtask_status)
@@ -570,7 +599,7 @@ def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
         # At present, we mark the task as having succeeded.  In future, we should see
         # if there was a catastrophic failure that occurred, and figure out how to
         # report that here.
-        if num_remaining <= 0:
+        if num_remaining <= 0 and set_final_state:
             entry.task_state = SUCCESS
         entry.subtasks = json.dumps(subtask_dict)
         entry.task_output = InstructorTask.create_output_for_success(task_progress)
@@ -579,7 +608,23 @@ def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
         entry.save()
         TASK_LOG.info("Task output updated to %s for subtask %s of instructor task %d",
                       entry.task_output, current_task_id, entry_id)
+        return new_state in READY_STATES and num_remaining == 0
     except Exception:
         TASK_LOG.exception("Unexpected error while updating InstructorTask.")
         dog_stats_api.increment('instructor_task.subtask.update_exception')
         raise
+
+
+@transaction.atomic
+def set_final_task_state(entry_id, state, exception=None, traceback_string=None):
+    """
+    Sets the final state of an InstructorTask whose subtasks have all completed, for tasks
+    whose subtasks update their status with `set_final_state` set to False.
+
+    If the state is FAILURE, the task output is replaced by the given exception and traceback.
+    """
+    entry = InstructorTask.objects.select_for_update().get(pk=entry_id)
+    entry.task_state = state
+    if state == FAILURE:
+        entry.task_output = InstructorTask.create_output_for_failure(exception, traceback_string)
+    entry.save()
@@ -27,6 +27,8 @@ from django.conf import settings
 from django.utils.translation import ugettext_noop
 
 from bulk_email.tasks import perform_delegate_email_batches
+from lms.djangoapps.instructor_task.exceptions import SubtaskLockedException
+from lms.djangoapps.instructor_task.subtasks import SUBTASK_LOCK_EXPIRE
 from lms.djangoapps.instructor_task.tasks_base import BaseInstructorTask
 from lms.djangoapps.instructor_task.tasks_helper.certs import generate_students_certificates
 from lms.djangoapps.instructor_task.tasks_helper.enrollments import (
@@ -46,6 +48,7 @@ from lms.djangoapps.instructor_task.tasks_helper.module_state import (
     delete_problem_module_state,
     perform_module_state_update,
     override_score_module_state,
+    prepare_rescore_problem_module_states,
     rescore_problem_module_state,
     reset_attempts_module_state
 )
@@ -76,8 +79,9 @@ def rescore_problem(entry_id, xmodule_instance_args):
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('rescored')
     update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
+    prepare_fcn = partial(prepare_rescore_problem_module_states, xmodule_instance_args)
 
-    visit_fcn = partial(perform_module_state_update, update_fcn, None)
+    visit_fcn = partial(perform_module_state_update, update_fcn, None, prepare_fcn=prepare_fcn)
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
@@ -183,10 +187,26 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(CourseGradeReport.generate, xmodule_instance_args)
+    task_fn = partial(CourseGradeReport.generate, xmodule_instance_args, chunk_task=calculate_grades_csv_chunk)
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY, acks_late=True)  # pylint: disable=not-callable
+def calculate_grades_csv_chunk(entry_id, xmodule_instance_args, chunk):
+    """
+    Grade a chunk of the students of a course for a grade report that is
+    generated in subtasks.  The task is acknowledged only once it is done,
+    so the chunk is graded again if its worker is lost.
+    """
+    # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
+    action_name = ugettext_noop('graded')
+    try:
+        return CourseGradeReport.generate_chunk(xmodule_instance_args, entry_id, chunk, action_name)
+    except SubtaskLockedException as exc:
+        # A lost worker may have left the chunk locked, so try again once its lock expires.
+        raise calculate_grades_csv_chunk.retry(exc=exc, countdown=SUBTASK_LOCK_EXPIRE)
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
 def calculate_problem_grade_report(entry_id, xmodule_instance_args):
     """
@@ -1,13 +1,18 @@
 """
 Functionality for generating grade reports.
 """
+import json
 import logging
 import re
+import traceback
 from collections import OrderedDict
 from datetime import datetime
-from itertools import chain, izip, izip_longest
+from itertools import chain, count, izip_longest
 from time import time
 
+from celery.states import FAILURE, SUCCESS
+from django.conf import settings
+from django.contrib.auth.models import User
 from lazy import lazy
 from pytz import UTC
 
@@ -16,7 +21,7 @@ from courseware.courses import get_course_by_id
 from instructor_analytics.basic import list_problem_responses
 from instructor_analytics.csvs import format_dictlist
 from lms.djangoapps.grades.context import grading_context, grading_context_for_course
-from lms.djangoapps.grades.models import PersistentCourseGrade
+from lms.djangoapps.grades.new.course_grade import CourseGrade
 from lms.djangoapps.grades.new.course_grade_factory import CourseGradeFactory
 from lms.djangoapps.teams.models import CourseTeamMembership
 from lms.djangoapps.verify_student.models import SoftwareSecurePhotoVerification
@@ -29,8 +34,17 @@ from xmodule.modulestore.django import modulestore
 from xmodule.partitions.partitions_service import PartitionService
 from xmodule.split_test_module import get_split_user_partitions
 
+from ..config.models import GradeReportSetting
+from ..models import InstructorTask, ReportStore
+from ..subtasks import (
+    SubtaskStatus,
+    check_subtask_is_valid,
+    queue_subtasks_for_query,
+    set_final_task_state,
+    update_subtask_status,
+)
 from .runner import TaskProgress
-from .utils import upload_csv_to_report_store
+from .utils import upload_csv_parts_to_report_store, upload_csv_to_report_store
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
@@ -75,6 +89,7 @@ class _CourseGradeReportContext(object):
         )
         self.action_name = action_name
         self.course_id = course_id
+        self.entry_id = _entry_id
         self.task_progress = TaskProgress(self.action_name, total=None, start_time=time())
 
     @lazy
@@ -180,7 +195,6 @@ class _CourseGradeBulkContext(object):
         self.enrollments = _EnrollmentBulkContext(context, users)
         bulk_cache_cohorts(context.course_id, users)
         BulkRoleCache.prefetch(users)
-        PersistentCourseGrade.prefetch(context.course_id, users)
         BulkCourseTags.prefetch(context.course_id, users)
 
 
@@ -192,14 +206,66 @@ class CourseGradeReport(object):
     USER_BATCH_SIZE = 100
 
     @classmethod
-    def generate(cls, _xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
+    def generate(cls, _xmodule_instance_args, _entry_id, course_id, _task_input, action_name, chunk_task=None):
         """
         Public method to generate a grade report.
+
+        If GradeReportSetting is enabled and a `chunk_task` is given, the
+        users are graded in chunks of GradeReportSetting.batch_size users
+        by subtasks of the `chunk_task` celery task, which should call
+        generate_chunk.
         """
         with modulestore().bulk_operations(course_id):
             context = _CourseGradeReportContext(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name)
+            if chunk_task is not None:
+                grade_report_setting = GradeReportSetting.current()
+                if grade_report_setting.enabled:
+                    return CourseGradeReport()._generate_in_chunks(
+                        context, _xmodule_instance_args, _entry_id, chunk_task, grade_report_setting.batch_size,
+                    )
             return CourseGradeReport()._generate(context)
 
+    @classmethod
+    def generate_chunk(cls, _xmodule_instance_args, _entry_id, chunk, action_name):
+        """
+        Public method to grade a chunk of the users of a grade report
+        that is generated in chunks, in a subtask.
+
+        The rows of the chunk are stored as parts of the report, and the
+        completion of the chunk is recorded in the InstructorTask's
+        subtask status.  Chunks that have been completed are not graded
+        again if their subtasks are run again, so the report resumes
+        with the remaining chunks when a worker is lost.  If grading the
+        chunk fails, each of its users is listed in the error report.
+        The subtask that completes the last chunk merges the parts into
+        the report.
+        """
+        subtask_status = SubtaskStatus.from_dict(chunk['subtask_status'])
+        check_subtask_is_valid(_entry_id, subtask_status.task_id, subtask_status)
+
+        entry = InstructorTask.objects.get(pk=_entry_id)
+        course_id = entry.course_id
+        with modulestore().bulk_operations(course_id):
+            context = _CourseGradeReportContext(
+                _xmodule_instance_args, _entry_id, course_id, json.loads(entry.task_input), action_name,
+            )
+            report = CourseGradeReport()
+            try:
+                users = report._enrolled_users(context).filter(id__in=chunk['user_ids']).order_by('id')
+                success_rows, error_rows = report._rows_for_users(context, list(users))
+                report._store_chunk(context, chunk['index'], success_rows, error_rows)
+            except Exception as exc:
+                TASK_LOG.exception(u'%s, Task type: %s, Failed to grade chunk %s', context.task_info_string,
+                                   action_name, chunk['index'])
+                report._store_failed_chunk(context, chunk, exc)
+                subtask_status.increment(failed=len(chunk['user_ids']), state=FAILURE)
+                report._complete_chunk(context, subtask_status)
+                raise
+
+            subtask_status.increment(succeeded=len(success_rows), failed=len(error_rows), state=SUCCESS)
+            report._complete_chunk(context, subtask_status)
+            return subtask_status.to_dict()
+
     def _generate(self, context):
         """
         Internal method for generating a grade report for the given context.
@@ -209,14 +275,148 @@ class CourseGradeReport(object):
         error_headers = self._error_headers()
         batched_rows = self._batched_rows(context)
 
-        context.update_status(u'Compiling grades')
-        success_rows, error_rows = self._compile(context, batched_rows)
-
-        context.update_status(u'Uploading grades')
+        # The success rows are compiled while they are uploaded, so only
+        # the error rows are collected in memory.
+        context.update_status(u'Compiling and uploading grades')
+        error_rows = []
+        success_rows = self._compile(context, batched_rows, error_rows)
         self._upload(context, success_headers, success_rows, error_headers, error_rows)
 
         return context.update_status(u'Completed grades')
 
+    def _generate_in_chunks(self, context, xmodule_instance_args, entry_id, chunk_task, users_per_chunk):
+        """
+        Internal method for generating a grade report for the given context
+        by queuing subtasks that each grade a chunk of the users.
+        """
+        entry = InstructorTask.objects.get(pk=entry_id)
+
+        # As with bulk emails, the task may be called again when the
+        # connection is lost while it is queued.  The subtasks have already
+        # been queued in that case, so there is nothing left to do.
+        if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+            TASK_LOG.warning(u'%s, Subtasks have already been queued', context.task_info_string)
+            return json.loads(entry.task_output)
+
+        users = self._enrolled_users(context).order_by('id')
+        total_num_users = users.count()
+        if total_num_users == 0:
+            return self._generate(context)
+
+        context.update_status(u'Queuing grade subtasks')
+        report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+        report_store.store_rows(context.course_id, self._part_filename(entry_id, 'header'), [
+            self._success_headers(context),
+        ])
+        report_store.store_rows(context.course_id, self._part_filename(entry_id, 'header', errors=True), [
+            self._error_headers(),
+        ])
+
+        chunk_indices = count()
+
+        def _create_chunk_subtask(user_items, initial_subtask_status):
+            """
+            Creates a subtask to grade the given chunk of users.
+            """
+            chunk = {
+                'index': next(chunk_indices),
+                'user_ids': [item['pk'] for item in user_items],
+                'subtask_status': initial_subtask_status.to_dict(),
+            }
+            return chunk_task.subtask(
+                (entry_id, xmodule_instance_args, chunk),
+                task_id=initial_subtask_status.task_id,
+                routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+            )
+
+        return queue_subtasks_for_query(
+            entry,
+            context.action_name,
+            _create_chunk_subtask,
+            [users],
+            [],
+            users_per_chunk,
+            total_num_users,
+        )
+
+    def _store_chunk(self, context, chunk_index, success_rows, error_rows):
+        """
+        Stores the rows of a chunk of users as parts of the report.
+        """
+        report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+        entry_id = context.entry_id
+        report_store.store_rows(context.course_id, self._part_filename(entry_id, chunk_index), success_rows)
+        if len(error_rows) > 0:
+            report_store.store_rows(
+                context.course_id, self._part_filename(entry_id, chunk_index, errors=True), error_rows,
+            )
+
+    def _store_failed_chunk(self, context, chunk, exc):
+        """
+        Stores an error row for each user of a chunk that could not be
+        graded, so that no user is left out of both reports.
+        """
+        try:
+            usernames = dict(User.objects.filter(id__in=chunk['user_ids']).values_list('id', 'username'))
+            error_rows = [
+                [user_id, usernames.get(user_id, u''), u'Failed to grade: {}'.format(exc)]
+                for user_id in chunk['user_ids']
+            ]
+            self._store_chunk(context, chunk['index'], [], error_rows)
+        except Exception:  # pylint: disable=broad-except
+            TASK_LOG.exception(u'%s, Failed to store the errors of chunk %s', context.task_info_string, chunk['index'])
+
+    def _complete_chunk(self, context, subtask_status):
+        """
+        Records the status of the completed chunk, and merges the parts of
+        the report if it was the last chunk to be completed.  The
+        InstructorTask succeeds only once the merged report is stored,
+        and fails if the parts can not be merged.
+        """
+        if update_subtask_status(context.entry_id, subtask_status.task_id, subtask_status, set_final_state=False):
+            num_chunks = json.loads(InstructorTask.objects.get(pk=context.entry_id).subtasks)['total']
+            try:
+                self._merge_chunks(context, num_chunks)
+            except Exception as exc:
+                TASK_LOG.exception(u'%s, Failed to merge the grade report', context.task_info_string)
+                set_final_task_state(context.entry_id, FAILURE, exc, traceback.format_exc())
+                raise
+            set_final_task_state(context.entry_id, SUCCESS)
+
+    def _merge_chunks(self, context, num_chunks):
+        """
+        Uploads the reports merged from the stored parts of all chunks.
+        """
+        report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+        date = datetime.now(UTC)
+        for csv_name, errors in (('grade_report', False), ('grade_report_err', True)):
+            part_filenames = [
+                self._part_filename(context.entry_id, chunk_index, errors)
+                for chunk_index in range(num_chunks)
+            ]
+            part_filenames = [
+                part_filename for part_filename in part_filenames
+                if report_store.exists(context.course_id, part_filename)
+            ]
+            header_filename = self._part_filename(context.entry_id, 'header', errors)
+            if errors and not part_filenames:
+                report_store.delete_file(context.course_id, header_filename)
+                continue
+            upload_csv_parts_to_report_store([header_filename] + part_filenames, csv_name, context.course_id, date)
+
+    @staticmethod
+    def _part_filename(entry_id, chunk_index, errors=False):
+        """
+        Returns the name under which a part of the report is stored.  The
+        parts are kept in a subdirectory, so they are not listed among
+        the course's reports.
+        """
+        return u'grade_report_parts/{entry_id}/{chunk_index}_{kind}.csv'.format(
+            entry_id=entry_id,
+            chunk_index=chunk_index,
+            kind='errors' if errors else 'grades',
+        )
+
     def _success_headers(self, context):
         """
         Returns a list of all applicable column headers for this grade report.
@@ -246,29 +446,30 @@ class CourseGradeReport(object):
             users = filter(lambda u: u is not None, users)
             yield self._rows_for_users(context, users)
 
-    def _compile(self, context, batched_rows):
+    def _compile(self, context, batched_rows, error_rows):
         """
-        Compiles and returns the complete list of (success_rows, error_rows) for
-        the given batched_rows and context.
+        A generator of the success rows for the given batched_rows and
+        context.  The error rows are appended to the given error_rows list.
         """
-        # partition and chain successes and errors
-        success_rows, error_rows = izip(*batched_rows)
-        success_rows = list(chain(*success_rows))
-        error_rows = list(chain(*error_rows))
+        task_progress = context.task_progress
+        for batch_success_rows, batch_error_rows in batched_rows:
+            error_rows.extend(batch_error_rows)
+
+            # update metrics on task status
+            task_progress.succeeded += len(batch_success_rows)
+            task_progress.failed += len(batch_error_rows)
+            task_progress.attempted = task_progress.succeeded + task_progress.failed
+            task_progress.total = task_progress.attempted
 
-        # update metrics on task status
-        context.task_progress.succeeded = len(success_rows)
-        context.task_progress.failed = len(error_rows)
-        context.task_progress.attempted = context.task_progress.succeeded + context.task_progress.failed
-        context.task_progress.total = context.task_progress.attempted
-        return success_rows, error_rows
+            for row in batch_success_rows:
+                yield row
 
     def _upload(self, context, success_headers, success_rows, error_headers, error_rows):
         """
         Creates and uploads a CSV for the given headers and rows.
         """
         date = datetime.now(UTC)
-        upload_csv_to_report_store([success_headers] + success_rows, 'grade_report', context.course_id, date)
+        upload_csv_to_report_store(chain([success_headers], success_rows), 'grade_report', context.course_id, date)
         if len(error_rows) > 0:
             error_rows = [error_headers] + error_rows
             upload_csv_to_report_store(error_rows, 'grade_report_err', context.course_id, date)
@@ -293,9 +494,14 @@ class CourseGradeReport(object):
             args = [iter(iterable)] * chunk_size
             return izip_longest(*args, fillvalue=fillvalue)
 
+        return grouper(self._enrolled_users(context))
+
+    def _enrolled_users(self, context):
+        """
+        Returns a queryset of the users to include in this report.
+        """
         users = CourseEnrollment.objects.users_enrolled_in(context.course_id, include_inactive=True, exclude_fake_email=True)
-        users = users.select_related('profile__allow_certificate')
-        return grouper(users)
+        return users.select_related('profile__allow_certificate')
 
     def _user_grade_results(self, course_grade, context):
         """
@@ -400,13 +606,19 @@ class CourseGradeReport(object):
         with modulestore().bulk_operations(context.course_id):
             bulk_context = _CourseGradeBulkContext(context, users)
 
-            success_rows, error_rows = [], []
-            for user, course_grade, error in CourseGradeFactory().iter(
+            grade_results = list(CourseGradeFactory().iter(
                 users,
                 course=context.course,
                 collected_block_structure=context.course_structure,
                 course_key=context.course_id,
-            ):
+            ))
+            if any(info['separate_subsection_avg_headers'] for info in context.graded_assignments.itervalues()):
+                CourseGrade.compute_grader_results(
+                    [course_grade for _, course_grade, _ in grade_results if course_grade]
+                )
+
+            success_rows, error_rows = [], []
+            for user, course_grade, error in grade_results:
                 if not course_grade:
                     # An empty gradeset means we failed to grade a student.
                     error_rows.append([user.id, user.username, error.message])
@@ -433,7 +645,6 @@ class ProblemGradeReport(object):
         """
         start_time = time()
         start_date = datetime.now(UTC)
-        status_interval = 100
         enrolled_students = CourseEnrollment.objects.users_enrolled_in(course_id, include_inactive=True, exclude_fake_email=True)
         task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
 
@@ -445,7 +656,7 @@ class ProblemGradeReport(object):
         graded_scorable_blocks = cls._graded_scorable_blocks_to_header(course_id)
 
         # Just generate the static fields for now.
-        rows = [list(header_row.values()) + ['Enrollment Status', 'Grade'] + _flatten(graded_scorable_blocks.values())]
+        header = list(header_row.values()) + ['Enrollment Status', 'Grade'] + _flatten(graded_scorable_blocks.values())
         error_rows = [list(header_row.values()) + ['error_msg']]
         current_step = {'step': 'Calculating Grades'}
 
@@ -454,7 +665,31 @@ class ProblemGradeReport(object):
         CourseEnrollment.bulk_fetch_enrollment_states(enrolled_students, course_id)
 
         course = get_course_by_id(course_id)
-        for student, course_grade, error in CourseGradeFactory().iter(enrolled_students, course):
+        rows = cls._rows(
+            course, enrolled_students, header_row, graded_scorable_blocks, error_rows, task_progress, current_step,
+        )
+
+        # Perform the upload if any students have been successfully graded.
+        # Students are graded while the rows are uploaded, so only the rows
+        # up to the first successfully graded student are computed up front.
+        first_row = next(rows, None)
+        if first_row is not None:
+            upload_csv_to_report_store(chain([header, first_row], rows), 'problem_grade_report', course_id, start_date)
+        # If there are any error rows, write them out as well
+        if len(error_rows) > 1:
+            upload_csv_to_report_store(error_rows, 'problem_grade_report_err', course_id, start_date)
+
+        return task_progress.update_task_state(extra_meta={'step': 'Uploading CSV'})
+
+    @classmethod
+    def _rows(cls, course, students, header_row, graded_scorable_blocks, error_rows, task_progress, current_step):
+        """
+        A generator of the rows of the given students who were graded
+        successfully.  The rows of the students who could not be graded
+        are appended to the given error_rows list.
+        """
+        status_interval = 100
+        for student, course_grade, error in CourseGradeFactory().iter(students, course):
             student_fields = [getattr(student, field_name) for field_name in header_row]
             task_progress.attempted += 1
 
@@ -467,7 +702,7 @@ class ProblemGradeReport(object):
                 task_progress.failed += 1
                 continue
 
-            enrollment_status = _user_enrollment_status(student, course_id)
+            enrollment_status = _user_enrollment_status(student, course.id)
 
             earned_possible_values = []
             for block_location in graded_scorable_blocks:
@@ -481,20 +716,11 @@ class ProblemGradeReport(object):
                     else:
                         earned_possible_values.append([u'Not Attempted', problem_score.possible])
 
-            rows.append(student_fields + [enrollment_status, course_grade.percent] + _flatten(earned_possible_values))
-
             task_progress.succeeded += 1
             if task_progress.attempted % status_interval == 0:
                 task_progress.update_task_state(extra_meta=current_step)
 
-        # Perform the upload if any students have been successfully graded
-        if len(rows) > 1:
-            upload_csv_to_report_store(rows, 'problem_grade_report', course_id, start_date)
-        # If there are any error rows, write them out as well
-        if len(error_rows) > 1:
-            upload_csv_to_report_store(error_rows, 'problem_grade_report_err', course_id, start_date)
-
-        return task_progress.update_task_state(extra_meta={'step': 'Uploading CSV'})
+            yield student_fields + [enrollment_status, course_grade.percent] + _flatten(earned_possible_values)
 
     @classmethod
     def _graded_scorable_blocks_to_header(cls, course_key):
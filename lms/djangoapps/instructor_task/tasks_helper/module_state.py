@@ -3,6 +3,8 @@ Instructor Tasks related to module state.
 """
 import json
 import logging
+from contextlib import contextmanager
+from itertools import islice
 from time import time
 
 from django.contrib.auth.models import User
@@ -11,6 +13,7 @@ from xblock.runtime import KvsFieldData
 
 import dogstats_wrapper as dog_stats_api
 from capa.responsetypes import LoncapaProblemError, ResponseError, StudentInputError
+from capa.safe_exec import SafeExecBatch, SafeExecDeferred
 from courseware.courses import get_course_by_id, get_problems_in_section
 from courseware.model_data import DjangoKeyValueStore, FieldDataCache
 from courseware.models import StudentModule
@@ -36,8 +39,25 @@ TASK_LOG = logging.getLogger('edx.celery.task')
 GRADES_RESCORE_EVENT_TYPE = 'edx.grades.problem.rescored'
 GRADES_OVERRIDE_EVENT_TYPE = 'edx.grades.problem.score_overridden'
 
+# The number of StudentModules that are prepared for their updates together.
+MODULE_STATE_UPDATE_CHUNK_SIZE = 100
 
-def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name):
+# The number of rehearsals used to collect the sandboxed code that rescoring
+# needs.  Code that depends on the results of other code, such as a check
+# function that depends on the problem's script, is collected in a later round.
+RESCORE_PREPARATION_ROUNDS = 2
+
+
+@contextmanager
+def _no_preparation(_modules, _task_input):
+    """
+    Prepares nothing for the update of StudentModules.
+    """
+    yield
+
+
+def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name,
+                                prepare_fcn=None):
     """
     Performs generic update by visiting StudentModule instances with the update_fcn provided.
 
@@ -56,6 +76,10 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     the update is successful; False indicates the update on the particular student module failed.
     A raised exception indicates a fatal condition -- that no other student modules should be considered.
 
+    If a `prepare_fcn` is not None, the StudentModules are updated in chunks.  For each chunk,
+    `prepare_fcn` is called with the list of (module_descriptor, StudentModule) pairs of the chunk and
+    the task_input, and returns a context manager within which the chunk is updated.
+
     The return value is a dict containing the task's results, with the following keys:
 
           'attempted': number of attempts made
@@ -116,23 +140,34 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     task_progress = TaskProgress(action_name, modules_to_update.count(), start_time)
     task_progress.update_task_state()
 
-    for module_to_update in modules_to_update:
-        task_progress.attempted += 1
-        module_descriptor = problems[unicode(module_to_update.module_state_key)]
-        # There is no try here:  if there's an error, we let it throw, and the task will
-        # be marked as FAILED, with a stack trace.
-        with dog_stats_api.timer('instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]):
-            update_status = update_fcn(module_descriptor, module_to_update, task_input)
-            if update_status == UPDATE_STATUS_SUCCEEDED:
-                # If the update_fcn returns true, then it performed some kind of work.
-                # Logging of failures is left to the update_fcn itself.
-                task_progress.succeeded += 1
-            elif update_status == UPDATE_STATUS_FAILED:
-                task_progress.failed += 1
-            elif update_status == UPDATE_STATUS_SKIPPED:
-                task_progress.skipped += 1
-            else:
-                raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
+    modules_iterator = iter(modules_to_update)
+    chunk_size = MODULE_STATE_UPDATE_CHUNK_SIZE if prepare_fcn is not None else 1
+    for modules_chunk in iter(lambda: list(islice(modules_iterator, chunk_size)), []):
+        modules = [
+            (problems[unicode(module_to_update.module_state_key)], module_to_update)
+            for module_to_update in modules_chunk
+        ]
+        with (prepare_fcn or _no_preparation)(modules, task_input):
+            for module_descriptor, module_to_update in modules:
+                task_progress.attempted += 1
+                # There is no try here:  if there's an error, we let it throw, and the task will
+                # be marked as FAILED, with a stack trace.
+                with dog_stats_api.timer(
+                    'instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]
+                ):
+                    update_status = update_fcn(module_descriptor, module_to_update, task_input)
+                    if update_status == UPDATE_STATUS_SUCCEEDED:
+                        # If the update_fcn returns true, then it performed some kind of work.
+                        # Logging of failures is left to the update_fcn itself.
+                        task_progress.succeeded += 1
+                    elif update_status == UPDATE_STATUS_FAILED:
+                        task_progress.failed += 1
+                    elif update_status == UPDATE_STATUS_SKIPPED:
+                        task_progress.skipped += 1
+                    else:
+                        raise UpdateProblemModuleStateError(
+                            "Unexpected update_status returned: {}".format(update_status)
+                        )
 
     return task_progress.update_task_state()
 
@@ -224,6 +259,51 @@ def rescore_problem_module_state(xmodule_instance_args, module_descriptor, stude
         return UPDATE_STATUS_SUCCEEDED
 
 
+@contextmanager
+def prepare_rescore_problem_module_states(xmodule_instance_args, modules, _task_input):
+    """
+    Runs the sandboxed code that rescoring the given (module_descriptor, StudentModule)
+    pairs needs in batches, rather than in a sandbox of its own for each StudentModule.
+
+    The code is collected by rehearsing the rescoring of each StudentModule, without
+    saving anything.  While the returned context is active, rescore_problem_module_state
+    uses the results of the code instead of running it again.
+    """
+    with SafeExecBatch() as batch:
+        for __ in xrange(RESCORE_PREPARATION_ROUNDS):
+            with batch.deferring():
+                for module_descriptor, student_module in modules:
+                    _rehearse_rescore(xmodule_instance_args, module_descriptor, student_module)
+            if not batch.run_pending():
+                break
+        yield
+
+
+def _rehearse_rescore(xmodule_instance_args, module_descriptor, student_module):
+    """
+    Grades the existing answers of the given StudentModule without saving the results.
+    """
+    course_id = student_module.course_id
+    try:
+        with modulestore().bulk_operations(course_id):
+            instance = _get_module_instance_for_task(
+                course_id,
+                student_module.student,
+                module_descriptor,
+                xmodule_instance_args,
+                grade_bucket_type='rescore',
+                course=get_course_by_id(course_id),
+            )
+            if instance is not None and hasattr(instance, 'update_correctness') and instance.has_submitted_answer():
+                instance.update_correctness()
+    except SafeExecDeferred:
+        # The rehearsal stops wherever code is deferred to the batch.
+        pass
+    except Exception:  # pylint: disable=broad-except
+        # Real errors are reported when the StudentModule is rescored.
+        pass
+
+
 @outer_atomic
 def override_score_module_state(xmodule_instance_args, module_descriptor, student_module, task_input):
     '''
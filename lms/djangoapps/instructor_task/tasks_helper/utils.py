@@ -1,4 +1,9 @@
+import shutil
+from tempfile import TemporaryFile
+
+from django.core.files import File
 from eventtracking import tracker
+
 from lms.djangoapps.instructor_task.models import ReportStore
 from util.file import course_filename_prefix_generator
 
@@ -24,22 +29,57 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name
                 [row1_colum1, row1_colum2, ...],
                 ...
             ]
+            Any iterable of rows is accepted.  Passing a generator streams
+            the rows to the ReportStore as they are generated, so large
+            reports do not need to be held in memory.
         csv_name: Name of the resulting CSV
         course_id: ID of the course
     """
     report_store = ReportStore.from_config(config_name)
-    report_store.store_rows(
-        course_id,
-        u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
-            course_prefix=course_filename_prefix_generator(course_id),
-            csv_name=csv_name,
-            timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
-        ),
-        rows
-    )
+    report_store.store_rows(course_id, _report_filename(csv_name, course_id, timestamp), rows)
+    tracker_emit(csv_name)
+
+
+def upload_csv_parts_to_report_store(part_filenames, csv_name, course_id, timestamp, config_name='GRADES_DOWNLOAD'):
+    """
+    Upload the concatenation of CSV files that were previously stored in
+    the ReportStore as a single CSV, and delete the stored parts.
+
+    The parts are streamed through a temporary file, so the complete CSV
+    is never held in memory.
+
+    Arguments:
+        part_filenames: Names of the stored CSV parts, in order.
+        csv_name: Name of the resulting CSV
+        course_id: ID of the course
+    """
+    report_store = ReportStore.from_config(config_name)
+    with TemporaryFile() as output_file:
+        for part_filename in part_filenames:
+            part_file = report_store.open_file(course_id, part_filename)
+            try:
+                shutil.copyfileobj(part_file, output_file)
+            finally:
+                part_file.close()
+        output_file.seek(0)
+        report_store.store(course_id, _report_filename(csv_name, course_id, timestamp), File(output_file))
+
+    for part_filename in part_filenames:
+        report_store.delete_file(course_id, part_filename)
     tracker_emit(csv_name)
 
 
+def _report_filename(csv_name, course_id, timestamp):
+    """
+    Returns the name under which the CSV report is stored.
+    """
+    return u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
+        course_prefix=course_filename_prefix_generator(course_id),
+        csv_name=csv_name,
+        timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
+    )
+
+
 def tracker_emit(report_name):
     """
     Emits a 'report.requested' event for the given report.
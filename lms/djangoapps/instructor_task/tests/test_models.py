@@ -49,6 +49,22 @@ class ReportStoreTestMixin(object):
             ['new_file', 'middle_file', 'old_file']
         )
 
+    def test_store_rows_from_generator(self):
+        """
+        Test that ReportStore.store_rows() streams rows from a generator
+        into a CSV, including CSVs larger than the in-memory spool.
+        """
+        report_store = self.create_report_store()
+        rows = ([u'row{}'.format(index), u'\u00e9' * 100] for index in xrange(20000))
+        with patch.object(report_store, 'SPOOL_MAX_SIZE', 1024):
+            report_store.store_rows(self.course_id, 'streamed_file', rows)
+
+        stored_file = report_store.open_file(self.course_id, 'streamed_file')
+        lines = stored_file.read().splitlines()
+        stored_file.close()
+        self.assertEqual(len(lines), 20000)
+        self.assertEqual(lines[-1], 'row19999,' + u'\u00e9'.encode('utf-8') * 100)
+
 
 class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, SimpleTestCase):
     """
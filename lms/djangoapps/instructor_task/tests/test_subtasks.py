@@ -79,3 +79,14 @@ class TestSubtasks(InstructorTaskCourseTestCase):
         self.assertEqual(len(mock_create_subtask_fcn_args[0][0][0]), 3)
         self.assertEqual(len(mock_create_subtask_fcn_args[1][0][0]), 3)
         self.assertEqual(len(mock_create_subtask_fcn_args[2][0][0]), 5)
+
+    def test_queue_subtasks_for_query_by_pk(self):
+        """Test queue_subtasks_for_query() fetches every item once, in order of pk, across several queries."""
+
+        mock_create_subtask_fcn = Mock()
+        with patch('lms.djangoapps.instructor_task.subtasks.ITEMS_PER_QUERY', 2):
+            self._queue_subtasks(mock_create_subtask_fcn, 3, 7, 0)
+
+        item_pks = [item['pk'] for args in mock_create_subtask_fcn.call_args_list for item in args[0][0]]
+        enrollment_pks = CourseEnrollment.objects.filter(course_id=self.course.id).values_list('pk', flat=True)
+        self.assertEqual(item_pks, sorted(enrollment_pks))
@@ -16,6 +16,7 @@ from mock import MagicMock, Mock, patch
 from nose.plugins.attrib import attr
 from opaque_keys.edx.locations import i4xEncoder
 
+from capa.safe_exec import SafeExecBatch
 from courseware.models import StudentModule
 from courseware.tests.factories import StudentModuleFactory
 from lms.djangoapps.instructor_task.exceptions import UpdateProblemModuleStateError
@@ -450,6 +451,29 @@ class TestRescoreInstructorTask(TestInstructorTasks):
             action_name='rescored'
         )
 
+    def test_rescoring_is_rehearsed(self):
+        """
+        Tests that rescoring is rehearsed, so that sandboxed code can be run in batches.
+        """
+        mock_instance = MagicMock()
+        mock_instance.has_submitted_answer.return_value = True
+
+        num_students = 3
+        self._create_students_with_state(num_students)
+        task_entry = self._create_input_entry()
+        with patch(
+                'lms.djangoapps.instructor_task.tasks_helper.module_state.get_module_for_descriptor_internal'
+        ) as mock_get_module:
+            mock_get_module.return_value = mock_instance
+            with patch.object(SafeExecBatch, 'run_pending', return_value=0) as mock_run_pending:
+                self._run_task_with_mock_celery(rescore_problem, task_entry.id, task_entry.task_id)
+
+        # Nothing was deferred by the mock instance, so there is a single rehearsal.
+        self.assertEqual(mock_run_pending.call_count, 1)
+        self.assertEqual(mock_instance.update_correctness.call_count, num_students)
+        self.assertEqual(mock_instance.rescore.call_count, num_students)
+        self.assertEqual(mock_instance.save.call_count, num_students)
+
 
 @attr(shard=3)
 class TestResetAttemptsInstructorTask(TestInstructorTasks):
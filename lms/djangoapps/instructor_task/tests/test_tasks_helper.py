@@ -8,7 +8,9 @@ Unit tests for LMS instructor-initiated background tasks helper functions.
 
 """
 
+import json
 import os
+import re
 import shutil
 import tempfile
 import urllib
@@ -16,6 +18,7 @@ from datetime import datetime
 
 import ddt
 import unicodecsv
+from celery.states import FAILURE, SUCCESS
 from django.conf import settings
 from django.core.urlresolvers import reverse
 from django.test.utils import override_settings
@@ -33,6 +36,9 @@ from courseware.tests.factories import InstructorFactory
 from instructor_analytics.basic import UNAVAILABLE
 from lms.djangoapps.grades.models import PersistentCourseGrade
 from lms.djangoapps.grades.transformer import GradesTransformer
+from lms.djangoapps.instructor_task.config.models import GradeReportSetting
+from lms.djangoapps.instructor_task.models import InstructorTask
+from lms.djangoapps.instructor_task.tasks import calculate_grades_csv_chunk
 from lms.djangoapps.instructor_task.tasks_helper.certs import generate_students_certificates
 from lms.djangoapps.instructor_task.tasks_helper.enrollments import (
     upload_enrollment_report,
@@ -52,6 +58,7 @@ from lms.djangoapps.instructor_task.tasks_helper.misc import (
     upload_course_survey_report,
     upload_ora2_data
 )
+from lms.djangoapps.instructor_task.tests.factories import InstructorTaskFactory
 from lms.djangoapps.instructor_task.tests.test_base import (
     InstructorTaskCourseTestCase,
     InstructorTaskModuleTestCase,
@@ -422,6 +429,93 @@ class TestInstructorGradeReport(InstructorGradeReportTestCase):
             {'attempted': expected_students, 'succeeded': expected_students, 'failed': 0}, result
         )
 
+    def _generate_in_chunks(self, usernames):
+        """
+        Generates a grade report for the given students in chunks of two
+        students, and returns its InstructorTask.
+        """
+        for username in usernames:
+            self.create_student(username, u'{}@contrived_example.com'.format(username))
+        GradeReportSetting.objects.create(enabled=True, batch_size=2)
+        entry = InstructorTaskFactory.create(course_id=self.course.id, task_type='grade_course', task_id='grades')
+
+        with patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task'):
+            CourseGradeReport.generate(
+                None, entry.id, self.course.id, {}, 'graded', chunk_task=calculate_grades_csv_chunk,
+            )
+        return InstructorTask.objects.get(pk=entry.id)
+
+    def _report_usernames(self, csv_name):
+        """
+        Returns the usernames listed in the course's report of the given name.
+        """
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        for filename, __ in report_store.links_for(self.course.id):
+            if re.search(r'_{}_\d{{4}}-\d{{2}}-\d{{2}}-\d{{4}}\.csv$'.format(csv_name), filename):
+                with report_store.storage.open(report_store.path_to(self.course.id, filename)) as csv_file:
+                    return [row['Username'] for row in unicodecsv.DictReader(csv_file)]
+        return None
+
+    def test_generate_in_chunks(self):
+        """
+        Test that the report is graded in chunks by subtasks when
+        GradeReportSetting is enabled, and merged into a single report.
+        """
+        usernames = [u'student{}'.format(index) for index in range(5)]
+        entry = self._generate_in_chunks(usernames)
+
+        self.assertEqual(entry.task_state, SUCCESS)
+        subtasks = json.loads(entry.subtasks)
+        self.assertEqual((subtasks['total'], subtasks['succeeded'], subtasks['failed']), (3, 3, 0))
+        self.assertDictContainsSubset({'attempted': 5, 'succeeded': 5, 'failed': 0}, json.loads(entry.task_output))
+
+        # Only the merged report is stored; the parts are deleted.
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        self.assertEqual(len(report_store.links_for(self.course.id)), 1)
+        self.verify_rows_in_csv(
+            [{'Username': username} for username in usernames],
+            ignore_other_columns=True,
+        )
+        _, part_filenames = report_store.storage.listdir(
+            report_store.path_to(self.course.id, u'grade_report_parts/{}'.format(entry.id))
+        )
+        self.assertEqual(part_filenames, [])
+
+    def test_failed_chunk_is_reported(self):
+        """
+        Test that the users of a chunk that could not be graded are
+        listed in the error report.
+        """
+        rows_for_users = CourseGradeReport._rows_for_users  # pylint: disable=protected-access
+
+        def _fail_for_student2(report, context, users):
+            """
+            Fails to grade the chunk of student2.
+            """
+            if any(user.username == u'student2' for user in users):
+                raise Exception('Grading failed')
+            return rows_for_users(report, context, users)
+
+        usernames = [u'student{}'.format(index) for index in range(5)]
+        with patch.object(CourseGradeReport, '_rows_for_users', autospec=True, side_effect=_fail_for_student2):
+            entry = self._generate_in_chunks(usernames)
+
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertDictContainsSubset({'attempted': 5, 'succeeded': 3, 'failed': 2}, json.loads(entry.task_output))
+        self.assertEqual(self._report_usernames('grade_report_err'), [u'student2', u'student3'])
+        self.assertEqual(self._report_usernames('grade_report'), [u'student0', u'student1', u'student4'])
+
+    def test_failed_merge_fails_task(self):
+        """
+        Test that the task fails, rather than succeeding without a
+        report, when the parts of the report can not be merged.
+        """
+        with patch.object(CourseGradeReport, '_merge_chunks', side_effect=Exception('Merge failed')):
+            entry = self._generate_in_chunks([u'student0', u'student1'])
+
+        self.assertEqual(entry.task_state, FAILURE)
+        self.assertEqual(json.loads(entry.task_output)['message'], 'Merge failed')
+
 
 class TestTeamGradeReport(InstructorGradeReportTestCase):
     """ Test that teams appear correctly in the grade report when it is enabled for the course. """
@@ -223,6 +223,29 @@ if 'loc_cache' not in CACHES:
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'edx_location_mem_cache',
     }
+COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES = ENV_TOKENS.get(
+    'COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES', COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES
+)
+COURSE_DEFINITION_LOCAL_CACHE_MAX_BYTES = ENV_TOKENS.get(
+    'COURSE_DEFINITION_LOCAL_CACHE_MAX_BYTES', COURSE_DEFINITION_LOCAL_CACHE_MAX_BYTES
+)
+CONFIGURATION_CACHE_LOCAL_TIMEOUT = ENV_TOKENS.get(
+    'CONFIGURATION_CACHE_LOCAL_TIMEOUT', CONFIGURATION_CACHE_LOCAL_TIMEOUT
+)
+if CONFIGURATION_CACHE_LOCAL_TIMEOUT and 'configuration' in CACHES:
+    CACHES['configuration_remote'] = CACHES['configuration']
+    CACHES['configuration'] = {
+        'BACKEND': 'util.configuration_cache.TieredConfigurationCache',
+        'LOCATION': 'configuration_remote',
+        'OPTIONS': {'LOCAL_TIMEOUT': CONFIGURATION_CACHE_LOCAL_TIMEOUT},
+    }
+STATIC_CONTENT_DISK_CACHE_DIR = ENV_TOKENS.get('STATIC_CONTENT_DISK_CACHE_DIR', STATIC_CONTENT_DISK_CACHE_DIR)
+STATIC_CONTENT_DISK_CACHE_MAX_BYTES = ENV_TOKENS.get(
+    'STATIC_CONTENT_DISK_CACHE_MAX_BYTES', STATIC_CONTENT_DISK_CACHE_MAX_BYTES
+)
+STATIC_CONTENT_DISK_CACHE_MAX_FILE_BYTES = ENV_TOKENS.get(
+    'STATIC_CONTENT_DISK_CACHE_MAX_FILE_BYTES', STATIC_CONTENT_DISK_CACHE_MAX_FILE_BYTES
+)
 
 # Email overrides
 DEFAULT_FROM_EMAIL = ENV_TOKENS.get('DEFAULT_FROM_EMAIL', DEFAULT_FROM_EMAIL)
@@ -260,6 +283,12 @@ BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = ENV_TOKENS.get(
     'BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS',
     BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS
 )
+BULK_EMAIL_SEND_CONCURRENCY = ENV_TOKENS.get('BULK_EMAIL_SEND_CONCURRENCY', BULK_EMAIL_SEND_CONCURRENCY)
+BULK_EMAIL_CONNECTION_POOL_SIZE = ENV_TOKENS.get('BULK_EMAIL_CONNECTION_POOL_SIZE', BULK_EMAIL_CONNECTION_POOL_SIZE)
+BULK_EMAIL_MAX_SENDS_PER_SECOND_PER_CONNECTION = ENV_TOKENS.get(
+    'BULK_EMAIL_MAX_SENDS_PER_SECOND_PER_CONNECTION',
+    BULK_EMAIL_MAX_SENDS_PER_SECOND_PER_CONNECTION
+)
 # We want Bulk Email running on the high-priority queue, so we define the
 # routing key that points to it. At the moment, the name is the same.
 # We have to reset the value here, since we have changed the value of the queue name.
@@ -351,6 +380,12 @@ VIRTUAL_UNIVERSITIES = ENV_TOKENS.get('VIRTUAL_UNIVERSITIES', [])
 META_UNIVERSITIES = ENV_TOKENS.get('META_UNIVERSITIES', {})
 COMMENTS_SERVICE_URL = ENV_TOKENS.get("COMMENTS_SERVICE_URL", '')
 COMMENTS_SERVICE_KEY = ENV_TOKENS.get("COMMENTS_SERVICE_KEY", '')
+COMMENTS_SERVICE_POOL_MAXSIZE = ENV_TOKENS.get("COMMENTS_SERVICE_POOL_MAXSIZE", COMMENTS_SERVICE_POOL_MAXSIZE)
+COMMENTS_SERVICE_MAX_RETRIES = ENV_TOKENS.get("COMMENTS_SERVICE_MAX_RETRIES", COMMENTS_SERVICE_MAX_RETRIES)
+COMMENTS_SERVICE_RETRY_BACKOFF_FACTOR = ENV_TOKENS.get(
+    "COMMENTS_SERVICE_RETRY_BACKOFF_FACTOR", COMMENTS_SERVICE_RETRY_BACKOFF_FACTOR
+)
+COMMENTS_SERVICE_BATCH_WORKERS = ENV_TOKENS.get("COMMENTS_SERVICE_BATCH_WORKERS", COMMENTS_SERVICE_BATCH_WORKERS)
 CERT_QUEUE = ENV_TOKENS.get("CERT_QUEUE", 'test-pull')
 ZENDESK_URL = ENV_TOKENS.get('ZENDESK_URL', ZENDESK_URL)
 ZENDESK_CUSTOM_FIELDS = ENV_TOKENS.get('ZENDESK_CUSTOM_FIELDS', ZENDESK_CUSTOM_FIELDS)
@@ -621,6 +656,7 @@ STUDENT_FILEUPLOAD_MAX_SIZE = ENV_TOKENS.get("STUDENT_FILEUPLOAD_MAX_SIZE", STUD
 
 # Event tracking
 TRACKING_BACKENDS.update(AUTH_TOKENS.get("TRACKING_BACKENDS", {}))
+TRACKING_ASYNC.update(ENV_TOKENS.get("TRACKING_ASYNC", {}))
 EVENT_TRACKING_BACKENDS['tracking_logs']['OPTIONS']['backends'].update(AUTH_TOKENS.get("EVENT_TRACKING_BACKENDS", {}))
 EVENT_TRACKING_BACKENDS['segmentio']['OPTIONS']['processors'][0]['OPTIONS']['whitelist'].extend(
     AUTH_TOKENS.get("EVENT_TRACKING_SEGMENTIO_EMIT_WHITELIST", []))
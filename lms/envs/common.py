@@ -57,6 +57,12 @@ DISCUSSION_SETTINGS = {
     'MAX_COMMENT_DEPTH': 2,
 }
 
+# Connection pooling, retries and concurrency of requests to the comments service
+COMMENTS_SERVICE_POOL_MAXSIZE = 10
+COMMENTS_SERVICE_MAX_RETRIES = 2
+COMMENTS_SERVICE_RETRY_BACKOFF_FACTOR = 0.1
+COMMENTS_SERVICE_BATCH_WORKERS = 4
+
 LMS_ROOT_URL = "http://localhost:8000"
 
 # Features
@@ -677,6 +683,18 @@ TRACKING_BACKENDS = {
     }
 }
 
+# Buffer tracking events and send them to TRACKING_BACKENDS in batches from a
+# background thread.  When the queue is full, events are dropped, block the
+# request ('block'), or are appended to SPILL_FILE ('spill').
+TRACKING_ASYNC = {
+    'ENABLED': False,
+    'MAX_QUEUE_SIZE': 10000,
+    'BATCH_SIZE': 100,
+    'FLUSH_INTERVAL': 1.0,
+    'OVERFLOW_POLICY': 'drop',
+    'SPILL_FILE': None,
+}
+
 # We're already logging events, and we don't want to capture user
 # names/passwords.  Heartbeat events are likely not interesting.
 TRACKING_IGNORE_URL_PATTERNS = [r'^/event', r'^/login', r'^/heartbeat', r'^/segmentio/event', r'^/performance']
@@ -777,6 +795,30 @@ XBLOCK_FIELD_DATA_WRAPPERS = ()
 ############# ModuleStore Configuration ##########
 
 MODULESTORE_BRANCH = 'published-only'
+
+# Number of bytes of pickled course structures each process keeps in memory
+# in front of the 'course_structure_cache'. Set to 0 to disable the local tier.
+COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Number of bytes of pickled split modulestore definitions each process keeps in
+# memory, in front of the optional 'course_definition_cache'. Set to 0 to disable.
+COURSE_DEFINITION_LOCAL_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Number of seconds each process serves ConfigurationModel values from memory
+# before checking the 'configuration' cache for changes to them. Deployments
+# that configure a 'configuration' cache get request and process tiers in front
+# of it (see util.configuration_cache). Set to 0 to disable these tiers.
+CONFIGURATION_CACHE_LOCAL_TIMEOUT = 5
+
+# Directory in which each server keeps copies of recently served course assets
+# that are too large for the 'course_assets' cache, or None to always read them
+# from the contentstore. The copies are limited to a total of
+# STATIC_CONTENT_DISK_CACHE_MAX_BYTES, and assets larger than
+# STATIC_CONTENT_DISK_CACHE_MAX_FILE_BYTES are never copied.
+STATIC_CONTENT_DISK_CACHE_DIR = None
+STATIC_CONTENT_DISK_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+STATIC_CONTENT_DISK_CACHE_MAX_FILE_BYTES = 64 * 1024 * 1024
+
 CONTENTSTORE = None
 DOC_STORE_CONFIG = {
     'host': 'localhost',
@@ -842,6 +884,10 @@ CODE_JAIL = {
 #   ]
 COURSES_WITH_UNSAFE_CODE = []
 
+# The number of preprocessed capa problems (parsed XML and script results, keyed
+# by the problem XML and seed) that each process keeps.  Set to 0 to disable.
+CAPA_PROBLEM_TEMPLATE_CACHE_SIZE = 500
+
 ############################### DJANGO BUILT-INS ###############################
 # Change DEBUG in your environment settings files, not here
 DEBUG = False
@@ -1922,6 +1968,19 @@ BULK_EMAIL_LOG_SENT_EMAILS = False
 # parallel, and what the SES rate is.
 BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = 0.02
 
+# Number of threads that send the messages of a single bulk email subtask
+# concurrently, each over its own connection to the email server.
+BULK_EMAIL_SEND_CONCURRENCY = 4
+
+# Maximum number of open connections to the email server that each worker
+# process keeps for reuse by later bulk email subtasks.
+BULK_EMAIL_CONNECTION_POOL_SIZE = 4
+
+# Maximum number of messages sent per second over each connection to the
+# email server, or 0 for no limit.  The overall rate of a subtask is at most
+# this value times BULK_EMAIL_SEND_CONCURRENCY.
+BULK_EMAIL_MAX_SENDS_PER_SECOND_PER_CONNECTION = 0
+
 ############################# Persistent Grades ####################################
 
 # Queue to use for updating persistent grades
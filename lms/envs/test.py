@@ -60,6 +60,10 @@ FEATURES['DISABLE_START_DATES'] = True
 # the one in cms/envs/test.py
 FEATURES['ENABLE_DISCUSSION_SERVICE'] = False
 
+# Send batched requests to the comments service one at a time, so tests see
+# the requests in a predictable order.
+COMMENTS_SERVICE_BATCH_WORKERS = 1
+
 FEATURES['ENABLE_SERVICE_STATUS'] = True
 
 FEATURES['ENABLE_SHOPPING_CART'] = True
@@ -233,6 +237,11 @@ CACHES = {
     },
 }
 
+# Structures and definitions are cached in-process by default, which would
+# hide the mongo queries that tests count.
+COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES = 0
+COURSE_DEFINITION_LOCAL_CACHE_MAX_BYTES = 0
+
 # Dummy secret key for dev
 SECRET_KEY = '85920908f28904ed733fe576320db18cabd7b6cd'
 
@@ -338,6 +347,11 @@ CELERY_RESULT_BACKEND = 'djcelery.backends.cache:CacheBackend'
 
 CLEAR_REQUEST_CACHE_ON_TASK_COMPLETION = False
 
+# Send bulk email sequentially over a fresh connection, so that tests can mock
+# the connection used by each subtask.
+BULK_EMAIL_SEND_CONCURRENCY = 1
+BULK_EMAIL_CONNECTION_POOL_SIZE = 0
+
 ######################### MARKETING SITE ###############################
 
 MKTG_URL_LINK_MAP = {
@@ -6,3 +6,18 @@ else:
     SERVICE_HOST = 'http://localhost:4567'
 
 PREFIX = SERVICE_HOST + '/api/v1'
+
+# Maximum number of persistent connections to the comments service that
+# are kept open by each process.
+POOL_MAXSIZE = getattr(settings, "COMMENTS_SERVICE_POOL_MAXSIZE", 10)
+
+# Number of times a request to the comments service is retried after a
+# connection error.  Only idempotent requests are retried after the
+# request was sent.
+MAX_RETRIES = getattr(settings, "COMMENTS_SERVICE_MAX_RETRIES", 2)
+RETRY_BACKOFF_FACTOR = getattr(settings, "COMMENTS_SERVICE_RETRY_BACKOFF_FACTOR", 0.1)
+
+# Number of threads of each process used to send batched requests to the
+# comments service concurrently.  Batched requests are sent one at a time
+# when this is 1.
+BATCH_WORKERS = getattr(settings, "COMMENTS_SERVICE_BATCH_WORKERS", 4)
@@ -1,17 +1,34 @@
 """" Common utilities for comment client wrapper """
 import logging
+import os
+import sys
+import threading
 from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
 from time import time
 from uuid import uuid4
 
 import requests
-from django.conf import settings
 from django.utils.translation import get_language
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
 
 import dogstats_wrapper as dog_stats_api
 
+from . import settings as cc_settings
+
 log = logging.getLogger(__name__)
 
+# Objects that are shared by the threads of a process.  They are created
+# lazily, and created again in processes that are forked after they were
+# created, since connections and threads are not inherited by forks.
+_process_lock = threading.Lock()
+_process_objects = {}
+
+# The forums config and language of the request on whose behalf batched
+# requests are performed by worker threads.
+_batch_context = threading.local()
+
 
 def strip_none(dic):
     return dict([(k, v) for k, v in dic.iteritems() if v is not None])
@@ -53,11 +70,108 @@ def request_timer(request_id, method, url, tags=None):
     )
 
 
-def perform_request(method, url, data_or_params=None, raw=False,
-                    metric_action=None, metric_tags=None, paged_results=False):
+def _get_process_object(name, factory):
+    """
+    Returns the object of the given name that is shared by the threads of
+    this process, creating it with the given factory if needed.
+    """
+    pid = os.getpid()
+    obj_pid, obj = _process_objects.get(name, (None, None))
+    if obj_pid != pid:
+        with _process_lock:
+            obj_pid, obj = _process_objects.get(name, (None, None))
+            if obj_pid != pid:
+                obj = factory()
+                _process_objects[name] = (pid, obj)
+    return obj
+
+
+def _create_session():
+    """
+    Returns a new requests session that keeps a pool of persistent
+    connections to the comments service.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_maxsize=cc_settings.POOL_MAXSIZE,
+        max_retries=Retry(
+            total=cc_settings.MAX_RETRIES,
+            backoff_factor=cc_settings.RETRY_BACKOFF_FACTOR,
+            raise_on_redirect=False,
+        ),
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def send_request(method, url, **kwargs):
+    """
+    Sends a request to the comments service over the pooled session of
+    this process, and returns the response.
+    """
+    return _get_process_object('session', _create_session).request(method, url, **kwargs)
+
+
+def _get_forums_config():
+    """
+    Returns the current ForumsConfig.
+    """
     # To avoid dependency conflict
     from django_comment_common.models import ForumsConfig
-    config = ForumsConfig.current()
+    return ForumsConfig.current()
+
+
+def perform_concurrently(*functions):
+    """
+    Calls the given functions, each of which should perform independent
+    requests to the comments service, concurrently and returns a list of
+    their results.
+
+    The functions are called by a pool of worker threads shared by the
+    process, so they should not access the database.  The requests they
+    perform use the forums config and language of the calling thread.  If
+    any of the functions raise an exception, the exception of the first of
+    them is raised once all the functions have returned.
+    """
+    # Functions that are already called by a worker thread call the given
+    # functions themselves, so workers never wait for each other.
+    num_workers = min(cc_settings.BATCH_WORKERS, len(functions))
+    if num_workers <= 1 or getattr(_batch_context, 'config', None) is not None:
+        return [function() for function in functions]
+
+    config = _get_forums_config()
+    language = get_language()
+
+    def _call(function):
+        """
+        Calls the function in the context of the calling thread, and
+        returns its result or the info of the exception it raised.
+        """
+        _batch_context.config, _batch_context.language = config, language
+        try:
+            return function(), None
+        except Exception:  # pylint: disable=broad-except
+            return None, sys.exc_info()
+        finally:
+            del _batch_context.config, _batch_context.language
+
+    pool = _get_process_object('pool', lambda: ThreadPool(cc_settings.BATCH_WORKERS))
+    batch_id = uuid4()
+    metric_tags = [u'method:batch', u'batch_size:{}'.format(len(functions))]
+    with request_timer(batch_id, 'batch', u'{} requests'.format(len(functions)), metric_tags):
+        results = pool.map(_call, functions)
+
+    for _result, exc_info in results:
+        if exc_info is not None:
+            raise exc_info[0], exc_info[1], exc_info[2]
+    return [result for result, _exc_info in results]
+
+
+def perform_request(method, url, data_or_params=None, raw=False,
+                    metric_action=None, metric_tags=None, paged_results=False):
+    config = getattr(_batch_context, 'config', None) or _get_forums_config()
+    language = getattr(_batch_context, 'language', None) or get_language()
 
     if not config.enabled:
         raise CommentClientMaintenanceError('service disabled')
@@ -73,7 +187,7 @@ def perform_request(method, url, data_or_params=None, raw=False,
         data_or_params = {}
     headers = {
         'X-Edx-Api-Key': config.api_key,
-        'Accept-Language': get_language(),
+        'Accept-Language': language,
     }
     request_id = uuid4()
     request_id_dict = {'request_id': request_id}
@@ -85,7 +199,7 @@ def perform_request(method, url, data_or_params=None, raw=False,
         data = None
         params = merge_dict(data_or_params, request_id_dict)
     with request_timer(request_id, method, url, metric_tags):
-        response = requests.request(
+        response = send_request(
             method,
             url,
             data=data,
@@ -277,6 +277,8 @@ urlpatterns += (
     # TODO: These views need to be updated before they work
     url(r'^calculate$', 'util.views.calculate'),
 
+    url(r'^configuration_cache_stats$', 'util.views.configuration_cache_stats', name='configuration_cache_stats'),
+
     url(r'^courses/?$', 'branding.views.courses', name="courses"),
 
     #About the course
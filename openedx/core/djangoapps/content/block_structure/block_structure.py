@@ -6,13 +6,14 @@ Module with family of classes for block structures.
 
 The following internal data structures are implemented:
     _BlockRelations - Data structure for a single block's relations.
+    _BlockGraph - Data structure for the relations of all blocks.
     _BlockData - Data structure for a single block's data.
 """
-from copy import deepcopy
-from functools import partial
+from array import array
+from copy import copy, deepcopy
 from logging import getLogger
 
-from openedx.core.lib.graph_traversals import traverse_topologically, traverse_post_order
+from openedx.core.lib.graph_traversals import traverse_topologically, traverse_post_order, traverse_pre_order
 
 from .exceptions import TransformerException
 
@@ -23,11 +24,18 @@ logger = getLogger(__name__)  # pylint: disable=invalid-name
 # A dictionary key value for storing a transformer's version number.
 TRANSFORMER_VERSION_KEY = '_version'
 
+# Typecode of the arrays used for block ids.
+_ID_TYPECODE = 'l'
+
 
 class _BlockRelations(object):
     """
     Data structure to encapsulate relationships for a single block,
     including its children and parents.
+
+    Note: Block structures keep their relations in a _BlockGraph.  This
+    class remains as the format of the relations in pickled block
+    structures.
     """
     def __init__(self):
 
@@ -40,6 +48,292 @@ class _BlockRelations(object):
         self.children = []
 
 
+class _BlockGraph(object):
+    """
+    Data structure to encapsulate the relationships of all blocks in a
+    block structure.
+
+    Each block is assigned a dense integer id, its index in the keys
+    list, and the relations are stored as arrays of ids in compressed
+    sparse row (CSR) format: the ids of the children of the block with
+    id i are children[child_offsets[i]:child_offsets[i + 1]], and
+    likewise for its parents.  Traversals run over the ids, so they
+    neither hash usage keys nor need an object per block.
+
+    Since the arrays are not updated in place, the relations of a block
+    that are changed after the arrays are built are kept in a list that
+    overrides the block's slice of the arrays, and a removed block is
+    only flagged as removed.  This keeps all ids stable until compact
+    rebuilds the arrays.
+    """
+    def __init__(self, keys=(), child_offsets=None, children=None, parent_offsets=None, parents=None):
+
+        # List of the usage keys of the blocks, indexed by block id.
+        # list [UsageKey]
+        self.keys = list(keys)
+
+        # Map of a block's usage key to its id.
+        # dict {UsageKey: int}
+        self.ids = {usage_key: block_id for block_id, usage_key in enumerate(self.keys)}
+
+        # Offsets into, and the flattened ids of, the blocks' children
+        # and parents.
+        # array [int]
+        no_relations = [0] * (len(self.keys) + 1)
+        self._child_offsets = child_offsets if child_offsets is not None else array(_ID_TYPECODE, no_relations)
+        self._children = children if children is not None else array(_ID_TYPECODE)
+        self._parent_offsets = parent_offsets if parent_offsets is not None else array(_ID_TYPECODE, no_relations)
+        self._parents = parents if parents is not None else array(_ID_TYPECODE)
+
+        # Map of a block's id to the ids of its children (and parents),
+        # for blocks whose relations changed since the arrays were built.
+        # dict {int: list [int]}
+        self._child_overrides = {}
+        self._parent_overrides = {}
+
+        # Whether each block, indexed by block id, was removed.
+        # bytearray
+        self._removed = bytearray(len(self.keys))
+        self._num_removed = 0
+
+    @classmethod
+    def from_counts(cls, keys, child_counts, children, parent_counts, parents):
+        """
+        Returns a new graph for the given keys with the given relations.
+
+        Arguments:
+            keys (list [UsageKey]) - The usage keys of the blocks,
+                indexed by block id.
+
+            child_counts, parent_counts (array [int]) - The number of
+                children (and parents) of each block.
+
+            children, parents (array [int]) - The flattened ids of the
+                children (and parents) of all blocks.
+        """
+        return cls(keys, _offsets(child_counts), children, _offsets(parent_counts), parents)
+
+    @classmethod
+    def from_relations_map(cls, block_relations):
+        """
+        Returns a new graph with the relations in the given map.
+
+        Arguments:
+            block_relations (dict {UsageKey: _BlockRelations}) - Map of
+                a block's usage key to its relations.
+        """
+        keys = list(block_relations)
+        ids = {usage_key: block_id for block_id, usage_key in enumerate(keys)}
+        child_counts, children, parent_counts, parents = [array(_ID_TYPECODE) for _ in range(4)]
+        for usage_key in keys:
+            relations = block_relations[usage_key]
+            child_counts.append(len(relations.children))
+            children.extend(ids[child] for child in relations.children)
+            parent_counts.append(len(relations.parents))
+            parents.extend(ids[parent] for parent in relations.parents)
+        return cls.from_counts(keys, child_counts, children, parent_counts, parents)
+
+    def to_relations_map(self):
+        """
+        Returns the relations of the blocks as a map of a block's usage
+        key to its _BlockRelations.
+        """
+        block_relations = {}
+        for usage_key in self:
+            relations = _BlockRelations()
+            relations.children = self.get_children(usage_key)
+            relations.parents = self.get_parents(usage_key)
+            block_relations[usage_key] = relations
+        return block_relations
+
+    def to_counts(self):
+        """
+        Returns the relations of the blocks, in the order of the keys
+        list, as a tuple of arrays of the arguments to from_counts.
+
+        The graph must be compact.
+        """
+        assert not self._is_modified()
+        return (
+            _counts(self._child_offsets),
+            self._children,
+            _counts(self._parent_offsets),
+            self._parents,
+        )
+
+    def __len__(self):
+        return len(self.keys) - self._num_removed
+
+    def __contains__(self, usage_key):
+        block_id = self.ids.get(usage_key)
+        return block_id is not None and not self._removed[block_id]
+
+    def __iter__(self):
+        removed = self._removed
+        return (usage_key for block_id, usage_key in enumerate(self.keys) if not removed[block_id])
+
+    def copy(self):
+        """
+        Returns a copy of this graph.  The usage keys, which are
+        immutable, are shared with the copy.
+        """
+        graph = copy(self)
+        graph.keys = list(self.keys)
+        graph.ids = dict(self.ids)
+        for name in ('_child_offsets', '_children', '_parent_offsets', '_parents'):
+            setattr(graph, name, getattr(self, name)[:])
+        graph._child_overrides = {block_id: list(ids) for block_id, ids in self._child_overrides.iteritems()}
+        graph._parent_overrides = {block_id: list(ids) for block_id, ids in self._parent_overrides.iteritems()}
+        graph._removed = bytearray(self._removed)
+        return graph
+
+    def compact(self, block_ids=None):
+        """
+        Returns a new graph with the current relations of the blocks
+        stored in its arrays, leaving out removed blocks.  Returns this
+        graph if it is already compact.
+
+        Arguments:
+            block_ids (iterable(int)) - If given, only the blocks with
+                these ids, and the relations among them, are included,
+                in the given order.
+        """
+        if block_ids is None:
+            if not self._is_modified():
+                return self
+            removed = self._removed
+            block_ids = [block_id for block_id in xrange(len(self.keys)) if not removed[block_id]]
+        else:
+            block_ids = list(block_ids)
+
+        new_ids = array(_ID_TYPECODE, [-1]) * len(self.keys)
+        for new_id, block_id in enumerate(block_ids):
+            new_ids[block_id] = new_id
+
+        child_offsets, children = _compact_related_ids(block_ids, new_ids, self.child_ids)
+        parent_offsets, parents = _compact_related_ids(block_ids, new_ids, self.parent_ids)
+        keys = self.keys
+        return _BlockGraph([keys[block_id] for block_id in block_ids], child_offsets, children, parent_offsets, parents)
+
+    def child_ids(self, block_id):
+        """
+        Returns the ids of the children of the block with the given id.
+        """
+        return self._related_ids(block_id, self._child_overrides, self._child_offsets, self._children)
+
+    def parent_ids(self, block_id):
+        """
+        Returns the ids of the parents of the block with the given id.
+        """
+        return self._related_ids(block_id, self._parent_overrides, self._parent_offsets, self._parents)
+
+    def get_children(self, usage_key):
+        """
+        Returns the usage keys of the children of the given block.
+        """
+        block_id = self.ids.get(usage_key)
+        keys = self.keys
+        return [keys[child_id] for child_id in self.child_ids(block_id)] if block_id is not None else []
+
+    def get_parents(self, usage_key):
+        """
+        Returns the usage keys of the parents of the given block.
+        """
+        block_id = self.ids.get(usage_key)
+        keys = self.keys
+        return [keys[parent_id] for parent_id in self.parent_ids(block_id)] if block_id is not None else []
+
+    def add_block(self, usage_key):
+        """
+        Adds the given block, if it is not already present, and returns
+        its id.
+        """
+        block_id = self.ids.get(usage_key)
+        if block_id is None or self._removed[block_id]:
+            # A removed block that is added again gets a new id, so it
+            # has none of the relations of its removed id.
+            block_id = len(self.keys)
+            self.keys.append(usage_key)
+            self.ids[usage_key] = block_id
+            self._child_offsets.append(self._child_offsets[-1])
+            self._parent_offsets.append(self._parent_offsets[-1])
+            self._removed.append(0)
+        return block_id
+
+    def add_relation(self, parent_key, child_key):
+        """
+        Adds a parent to child relationship, adding the blocks if they
+        are not already present.
+        """
+        parent_id = self.add_block(parent_key)
+        child_id = self.add_block(child_key)
+        self._overridden_ids(parent_id, self._child_overrides, self.child_ids).append(child_id)
+        self._overridden_ids(child_id, self._parent_overrides, self.parent_ids).append(parent_id)
+
+    def remove_block(self, usage_key):
+        """
+        Removes the given block, along with its relations to other
+        blocks.
+
+        Raises KeyError if the block is not present.
+        """
+        self._removed[self._get_id(usage_key)] = 1
+        self._num_removed += 1
+
+    def clear_parents(self, usage_key):
+        """
+        Removes the relations of the given block to its parents, but not
+        the relations of the parents to the block.
+
+        Raises KeyError if the block is not present.
+        """
+        self._parent_overrides[self._get_id(usage_key)] = []
+
+    def _is_modified(self):
+        """
+        Returns whether any relations changed since the arrays were
+        built.
+        """
+        return bool(self._num_removed or self._child_overrides or self._parent_overrides)
+
+    def _get_id(self, usage_key):
+        """
+        Returns the id of the given block.
+
+        Raises KeyError if the block is not present.
+        """
+        if usage_key not in self:
+            raise KeyError(usage_key)
+        return self.ids[usage_key]
+
+    def _related_ids(self, block_id, overrides, offsets, related_ids):
+        """
+        Returns the ids of the blocks that are related to the block with
+        the given id, leaving out removed blocks.
+        """
+        removed = self._removed
+        if removed[block_id]:
+            return []
+        block_related_ids = overrides.get(block_id)
+        if block_related_ids is None:
+            block_related_ids = related_ids[offsets[block_id]:offsets[block_id + 1]]
+        if self._num_removed:
+            return [related_id for related_id in block_related_ids if not removed[related_id]]
+        return list(block_related_ids)
+
+    @staticmethod
+    def _overridden_ids(block_id, overrides, get_related_ids):
+        """
+        Returns the list of ids in the given overrides for the block with
+        the given id, creating it from the block's current relations if
+        it is not overridden yet.
+        """
+        block_related_ids = overrides.get(block_id)
+        if block_related_ids is None:
+            block_related_ids = overrides[block_id] = get_related_ids(block_id)
+        return block_related_ids
+
+
 class BlockStructure(object):
     """
     Base class for a block structure.  BlockStructures are constructed
@@ -56,14 +350,13 @@ class BlockStructure(object):
         # UsageKey
         self.root_block_usage_key = root_block_usage_key
 
-        # Map of a block's usage key to its block relations. The
-        # existence of a block in the structure is determined by its
-        # presence in this map.
-        # dict {UsageKey: _BlockRelations}
-        self._block_relations = {}
+        # Graph of the blocks' relations. The existence of a block in
+        # the structure is determined by its presence in this graph.
+        # _BlockGraph
+        self._block_relations = _BlockGraph()
 
         # Add the root block.
-        self._add_block(self._block_relations, root_block_usage_key)
+        self._block_relations.add_block(root_block_usage_key)
 
     def __iter__(self):
         """
@@ -91,7 +384,7 @@ class BlockStructure(object):
         Returns:
             [UsageKey] - A list of usage keys of the block's parents.
         """
-        return self._block_relations[usage_key].parents if usage_key in self else []
+        return self._block_relations.get_parents(usage_key)
 
     def get_children(self, usage_key):
         """
@@ -105,7 +398,7 @@ class BlockStructure(object):
         Returns:
             [UsageKey] - A list of usage keys of the block's children.
         """
-        return self._block_relations[usage_key].children if usage_key in self else []
+        return self._block_relations.get_children(usage_key)
 
     def set_root_block(self, usage_key):
         """
@@ -120,7 +413,7 @@ class BlockStructure(object):
                 new root of the block structure.
         """
         self.root_block_usage_key = usage_key
-        self._block_relations[usage_key].parents = []
+        self._block_relations.clear_parents(usage_key)
 
     def __contains__(self, usage_key):
         """
@@ -145,7 +438,7 @@ class BlockStructure(object):
             iterator(UsageKey) - An iterator of the usage
             keys of all the blocks in the block structure.
         """
-        return self._block_relations.iterkeys()
+        return iter(self._block_relations)
 
     #--- Block structure traversal methods ---#
 
@@ -167,13 +460,26 @@ class BlockStructure(object):
             generator - A generator object created from the
                 traverse_topologically method.
         """
-        return traverse_topologically(
-            start_node=start_node or self.root_block_usage_key,
-            get_parents=self.get_parents,
-            get_children=self.get_children,
-            filter_func=filter_func,
+        start_node = start_node or self.root_block_usage_key
+        block_relations = self._block_relations
+        if start_node not in block_relations.ids:
+            return traverse_topologically(
+                start_node=start_node,
+                get_parents=self.get_parents,
+                get_children=self.get_children,
+                filter_func=filter_func,
+                yield_descendants_of_unyielded=yield_descendants_of_unyielded,
+            )
+
+        # Traverse the ids of the blocks rather than their usage keys.
+        keys = block_relations.keys
+        return (keys[block_id] for block_id in traverse_topologically(
+            start_node=block_relations.ids[start_node],
+            get_parents=block_relations.parent_ids,
+            get_children=block_relations.child_ids,
+            filter_func=_filter_on_ids(filter_func, keys),
             yield_descendants_of_unyielded=yield_descendants_of_unyielded,
-        )
+        ))
 
     def post_order_traversal(
             self,
@@ -192,11 +498,22 @@ class BlockStructure(object):
             generator - A generator object created from the
                 traverse_post_order method.
         """
-        return traverse_post_order(
-            start_node=start_node or self.root_block_usage_key,
-            get_children=self.get_children,
-            filter_func=filter_func,
-        )
+        start_node = start_node or self.root_block_usage_key
+        block_relations = self._block_relations
+        if start_node not in block_relations.ids:
+            return traverse_post_order(
+                start_node=start_node,
+                get_children=self.get_children,
+                filter_func=filter_func,
+            )
+
+        # Traverse the ids of the blocks rather than their usage keys.
+        keys = block_relations.keys
+        return (keys[block_id] for block_id in traverse_post_order(
+            start_node=block_relations.ids[start_node],
+            get_children=block_relations.child_ids,
+            filter_func=_filter_on_ids(filter_func, keys),
+        ))
 
     #--- Internal methods ---#
     # To be used within the block_structure framework or by tests.
@@ -205,29 +522,19 @@ class BlockStructure(object):
         """
         Mutates this block structure by removing any unreachable blocks.
         """
+        block_relations = self._block_relations
+        root_block_id = block_relations.ids.get(self.root_block_usage_key)
+        if root_block_id is None:
+            self._block_relations = _BlockGraph()
+            return
 
-        # Create a new block relations map to store only those blocks
-        # that are still linked
-        pruned_block_relations = {}
-        old_block_relations = self._block_relations
-
-        # Build the structure from the leaves up by doing a post-order
-        # traversal of the old structure, thereby encountering only
+        # Rebuild the graph from the leaves up by doing a post-order
+        # traversal of the old graph, thereby encountering only
         # reachable blocks.
-        for block_key in self.post_order_traversal():
-            # If the block is in the old structure,
-            if block_key in old_block_relations:
-                # Add it to the new pruned structure
-                self._add_block(pruned_block_relations, block_key)
-
-                # Add a relationship to only those old children that
-                # were also added to the new pruned structure.
-                for child in old_block_relations[block_key].children:
-                    if child in pruned_block_relations:
-                        self._add_to_relations(pruned_block_relations, block_key, child)
-
-        # Replace this structure's relations with the newly pruned one.
-        self._block_relations = pruned_block_relations
+        self._block_relations = block_relations.compact(
+            block_id for block_id in traverse_post_order(root_block_id, block_relations.child_ids)
+            if block_relations.keys[block_id] in block_relations
+        )
 
     def _add_relation(self, parent_key, child_key):
         """
@@ -237,44 +544,39 @@ class BlockStructure(object):
             parent_key (UsageKey) - Usage key of the parent block.
             child_key (UsageKey) - Usage key of the child block.
         """
-        self._add_to_relations(self._block_relations, parent_key, child_key)
+        self._block_relations.add_relation(parent_key, child_key)
 
-    @staticmethod
-    def _add_to_relations(block_relations, parent_key, child_key):
+    def _compact_relations(self):
+        """
+        Rebuilds the arrays of this block structure's relations, once
+        the structure is fully built.
         """
-        Adds a parent to child relationship in the given block
-        relations map.
+        self._block_relations = self._block_relations.compact()
 
-        Arguments:
-            block_relations (dict({UsageKey: _BlockRelations})) -
-                Internal map of a block's usage key to its
-                parents/children relations.
 
-            parent_key (UsageKey) - Usage key of the parent block.
-
-            child_key (UsageKey) - Usage key of the child block.
-        """
-        BlockStructure._add_block(block_relations, parent_key)
-        BlockStructure._add_block(block_relations, child_key)
+def universal_filter(block_key):  # pylint: disable=unused-argument
+    """
+    Filter function that returns True for all blocks.
+    """
+    return True
 
-        block_relations[child_key].parents.append(parent_key)
-        block_relations[parent_key].children.append(child_key)
 
-    @staticmethod
-    def _add_block(block_relations, usage_key):
-        """
-        Adds the given usage_key to the given block_relations map.
+class RemovalFilter(object):
+    """
+    Filter function that removes the blocks that satisfy its
+    removal_condition from its block structure.
 
-        Arguments:
-            block_relations (dict({UsageKey: _BlockRelations})) -
-                Internal map of a block's usage key to its
-                parents/children relations.
+    The removal_condition and keep_descendants of the filter remain
+    accessible so multiple removal filters can be fused into a single
+    filter function.  See BlockStructureTransformers.
+    """
+    def __init__(self, block_structure, removal_condition, keep_descendants=False):
+        self.block_structure = block_structure
+        self.removal_condition = removal_condition
+        self.keep_descendants = keep_descendants
 
-            usage_key (UsageKey) - Usage key of the block that is to
-                be added to the given block_relations.
-        """
-        if usage_key not in block_relations:
-            block_relations[usage_key] = _BlockRelations()
+    def __call__(self, block_key):
+        return self.block_structure.retain_or_remove(block_key, self.removal_condition, self.keep_descendants)
 
 
 class FieldData(object):
@@ -414,24 +716,33 @@ class BlockStructureBlockData(BlockStructure):
         # Map of a transformer's name to its non-block-specific data.
         self.transformer_data = TransformerDataMap()
 
+        # Map of a transformer's name to a function that returns its
+        # block-specific data, for deserialized data that has not been
+        # loaded into the block data map yet.
+        # dict {string: (() -> iterable((UsageKey, TransformerData)))}
+        self._transformer_block_data_loaders = {}
+
     def copy(self):
         """
         Returns a new instance of BlockStructureBlockData with a
         deep-copy of this instance's contents.
         """
         from .factory import BlockStructureFactory
-        return BlockStructureFactory.create_new(
+        block_structure = BlockStructureFactory.create_new(
             self.root_block_usage_key,
-            deepcopy(self._block_relations),
+            self._block_relations.copy(),
             deepcopy(self.transformer_data),
             deepcopy(self._block_data_map),
         )
+        block_structure._transformer_block_data_loaders = dict(self._transformer_block_data_loaders)
+        return block_structure
 
     def iteritems(self):
         """
         Returns iterator of (UsageKey, BlockData) pairs for all
         blocks in the BlockStructure.
         """
+        self._load_all_transformer_block_data()
         return self._block_data_map.iteritems()
 
     def itervalues(self):
@@ -439,12 +750,14 @@ class BlockStructureBlockData(BlockStructure):
         Returns iterator of BlockData for all blocks in the
         BlockStructure.
         """
+        self._load_all_transformer_block_data()
         return self._block_data_map.itervalues()
 
     def __getitem__(self, usage_key):
         """
         Returns the BlockData associated with the given key.
         """
+        self._load_all_transformer_block_data()
         return self._block_data_map[usage_key]
 
     def get_xblock_field(self, usage_key, field_name, default=None):
@@ -513,6 +826,8 @@ class BlockStructureBlockData(BlockStructure):
             transformer (BlockStructureTransformer) - The transformer
                 whose dictionary data is requested.
         """
+        if self._transformer_block_data_loaders:
+            self._load_transformer_block_data(transformer)
         return self._block_data_map[usage_key].transformer_data[transformer]
 
     def get_transformer_block_field(self, usage_key, transformer, key, default=None):
@@ -558,6 +873,8 @@ class BlockStructureBlockData(BlockStructure):
                 given key for the given transformer's data for the
                 requested block.
         """
+        if self._transformer_block_data_loaders:
+            self._load_transformer_block_data(transformer)
         setattr(
             self._get_or_create_block(usage_key).transformer_data.get_or_create(transformer),
             key,
@@ -602,19 +919,11 @@ class BlockStructureBlockData(BlockStructure):
                 removed block's children become children of the
                 removed block's parents.
         """
-        children = self._block_relations[usage_key].children
-        parents = self._block_relations[usage_key].parents
-
-        # Remove block from its children.
-        for child in children:
-            self._block_relations[child].parents.remove(usage_key)
+        children = self.get_children(usage_key)
+        parents = self.get_parents(usage_key)
 
-        # Remove block from its parents.
-        for parent in parents:
-            self._block_relations[parent].children.remove(usage_key)
-
-        # Remove block.
-        self._block_relations.pop(usage_key, None)
+        # Remove block, along with its relations.
+        self._block_relations.remove_block(usage_key)
         self._block_data_map.pop(usage_key, None)
 
         # Recreate the graph connections if descendants are to be kept.
@@ -627,7 +936,7 @@ class BlockStructureBlockData(BlockStructure):
         """
         Returns a filter function that always returns True for all blocks.
         """
-        return lambda block_key: True
+        return universal_filter
 
     def create_removal_filter(self, removal_condition, keep_descendants=False):
         """
@@ -642,11 +951,7 @@ class BlockStructureBlockData(BlockStructure):
             keep_descendants (bool) - See the description in
                 remove_block.
         """
-        return partial(
-            self.retain_or_remove,
-            removal_condition=removal_condition,
-            keep_descendants=keep_descendants,
-        )
+        return RemovalFilter(self, removal_condition, keep_descendants)
 
     def retain_or_remove(self, block_key, removal_condition, keep_descendants=False):
         """
@@ -714,6 +1019,34 @@ class BlockStructureBlockData(BlockStructure):
     #--- Internal methods ---#
     # To be used within the block_structure framework or by tests.
 
+    def _create_subtree(self, usage_key):
+        """
+        Returns a new BlockStructureBlockData rooted at the block
+        identified by the given usage_key, containing only that block
+        and its descendants.
+
+        Note: The block and transformer data of the new structure is
+        shared with, not copied from, this structure.  Relations to
+        parents outside of the subtree are not included.
+
+        Arguments:
+            usage_key (UsageKey) - Usage key of the root of the subtree.
+        """
+        self._load_all_transformer_block_data()
+        subtree = BlockStructureBlockData(usage_key)
+        subtree.transformer_data = self.transformer_data
+        if usage_key not in self:
+            return subtree
+
+        block_relations = self._block_relations
+        subtree._block_relations = block_relations.compact(
+            traverse_pre_order(block_relations.ids[usage_key], block_relations.child_ids)
+        )
+        for block_key in subtree:
+            if block_key in self._block_data_map:
+                subtree._block_data_map[block_key] = self._block_data_map[block_key]
+        return subtree
+
     def _get_transformer_data_version(self, transformer):
         """
         Returns the version number stored for the given transformer.
@@ -734,6 +1067,40 @@ class BlockStructureBlockData(BlockStructure):
             raise TransformerException('Version attributes are not set on transformer {0}.', transformer.name())
         self.set_transformer_data(transformer, TRANSFORMER_VERSION_KEY, transformer.WRITE_VERSION)
 
+    def _load_transformer_block_data(self, transformer):
+        """
+        Loads the given transformer's block-specific data into the
+        block data map, if it was deserialized lazily and has not been
+        loaded yet.
+
+        Arguments:
+            transformer (BlockStructureTransformer or string) - The
+                transformer, or its name, whose data is to be loaded.
+        """
+        try:
+            transformer_name = transformer.name()
+        except AttributeError:
+            transformer_name = transformer
+
+        loader = self._transformer_block_data_loaders.pop(transformer_name, None)
+        if loader is None:
+            return
+
+        for usage_key, transformer_block_data in loader():
+            # Blocks removed since the structure was deserialized
+            # remain removed.
+            block_data = self._block_data_map.get(usage_key)
+            if block_data is not None:
+                block_data.transformer_data[transformer_name] = transformer_block_data
+
+    def _load_all_transformer_block_data(self):
+        """
+        Loads the block-specific data of all transformers that was
+        deserialized lazily and has not been loaded yet.
+        """
+        for transformer_name in self._transformer_block_data_loaders.keys():
+            self._load_transformer_block_data(transformer_name)
+
     def _get_or_create_block(self, usage_key):
         """
         Returns the BlockData associated with the given usage_key.
@@ -842,3 +1209,51 @@ class BlockStructureModulestoreData(BlockStructureBlockData):
         """
         if hasattr(xblock, field_name):
             setattr(block_data, field_name, getattr(xblock, field_name))
+
+
+def _offsets(counts):
+    """
+    Returns the array of offsets of the related ids of each block for the
+    given array of the number of related ids of each block.
+    """
+    offsets = array(_ID_TYPECODE, [0])
+    total = 0
+    for count in counts:
+        total += count
+        offsets.append(total)
+    return offsets
+
+
+def _counts(offsets):
+    """
+    Returns the array of the number of related ids of each block for the
+    given array of offsets.
+    """
+    return array(_ID_TYPECODE, (offsets[index + 1] - offsets[index] for index in xrange(len(offsets) - 1)))
+
+
+def _compact_related_ids(block_ids, new_ids, get_related_ids):
+    """
+    Returns the (offsets, related ids) arrays of the given blocks, with
+    the related ids translated to the given new ids and relations to
+    blocks without a new id left out.
+    """
+    offsets = array(_ID_TYPECODE, [0])
+    related_ids = array(_ID_TYPECODE)
+    for block_id in block_ids:
+        for related_id in get_related_ids(block_id):
+            new_id = new_ids[related_id]
+            if new_id >= 0:
+                related_ids.append(new_id)
+        offsets.append(len(related_ids))
+    return offsets, related_ids
+
+
+def _filter_on_ids(filter_func, keys):
+    """
+    Returns the given filter function on usage keys as a filter function
+    on the ids of the given keys.
+    """
+    if filter_func is None:
+        return None
+    return lambda block_id: filter_func(keys[block_id])
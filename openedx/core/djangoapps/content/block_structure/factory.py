@@ -9,7 +9,7 @@ class BlockStructureFactory(object):
     Factory class for BlockStructure objects.
     """
     @classmethod
-    def create_from_modulestore(cls, root_block_usage_key, modulestore):
+    def create_from_modulestore(cls, root_block_usage_key, modulestore, block_usage_keys=None):
         """
         Creates and returns a block structure from the modulestore
         starting at the given root_block_usage_key.
@@ -22,6 +22,11 @@ class BlockStructureFactory(object):
                 contains the data for the xBlocks within the block
                 structure starting at root_block_usage_key.
 
+            block_usage_keys (set(UsageKey)) - If given, only the blocks
+                with these usage keys are included in the block
+                structure.  Their ancestors are expected to be included
+                as well, since blocks are only reached via their parents.
+
         Returns:
             BlockStructureModulestoreData - The created block structure
                 with instantiated xBlocks from the given modulestore
@@ -34,6 +39,16 @@ class BlockStructureFactory(object):
         block_structure = BlockStructureModulestoreData(root_block_usage_key)
         blocks_visited = set()
 
+        def is_included(usage_key):
+            """
+            Returns whether the child with the given usage key is to be
+            included in the block structure.
+            """
+            return (
+                block_usage_keys is None or
+                usage_key.map_into_course(root_block_usage_key.course_key) in block_usage_keys
+            )
+
         def build_block_structure(xblock):
             """
             Recursively update the block structure with the given xBlock
@@ -49,12 +64,13 @@ class BlockStructureFactory(object):
             block_structure._add_xblock(xblock.location, xblock)  # pylint: disable=protected-access
 
             # Add relations with its children and recurse.
-            for child in xblock.get_children():
+            for child in xblock.get_children(usage_id_filter=is_included):
                 block_structure._add_relation(xblock.location, child.location)  # pylint: disable=protected-access
                 build_block_structure(child)
 
         root_xblock = modulestore.get_item(root_block_usage_key, depth=None, lazy=False)
         build_block_structure(root_xblock)
+        block_structure._compact_relations()  # pylint: disable=protected-access
         return block_structure
 
     @classmethod
@@ -89,6 +105,9 @@ class BlockStructureFactory(object):
     def create_new(cls, root_block_usage_key, block_relations, transformer_data, block_data_map):
         """
         Returns a new block structure for given the arguments.
+
+        Arguments:
+            block_relations (_BlockGraph) - The relations of the blocks.
         """
         block_structure = BlockStructureBlockData(root_block_usage_key)
         block_structure._block_relations = block_relations  # pylint: disable=protected-access
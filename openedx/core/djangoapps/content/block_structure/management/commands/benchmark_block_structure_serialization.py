@@ -0,0 +1,150 @@
+"""
+Command to compare the performance of the block structure serialization formats.
+"""
+from datetime import datetime, timedelta
+from timeit import default_timer
+
+from django.core.management.base import BaseCommand
+from opaque_keys.edx.locator import BlockUsageLocator, CourseLocator
+
+from openedx.core.djangoapps.content.block_structure import serializer
+from openedx.core.djangoapps.content.block_structure.block_structure import BlockStructureBlockData
+from openedx.core.lib.cache_utils import zpickle, zunpickle
+
+
+# Number of children of each block type in the generated course.
+BRANCHING = (
+    ('chapter', 10),
+    ('sequential', 5),
+    ('vertical', 4),
+    ('problem', 6),
+)
+
+# Names of the fake transformers whose data is generated for every block.
+TRANSFORMER_NAMES = ['visibility', 'start_date', 'user_partitions', 'grades', 'block_counts']
+
+
+class Command(BaseCommand):
+    """
+    Example usage:
+        $ ./manage.py lms benchmark_block_structure_serialization --settings=devstack
+        $ ./manage.py lms benchmark_block_structure_serialization --num_blocks 10000 --iterations 5 --settings=devstack
+    """
+    help = u'Compares the pickle and compact serialization formats of block structures on a generated course.'
+
+    def add_arguments(self, parser):
+        """
+        Entry point for subclassed commands to add custom arguments.
+        """
+        parser.add_argument(
+            '--num_blocks',
+            help=u'Approximate number of blocks in the generated course.',
+            default=5000,
+            type=int,
+        )
+        parser.add_argument(
+            '--iterations',
+            help=u'Number of times to repeat each measurement.',
+            default=10,
+            type=int,
+        )
+
+    def handle(self, *args, **options):
+        block_structure = generate_block_structure(options['num_blocks'])
+        root_key = block_structure.root_block_usage_key
+        iterations = options['iterations']
+        self.stdout.write(u'Generated course with {} blocks.'.format(len(block_structure)))
+
+        pickled = zpickle(_pickle_payload(block_structure))
+        compact = serializer.serialize(block_structure)
+        self.stdout.write(u'pickle size: {} bytes, compact size: {} bytes'.format(len(pickled), len(compact)))
+
+        measurements = [
+            (u'pickle serialize', lambda: zpickle(_pickle_payload(block_structure))),
+            (u'compact serialize', lambda: serializer.serialize(block_structure)),
+            (u'pickle deserialize', lambda: zunpickle(pickled)),
+            (u'compact deserialize (all data)', lambda: serializer.deserialize(compact, root_key).itervalues()),
+            (
+                u'compact deserialize (one transformer)',
+                lambda: serializer.deserialize(compact, root_key).get_transformer_block_field(
+                    root_key, TRANSFORMER_NAMES[0], 'field_0',
+                ),
+            ),
+        ]
+        for name, func in measurements:
+            self.stdout.write(u'{}: {:.2f} ms'.format(name, _time(func, iterations) * 1000))
+
+
+def generate_block_structure(num_blocks):
+    """
+    Returns a collected block structure for a generated course with
+    approximately the given number of blocks.
+    """
+    course_key = CourseLocator('benchmark', 'course', 'run')
+    root_key = BlockUsageLocator(course_key, 'course', 'course')
+    block_structure = BlockStructureBlockData(root_key)
+
+    scale = float(num_blocks) / _num_generated_blocks()
+    branching = [(block_type, max(1, int(round(count * scale ** 0.25)))) for block_type, count in BRANCHING]
+
+    parents = [root_key]
+    for block_type, count in branching:
+        children = []
+        for parent_key in parents:
+            for index in range(count):
+                child_key = BlockUsageLocator(
+                    course_key, block_type, u'{}_{}_{}'.format(block_type, len(children), index),
+                )
+                block_structure._add_relation(parent_key, child_key)  # pylint: disable=protected-access
+                children.append(child_key)
+        parents = children
+
+    start = datetime(2017, 1, 1)
+    for index, usage_key in enumerate(block_structure):
+        block_data = block_structure._get_or_create_block(usage_key)  # pylint: disable=protected-access
+        block_data.display_name = u'Block {}'.format(index)
+        block_data.category = usage_key.block_type
+        block_data.graded = index % 3 == 0
+        block_data.weight = float(index % 7)
+        block_data.start = start + timedelta(days=index % 30)
+        for transformer_name in TRANSFORMER_NAMES:
+            block_structure.set_transformer_block_field(usage_key, transformer_name, 'field_0', index % 2 == 0)
+            block_structure.set_transformer_block_field(usage_key, transformer_name, 'field_1', index)
+            block_structure.set_transformer_block_field(usage_key, transformer_name, 'field_2', {'index': index})
+
+    for transformer_name in TRANSFORMER_NAMES:
+        block_structure.set_transformer_data(transformer_name, '_version', 1)
+    return block_structure
+
+
+def _num_generated_blocks():
+    """
+    Returns the number of blocks generated with the default branching.
+    """
+    total, level = 1, 1
+    for _, count in BRANCHING:
+        level *= count
+        total += level
+    return total
+
+
+def _pickle_payload(block_structure):
+    """
+    Returns the data pickled by the legacy serialization format.
+    """
+    # pylint: disable=protected-access
+    return (
+        block_structure._block_relations.to_relations_map(),
+        block_structure.transformer_data,
+        block_structure._block_data_map,
+    )
+
+
+def _time(func, iterations):
+    """
+    Returns the average time taken by the given function.
+    """
+    start = default_timer()
+    for _ in range(iterations):
+        func()
+    return (default_timer() - start) / iterations
@@ -4,13 +4,22 @@ BlockStructures.
 """
 from contextlib import contextmanager
 
+from xmodule.modulestore.exceptions import ItemNotFoundError
+
 from . import config
+from .block_structure import BlockStructureBlockData
 from .exceptions import UsageKeyNotInBlockStructure, TransformerDataIncompatible, BlockStructureNotFound
 from .factory import BlockStructureFactory
 from .store import BlockStructureStore
+from .transformer import BlockStructureTransformer
 from .transformers import BlockStructureTransformers
 
 
+# Name of the xBlock field with the version of the course structure from
+# which a block was collected.
+COURSE_VERSION_FIELD = 'course_version'
+
+
 class BlockStructureManager(object):
     """
     Top-level class for managing Block Structures.
@@ -41,7 +50,9 @@ class BlockStructureManager(object):
         and modulestore, as needed.
 
         Details: Similar to the get_collected method, except the transformers'
-        transform methods are also called.
+        transform methods are also called.  When starting_block_usage_key
+        is given, only the cached segment of the block structure that
+        contains it is loaded, if available.
 
         Arguments:
             transformers (BlockStructureTransformers) - Collection of
@@ -60,7 +71,12 @@ class BlockStructureManager(object):
             BlockStructureBlockData - A transformed block structure,
                 starting at starting_block_usage_key.
         """
-        block_structure = collected_block_structure.copy() if collected_block_structure else self.get_collected()
+        if collected_block_structure:
+            block_structure = collected_block_structure.copy()
+        elif starting_block_usage_key:
+            block_structure = self._get_collected_subtree(starting_block_usage_key)
+        else:
+            block_structure = self.get_collected()
 
         if starting_block_usage_key:
             # Override the root_block_usage_key so traversals start at the
@@ -105,6 +121,20 @@ class BlockStructureManager(object):
 
         return block_structure
 
+    def _get_collected_subtree(self, starting_block_usage_key):
+        """
+        Returns the smallest cached segment of the collected Block
+        Structure that contains starting_block_usage_key and all of its
+        descendants, falling back to the entire collected Block Structure
+        if no such segment is available.
+        """
+        try:
+            block_structure = self.store.get_subtree(self.root_block_usage_key, starting_block_usage_key)
+            BlockStructureTransformers.verify_versions(block_structure)
+        except (BlockStructureNotFound, TransformerDataIncompatible):
+            block_structure = self.get_collected()
+        return block_structure
+
     def update_collected_if_needed(self):
         """
         The store is updated with newly collected transformers data from
@@ -120,14 +150,139 @@ class BlockStructureManager(object):
         the modulestore.
         """
         with self._bulk_operations():
-            block_structure = BlockStructureFactory.create_from_modulestore(
-                self.root_block_usage_key,
-                self.modulestore,
-            )
-            BlockStructureTransformers.collect(block_structure)
+            block_structure = None
+            if config.waffle().is_enabled(config.INCREMENTAL_COLLECT):
+                block_structure = self._collect_incrementally()
+
+            if block_structure is None:
+                block_structure = BlockStructureFactory.create_from_modulestore(
+                    self.root_block_usage_key,
+                    self.modulestore,
+                )
+                self._collect(block_structure)
+
             self.store.add(block_structure)
             return block_structure
 
+    def _collect_incrementally(self):
+        """
+        Returns the collected Block Structure for the root_block_usage_key,
+        re-collecting only the blocks that changed in the modulestore since
+        the previously stored block structure was collected.
+
+        Returns None if the block structure cannot be updated incrementally,
+        in which case it needs to be collected in full.
+        """
+        collect_scope = BlockStructureTransformers.collect_scope()
+        if collect_scope == BlockStructureTransformer.COLLECT_SCOPE_GLOBAL:
+            return None
+        if not hasattr(self.modulestore, 'get_structure_changes'):
+            return None
+
+        try:
+            previous = self.store.get(self.root_block_usage_key)
+        except BlockStructureNotFound:
+            return None
+        previous_version = previous.get_xblock_field(self.root_block_usage_key, COURSE_VERSION_FIELD)
+        if previous_version is None or not BlockStructureTransformers.is_collected_with_current_versions(previous):
+            return None
+
+        course_key = self.root_block_usage_key.course_key
+        try:
+            changes = self.modulestore.get_structure_changes(course_key, previous_version)
+        except (NotImplementedError, ItemNotFoundError):
+            return None
+
+        def map_into_course(usage_keys):
+            """
+            Returns the given usage keys mapped into the course of this
+            block structure.
+            """
+            return {usage_key.map_into_course(course_key) for usage_key in usage_keys}
+
+        removed = map_into_course(changes.removed)
+
+        # Changes to a block's settings are inherited by its descendants,
+        # and so are changes to its content when transformers collect data
+        # that depends on the blocks' ancestors.
+        inherited = changes.changed_settings
+        if collect_scope == BlockStructureTransformer.COLLECT_SCOPE_ANCESTORS:
+            inherited = inherited | changes.changed_content
+        outdated = map_into_course(changes.changed) | _closure(map_into_course(inherited), previous.get_children)
+
+        # Blocks are only reachable through their ancestors, which are
+        # therefore re-collected along with them.
+        to_collect = _closure(outdated, previous.get_parents) - removed
+        to_collect.add(self.root_block_usage_key)
+
+        collected = BlockStructureFactory.create_from_modulestore(
+            self.root_block_usage_key,
+            self.modulestore,
+            block_usage_keys=to_collect,
+        )
+        self._collect(collected)
+
+        # Non-block-specific data may affect the data collected for any
+        # block, so the entire structure is re-collected when it changes.
+        if _transformer_data_fields(collected) != _transformer_data_fields(previous):
+            return None
+
+        retained = set(previous) - to_collect - removed
+        return self._merge_collected(previous, collected, retained)
+
+    def _merge_collected(self, previous, collected, retained):
+        """
+        Returns a new block structure with the blocks and data of the
+        newly collected block structure, along with the given retained
+        blocks and their data from the previous block structure.
+        """
+        # pylint: disable=protected-access
+        course_key = self.root_block_usage_key.course_key
+        course_version = collected.get_xblock_field(self.root_block_usage_key, COURSE_VERSION_FIELD)
+        merged = BlockStructureBlockData(self.root_block_usage_key)
+        merged.transformer_data = collected.transformer_data
+
+        def is_merged(usage_key):
+            """
+            Returns whether the block with the given key is in the
+            merged block structure.
+            """
+            return usage_key in collected or usage_key in retained
+
+        previous._load_all_transformer_block_data()
+        for usage_key in retained:
+            for child_key in previous.get_children(usage_key):
+                if is_merged(child_key):
+                    merged._add_relation(usage_key, child_key)
+            if usage_key in previous._block_data_map:
+                block_data = previous._block_data_map[usage_key]
+                if COURSE_VERSION_FIELD in block_data.fields:
+                    setattr(block_data, COURSE_VERSION_FIELD, course_version)
+                merged._block_data_map[usage_key] = block_data
+
+        for usage_key in collected:
+            # The newly collected structure only includes re-collected
+            # children, so the rest are added from the xBlock's children.
+            for child_key in getattr(collected.get_xblock(usage_key), 'children', []):
+                child_key = child_key.map_into_course(course_key)
+                if is_merged(child_key):
+                    merged._add_relation(usage_key, child_key)
+            if usage_key in collected._block_data_map:
+                merged._block_data_map[usage_key] = collected._block_data_map[usage_key]
+
+        merged._compact_relations()
+        return merged
+
+    @staticmethod
+    def _collect(block_structure):
+        """
+        Collects the data of all registered transformers for the given
+        block structure, along with the version of the course structure
+        it is collected from.
+        """
+        block_structure.request_xblock_fields(COURSE_VERSION_FIELD)
+        BlockStructureTransformers.collect(block_structure)
+
     def clear(self):
         """
         Removes data for the block structure associated with the given
@@ -146,3 +301,27 @@ class BlockStructureManager(object):
             course_key = None
         with self.modulestore.bulk_operations(course_key):
             yield
+
+
+def _closure(usage_keys, get_related):
+    """
+    Returns the given usage keys along with the keys of all blocks that
+    are transitively related to them through the given get_related
+    function, such as BlockStructure.get_children.
+    """
+    closure = set()
+    pending = list(usage_keys)
+    while pending:
+        usage_key = pending.pop()
+        if usage_key not in closure:
+            closure.add(usage_key)
+            pending.extend(get_related(usage_key))
+    return closure
+
+
+def _transformer_data_fields(block_structure):
+    """
+    Returns the non-block-specific data of all transformers in the given
+    block structure, as a map of transformer name to its fields.
+    """
+    return {name: data.fields for name, data in block_structure.transformer_data.iteritems()}
@@ -0,0 +1,291 @@
+"""
+Module for a compact, versioned serialization of BlockStructure objects.
+
+The serialized data is a container of independently compressed sections:
+
+    keys - The usage keys of all blocks, serialized once and thereafter
+        referred to by their index in this list.
+    relations - The children and parents of each block, as arrays of
+        block indices.
+    block_data - The indices of the blocks that have collected data.
+    xblock_fields - The collected xBlock fields of all blocks.
+    transformer_data - The transformers' non-block-specific data.
+    transformer_block_data.<name> - A transformer's block-specific data.
+
+Block fields are stored in columns, one per field name. A column is a pair
+of (block indices, values), where the values are stored as a typed array
+when they all share a bool, int or float type.
+
+Each transformer's block-specific data is only decompressed and decoded
+when it is first accessed on the deserialized block structure, so a
+request that needs the data of only some transformers does not pay for
+the rest.
+"""
+# pylint: disable=protected-access
+from array import array
+from collections import defaultdict
+import cPickle as pickle
+from cStringIO import StringIO
+from functools import partial
+from itertools import izip
+
+from openedx.core.lib.cache_utils import zpickle, zunpickle
+
+from .block_structure import TransformerData, TransformerDataMap, BlockData, _BlockGraph
+from .factory import BlockStructureFactory
+
+
+# Prefix for all data serialized with this module, which allows it to be
+# distinguished from the legacy zlib compressed pickles.
+MAGIC = 'BSS'
+
+# The current version of the serialization format.  Incrementally update
+# this value whenever the format changes.
+FORMAT_VERSION = 1
+
+TRANSFORMER_BLOCK_DATA_PREFIX = 'transformer_block_data.'
+
+# Typecode of the arrays used for block indices.
+_INDEX_TYPECODE = 'l'
+
+# Map of the types of values that can be stored in typed arrays to
+# the typecode of the array.
+_TYPED_COLUMN_TYPECODES = {
+    bool: 'B',
+    int: 'l',
+    float: 'd',
+}
+_TYPED_COLUMN_TYPES = {value_type.__name__: value_type for value_type in _TYPED_COLUMN_TYPECODES}
+
+
+def is_compact(serialized_data):
+    """
+    Returns whether the given data was serialized with this module.
+    """
+    return serialized_data[:len(MAGIC)] == MAGIC
+
+
+def serialize(block_structure):
+    """
+    Serializes the data for the given block_structure.
+
+    Arguments:
+        block_structure (BlockStructureBlockData) - The block structure
+            that is to be serialized.
+
+    Returns:
+        str - The serialized data.
+    """
+    block_structure._load_all_transformer_block_data()
+    block_relations = block_structure._block_relations.compact()
+    block_data_map = block_structure._block_data_map
+
+    # Blocks with relations come first, so their indices are their ids
+    # in the relations arrays.
+    keys = list(block_relations.keys)
+    keys.extend(key for key in block_data_map if key not in block_relations)
+    key_indices = {key: index for index, key in enumerate(keys)}
+
+    xblock_fields_rows = []
+    transformer_block_data_rows = defaultdict(list)
+    for usage_key, block_data in block_data_map.iteritems():
+        block_index = key_indices[usage_key]
+        xblock_fields_rows.append((block_index, block_data.fields))
+        for transformer_name, transformer_block_data in block_data.transformer_data.iteritems():
+            transformer_block_data_rows[transformer_name].append((block_index, transformer_block_data.fields))
+
+    sections = {
+        'keys': zpickle(keys),
+        'relations': zpickle(_encode_relations(block_relations)),
+        'block_data': zpickle(_encode_indices(key_indices[key] for key in block_data_map)),
+        'xblock_fields': zpickle(_encode_rows(xblock_fields_rows)),
+        'transformer_data': zpickle(dict(block_structure.transformer_data)),
+    }
+    for transformer_name, rows in transformer_block_data_rows.iteritems():
+        sections[TRANSFORMER_BLOCK_DATA_PREFIX + transformer_name] = zpickle(_encode_rows(rows))
+
+    return MAGIC + chr(FORMAT_VERSION) + pickle.dumps(sections, pickle.HIGHEST_PROTOCOL)
+
+
+def deserialize(serialized_data, root_block_usage_key):
+    """
+    Deserializes the given data and returns the parsed block_structure.
+
+    The block-specific data of each transformer is left undecoded until it
+    is first accessed.
+
+    Arguments:
+        serialized_data (str) - Data returned by serialize.
+
+        root_block_usage_key (UsageKey) - The usage_key for the root
+            of the block structure.
+
+    Returns:
+        BlockStructureBlockData - The deserialized block structure.
+
+    Raises:
+        ValueError if the data is not in a supported format.
+    """
+    sections = _load_sections(serialized_data)
+
+    keys = zunpickle(sections['keys'])
+    block_relations = _decode_relations(zunpickle(sections['relations']), keys)
+
+    block_data_map = {}
+    for block_index in _decode_indices(zunpickle(sections['block_data'])):
+        usage_key = keys[block_index]
+        block_data_map[usage_key] = BlockData(usage_key)
+    for block_index, fields in _decode_rows(zunpickle(sections['xblock_fields'])):
+        block_data_map[keys[block_index]].fields = fields
+
+    transformer_data = TransformerDataMap(zunpickle(sections['transformer_data']))
+
+    block_structure = BlockStructureFactory.create_new(
+        root_block_usage_key,
+        block_relations,
+        transformer_data,
+        block_data_map,
+    )
+    for section_name, section in sections.iteritems():
+        if section_name.startswith(TRANSFORMER_BLOCK_DATA_PREFIX):
+            transformer_name = section_name[len(TRANSFORMER_BLOCK_DATA_PREFIX):]
+            block_structure._transformer_block_data_loaders[transformer_name] = partial(
+                _iter_transformer_block_data, section, keys,
+            )
+    return block_structure
+
+
+def _load_sections(serialized_data):
+    """
+    Returns the map of section names to compressed sections from the
+    given serialized data, after verifying its format version.
+    """
+    if not is_compact(serialized_data):
+        raise ValueError('Data is not a serialized block structure.')
+
+    data_file = StringIO(serialized_data)
+    data_file.seek(len(MAGIC))
+    version = ord(data_file.read(1))
+    if version != FORMAT_VERSION:
+        raise ValueError('Unsupported block structure serialization version {}.'.format(version))
+    return pickle.load(data_file)
+
+
+def _iter_transformer_block_data(section, keys):
+    """
+    Generator of (usage key, TransformerData) pairs for a transformer's
+    block-specific data section.
+    """
+    for block_index, fields in _decode_rows(zunpickle(section)):
+        transformer_block_data = TransformerData()
+        transformer_block_data.fields = fields
+        yield keys[block_index], transformer_block_data
+
+
+def _encode_indices(indices):
+    """
+    Returns the given iterable of block indices as a packed array.
+    """
+    return array(_INDEX_TYPECODE, indices).tostring()
+
+
+def _decode_indices(encoded_indices):
+    """
+    Returns the array of block indices packed by _encode_indices.
+    """
+    indices = array(_INDEX_TYPECODE)
+    indices.fromstring(encoded_indices)
+    return indices
+
+
+def _encode_relations(block_relations):
+    """
+    Returns the relations of the blocks in the given compact graph as
+    arrays of the number of children (and parents) of each block followed
+    by the flattened indices of the children (and parents) themselves.
+    """
+    return tuple(encoded.tostring() for encoded in block_relations.to_counts())
+
+
+def _decode_relations(encoded_relations, keys):
+    """
+    Returns the block relations graph encoded by _encode_relations.
+    """
+    child_counts, children, parent_counts, parents = [
+        _decode_indices(encoded) for encoded in encoded_relations
+    ]
+    return _BlockGraph.from_counts(keys[:len(child_counts)], child_counts, children, parent_counts, parents)
+
+
+def _encode_rows(rows):
+    """
+    Returns the given rows of block fields in columnar form.
+
+    Arguments:
+        rows (iterable((int, dict))) - Pairs of a block index and that
+            block's fields, a map of field name to value.
+
+    Returns:
+        (str, dict) - The packed indices of all the given blocks, and a
+            map of field name to its encoded column.
+    """
+    block_indices = array(_INDEX_TYPECODE)
+    columns = defaultdict(lambda: (array(_INDEX_TYPECODE), []))
+    for block_index, fields in rows:
+        block_indices.append(block_index)
+        for field_name, value in fields.iteritems():
+            column_indices, column_values = columns[field_name]
+            column_indices.append(block_index)
+            column_values.append(value)
+
+    return (
+        block_indices.tostring(),
+        {
+            field_name: _encode_column(column_indices, column_values)
+            for field_name, (column_indices, column_values) in columns.iteritems()
+        },
+    )
+
+
+def _decode_rows(encoded_rows):
+    """
+    Returns a list of (block index, fields) pairs for the rows encoded by
+    _encode_rows.
+    """
+    encoded_indices, columns = encoded_rows
+    rows = {block_index: {} for block_index in _decode_indices(encoded_indices)}
+    for field_name, column in columns.iteritems():
+        for block_index, value in _decode_column(column):
+            rows[block_index][field_name] = value
+    return rows.items()
+
+
+def _encode_column(column_indices, column_values):
+    """
+    Returns a (packed indices, type name, values) tuple for the given
+    column.  The values are packed in a typed array if they all have the
+    same type and that type has an array typecode; otherwise the type name
+    is None and the values are left as a list.
+    """
+    type_name = None
+    value_type = type(column_values[0])
+    if value_type in _TYPED_COLUMN_TYPECODES and all(type(value) is value_type for value in column_values):
+        type_name = value_type.__name__
+        column_values = array(_TYPED_COLUMN_TYPECODES[value_type], column_values).tostring()
+    return column_indices.tostring(), type_name, column_values
+
+
+def _decode_column(column):
+    """
+    Returns an iterator of (block index, value) pairs for the column
+    encoded by _encode_column.
+    """
+    encoded_indices, type_name, column_values = column
+    if type_name is not None:
+        value_type = _TYPED_COLUMN_TYPES[type_name]
+        values = array(_TYPED_COLUMN_TYPECODES[value_type])
+        values.fromstring(column_values)
+        column_values = values.tolist()
+        if value_type is bool:
+            column_values = [bool(value) for value in column_values]
+    return izip(_decode_indices(encoded_indices), column_values)
@@ -3,11 +3,12 @@ Module for the Storage of BlockStructure objects.
 """
 # pylint: disable=protected-access
 from logging import getLogger
+from uuid import uuid4
 
 from openedx.core.lib.cache_utils import zpickle, zunpickle
 
-from . import config
-from .block_structure import BlockStructureBlockData
+from . import config, serializer
+from .block_structure import BlockStructureBlockData, _BlockGraph
 from .exceptions import BlockStructureNotFound
 from .factory import BlockStructureFactory
 from .models import BlockStructureModel
@@ -16,6 +17,10 @@ from .transformer_registry import TransformerRegistry
 
 logger = getLogger(__name__)  # pylint: disable=C0103
 
+# Types of the blocks whose subtrees are additionally stored as segments,
+# so requests starting at or below them need not load the whole structure.
+SEGMENT_BLOCK_TYPES = ('chapter', 'sequential')
+
 
 class StubModel(object):
     """
@@ -66,6 +71,13 @@ class BlockStructureStore(object):
         bs_model = self._update_or_create_model(block_structure, serialized_data)
         self._add_to_cache(serialized_data, bs_model)
 
+        if _is_subtree_segments_enabled():
+            self._add_segments_to_cache(block_structure, bs_model)
+        else:
+            # Segments of a previous version would otherwise be served
+            # once the segments are enabled again.
+            self._delete_segments_from_cache(bs_model)
+
     def get(self, root_block_usage_key):
         """
         Deserializes and returns the block structure starting at
@@ -96,6 +108,64 @@ class BlockStructureStore(object):
 
         return self._deserialize(serialized_data, root_block_usage_key)
 
+    def get_subtree(self, root_block_usage_key, starting_block_usage_key):
+        """
+        Deserializes and returns the smallest cached segment of the block
+        structure starting at root_block_usage_key that contains the
+        block identified by starting_block_usage_key and all of its
+        descendants.
+
+        The returned block structure is rooted at the segment's root
+        block, which is either the starting block itself or one of its
+        ancestors.
+
+        Arguments:
+            root_block_usage_key (UsageKey) - The usage_key for the
+                root of the block structure previously passed to the
+                `add` method.
+
+            starting_block_usage_key (UsageKey) - The usage_key of the
+                block whose subtree is requested.
+
+        Returns:
+            BlockStructure - The deserialized segment of the block
+            structure.
+
+        Raises:
+            BlockStructureNotFound if no cached segment contains the
+            starting block.
+        """
+        if not _is_subtree_segments_enabled():
+            raise BlockStructureNotFound(starting_block_usage_key)
+
+        bs_model = self._get_model(root_block_usage_key)
+        segment_index = self._cache.get(self._encode_segment_index_cache_key(bs_model))
+        if segment_index is None:
+            logger.info("BlockStructure: Segment index not found in cache; %s.", bs_model)
+            raise BlockStructureNotFound(starting_block_usage_key)
+
+        token, segment_roots, block_segments = segment_index
+        segment_position = block_segments.get(unicode(starting_block_usage_key))
+        if segment_position is None:
+            raise BlockStructureNotFound(starting_block_usage_key)
+
+        serialized_data = self._cache.get(self._encode_segment_cache_key(bs_model, token, segment_position))
+        if not serialized_data:
+            logger.info(
+                "BlockStructure: Segment not found in cache; %s, segment: %s.",
+                bs_model,
+                segment_roots[segment_position],
+            )
+            raise BlockStructureNotFound(starting_block_usage_key)
+
+        logger.info(
+            "BlockStructure: Read segment from cache; %s, segment: %s, size: %d",
+            bs_model,
+            segment_roots[segment_position],
+            len(serialized_data),
+        )
+        return self._deserialize(serialized_data, segment_roots[segment_position])
+
     def delete(self, root_block_usage_key):
         """
         Deletes the block structure for the given root_block_usage_key
@@ -107,6 +177,7 @@ class BlockStructureStore(object):
         """
         bs_model = self._get_model(root_block_usage_key)
         self._cache.delete(self._encode_root_cache_key(bs_model))
+        self._delete_segments_from_cache(bs_model)
         bs_model.delete()
         logger.info("BlockStructure: Deleted from cache and store; %s.", bs_model)
 
@@ -159,6 +230,72 @@ class BlockStructureStore(object):
         self._cache.set(cache_key, serialized_data, timeout=config.cache_timeout_in_seconds())
         logger.info("BlockStructure: Added to cache; %s, size: %d", bs_model, len(serialized_data))
 
+    def _add_segments_to_cache(self, block_structure, bs_model):
+        """
+        Adds a serialization of the subtree of each block of a type in
+        SEGMENT_BLOCK_TYPES to the cache, followed by an index that maps
+        each block to the smallest segment that contains it.
+
+        Segments are keyed by a token that is unique to this call and
+        recorded in the index, so readers never combine an index with
+        the segments of a different version of the block structure.
+        """
+        token = uuid4().hex
+        segment_roots = []
+        block_segments = {}
+        serialized_segments = {}
+
+        # Since ancestors are visited before their descendants, a block
+        # ends up mapped to its innermost enclosing segment.
+        for block_key in block_structure.topological_traversal(yield_descendants_of_unyielded=True):
+            if getattr(block_key, 'block_type', None) not in SEGMENT_BLOCK_TYPES:
+                continue
+
+            segment = block_structure._create_subtree(block_key)
+            segment_position = len(segment_roots)
+            segment_roots.append(block_key)
+            for segment_block_key in segment:
+                block_segments[unicode(segment_block_key)] = segment_position
+            serialized_segments[self._encode_segment_cache_key(bs_model, token, segment_position)] = (
+                self._serialize(segment)
+            )
+
+        if not segment_roots:
+            self._delete_segments_from_cache(bs_model)
+            return
+
+        timeout = config.cache_timeout_in_seconds()
+        self._cache.set_many(serialized_segments, timeout=timeout)
+        self._cache.set(
+            self._encode_segment_index_cache_key(bs_model),
+            (token, segment_roots, block_segments),
+            timeout=timeout,
+        )
+        logger.info(
+            "BlockStructure: Added segments to cache; %s, segments: %d, size: %d",
+            bs_model,
+            len(segment_roots),
+            sum(len(serialized_data) for serialized_data in serialized_segments.itervalues()),
+        )
+
+    def _delete_segments_from_cache(self, bs_model):
+        """
+        Deletes the segment index of the given BlockStructureModel and
+        the segments that it refers to from the cache, if found.
+        """
+        segment_index_cache_key = self._encode_segment_index_cache_key(bs_model)
+        segment_index = self._cache.get(segment_index_cache_key)
+        if segment_index is None:
+            return
+
+        token, segment_roots, _ = segment_index
+        self._cache.delete(segment_index_cache_key)
+        self._cache.delete_many([
+            self._encode_segment_cache_key(bs_model, token, segment_position)
+            for segment_position in range(len(segment_roots))
+        ])
+        logger.info("BlockStructure: Deleted segments from cache; %s.", bs_model)
+
     def _get_from_cache(self, bs_model):
         """
         Returns the serialized data for the given BlockStructureModel
@@ -192,8 +329,11 @@ class BlockStructureStore(object):
         """
         Serializes the data for the given block_structure.
         """
+        if _is_compact_serialization_enabled():
+            return serializer.serialize(block_structure)
+
         data_to_cache = (
-            block_structure._block_relations,
+            block_structure._block_relations.to_relations_map(),
             block_structure.transformer_data,
             block_structure._block_data_map,
         )
@@ -203,10 +343,13 @@ class BlockStructureStore(object):
         """
         Deserializes the given data and returns the parsed block_structure.
         """
+        if serializer.is_compact(serialized_data):
+            return serializer.deserialize(serialized_data, root_block_usage_key)
+
         block_relations, transformer_data, block_data_map = zunpickle(serialized_data)
         return BlockStructureFactory.create_new(
             root_block_usage_key,
-            block_relations,
+            _BlockGraph.from_relations_map(block_relations),
             transformer_data,
             block_data_map,
         )
@@ -226,6 +369,22 @@ class BlockStructureStore(object):
                 root_usage_key=unicode(bs_model.data_usage_key),
             )
 
+    @classmethod
+    def _encode_segment_index_cache_key(cls, bs_model):
+        """
+        Returns the cache key to use for the segment index of the
+        given BlockStructureModel or StubModel.
+        """
+        return u'{}.segments'.format(cls._encode_root_cache_key(bs_model))
+
+    @classmethod
+    def _encode_segment_cache_key(cls, bs_model, token, segment_position):
+        """
+        Returns the cache key to use for a segment of the given
+        BlockStructureModel or StubModel.
+        """
+        return u'{}.segment.{}.{}'.format(cls._encode_root_cache_key(bs_model), token, segment_position)
+
     @staticmethod
     def _version_data_of_block(root_block):
         """
@@ -255,3 +414,19 @@ def _is_storage_backing_enabled():
     Returns whether storage backing for Block Structures is enabled.
     """
     return config.waffle().is_enabled(config.STORAGE_BACKING_FOR_CACHE)
+
+
+def _is_compact_serialization_enabled():
+    """
+    Returns whether block structures are to be stored in the compact
+    serialization format.
+    """
+    return config.waffle().is_enabled(config.COMPACT_SERIALIZATION)
+
+
+def _is_subtree_segments_enabled():
+    """
+    Returns whether segments of block structures are to be cached
+    and used for requests that start below the root block.
+    """
+    return config.waffle().is_enabled(config.SUBTREE_SEGMENTS)
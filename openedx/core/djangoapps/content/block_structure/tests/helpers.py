@@ -61,11 +61,15 @@ class MockXBlock(object):
         except KeyError:
             raise AttributeError
 
-    def get_children(self):
+    def get_children(self, usage_id_filter=None):
         """
         Returns the children of the mock XBlock.
         """
-        return [self.modulestore.get_item(child) for child in self.children]
+        return [
+            self.modulestore.get_item(child)
+            for child in self.children
+            if usage_id_filter is None or usage_id_filter(child)
+        ]
 
 
 class MockModulestore(object):
@@ -127,6 +131,13 @@ class MockCache(object):
         self.map[key] = val
         self.timeout_from_last_call = timeout
 
+    def set_many(self, data, timeout):
+        """
+        Associates each of the given keys with its value in the cache.
+        """
+        for key, val in data.iteritems():
+            self.set(key, val, timeout)
+
     def get(self, key, default=None):
         """
         Returns the value associated with the given key in the cache;
@@ -136,9 +147,16 @@ class MockCache(object):
 
     def delete(self, key):
         """
-        Deletes the given key from the cache.
+        Deletes the given key from the cache, if found.
+        """
+        self.map.pop(key, None)
+
+    def delete_many(self, keys):
+        """
+        Deletes each of the given keys from the cache, if found.
         """
-        del self.map[key]
+        for key in keys:
+            self.delete(key)
 
 
 class MockModulestoreFactory(object):
@@ -11,7 +11,7 @@ from unittest import TestCase
 
 from openedx.core.lib.graph_traversals import traverse_post_order
 
-from ..block_structure import BlockStructure, BlockStructureModulestoreData
+from ..block_structure import BlockStructure, BlockStructureModulestoreData, _BlockGraph
 from ..exceptions import TransformerException
 from .helpers import MockXBlock, MockTransformer, ChildrenMapTestMixin
 
@@ -44,6 +44,45 @@ class TestBlockStructure(TestCase, ChildrenMapTestMixin):
             self.assertIn(node, block_structure)
         self.assertNotIn(len(children_map) + 1, block_structure)
 
+    @ddt.data(
+        ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+        ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+        ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+    )
+    def test_compact_relations(self, children_map):
+        block_structure = self.create_block_structure(children_map, BlockStructure)
+        expected_traversal = list(block_structure.topological_traversal())
+
+        block_structure._compact_relations()
+        self.assertFalse(block_structure._block_relations._is_modified())
+        self.assert_block_structure(block_structure, children_map)
+        self.assertEqual(list(block_structure.topological_traversal()), expected_traversal)
+        self.assertEqual(len(block_structure), len(children_map))
+
+    @ddt.data(
+        ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+        ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+    )
+    def test_relations_map(self, children_map):
+        block_structure = self.create_block_structure(children_map, BlockStructure)
+        block_relations = block_structure._block_relations.to_relations_map()
+        block_structure._block_relations = _BlockGraph.from_relations_map(block_relations)
+        self.assert_block_structure(block_structure, children_map)
+
+    def test_add_removed_block(self):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP)
+        block_structure._compact_relations()
+        block_structure.remove_block(1, keep_descendants=False)
+        block_structure._add_relation(2, 1)
+
+        # The block is added again without its previous relations.
+        self.assert_block_structure(block_structure, [[2], [], [1], [], []])
+        self.assertEqual(len(block_structure), 5)
+
+        block_structure._prune_unreachable()
+        self.assert_block_structure(block_structure, [[2], [], [1], [], []], missing_blocks=[3, 4])
+        self.assertEqual(list(block_structure.post_order_traversal()), [1, 2, 0])
+
 
 @attr(shard=2)
 @ddt.ddt
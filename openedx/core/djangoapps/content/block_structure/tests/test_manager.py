@@ -2,13 +2,19 @@
 Tests for manager.py
 """
 import ddt
+from mock import Mock, patch
 from nose.plugins.attrib import attr
 from unittest import TestCase
 
+from xmodule.modulestore.split_mongo import StructureChanges
+
 from ..block_structure import BlockStructureBlockData
-from ..config import RAISE_ERROR_WHEN_NOT_FOUND, STORAGE_BACKING_FOR_CACHE, waffle
+from ..config import (
+    INCREMENTAL_COLLECT, RAISE_ERROR_WHEN_NOT_FOUND, STORAGE_BACKING_FOR_CACHE, SUBTREE_SEGMENTS, waffle,
+)
 from ..exceptions import UsageKeyNotInBlockStructure, BlockStructureNotFound
 from ..manager import BlockStructureManager
+from ..transformer import BlockStructureTransformer
 from ..transformers import BlockStructureTransformers
 from .helpers import (
     MockModulestoreFactory, MockCache, MockTransformer,
@@ -132,17 +138,36 @@ class TestBlockStructureManager(UsageKeyFactoryMixin, ChildrenMapTestMixin, Test
         TestTransformer1.assert_collected(block_structure)
         TestTransformer1.assert_transformed(block_structure)
 
-    def test_get_transformed_with_starting_block(self):
-        with mock_registered_transformers(self.registered_transformers):
-            block_structure = self.bs_manager.get_transformed(
-                self.transformers,
-                starting_block_usage_key=self.block_key_factory(1),
-            )
+    @ddt.data(True, False)
+    def test_get_transformed_with_starting_block(self, with_subtree_segments):
+        with waffle().override(SUBTREE_SEGMENTS, active=with_subtree_segments):
+            with mock_registered_transformers(self.registered_transformers):
+                block_structure = self.bs_manager.get_transformed(
+                    self.transformers,
+                    starting_block_usage_key=self.block_key_factory(1),
+                )
         substructure_of_children_map = [[], [3, 4], [], [], []]
         self.assert_block_structure(block_structure, substructure_of_children_map, missing_blocks=[0, 2])
         TestTransformer1.assert_collected(block_structure)
         TestTransformer1.assert_transformed(block_structure)
 
+    def test_get_transformed_with_starting_block_from_segment(self):
+        with mock_registered_transformers(self.registered_transformers):
+            collected_block_structure = self.bs_manager.get_collected()
+            segment = collected_block_structure._create_subtree(  # pylint: disable=protected-access
+                self.block_key_factory(1),
+            )
+            with patch.object(self.bs_manager.store, 'get_subtree', return_value=segment) as mock_get_subtree:
+                with patch.object(self.bs_manager, 'get_collected') as mock_get_collected:
+                    block_structure = self.bs_manager.get_transformed(
+                        self.transformers,
+                        starting_block_usage_key=self.block_key_factory(3),
+                    )
+        mock_get_subtree.assert_called_once_with(self.block_key_factory(0), self.block_key_factory(3))
+        self.assertFalse(mock_get_collected.called)
+        self.assert_block_structure(block_structure, [[], [], [], [], []], missing_blocks=[0, 1, 2, 4])
+        TestTransformer1.assert_transformed(block_structure)
+
     def test_get_transformed_with_collected(self):
         with mock_registered_transformers(self.registered_transformers):
             collected_block_structure = self.bs_manager.get_collected()
@@ -219,3 +244,48 @@ class TestBlockStructureManager(UsageKeyFactoryMixin, ChildrenMapTestMixin, Test
         self.bs_manager.clear()
         self.collect_and_verify(expect_modulestore_called=True, expect_cache_updated=True)
         self.assertEquals(TestTransformer1.collect_call_count, 2)
+
+    @ddt.data(
+        # A changed leaf is re-collected along with its ancestors.
+        (BlockStructureTransformer.COLLECT_SCOPE_LOCAL, dict(changed=[4]), 3),
+        # Descendants of a block with changed settings are re-collected.
+        (BlockStructureTransformer.COLLECT_SCOPE_LOCAL, dict(changed=[1], changed_settings=[1]), 4),
+        # Descendants of a block with changed content are only re-collected
+        # for ancestor-dependent data.
+        (BlockStructureTransformer.COLLECT_SCOPE_LOCAL, dict(changed=[1], changed_content=[1]), 2),
+        (BlockStructureTransformer.COLLECT_SCOPE_ANCESTORS, dict(changed=[1], changed_content=[1]), 4),
+        # Removed blocks are dropped from the structure.
+        (BlockStructureTransformer.COLLECT_SCOPE_LOCAL, dict(changed=[0], removed=[2]), 1),
+        # Global data is always re-collected in full.
+        (BlockStructureTransformer.COLLECT_SCOPE_GLOBAL, dict(changed=[4]), 5),
+    )
+    @ddt.unpack
+    def test_update_collected_incrementally(self, collect_scope, changes, expected_blocks_collected):
+        for xblock in self.modulestore.blocks.itervalues():
+            xblock.field_map['course_version'] = 'version1'
+        self.modulestore.get_structure_changes = Mock(return_value=StructureChanges(**{
+            name: {self.block_key_factory(block_id) for block_id in changes.get(name, [])}
+            for name in StructureChanges._fields
+        }))
+
+        with waffle().override(INCREMENTAL_COLLECT, active=True):
+            with patch.object(TestTransformer1, 'COLLECT_SCOPE', collect_scope):
+                with mock_registered_transformers(self.registered_transformers):
+                    self.bs_manager.get_collected()
+                    self.assertFalse(self.modulestore.get_structure_changes.called)
+
+                    if changes.get('removed'):
+                        self.modulestore.blocks[self.block_key_factory(0)].children.remove(self.block_key_factory(2))
+                        self.children_map = [[1], [3, 4], [], [], []]
+                    self.modulestore.get_items_call_count = 0
+                    self.bs_manager.update_collected_if_needed()
+
+        if collect_scope != BlockStructureTransformer.COLLECT_SCOPE_GLOBAL:
+            self.modulestore.get_structure_changes.assert_called_once_with(self.course_key, 'version1')
+        self.assertEquals(self.modulestore.get_items_call_count, expected_blocks_collected)
+        self.assertEquals(TestTransformer1.collect_call_count, 2)
+
+        with mock_registered_transformers(self.registered_transformers):
+            block_structure = self.bs_manager.get_collected()
+        self.assert_block_structure(block_structure, self.children_map, missing_blocks=changes.get('removed'))
+        TestTransformer1.assert_collected(block_structure)
@@ -0,0 +1,146 @@
+"""
+Tests for serializer.py
+"""
+# pylint: disable=protected-access
+from datetime import datetime
+import ddt
+from mock import patch
+from nose.plugins.attrib import attr
+from unittest import TestCase
+
+from openedx.core.lib.cache_utils import zpickle
+
+from .. import serializer
+from .helpers import ChildrenMapTestMixin, UsageKeyFactoryMixin, MockTransformer
+
+
+@attr(shard=2)
+@ddt.ddt
+class TestSerializer(UsageKeyFactoryMixin, ChildrenMapTestMixin, TestCase):
+    """
+    Tests for the compact block structure serialization format.
+    """
+    def create_collected_block_structure(self, children_map):
+        """
+        Returns a block structure for the given children_map with
+        xBlock fields and transformer data of various types.
+        """
+        block_structure = self.create_block_structure(children_map)
+        block_structure._add_transformer(MockTransformer)
+        block_structure.set_transformer_data(MockTransformer, 'global', {'key': 'value'})
+        for block_id in range(len(children_map)):
+            block_key = self.block_key_factory(block_id)
+            block_data = block_structure._get_or_create_block(block_key)
+            block_data.display_name = u'Block {}'.format(block_id)
+            block_data.weight = float(block_id)
+            block_data.start = datetime(2017, 1, block_id + 1) if block_id % 2 else None
+            block_structure.set_transformer_block_field(block_key, MockTransformer, 'graded', block_id % 2 == 0)
+            block_structure.set_transformer_block_field(block_key, MockTransformer, 'count', block_id)
+            block_structure.set_transformer_block_field(block_key, 'other_transformer', 'list', [block_id])
+        return block_structure
+
+    def assert_block_data_equal(self, block_structure, expected_block_structure):
+        """
+        Verifies that the collected data of the given block structures are equal.
+        """
+        self.assertEqual(
+            block_structure.get_transformer_data(MockTransformer, 'global'),
+            expected_block_structure.get_transformer_data(MockTransformer, 'global'),
+        )
+        self.assertEqual(
+            block_structure._get_transformer_data_version(MockTransformer),
+            expected_block_structure._get_transformer_data_version(MockTransformer),
+        )
+        for block_key, expected_block_data in expected_block_structure.iteritems():
+            block_data = block_structure[block_key]
+            self.assertEqual(block_data.fields, expected_block_data.fields)
+            self.assertEqual(
+                {name: data.fields for name, data in block_data.transformer_data.iteritems()},
+                {name: data.fields for name, data in expected_block_data.transformer_data.iteritems()},
+            )
+
+    @ddt.data(
+        ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+        ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+        ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+    )
+    def test_round_trip(self, children_map):
+        block_structure = self.create_collected_block_structure(children_map)
+        serialized_data = serializer.serialize(block_structure)
+        self.assertTrue(serializer.is_compact(serialized_data))
+
+        deserialized = serializer.deserialize(serialized_data, block_structure.root_block_usage_key)
+        self.assert_block_structure(deserialized, children_map)
+        self.assert_block_data_equal(deserialized, block_structure)
+
+    def test_typed_columns(self):
+        block_structure = self.create_collected_block_structure(self.SIMPLE_CHILDREN_MAP)
+        deserialized = serializer.deserialize(
+            serializer.serialize(block_structure),
+            block_structure.root_block_usage_key,
+        )
+        graded = deserialized.get_transformer_block_field(self.block_key_factory(0), MockTransformer, 'graded')
+        count = deserialized.get_transformer_block_field(self.block_key_factory(1), MockTransformer, 'count')
+        weight = deserialized.get_xblock_field(self.block_key_factory(1), 'weight')
+        self.assertIs(graded, True)
+        self.assertEqual((type(count), count), (int, 1))
+        self.assertEqual((type(weight), weight), (float, 1.0))
+
+    def test_transformer_block_data_loaded_lazily(self):
+        block_structure = self.create_collected_block_structure(self.SIMPLE_CHILDREN_MAP)
+        serialized_data = serializer.serialize(block_structure)
+
+        iter_transformer_block_data = serializer._iter_transformer_block_data
+        with patch.object(serializer, '_iter_transformer_block_data', wraps=iter_transformer_block_data) as mock_iter:
+            deserialized = serializer.deserialize(serialized_data, block_structure.root_block_usage_key)
+            self.assertEqual(mock_iter.call_count, 0)
+
+            deserialized.get_transformer_block_field(self.block_key_factory(0), MockTransformer, 'count')
+            self.assertEqual(mock_iter.call_count, 1)
+            self.assertEqual(deserialized._transformer_block_data_loaders.keys(), ['other_transformer'])
+
+            # Accessing the block data directly loads all remaining data.
+            self.assertEqual(
+                deserialized[self.block_key_factory(0)].transformer_data['other_transformer'].list,
+                [0],
+            )
+            self.assertEqual(mock_iter.call_count, 2)
+
+    def test_removed_blocks_not_restored_by_lazy_load(self):
+        block_structure = self.create_collected_block_structure(self.SIMPLE_CHILDREN_MAP)
+        deserialized = serializer.deserialize(
+            serializer.serialize(block_structure),
+            block_structure.root_block_usage_key,
+        )
+        deserialized.remove_block(self.block_key_factory(2), keep_descendants=False)
+
+        self.assertIsNone(
+            deserialized.get_transformer_block_field(self.block_key_factory(2), MockTransformer, 'count')
+        )
+        self.assertNotIn(self.block_key_factory(2), deserialized._block_data_map)
+
+    def test_copy_of_lazy_structure(self):
+        block_structure = self.create_collected_block_structure(self.SIMPLE_CHILDREN_MAP)
+        deserialized = serializer.deserialize(
+            serializer.serialize(block_structure),
+            block_structure.root_block_usage_key,
+        )
+        copied = deserialized.copy()
+        block_key = self.block_key_factory(0)
+        copied.set_transformer_block_field(block_key, MockTransformer, 'count', 100)
+
+        self.assertEqual(copied.get_transformer_block_field(block_key, MockTransformer, 'count'), 100)
+        self.assertEqual(deserialized.get_transformer_block_field(block_key, MockTransformer, 'count'), 0)
+        self.assert_block_data_equal(deserialized, block_structure)
+
+    def test_legacy_data_not_compact(self):
+        self.assertFalse(serializer.is_compact(zpickle(({}, {}, {}))))
+        with self.assertRaises(ValueError):
+            serializer.deserialize(zpickle(({}, {}, {})), self.block_key_factory(0))
+
+    def test_unsupported_version(self):
+        serialized_data = serializer.serialize(self.create_collected_block_structure(self.SIMPLE_CHILDREN_MAP))
+        header_length = len(serializer.MAGIC) + 1
+        future_data = serializer.MAGIC + chr(serializer.FORMAT_VERSION + 1) + serialized_data[header_length:]
+        with self.assertRaises(ValueError):
+            serializer.deserialize(future_data, self.block_key_factory(0))
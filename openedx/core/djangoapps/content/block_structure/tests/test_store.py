@@ -1,15 +1,19 @@
 """
 Tests for block_structure/cache.py
 """
+# pylint: disable=protected-access
 import ddt
+import itertools
 from nose.plugins.attrib import attr
+from opaque_keys.edx.locator import BlockUsageLocator
 
 from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
 
-from ..config import STORAGE_BACKING_FOR_CACHE, waffle
+from ..config import COMPACT_SERIALIZATION, STORAGE_BACKING_FOR_CACHE, SUBTREE_SEGMENTS, waffle
 from ..config.models import BlockStructureConfiguration
 from ..exceptions import BlockStructureNotFound
 from ..store import BlockStructureStore
+
 from .helpers import ChildrenMapTestMixin, UsageKeyFactoryMixin, MockCache, MockTransformer
 
 
@@ -59,6 +63,23 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
             self.assertIsNotNone(stored_value)
             self.assert_block_structure(stored_value, self.children_map)
 
+    @ddt.data(*itertools.product((True, False), repeat=2))
+    @ddt.unpack
+    def test_add_and_get_compact(self, with_storage_backing, compact_on_add):
+        with waffle().override(STORAGE_BACKING_FOR_CACHE, active=with_storage_backing):
+            with waffle().override(COMPACT_SERIALIZATION, active=compact_on_add):
+                self.store.add(self.block_structure)
+
+            # Data stored in either format is readable, regardless of the switch.
+            with waffle().override(COMPACT_SERIALIZATION, active=not compact_on_add):
+                stored_value = self.store.get(self.block_structure.root_block_usage_key)
+
+            self.assert_block_structure(stored_value, self.children_map)
+            self.assertEqual(
+                stored_value.get_transformer_block_field(self.block_key_factory(0), MockTransformer, 'test'),
+                '{} val'.format(MockTransformer.name()),
+            )
+
     @ddt.data(True, False)
     def test_delete(self, with_storage_backing):
         with waffle().override(STORAGE_BACKING_FOR_CACHE, active=with_storage_backing):
@@ -90,3 +111,116 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
         self.assertEquals(self.mock_cache.timeout_from_last_call, 0)
         self.store.add(self.block_structure)
         self.assertEquals(self.mock_cache.timeout_from_last_call, timeout)
+
+
+@attr(shard=2)
+@ddt.ddt
+class TestBlockStructureStoreSegments(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheIsolationTestCase):
+    """
+    Tests for the subtree segments of BlockStructureStore
+    """
+    ENABLED_CACHES = ['default']
+
+    #         0 (course)
+    #        /       \
+    #   1 (chapter)  2 (chapter)
+    #    /      \
+    # 3 (seq)  4 (vertical)
+    BLOCK_TYPES = ['course', 'chapter', 'chapter', 'sequential', 'vertical']
+
+    def setUp(self):
+        super(TestBlockStructureStoreSegments, self).setUp()
+        self.block_structure = self.create_block_structure(self.SIMPLE_CHILDREN_MAP)
+        for block_id in range(len(self.SIMPLE_CHILDREN_MAP)):
+            self.block_structure._get_or_create_block(self.block_key_factory(block_id)).block_id = block_id
+        self.block_structure._add_transformer(MockTransformer)
+
+        self.mock_cache = MockCache()
+        self.store = BlockStructureStore(self.mock_cache)
+
+    def block_key_factory(self, block_id):
+        return BlockUsageLocator(
+            course_key=self.course_key,
+            block_type=self.BLOCK_TYPES[block_id],
+            block_id=unicode(block_id),
+        )
+
+    def get_subtree(self, starting_block_id):
+        """
+        Returns the segment for the given starting block from the store.
+        """
+        return self.store.get_subtree(
+            self.block_structure.root_block_usage_key,
+            self.block_key_factory(starting_block_id),
+        )
+
+    def test_disabled(self):
+        with waffle().override(SUBTREE_SEGMENTS, active=False):
+            self.store.add(self.block_structure)
+        with waffle().override(SUBTREE_SEGMENTS, active=True):
+            with self.assertRaises(BlockStructureNotFound):
+                self.get_subtree(1)
+
+    @ddt.data(
+        # starting block, segment root, blocks in segment
+        (1, 1, {1, 3, 4}),
+        (2, 2, {2}),
+        (3, 3, {3}),
+        (4, 1, {1, 3, 4}),
+    )
+    @ddt.unpack
+    def test_get_subtree(self, starting_block_id, segment_root_id, segment_block_ids):
+        with waffle().override(SUBTREE_SEGMENTS, active=True):
+            self.store.add(self.block_structure)
+            segment = self.get_subtree(starting_block_id)
+
+        self.assertEqual(segment.root_block_usage_key, self.block_key_factory(segment_root_id))
+        self.assertEqual(set(segment), {self.block_key_factory(block_id) for block_id in segment_block_ids})
+        self.assertEqual(segment.get_parents(self.block_key_factory(segment_root_id)), [])
+        for block_id in segment_block_ids:
+            self.assertEqual(segment.get_xblock_field(self.block_key_factory(block_id), 'block_id'), block_id)
+        self.assertEqual(segment._get_transformer_data_version(MockTransformer), MockTransformer.WRITE_VERSION)
+
+    def test_disabled_after_enabled(self):
+        with waffle().override(SUBTREE_SEGMENTS, active=True):
+            self.store.add(self.block_structure)
+        self.block_structure._get_or_create_block(self.block_key_factory(3)).block_id = 'updated'
+        with waffle().override(SUBTREE_SEGMENTS, active=False):
+            self.store.add(self.block_structure)
+        self.assertEqual(
+            [key for key in self.mock_cache.map if '.segment' in key],
+            [],
+        )
+        with waffle().override(SUBTREE_SEGMENTS, active=True):
+            with self.assertRaises(BlockStructureNotFound):
+                self.get_subtree(3)
+            self.store.add(self.block_structure)
+            segment = self.get_subtree(3)
+        self.assertEqual(segment.get_xblock_field(self.block_key_factory(3), 'block_id'), 'updated')
+
+    def test_delete_removes_segments(self):
+        with waffle().override(SUBTREE_SEGMENTS, active=True):
+            self.store.add(self.block_structure)
+            self.store.delete(self.block_structure.root_block_usage_key)
+        self.assertEqual(self.mock_cache.map, {})
+
+    def test_root_not_in_segment(self):
+        with waffle().override(SUBTREE_SEGMENTS, active=True):
+            self.store.add(self.block_structure)
+            with self.assertRaises(BlockStructureNotFound):
+                self.get_subtree(0)
+
+    def test_delete(self):
+        with waffle().override(SUBTREE_SEGMENTS, active=True):
+            self.store.add(self.block_structure)
+            self.store.delete(self.block_structure.root_block_usage_key)
+            with self.assertRaises(BlockStructureNotFound):
+                self.get_subtree(1)
+
+    def test_segments_of_previous_add_not_used(self):
+        with waffle().override(SUBTREE_SEGMENTS, active=True):
+            self.store.add(self.block_structure)
+            self.block_structure._get_or_create_block(self.block_key_factory(3)).block_id = 'updated'
+            self.store.add(self.block_structure)
+            segment = self.get_subtree(3)
+        self.assertEqual(segment.get_xblock_field(self.block_key_factory(3), 'block_id'), 'updated')
@@ -1,12 +1,15 @@
 """
 Tests for transformers.py
 """
+import ddt
 from mock import MagicMock, patch
 from nose.plugins.attrib import attr
 from unittest import TestCase
 
-from ..block_structure import BlockStructureModulestoreData
+from ..block_structure import BlockStructureBlockData, BlockStructureModulestoreData, universal_filter
+from ..config import PROFILE_TRANSFORMERS, waffle
 from ..exceptions import TransformerException, TransformerDataIncompatible
+from ..transformer import BlockStructureTransformer
 from ..transformers import BlockStructureTransformers
 from .helpers import (
     ChildrenMapTestMixin, MockTransformer, MockFilteringTransformer, mock_registered_transformers
@@ -14,6 +17,7 @@ from .helpers import (
 
 
 @attr(shard=2)
+@ddt.ddt
 class TestBlockStructureTransformers(ChildrenMapTestMixin, TestCase):
     """
     Test class for testing BlockStructureTransformers
@@ -71,6 +75,33 @@ class TestBlockStructureTransformers(ChildrenMapTestMixin, TestCase):
             self.transformers.transform(block_structure=MagicMock())
             self.assertTrue(mock_transform_call.called)
 
+    @ddt.data(True, False)
+    def test_transform_with_fused_filters(self, profile):
+        block_structure = self.create_block_structure(self.SIMPLE_CHILDREN_MAP, BlockStructureBlockData)
+        condition = MagicMock(side_effect=lambda block_key: block_key in (1, 3))
+        filters = [
+            block_structure.create_removal_filter(lambda block_key: block_key == 1, keep_descendants=True),
+            block_structure.create_universal_filter(),
+            block_structure.create_removal_filter(condition),
+        ]
+        self.add_mock_transformer()
+
+        with waffle().override(PROFILE_TRANSFORMERS, active=profile):
+            with patch.object(MockFilteringTransformer, 'transform_block_filters', return_value=filters):
+                self.transformers.transform(block_structure)
+
+        # Block 1 is removed by the first filter, keeping its descendants,
+        # without being tested by the subsequent ones.
+        self.assert_block_structure(block_structure, [[2, 4], [], [], [], []], missing_blocks=[1, 3])
+        self.assertEquals(sorted(call[0][0] for call in condition.call_args_list), [0, 2, 3, 4])
+
+    def test_transform_with_universal_filters_only(self):
+        block_structure = MagicMock()
+        self.add_mock_transformer()
+        with patch.object(MockFilteringTransformer, 'transform_block_filters', return_value=[universal_filter]):
+            self.transformers.transform(block_structure)
+        self.assertFalse(block_structure.filter_topological_traversal.called)
+
     def test_verify_versions(self):
         block_structure = self.create_block_structure(
             self.SIMPLE_CHILDREN_MAP,
@@ -82,3 +113,36 @@ class TestBlockStructureTransformers(ChildrenMapTestMixin, TestCase):
                 self.transformers.verify_versions(block_structure)
             self.transformers.collect(block_structure)
             self.assertTrue(self.transformers.verify_versions(block_structure))
+
+    @ddt.data(
+        (
+            [BlockStructureTransformer.COLLECT_SCOPE_LOCAL, BlockStructureTransformer.COLLECT_SCOPE_LOCAL],
+            BlockStructureTransformer.COLLECT_SCOPE_LOCAL,
+        ),
+        (
+            [BlockStructureTransformer.COLLECT_SCOPE_LOCAL, BlockStructureTransformer.COLLECT_SCOPE_ANCESTORS],
+            BlockStructureTransformer.COLLECT_SCOPE_ANCESTORS,
+        ),
+        (
+            [BlockStructureTransformer.COLLECT_SCOPE_ANCESTORS, BlockStructureTransformer.COLLECT_SCOPE_GLOBAL],
+            BlockStructureTransformer.COLLECT_SCOPE_GLOBAL,
+        ),
+    )
+    @ddt.unpack
+    def test_collect_scope(self, transformer_scopes, expected_scope):
+        with mock_registered_transformers(self.registered_transformers):
+            with patch.object(MockTransformer, 'COLLECT_SCOPE', transformer_scopes[0]):
+                with patch.object(MockFilteringTransformer, 'COLLECT_SCOPE', transformer_scopes[1]):
+                    self.assertEquals(BlockStructureTransformers.collect_scope(), expected_scope)
+
+    def test_is_collected_with_current_versions(self):
+        block_structure = self.create_block_structure(
+            self.SIMPLE_CHILDREN_MAP,
+            BlockStructureModulestoreData
+        )
+
+        with mock_registered_transformers(self.registered_transformers):
+            self.transformers.collect(block_structure)
+            self.assertTrue(self.transformers.is_collected_with_current_versions(block_structure))
+            with patch.object(MockTransformer, 'WRITE_VERSION', MockTransformer.WRITE_VERSION + 1):
+                self.assertFalse(self.transformers.is_collected_with_current_versions(block_structure))
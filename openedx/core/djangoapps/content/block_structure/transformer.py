@@ -55,6 +55,29 @@ class BlockStructureTransformer(object):
     WRITE_VERSION = 0
     READ_VERSION = 0
 
+    # Transformers declare the scope of their collected data so the
+    # block_structure framework can determine which blocks to
+    # re-collect when only some blocks of a structure change.
+    #
+    # COLLECT_SCOPE_LOCAL - The data collected for a block depends only
+    # on that block's own xBlock (including any fields it inherits).
+    #
+    # COLLECT_SCOPE_ANCESTORS - The data collected for a block also
+    # depends on the xBlocks or collected data of its ancestors, as with
+    # data that is percolated down from ancestors to descendants.
+    #
+    # COLLECT_SCOPE_GLOBAL - The data collected for a block may depend on
+    # any other block in the structure, so the entire structure needs to
+    # be re-collected whenever any block changes.
+    #
+    # Transformers that have not been audited for incremental collection
+    # should keep the default COLLECT_SCOPE_GLOBAL.
+    #
+    COLLECT_SCOPE_LOCAL = 'local'
+    COLLECT_SCOPE_ANCESTORS = 'ancestors'
+    COLLECT_SCOPE_GLOBAL = 'global'
+    COLLECT_SCOPE = COLLECT_SCOPE_GLOBAL
+
     @classmethod
     def name(cls):
         """
@@ -190,6 +213,11 @@ class FilteringTransformerMixin(BlockStructureTransformer):
             create_universal_filter
             create_removal_filter
 
+        Filters created with these methods are preferred over arbitrary
+        filter functions, since universal filters are skipped and the
+        removal conditions of removal filters are tested directly when
+        the filters of all transformers are combined.
+
         Note: Transformers that implement this alternative should be
         independent of all other registered transformers as they may not
         be applied in the order in which they were listed in the registry.
@@ -1,11 +1,15 @@
 """
 Module for a collection of BlockStructureTransformers.
 """
-import functools
+from collections import OrderedDict
+from contextlib import contextmanager
 from logging import getLogger
+from timeit import default_timer
 
+from . import config
+from .block_structure import RemovalFilter, universal_filter
 from .exceptions import TransformerException, TransformerDataIncompatible
-from .transformer import FilteringTransformerMixin
+from .transformer import BlockStructureTransformer, FilteringTransformerMixin
 from .transformer_registry import TransformerRegistry
 
 
@@ -82,6 +86,34 @@ class BlockStructureTransformers(object):
         # Collect all fields that were requested by the transformers.
         block_structure._collect_requested_xblock_fields()  # pylint: disable=protected-access
 
+    @classmethod
+    def collect_scope(cls):
+        """
+        Returns the broadest COLLECT_SCOPE of all registered
+        transformers, which determines the blocks that need to be
+        re-collected when only some blocks of a structure change.
+        """
+        scopes = {transformer.COLLECT_SCOPE for transformer in TransformerRegistry.get_registered_transformers()}
+        for scope in (
+                BlockStructureTransformer.COLLECT_SCOPE_GLOBAL,
+                BlockStructureTransformer.COLLECT_SCOPE_ANCESTORS,
+        ):
+            if scope in scopes:
+                return scope
+        return BlockStructureTransformer.COLLECT_SCOPE_LOCAL
+
+    @classmethod
+    def is_collected_with_current_versions(cls, block_structure):
+        """
+        Returns whether the collected data in the block structure was
+        written by the current version of every registered Transformer.
+        """
+        # pylint: disable=protected-access
+        return all(
+            block_structure._get_transformer_data_version(transformer) == transformer.WRITE_VERSION
+            for transformer in TransformerRegistry.get_registered_transformers()
+        )
+
     @classmethod
     def verify_versions(cls, block_structure):
         """
@@ -111,43 +143,176 @@ class BlockStructureTransformers(object):
         collection. Tranformers with filters are combined and run first in a
         single course tree traversal, then remaining transformers are run in
         the order that they were added.
+
+        When the PROFILE_TRANSFORMERS switch is enabled, the time taken by
+        each transformer and by each of the combined filters is logged.
         """
-        self._transform_with_filters(block_structure)
-        self._transform_without_filters(block_structure)
+        profile = _TransformProfile() if config.waffle().is_enabled(config.PROFILE_TRANSFORMERS) else None
+
+        self._transform_with_filters(block_structure, profile)
+        self._transform_without_filters(block_structure, profile)
 
         # Prune the block structure to remove any unreachable blocks.
         block_structure._prune_unreachable()  # pylint: disable=protected-access
 
-    def _transform_with_filters(self, block_structure):
+        if profile:
+            profile.log(block_structure)
+
+    def _transform_with_filters(self, block_structure, profile=None):
         """
         Transforms the given block_structure using the transform_block_filters
         method from the given transformers.
+
+        The filters are fused into a single filter function for a single
+        traversal of the block structure.  Universal filters are left out
+        and removal filters contribute only their removal conditions, so
+        each block is tested against each condition with a single
+        function call, and removed at most once.
         """
         if not self._transformers['supports_filter']:
             return
 
-        filters = []
+        predicates = []
         for transformer in self._transformers['supports_filter']:
-            filters.extend(transformer.transform_block_filters(self.usage_info, block_structure))
+            with _timed(profile, transformer.name()):
+                filters = transformer.transform_block_filters(self.usage_info, block_structure)
+            for index, filter_func in enumerate(filters):
+                if filter_func is universal_filter:
+                    continue
+                if profile:
+                    predicate_name = transformer.name() if len(filters) == 1 else u'{}[{}]'.format(
+                        transformer.name(), index,
+                    )
+                    filter_func = profile.timed_filter(predicate_name, filter_func)
+                predicates.append(_as_predicate(filter_func))
 
-        combined_filters = functools.reduce(
-            self._filter_chain,
-            filters,
-            block_structure.create_universal_filter()
-        )
-        block_structure.filter_topological_traversal(combined_filters)
+        if not predicates:
+            return
 
-    def _filter_chain(self, accumulated, additional):
-        """
-        Given two functions that take a block_key and return a boolean, yield
-        a function that takes a block key, and 'ands' the functions together
-        """
-        return lambda block_key: accumulated(block_key) and additional(block_key)
+        with _timed(profile, u'filters'):
+            block_structure.filter_topological_traversal(_fuse_predicates(block_structure, predicates))
 
-    def _transform_without_filters(self, block_structure):
+    def _transform_without_filters(self, block_structure, profile=None):
         """
         Transforms the given block_structure using the transform
         method from the given transformers.
         """
         for transformer in self._transformers['no_filter']:
-            transformer.transform(self.usage_info, block_structure)
+            with _timed(profile, transformer.name()):
+                transformer.transform(self.usage_info, block_structure)
+
+
+def _as_predicate(filter_func):
+    """
+    Returns a (removal_condition, keep_descendants, filter_func) tuple
+    for the given filter function, with only one of removal_condition and
+    filter_func set, depending on whether it is a RemovalFilter.
+    """
+    if isinstance(filter_func, RemovalFilter):
+        return filter_func.removal_condition, filter_func.keep_descendants, None
+    return None, False, filter_func
+
+
+def _fuse_predicates(block_structure, predicates):
+    """
+    Returns a single filter function that applies the given predicates in
+    order, stopping at the first predicate that rejects or removes a block.
+    """
+    def fused_filter(block_key):
+        """
+        Returns whether the given block is retained by all predicates,
+        removing it from the block structure if it satisfies a removal
+        condition.
+        """
+        for removal_condition, keep_descendants, filter_func in predicates:
+            if removal_condition is not None:
+                if removal_condition(block_key):
+                    block_structure.remove_block(block_key, keep_descendants)
+                    return False
+            elif not filter_func(block_key):
+                return False
+        return True
+
+    return fused_filter
+
+
+@contextmanager
+def _timed(profile, name):
+    """
+    Context manager that adds the time taken by its block to the given
+    profile, if any, under the given name.
+    """
+    if profile is None:
+        yield
+        return
+
+    start = default_timer()
+    try:
+        yield
+    finally:
+        profile.add_time(name, default_timer() - start)
+
+
+class _TransformProfile(object):
+    """
+    Accumulates the time taken by each transformer, and by each of the
+    combined filters, while transforming a block structure.
+    """
+    def __init__(self):
+        # Map of a transformer's name to the seconds taken by it.
+        # OrderedDict {string: float}
+        self.times = OrderedDict()
+
+        # Map of a filter's name to a list of the number of blocks it was
+        # called for, the number of blocks it rejected or removed, and the
+        # seconds taken by it.
+        # OrderedDict {string: [int, int, float]}
+        self.filter_stats = OrderedDict()
+
+    def add_time(self, name, seconds):
+        """
+        Adds the given time to the time taken by the given transformer.
+        """
+        self.times[name] = self.times.get(name, 0) + seconds
+
+    def timed_filter(self, name, filter_func):
+        """
+        Returns the given filter function, or the removal condition of the
+        given RemovalFilter, wrapped to record its stats under the given
+        name.
+        """
+        stats = self.filter_stats.setdefault(name, [0, 0, 0.0])
+        predicate, hit_value = filter_func, False
+        if isinstance(filter_func, RemovalFilter):
+            predicate, hit_value = filter_func.removal_condition, True
+
+        def timed_predicate(block_key):
+            """
+            Calls the predicate, recording its stats.
+            """
+            start = default_timer()
+            result = predicate(block_key)
+            stats[2] += default_timer() - start
+            stats[0] += 1
+            if bool(result) == hit_value:
+                stats[1] += 1
+            return result
+
+        if isinstance(filter_func, RemovalFilter):
+            return RemovalFilter(filter_func.block_structure, timed_predicate, filter_func.keep_descendants)
+        return timed_predicate
+
+    def log(self, block_structure):
+        """
+        Logs the accumulated times for the given transformed block
+        structure.
+        """
+        logger.info(
+            u'BlockStructure: Transformed %s in %s; filters %s.',
+            block_structure.root_block_usage_key,
+            u', '.join(u'{}: {:.2f} ms'.format(name, seconds * 1000) for name, seconds in self.times.iteritems()),
+            u', '.join(
+                u'{}: {} blocks, {} rejected, {:.2f} ms'.format(name, num_blocks, num_rejected, seconds * 1000)
+                for name, (num_blocks, num_rejected, seconds) in self.filter_stats.iteritems()
+            ),
+        )
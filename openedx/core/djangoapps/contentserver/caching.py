@@ -1,11 +1,19 @@
 """
 Helper functions for caching course assets.
 """
+import hashlib
+import logging
+import os
+import tempfile
+
+from django.conf import settings
 from django.core.cache import caches
 from django.core.cache.backends.base import InvalidCacheBackendError
 from opaque_keys import InvalidKeyError
 
-from xmodule.contentstore.content import STATIC_CONTENT_VERSION
+from xmodule.contentstore.content import STATIC_CONTENT_VERSION, StaticContentStream
+
+log = logging.getLogger(__name__)
 
 # See if there's a "course_assets" cache configured, and if not, fallback to the default cache.
 CONTENT_CACHE = caches['default']
@@ -48,3 +56,137 @@ def del_cached_content(location):
         pass
 
     CONTENT_CACHE.delete_many(locations, version=STATIC_CONTENT_VERSION)
+
+
+# Number of bytes read at a time from assets cached on disk.
+DISK_CACHE_READ_SIZE = 64 * 1024
+
+
+class CachedAssetStream(StaticContentStream):
+    """
+    A StaticContentStream whose data is read from a copy of the asset in the disk cache.
+    """
+    def __init__(self, content, asset_file):
+        super(CachedAssetStream, self).__init__(
+            content.location, content.name, content.content_type, asset_file,
+            last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+            import_path=content.import_path, length=content.length, locked=content.locked,
+            content_digest=content.content_digest,
+        )
+        self.file = asset_file
+
+    def _read_chunk(self):
+        return self.file.read(DISK_CACHE_READ_SIZE)
+
+
+class AssetDiskCache(object):
+    """
+    Keeps copies of assets that are too large for CONTENT_CACHE in files on local disk,
+    so that they don't need to be read from the contentstore on every request.
+
+    Files are named after the asset's location and version, so a changed asset is
+    cached as a new file.  The least recently served files are removed once the cached
+    files total more than `max_bytes`.
+    """
+    def __init__(self, directory, max_bytes, max_file_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+
+    def open(self, content):
+        """
+        Returns a CachedAssetStream for the given StaticContentStream, copying its data into
+        the cache if it isn't cached yet.  Returns None if the asset is not to be cached.
+        """
+        if content.length is None or content.length > self.max_file_bytes:
+            return None
+
+        path = self._path(content)
+        try:
+            asset_file = open(path, 'rb')
+        except IOError:
+            if not self._add(content, path):
+                return None
+            try:
+                asset_file = open(path, 'rb')
+            except IOError:
+                return None
+        else:
+            # Mark the file as recently served, so that it is evicted last.
+            try:
+                os.utime(path, None)
+            except OSError:
+                pass
+        return CachedAssetStream(content, asset_file)
+
+    def _path(self, content):
+        """
+        Returns the path of the file for the given version of an asset.
+        """
+        version = content.content_digest or content.last_modified_at.isoformat()
+        name = hashlib.sha1(u'{}:{}'.format(content.location, version).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, name)
+
+    def _add(self, content, path):
+        """
+        Copies the data of the given content into the cache, and returns whether it succeeded.
+        """
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            temp_fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.')
+        except OSError:
+            log.exception(u"Could not create a file in the asset disk cache %s", self.directory)
+            return False
+        try:
+            with os.fdopen(temp_fd, 'wb') as temp_file:
+                for chunk in content.stream_data_in_range(0, content.length - 1):
+                    temp_file.write(chunk)
+            # Renaming is atomic, so other processes never see a partially written file.
+            os.rename(temp_path, path)
+        except (IOError, OSError):
+            log.exception(u"Could not cache %s in the asset disk cache", content.location)
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False
+        self._evict()
+        return True
+
+    def _evict(self):
+        """
+        Removes the least recently served files until the cache is within its size limit.
+        """
+        entries = []
+        total_bytes = 0
+        for name in os.listdir(self.directory):
+            if name.startswith('.'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+            total_bytes += stat.st_size
+
+        for __, size, name in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total_bytes -= size
+
+
+def get_asset_disk_cache():
+    """
+    Returns the AssetDiskCache configured by the STATIC_CONTENT_DISK_CACHE_* settings,
+    or None if assets are not to be cached on disk.
+    """
+    if not settings.STATIC_CONTENT_DISK_CACHE_DIR:
+        return None
+    return AssetDiskCache(
+        settings.STATIC_CONTENT_DISK_CACHE_DIR,
+        settings.STATIC_CONTENT_DISK_CACHE_MAX_BYTES,
+        settings.STATIC_CONTENT_DISK_CACHE_MAX_FILE_BYTES,
+    )
@@ -6,6 +6,10 @@ import copy
 import datetime
 import ddt
 import logging
+import os
+import shutil
+import StringIO
+import tempfile
 import unittest
 from uuid import uuid4
 
@@ -16,7 +20,7 @@ from django.test.utils import override_settings
 from mock import patch
 
 from xmodule.contentstore.django import contentstore
-from xmodule.contentstore.content import StaticContent, VERSIONED_ASSETS_PREFIX
+from xmodule.contentstore.content import StaticContent, StaticContentStream, VERSIONED_ASSETS_PREFIX
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 from xmodule.modulestore.xml_importer import import_course_from_xml
@@ -27,6 +31,7 @@ from xmodule.modulestore.exceptions import ItemNotFoundError
 from student.models import CourseEnrollment
 from student.tests.factories import UserFactory, AdminFactory
 
+from ..caching import AssetDiskCache, CachedAssetStream
 from ..middleware import parse_range_header, HTTP_DATE_FORMAT, StaticContentServer
 
 log = logging.getLogger(__name__)
@@ -242,15 +247,32 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
 
     def test_range_request_multiple_ranges(self):
         """
-        Test that multiple ranges in request outputs the full content.
+        Test that multiple ranges in request outputs a multipart message with each range.
         """
         first_byte = self.length_unlocked / 4
         last_byte = self.length_unlocked / 2
         resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes={first}-{last}, -100'.format(
             first=first_byte, last=last_byte))
 
-        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.status_code, 206)
         self.assertNotIn('Content-Range', resp)
+        self.assertTrue(resp['Content-Type'].startswith('multipart/byteranges; boundary='))
+        body = ''.join(resp.streaming_content)
+        self.assertEqual(resp['Content-Length'], str(len(body)))
+
+        full_content = self.client.get(self.url_unlocked).content
+        for first, last in [(first_byte, last_byte), (self.length_unlocked - 100, self.length_unlocked - 1)]:
+            part = 'Content-Range: bytes {first}-{last}/{length}\r\n\r\n{data}\r\n'.format(
+                first=first, last=last, length=self.length_unlocked, data=full_content[first:last + 1]
+            )
+            self.assertIn(part, body)
+
+    def test_range_request_too_many_ranges(self):
+        """
+        Test that a request for very many ranges outputs the full content.
+        """
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=' + ', '.join(['0-0'] * 100))
+        self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
 
     @ddt.data(
@@ -285,6 +307,33 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
             first=(self.length_unlocked), last=(self.length_unlocked)))
         self.assertEqual(resp.status_code, 416)
 
+    def test_if_none_match(self):
+        """
+        Test that a request with a matching entity tag is answered with 304 Not Modified.
+        """
+        etag = self.client.get(self.url_unlocked)['ETag']
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp['ETag'], etag)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"{}"'.format(FAKE_MD5_HASH))
+        self.assertEqual(resp.status_code, 200)
+
+    def test_if_modified_since(self):
+        """
+        Test that a request for an asset that has not been modified since the given
+        time is answered with 304 Not Modified.
+        """
+        last_modified = datetime.datetime.strptime(
+            self.client.get(self.url_unlocked)['Last-Modified'], HTTP_DATE_FORMAT
+        )
+        for offset, expected_status_code in [(0, 304), (60, 304), (-60, 200)]:
+            if_modified_since = last_modified + datetime.timedelta(seconds=offset)
+            resp = self.client.get(
+                self.url_unlocked, HTTP_IF_MODIFIED_SINCE=if_modified_since.strftime(HTTP_DATE_FORMAT)
+            )
+            self.assertEqual(resp.status_code, expected_status_code)
+
     def test_vary_header_sent(self):
         """
         Tests that we're properly setting the Vary header to ensure browser requests don't get
@@ -447,3 +496,59 @@ class ParseRangeHeaderTestCase(unittest.TestCase):
         self.assertRaisesRegexp(
             exception_class, exception_message_regex, parse_range_header, header_value, self.content_length
         )
+
+
+class AssetDiskCacheTestCase(unittest.TestCase):
+    """
+    Tests for AssetDiskCache.
+    """
+    def setUp(self):
+        super(AssetDiskCacheTestCase, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.disk_cache = AssetDiskCache(self.directory, max_bytes=10, max_file_bytes=8)
+
+    def create_content(self, name, data, content_digest=FAKE_MD5_HASH):
+        """
+        Returns a StaticContentStream of the given data.
+        """
+        return StaticContentStream(
+            name, name, 'text/plain', StringIO.StringIO(data), length=len(data), content_digest=content_digest,
+            last_modified_at=datetime.datetime(2017, 1, 1),
+        )
+
+    def read_cached(self, content):
+        """
+        Returns the data of the given content as served from the disk cache.
+        """
+        cached_content = self.disk_cache.open(content)
+        self.assertIsInstance(cached_content, CachedAssetStream)
+        self.addCleanup(cached_content.close)
+        return ''.join(cached_content.stream_data())
+
+    def test_cached_data_is_served(self):
+        self.assertEqual(self.read_cached(self.create_content('asset', 'abcdef')), 'abcdef')
+
+        # The cached copy is served without reading the contentstore.
+        self.assertEqual(self.read_cached(self.create_content('asset', 'XXXXXX')), 'abcdef')
+
+        # A new version of the asset is cached separately.
+        self.assertEqual(self.read_cached(self.create_content('asset', 'ghijkl', 'new_digest')), 'ghijkl')
+
+    def test_large_assets_are_not_cached(self):
+        self.assertIsNone(self.disk_cache.open(self.create_content('asset', 'abcdefghi')))
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_least_recently_served_are_evicted(self):
+        self.read_cached(self.create_content('first', 'abcd'))
+        self.read_cached(self.create_content('second', 'efgh'))
+        for name in os.listdir(self.directory):
+            os.utime(os.path.join(self.directory, name), (0, 0))
+
+        # Serving 'first' again makes 'second' the least recently served.
+        self.read_cached(self.create_content('first', 'abcd'))
+        self.read_cached(self.create_content('third', 'ijkl'))
+
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+        self.assertEqual(self.read_cached(self.create_content('first', 'XXXX')), 'abcd')
+        self.assertEqual(self.read_cached(self.create_content('second', 'mnop')), 'mnop')
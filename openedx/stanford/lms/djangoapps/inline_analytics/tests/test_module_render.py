@@ -9,6 +9,7 @@ from courseware.model_data import FieldDataCache
 from courseware.tests.factories import InstructorFactory
 from courseware.tests.factories import StaffFactory
 from courseware.tests.factories import UserFactory
+from courseware.tests.test_module_render import grant_access_to_blocks
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory
 from xmodule.modulestore.tests.factories import ItemFactory
@@ -65,6 +66,7 @@ class TestInlineAnalytics(ModuleStoreTestCase):
         )
 
     @patch('courseware.module_render.has_access', Mock(return_value=True))
+    @patch('courseware.module_render.has_access_to_blocks', grant_access_to_blocks)
     def test_inline_analytics_enabled(self):
         module = render.get_module(
             self.user,
@@ -117,6 +119,7 @@ class TestInlineAnalytics(ModuleStoreTestCase):
         self.assertIn('Staff Analytics Info', result_fragment.content)
 
     @patch('courseware.module_render.has_access', Mock(return_value=True))
+    @patch('courseware.module_render.has_access_to_blocks', grant_access_to_blocks)
     @override_settings(INLINE_ANALYTICS_SUPPORTED_TYPES={'ChoiceResponse': 'checkbox'})
     def test_unsupported_response_type(self):
         module = render.get_module(
@@ -133,6 +136,7 @@ class TestInlineAnalytics(ModuleStoreTestCase):
         )
 
     @patch('courseware.module_render.has_access', Mock(return_value=True))
+    @patch('courseware.module_render.has_access_to_blocks', grant_access_to_blocks)
     def test_rerandomization_set(self):
         descriptor = ItemFactory.create(
             category='problem',